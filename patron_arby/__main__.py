@@ -1,48 +1,83 @@
 import logging
 import threading
 import time
-from typing import List, Set
+from typing import List, Optional, Set
 
 from patron_arby.arbitrage.arbitrage_event_listener import ArbitrageEventListener
 from patron_arby.arbitrage.arbitrage_thread import ArbitrageThread
 from patron_arby.arbitrage.arby import PetroniusArbiter
 from patron_arby.arbitrage.market_data import MarketData
+from patron_arby.arbitrage.opportunity_stats import OpportunityStats
 from patron_arby.common.bus import Bus
 from patron_arby.common.chain import AChain
 from patron_arby.common.decorators import safely
+from patron_arby.common.metrics import MetricsReporter
+from patron_arby.common.util import current_time_ms
 from patron_arby.config.base import (
     ARBITRAGE_COINS,
     ARBITRAGE_FIRE_CHAIN_ASAP,
     BALANCE_CHECKER_PERIOD_SECONDS,
+    BALANCE_LEDGER_ENABLED,
+    BALANCE_LEDGER_RECONCILE_PERIOD_SECONDS,
     BALANCE_UPDATER_PERIOD_SECONDS,
+    BINANCE_DATA_LISTENER_ASYNC,
+    BINANCE_FAST_ORDER_CLIENT,
     BINANCE_LIMIT_ORDER_DEFAULT_TIME_IN_FORCE,
-    KINESIS_MAX_BATCH_SIZE,
+    BINANCE_WS_ORDER_SESSION,
+    CHAIN_DISPATCH_LEG_SLOTS,
+    EXCHANGE_RATES_REFRESH_PERIOD_SECONDS,
+    OPPORTUNITY_STATS_ENABLED,
+    ORDER_EXECUTOR_ASYNC,
     ORDER_EXECUTORS_NUMBER,
-    POSITIVE_ARBITRAGE_STORE_PERIOD_SECONDS,
+    ORDER_STATE_CACHE_ENABLED,
+    ORDER_WRITE_BEHIND_ENABLED,
+    STOP_LOSS_EVENT_DRIVEN,
+    STREAM_FRESHNESS_MONITOR_ENABLED,
+    TRADE_MANAGER_DISPATCH_CHAIN_ATOMICALLY,
     BinanceTimeInForce,
 )
 from patron_arby.db.arbitrage_dao import ArbitrageDao
+from patron_arby.db.chain_storage_pipeline import ChainStoragePipeline
 from patron_arby.db.keys_provider import KeysProvider
 from patron_arby.db.order_dao import OrderDao
+from patron_arby.db.order_state_cache import OrderStateCache
+from patron_arby.db.order_write_behind import OrderWriteBehind
+from patron_arby.db.profitable_arbitrage_writer import ProfitableArbitrageWriter
+from patron_arby.db.raw_recorder import RawFramesRecorder
+from patron_arby.exchange.balance_ledger import BalanceLedger
 from patron_arby.exchange.binance.api import BinanceApi
+from patron_arby.exchange.binance.async_listener import AsyncBinanceDataListener
+from patron_arby.exchange.binance.async_rest_client import AsyncBinanceRestClient
+from patron_arby.exchange.binance.balance_listener import BinanceBalanceListener
 from patron_arby.exchange.binance.balances_checker import BalancesChecker
 from patron_arby.exchange.binance.balances_rebalancer import BalancesRebalancer
+from patron_arby.exchange.binance.constants import Binance
+from patron_arby.exchange.binance.fast_order_client import FastBinanceOrderClient
 from patron_arby.exchange.binance.limitations import BinanceExchangeLimitations
 from patron_arby.exchange.binance.listener import BinanceDataListener
 from patron_arby.exchange.binance.order_listener import BinanceOrderListener
+from patron_arby.exchange.binance.stop_loss_listener import BinanceStopLossListener
+from patron_arby.exchange.binance.ws_order_session import BinanceWsOrderSession
+from patron_arby.exchange.exchange_api import ExchangeApi
 from patron_arby.exchange.order_cancelator import OrderCancelator
 from patron_arby.exchange.registry import BalancesRegistry
+from patron_arby.exchange.stream_freshness_monitor import StreamFreshnessMonitor
+from patron_arby.settings import RAW_RECORDER_DIR
+from patron_arby.trade.async_executor import AsyncOrderExecutor
+from patron_arby.trade.chain_dispatcher import ChainDispatcher
 from patron_arby.trade.executor import OrderExecutor
 from patron_arby.trade.manager import TradeManager
 
 log = logging.getLogger("patron_arby.main")
 
 bus = Bus()
-balances_registry = BalancesRegistry()
+balances_registry = BalanceLedger() if BALANCE_LEDGER_ENABLED else BalancesRegistry()
 balances_checker = BalancesChecker(bus, balances_registry, ARBITRAGE_COINS)
 
 
 class Main:
+    ws_order_session: Optional[BinanceWsOrderSession] = None
+
     @staticmethod
     def _on_positive_arbitrage_found_callback(chains: Set[AChain]):
         bus.positive_arbitrages_queue.put(chains)
@@ -50,10 +85,18 @@ class Main:
         # bus.store_positive_arbitrages_queue.put(chain)
 
     def _update_balances(self):
+        last_update_time = 0
+        last_exchange_rates_update_time = time.time()
         while True:
             time.sleep(BALANCE_UPDATER_PERIOD_SECONDS)
-            self._safe_update_balances()
-            self._safe_update_exchange_rates()
+            # Ledger is kept up to date by account events, REST account is just a consistency check for it
+            if not BALANCE_LEDGER_ENABLED or \
+                    time.time() - last_update_time >= BALANCE_LEDGER_RECONCILE_PERIOD_SECONDS:
+                last_update_time = time.time()
+                self._safe_update_balances()
+            if time.time() - last_exchange_rates_update_time >= EXCHANGE_RATES_REFRESH_PERIOD_SECONDS:
+                last_exchange_rates_update_time = time.time()
+                self._safe_update_exchange_rates()
 
     def _check_balances(self) -> None:
         while True:
@@ -63,6 +106,10 @@ class Main:
 
     @safely
     def _safe_update_balances(self):
+        if isinstance(balances_registry, BalanceLedger):
+            as_of_ms = current_time_ms()
+            balances_registry.reconcile(self.binance_api.get_account_balances(), as_of_ms)
+            return
         balances_registry.update_balances(self.binance_api.get_balances())
 
     @safely
@@ -73,24 +120,6 @@ class Main:
     def _safe_check_and_fix_disbalance(self):
         self.balances_rebalancer.check_and_fix_disbalance()
 
-    def _run_store_arbitrages(self):
-        # Max size kinesis accepts is 500. Make it twice lower to ensure no overfill happens
-        chain_buffer_size = KINESIS_MAX_BATCH_SIZE >> 1
-        chains_buffer: List[AChain] = list()
-        while True:
-            # todo Queue is growing FASTER than we can process it, even with the buffer
-            chains = bus.all_arbitrages_queue.get()
-            chains_buffer += chains
-            if len(chains_buffer) >= chain_buffer_size:
-                self.arbitrage_dao.put_arbitrage_records(chains_buffer)
-                chains_buffer.clear()
-
-    def _run_store_positive_arbitrage(self):
-        while True:
-            time.sleep(POSITIVE_ARBITRAGE_STORE_PERIOD_SECONDS)
-            chain = bus.store_positive_arbitrages_queue.get()
-            self.arbitrage_dao.put_profitable_arbitrage(chain)
-
     def main(self, keys_provider: KeysProvider = KeysProvider()):
         # Create components
         self.keys_provider = keys_provider
@@ -101,45 +130,84 @@ class Main:
             balances_checker.coins_of_interest)
 
         market_data = self._create_market_data()
+        # Exchange rates are live prices of market data. REST ones are the fallback, refreshed in _update_balances
+        balances_registry.set_market_data(market_data)
+        self._safe_update_exchange_rates()
 
         petronius_arbiter = self._create_arby(market_data)
 
         order_manager = self._create_order_manager(bus, balances_registry)
 
         order_dao = OrderDao()
+        order_write_behind = None
+        if ORDER_WRITE_BEHIND_ENABLED:
+            order_dao = order_write_behind = OrderWriteBehind(order_dao)
+            order_write_behind.start()
+        if ORDER_STATE_CACHE_ENABLED:
+            order_dao = OrderStateCache(order_dao)
         order_executors = self._create_order_executors(order_dao, market_data, balances_checker)
 
-        exchange_data_listener = BinanceDataListener(market_data, keys_provider,
-            set(self.binance_api.get_all_markets()))
+        exchange_data_listener = self._create_data_listener(market_data, keys_provider)
 
         exchange_data_listener.add_event_listener(BinanceOrderListener(bus, order_dao))     # todo Via Bus?
         exchange_data_listener.add_event_listener(ArbitrageEventListener(bus))
+        if isinstance(balances_registry, BalanceLedger):
+            exchange_data_listener.add_event_listener(BinanceBalanceListener(balances_registry))
+        if STOP_LOSS_EVENT_DRIVEN:
+            exchange_data_listener.add_event_listener(
+                BinanceStopLossListener(balances_checker, market_data.symbol_to_base_quote_coins))
 
         listener_thread = threading.Thread(target=exchange_data_listener.run)
         arby_thread = ArbitrageThread(bus, petronius_arbiter)
         balance_updater_thread = threading.Thread(target=self._update_balances)
         balance_checker_thread = threading.Thread(target=self._check_balances)
-        arbitrages_store_thread = threading.Thread(target=self._run_store_arbitrages)
-        positive_arbitrages_store_thread = threading.Thread(target=self._run_store_positive_arbitrage)
+        opportunity_stats = OpportunityStats(self.arbitrage_dao) if OPPORTUNITY_STATS_ENABLED else None
+        chain_storage_pipeline = ChainStoragePipeline(bus.all_arbitrages_queue, self.arbitrage_dao,
+            opportunity_stats=opportunity_stats)
+        profitable_arbitrage_writer = ProfitableArbitrageWriter(bus.store_positive_arbitrages_queue,
+            self.arbitrage_dao)
 
         # Run everything
+        MetricsReporter().start()
         balance_updater_thread.start()
         balance_checker_thread.start()
         listener_thread.start()
         arby_thread.start()
         order_manager.start()
-        arbitrages_store_thread.start()
-        positive_arbitrages_store_thread.start()
+        if opportunity_stats:
+            opportunity_stats.start()
+        chain_storage_pipeline.start()
+        profitable_arbitrage_writer.start()
         for order_exec in order_executors:
             order_exec.start()
 
         self._run_order_cancelator_if_needed(self.binance_api, market_data)
 
-        listener_thread.join()
+        try:
+            listener_thread.join()
+        finally:
+            # It's a daemon thread, so buffered orders are lost unless written before exit
+            if order_write_behind:
+                order_write_behind.stop()
 
     def _create_market_data(self) -> MarketData:
         return MarketData(self.binance_api.get_symbol_to_base_quote_mapping(), only_coins=ARBITRAGE_COINS)
 
+    def _create_data_listener(self, market_data: MarketData, keys_provider: KeysProvider) -> BinanceDataListener:
+        markets = set(self.binance_api.get_all_markets())
+        recorder = None
+        if RAW_RECORDER_DIR:
+            recorder = RawFramesRecorder(RAW_RECORDER_DIR)
+            recorder.start()
+        freshness_monitor = None
+        if STREAM_FRESHNESS_MONITOR_ENABLED:
+            freshness_monitor = StreamFreshnessMonitor(market_data)
+            freshness_monitor.start()
+        if BINANCE_DATA_LISTENER_ASYNC:
+            return AsyncBinanceDataListener(market_data, keys_provider, markets, raw_frames_recorder=recorder,
+                freshness_monitor=freshness_monitor)
+        return BinanceDataListener(market_data, keys_provider, markets, recorder, freshness_monitor)
+
     def _create_arby(self, market_data: MarketData) -> PetroniusArbiter:
         return PetroniusArbiter(
             market_data,
@@ -160,12 +228,46 @@ class Main:
 
     def _create_order_executors(self, order_dao: OrderDao, market_data: MarketData, balances_checker: BalancesChecker) \
             -> List[OrderExecutor]:
+        if ORDER_EXECUTOR_ASYNC:
+            rest_client = AsyncBinanceRestClient(*self.keys_provider.get_exchange_api_keys(Binance.NAME))
+            return [AsyncOrderExecutor(bus, rest_client, order_dao, market_data, balances_checker)]
         order_executors: List[OrderExecutor] = list()
         for i in range(0, ORDER_EXECUTORS_NUMBER):
-            order_executors.append(
-                OrderExecutor(bus, BinanceApi(self.keys_provider), order_dao, market_data, balances_checker))
+            # Shared by the executor and its leg slots
+            order_client = None if BINANCE_WS_ORDER_SESSION else self._create_order_client()
+            chain_dispatcher = None
+            if TRADE_MANAGER_DISPATCH_CHAIN_ATOMICALLY:
+                chain_dispatcher = ChainDispatcher(
+                    [self._create_trading_api(order_client) for _ in range(CHAIN_DISPATCH_LEG_SLOTS)])
+            order_executors.append(OrderExecutor(bus, self._create_trading_api(order_client), order_dao, market_data,
+                balances_checker, chain_dispatcher))
         return order_executors
 
+    def _create_trading_api(self, order_client: Optional[FastBinanceOrderClient] = None) -> ExchangeApi:
+        """
+        :return: API to place orders with, one per thread
+        """
+        if BINANCE_WS_ORDER_SESSION:
+            # Session is thread-safe, so shared by all the threads
+            if not self.ws_order_session:
+                self.ws_order_session = BinanceWsOrderSession(
+                    *self.keys_provider.get_exchange_api_keys(Binance.NAME),
+                    fallback=self._create_rest_trading_api(self._create_order_client()))
+                self.ws_order_session.start()
+            return self.ws_order_session
+        return self._create_rest_trading_api(order_client)
+
+    def _create_rest_trading_api(self, order_client: Optional[FastBinanceOrderClient]) -> BinanceApi:
+        return BinanceApi(self.keys_provider, order_client=order_client)
+
+    def _create_order_client(self) -> Optional[FastBinanceOrderClient]:
+        if not BINANCE_FAST_ORDER_CLIENT:
+            return None
+        order_client = FastBinanceOrderClient(*self.keys_provider.get_exchange_api_keys(Binance.NAME))
+        order_client.warm_up()
+        order_client.start_keep_warm()
+        return order_client
+
 
 if __name__ == "__main__":
     Main().main()
@@ -2,8 +2,10 @@ import logging
 from typing import Dict
 
 from patron_arby.common.bus import Bus
+from patron_arby.common.trace import Trace
 from patron_arby.common.util import current_time_ms
-from patron_arby.config.base import ARBITRAGE_COINS
+from patron_arby.config.base import ARBITRAGE_COINS, TRADE_TRACING_ENABLED
+from patron_arby.exchange.binance.constants import Binance
 from patron_arby.exchange.binance.ticker_converter import BinanceTickerConverter
 from patron_arby.exchange.exchange_event_listener import ExchangeEventListener
 
@@ -15,9 +17,13 @@ class ArbitrageEventListener(ExchangeEventListener):
     counter = 0
     total_counter = 0
 
-    def __init__(self, bus: Bus) -> None:
+    def __init__(self, bus: Bus, trace_enabled: bool = TRADE_TRACING_ENABLED) -> None:
+        """
+        :param trace_enabled: Start trade trace for every ticker
+        """
         super().__init__()
         self.bus = bus
+        self.trace_enabled = trace_enabled
         self.ticker_converter = BinanceTickerConverter()
         self.all_possible_tickers = set()
         coins = [c.lower() for c in ARBITRAGE_COINS]
@@ -38,9 +44,10 @@ class ArbitrageEventListener(ExchangeEventListener):
         if ticker not in self.all_possible_tickers:
             return
 
-        self.bus.tickers_queue.put(
-            self.ticker_converter.from_ws_event(event)
-        )
+        ticker = self.ticker_converter.from_ws_event(event)
+        if self.trace_enabled:
+            ticker.trace = Trace.start(event.get(Binance.EVENT_KEY_RECEIVE_TIME_NS))
+        self.bus.tickers_queue.put(ticker)
 
         self.counter += 1
         time_passed = current_time_ms() - self.start_time
@@ -1,9 +1,13 @@
 import logging
 import threading
 import time
+from typing import List
 
 from patron_arby.arbitrage.arby import PetroniusArbiter
 from patron_arby.common.bus import Bus
+from patron_arby.common.chain import AChain
+from patron_arby.common.ticker import Ticker
+from patron_arby.common.trace import STAGE_FIND_START
 from patron_arby.common.util import current_time_ms
 
 log = logging.getLogger(__name__)
@@ -27,11 +31,9 @@ class ArbitrageThread(threading.Thread):
             ticker = self.bus.tickers_queue.get()
 
             start_time = current_time_ms()
-            chains = self.arby.find({ticker.market})
+            self._process_ticker(ticker)
             exec_time_sum += current_time_ms() - start_time
 
-            self.bus.all_arbitrages_queue.put(chains)
-
             current_count += 1
             if current_count % 1000 == 0:
                 exec_count += current_count
@@ -39,3 +41,8 @@ class ArbitrageThread(threading.Thread):
                          f"invocations is {exec_time_sum/current_count} ms")
                 exec_time_sum = 0
                 current_count = 0
+
+    def _process_ticker(self, ticker: Ticker) -> List[AChain]:
+        chains = self.arby.find({ticker.market}, ticker.trace.mark(STAGE_FIND_START) if ticker.trace else None)
+        self.bus.all_arbitrages_queue.put(chains)
+        return chains
@@ -1,12 +1,16 @@
 import logging
-from typing import Callable, Dict, List, Set, Tuple
+from typing import Callable, Dict, List, Optional, Set, Tuple
 
 from patron_arby.arbitrage.arby_utils import ArbyUtils
 from patron_arby.arbitrage.market_data import COINS_PATH_SEPARATOR, MarketData
 from patron_arby.common.chain import AChain, AChainStep, OrderSide
 from patron_arby.common.ticker import Ticker
+from patron_arby.common.trace import STAGE_FIND_END, Trace
 from patron_arby.common.util import current_time_ms
-from patron_arby.config.base import ARBITRAGE_FIRE_CHAIN_ASAP
+from patron_arby.config.base import (
+    ARBITRAGE_FIRE_CHAIN_ASAP,
+    ARBITRAGE_MAX_TICKER_AGE_MS,
+)
 
 log = logging.getLogger(__name__)
 
@@ -19,18 +23,28 @@ class PetroniusArbiter:
     def __init__(self, market_data: MarketData, trade_fees: Dict,
                  on_positive_arbitrage_found_callback: Callable[[Set[AChain]], None],
                  fire_chains_asap: bool = ARBITRAGE_FIRE_CHAIN_ASAP,
-                 default_trade_fee: float = 0.001) -> None:
+                 default_trade_fee: float = 0.001,
+                 max_ticker_age_ms: Optional[int] = ARBITRAGE_MAX_TICKER_AGE_MS,
+                 clock: Callable[[], int] = current_time_ms) -> None:
+        """
+        :param max_ticker_age_ms: Chains having a leg with older price are skipped. None to disable
+        :param clock: Source of current time, ms. Replay passes recording time here
+        """
         super().__init__()
         self.market_data = market_data
         self.previous_run_time = 0
         self.fees = trade_fees
         self.fire_chains_asap = fire_chains_asap
         self.default_fee = default_trade_fee
+        self.max_ticker_age_ms = max_ticker_age_ms
+        self.clock = clock
+        self.stale_chains_count = 0
         self.on_positive_arbitrage_found_callback = on_positive_arbitrage_found_callback
 
-    def find(self, updated_markets: Set) -> List[AChain]:
+    def find(self, updated_markets: Set, trace: Trace = None) -> List[AChain]:
         """
         :param updated_markets:
+        :param trace: Trace of the update, profitable chains carry it on
         :return: List of all arbitrage chain verified, both profitable and non-profitable
         """
         # todo Lookup only chains coming via the given updated_markets
@@ -42,6 +56,8 @@ class PetroniusArbiter:
 
         result = list()
         profitable_chains = set()
+        stale_markets = self.market_data.stale_markets
+        now_ms = self.clock() if self.max_ticker_age_ms is not None else 0
 
         # for coins_path, markets_path in self.market_data.paths_3.items():
         for coins_path, markets_path in self.market_data.filter_path3_by_markets(updated_markets):
@@ -52,7 +68,11 @@ class PetroniusArbiter:
             steps: List[AChainStep] = list()
             for i in range(0, len(markets)):
                 ticker = price_volume_data.get(markets[i])
-                if not ticker:  # or bidask_dict.get("LastUpdateTimeMs") < self.previous_run_time:
+                if not ticker or markets[i] in stale_markets:
+                    valid_3_chain = False
+                    break
+                if self.max_ticker_age_ms is not None and ticker.age_ms(now_ms) > self.max_ticker_age_ms:
+                    self.stale_chains_count += 1
                     valid_3_chain = False
                     break
                 step = self._create_chain_step(ticker, coins[i + 1])
@@ -73,6 +93,8 @@ class PetroniusArbiter:
             if profit > 0:
                 profitable_chains.add(chain)
                 if self.fire_chains_asap:
+                    if trace:
+                        chain.trace = trace.mark(STAGE_FIND_END)
                     log.debug(f"Found positive arbitrage chain, firing ASAP: {chain}")
                     self.on_positive_arbitrage_found_callback({chain})
 
@@ -82,6 +104,10 @@ class PetroniusArbiter:
         log.fine(" =========== End find cycle")
 
         if len(profitable_chains) > 0 and not self.fire_chains_asap:
+            if trace:
+                find_end = trace.mark(STAGE_FIND_END)
+                for chain in profitable_chains:
+                    chain.trace = find_end
             log.debug(f"Found positive {len(profitable_chains)} arbitrage chains, firing all together")
             self.on_positive_arbitrage_found_callback(profitable_chains)
 
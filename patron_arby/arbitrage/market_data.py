@@ -1,9 +1,8 @@
 import logging
-from typing import Dict, List, Optional, Set
+from typing import Dict, Iterable, List, Optional, Set
 
 from patron_arby.common.decorators import measure_execution_time
 from patron_arby.common.ticker import Ticker
-from patron_arby.common.util import current_time_ms
 from patron_arby.exchange.binance.constants import Binance
 
 log = logging.getLogger(__name__)
@@ -23,6 +22,8 @@ class MarketData:
     # Dict that helps filtering coin paths by market: {"BTCUSDT" => set(all 3-paths that includes BTCUSDT as step)}
     # That is helpful when need to get all paths to check arbitrage after market ticker arrives
     market_to_coinpaths: Dict[str, Set[str]] = dict()
+    # Markets (e.g. "BTC/USDT") whose prices can't be trusted, e.g. because their stream has stalled
+    stale_markets: Set[str] = set()
 
     market_data_update_listeners = set()
 
@@ -36,6 +37,14 @@ class MarketData:
                         If None, all coins are included
         """
         super().__init__()
+        # Each instance has its own state
+        self.data = dict()
+        self.markets = set()
+        self.market_paths = dict()
+        self.market_update_times = dict()
+        self.paths_3 = dict()
+        self.market_to_coinpaths = dict()
+        self.stale_markets = set()
         if only_coins:
             log.info(f"Only considering the following coins: {sorted(list(only_coins))}")
         else:
@@ -75,7 +84,20 @@ class MarketData:
             return
 
         self.data[ticker.market] = ticker
-        self.market_update_times[ticker.market] = current_time_ms()
+        self.market_update_times[ticker.market] = ticker.time_ms
+
+    def set_stale(self, symbols: Iterable[str], stale: bool):
+        """
+        :param symbols: Exchange symbols, e.g. "BTCUSDT"
+        """
+        for symbol in symbols:
+            base_quote_pair = self.symbol_to_base_quote_coins.get(symbol)
+            if not base_quote_pair:
+                continue
+            if stale:
+                self.stale_markets.add(base_quote_pair)
+            else:
+                self.stale_markets.discard(base_quote_pair)
 
     def get_ticker(self, market: str):
         if "/" in market:
@@ -84,6 +106,17 @@ class MarketData:
         base_quote_pair = self.symbol_to_base_quote_coins.get(market)
         return self.data.get(base_quote_pair)
 
+    def get_mid_price(self, market: str) -> Optional[float]:
+        """
+        :param market: Either exchange symbol ("BTCUSDT") or base/quote pair ("BTC/USDT")
+        :return: Middle of the best bid and ask, None if there's no price, or it can't be trusted
+        """
+        base_quote_pair = market if "/" in market else self.symbol_to_base_quote_coins.get(market)
+        ticker = self.data.get(base_quote_pair)
+        if not ticker or base_quote_pair in self.stale_markets or not ticker.best_bid or not ticker.best_ask:
+            return None
+        return (ticker.best_bid + ticker.best_ask) / 2
+
     def get_coins(self) -> List[str]:
         return list(self.trading_coins)
 
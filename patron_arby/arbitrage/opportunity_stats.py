@@ -0,0 +1,192 @@
+import logging
+import math
+import threading
+from typing import Callable, Dict, Iterable, List, Optional
+
+from patron_arby.common.chain import AChain
+from patron_arby.common.decorators import safely
+from patron_arby.common.metrics import Histogram, MetricsRegistry, metrics
+from patron_arby.common.util import current_time_ms
+from patron_arby.config.base import (
+    OPPORTUNITY_STATS_FLUSH_PERIOD_SECONDS,
+    OPPORTUNITY_STATS_RAW_SAMPLE_EVERY,
+    OPPORTUNITY_STATS_ROI_BUCKET,
+    OPPORTUNITY_STATS_ROI_RANGE,
+    OPPORTUNITY_STATS_ROI_THRESHOLD,
+)
+from patron_arby.db.arbitrage_dao import ArbitrageDao
+
+log = logging.getLogger(__name__)
+
+
+class PathStats:
+    """
+    Stats of a chain path since the last flush. Profitable window, if open, lives on across flushes.
+    All the times are of chain evaluation
+    """
+    __slots__ = ("evaluations", "profitable", "roi_sum", "roi_max", "roi_counts", "time_above_ms", "windows",
+                 "window_lifetime_ms", "window_start_ms", "above_since_ms", "last_time_ms")
+
+    def __init__(self) -> None:
+        self.window_start_ms: Optional[int] = None
+        # Time the open window is accounted in `time_above_ms` since
+        self.above_since_ms: Optional[int] = None
+        self.last_time_ms = 0
+        self.reset()
+
+    def reset(self):
+        self.evaluations = 0
+        self.profitable = 0
+        self.roi_sum = 0.0
+        self.roi_max: Optional[float] = None
+        # ROI bucket index -> count
+        self.roi_counts: Dict[int, int] = dict()
+        self.time_above_ms = 0
+        # Profitable windows closed
+        self.windows = 0
+        self.window_lifetime_ms = Histogram()
+
+
+class OpportunityStats(threading.Thread):
+    """
+    Aggregates all the evaluated chains into per-path (see `AChain.to_chain`) stats: evaluations count, ROI histogram
+    and max, time spent above the ROI threshold, and lifetime of profitable windows, from the first chain above the
+    threshold to the first one below it. Every flush period, stats are written as a compact snapshot per path, and
+    reset.
+
+    `observe` returns the chains worth storing raw: all the profitable ones, and a sample of the rest.
+
+    Chains may come slightly out of order, from several storage workers: a chain older than the latest one of its path
+    is counted, but doesn't open or close a window
+    """
+
+    def __init__(self, arbitrage_dao: ArbitrageDao,
+                 flush_period_seconds: float = OPPORTUNITY_STATS_FLUSH_PERIOD_SECONDS,
+                 roi_threshold: float = OPPORTUNITY_STATS_ROI_THRESHOLD,
+                 roi_bucket: float = OPPORTUNITY_STATS_ROI_BUCKET,
+                 roi_range: float = OPPORTUNITY_STATS_ROI_RANGE,
+                 raw_sample_every: int = OPPORTUNITY_STATS_RAW_SAMPLE_EVERY,
+                 clock: Callable[[], int] = current_time_ms,
+                 registry: MetricsRegistry = metrics) -> None:
+        super().__init__(name="OpportunityStats", daemon=True)
+        self.arbitrage_dao = arbitrage_dao
+        self.flush_period_seconds = flush_period_seconds
+        self.roi_threshold = roi_threshold
+        self.roi_bucket = roi_bucket
+        self.max_bucket = round(roi_range / roi_bucket)
+        self.raw_sample_every = raw_sample_every
+        self.clock = clock
+        self.observed_count = 0
+        self.raw_count = 0
+        self._paths: Dict[str, PathStats] = dict()
+        self._period_start_ms = clock()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        registry.gauge("opportunity_stats", self.snapshot)
+
+    def observe(self, chains: Iterable[AChain]) -> List[AChain]:
+        """
+        :return: Chains to be stored raw
+        """
+        raw: List[AChain] = list()
+        with self._lock:
+            for chain in chains:
+                path = chain.to_chain()
+                stats = self._paths.get(path)
+                if stats is None:
+                    stats = self._paths[path] = PathStats()
+                is_above = self._observe(stats, chain.roi, chain.timems)
+                self.observed_count += 1
+                if is_above or self.observed_count % self.raw_sample_every == 0:
+                    raw.append(chain)
+            self.raw_count += len(raw)
+        return raw
+
+    def flush(self) -> List[Dict]:
+        """
+        Writes stats since the previous flush
+        :return: Stats written, a record per path
+        """
+        with self._lock:
+            now = self.clock()
+            records = list()
+            for path, stats in list(self._paths.items()):
+                if stats.window_start_ms is not None:
+                    # Split at the path's latest chain, not at the current time: chains are timed by their
+                    # evaluation, and storage lags behind it
+                    stats.time_above_ms += stats.last_time_ms - stats.above_since_ms
+                    stats.above_since_ms = stats.last_time_ms
+                if stats.evaluations:
+                    records.append(self._record(path, stats, now))
+                if stats.window_start_ms is None:
+                    # Kept only while there's a window to track
+                    del self._paths[path]
+                else:
+                    stats.reset()
+            self._period_start_ms = now
+        if records:
+            self._write(records)
+        return records
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+    def run(self) -> None:
+        log.debug("Starting")
+        while not self._stopped.wait(self.flush_period_seconds):
+            self.flush()
+        self.flush()
+        log.debug("Ending")
+
+    def snapshot(self) -> Dict:
+        return {
+            "paths": len(self._paths),
+            "observed": self.observed_count,
+            "raw": self.raw_count,
+        }
+
+    def _observe(self, stats: PathStats, roi: float, time_ms: int) -> bool:
+        stats.evaluations += 1
+        stats.roi_sum += roi
+        if stats.roi_max is None or roi > stats.roi_max:
+            stats.roi_max = roi
+        # Rounded first, for ROI right at bucket edge not to fall into the previous bucket on float error
+        bucket = min(max(math.floor(round(roi / self.roi_bucket, 6)), -self.max_bucket), self.max_bucket)
+        stats.roi_counts[bucket] = stats.roi_counts.get(bucket, 0) + 1
+        is_above = roi > self.roi_threshold
+        if is_above:
+            stats.profitable += 1
+        if time_ms < stats.last_time_ms:
+            return is_above
+        stats.last_time_ms = time_ms
+        if is_above and stats.window_start_ms is None:
+            stats.window_start_ms = stats.above_since_ms = time_ms
+        elif not is_above and stats.window_start_ms is not None:
+            stats.time_above_ms += time_ms - stats.above_since_ms
+            stats.window_lifetime_ms.record(time_ms - stats.window_start_ms)
+            stats.windows += 1
+            stats.window_start_ms = stats.above_since_ms = None
+        return is_above
+
+    def _record(self, path: str, stats: PathStats, now: int) -> Dict:
+        return {
+            "path": path,
+            "from_ms": self._period_start_ms,
+            "to_ms": now,
+            "evaluations": stats.evaluations,
+            "profitable": stats.profitable,
+            "roi_mean": stats.roi_sum / stats.evaluations,
+            "roi_max": stats.roi_max,
+            # Bucket index -> count. Bucket covers [index * bucket, (index + 1) * bucket)
+            "roi_bucket": self.roi_bucket,
+            "roi_histogram": {str(bucket): count for bucket, count in sorted(stats.roi_counts.items())},
+            "time_above_threshold_ms": stats.time_above_ms,
+            "windows": stats.windows,
+            "window_open": stats.window_start_ms is not None,
+            "window_lifetime_ms": stats.window_lifetime_ms.snapshot() if stats.windows else None,
+        }
+
+    @safely
+    def _write(self, records: List[Dict]):
+        self.arbitrage_dao.put_opportunity_stats(records)
@@ -1,19 +1,41 @@
 from queue import Queue
+from typing import Callable
+
+from patron_arby.common.bus_transport import BusTransport, in_process_transport
+from patron_arby.common.chain_storage_queue import ChainStorageQueue
+from patron_arby.common.positive_arbitrages_queue import PositiveArbitragesQueue
+
+CHANNEL_POSITIVE_ARBITRAGES = "positive_arbitrages"
+CHANNEL_STORE_POSITIVE_ARBITRAGES = "store_positive_arbitrages"
+CHANNEL_FIRE_ORDERS = "fire_orders"
+CHANNEL_TICKERS = "tickers"
+CHANNEL_ALL_ARBITRAGES = "all_arbitrages"
+
+ALL_CHANNELS = [CHANNEL_POSITIVE_ARBITRAGES, CHANNEL_STORE_POSITIVE_ARBITRAGES, CHANNEL_FIRE_ORDERS, CHANNEL_TICKERS,
+                CHANNEL_ALL_ARBITRAGES]
 
 
 class Bus:
     """
-    Communication bus between Arbitrage components
-    Shared-mem implementation to be replaced by separate component (Redis most probably)
+    Communication bus between Arbitrage components.
+    Messages are carried by the transport: in-process queues by default (shared by all Bus instances), or Unix domain
+    sockets to run components as separate processes, see UnixSocketBusTransport.
+    In process, positive arbitrages go via PositiveArbitragesQueue: newest chain per path, expiring, most profitable
+    first. All the evaluated chains go via bounded ChainStorageQueue, never holding arbitrage search up on storage
     """
-    _positive_arbitrages_queue: Queue = Queue()
-    _store_positive_arbitrages_queue: Queue = Queue()
-    _fire_orders_queue: Queue = Queue()
-    _tickers_queue: Queue = Queue()
-    _all_arbitrages_queue: Queue = Queue()
 
-    # When set to True, all trading activities are ceased
-    _stop_trading = False
+    def __init__(self, transport: BusTransport = None) -> None:
+        self.transport = transport if transport else in_process_transport
+        self._positive_arbitrages_queue = self.transport.channel(CHANNEL_POSITIVE_ARBITRAGES,
+            PositiveArbitragesQueue)
+        self._store_positive_arbitrages_queue = self.transport.channel(CHANNEL_STORE_POSITIVE_ARBITRAGES)
+        self._fire_orders_queue = self.transport.channel(CHANNEL_FIRE_ORDERS)
+        self._tickers_queue = self.transport.channel(CHANNEL_TICKERS)
+        self._all_arbitrages_queue = self.transport.channel(CHANNEL_ALL_ARBITRAGES, ChainStorageQueue)
+        # When set to True, all trading activities are ceased
+        self._stop_trading = self.transport.create_stop_flag()
+        # Checked before every order: bound right to the flag, saving a call
+        self.is_stop_trading: Callable[[], bool] = self._stop_trading.is_set
 
     @property
     def positive_arbitrages_queue(self) -> Queue:
@@ -35,8 +57,5 @@ class Bus:
     def all_arbitrages_queue(self) -> Queue:
         return self._all_arbitrages_queue
 
-    def is_stop_trading(self) -> bool:
-        return self._stop_trading
-
     def set_stop_trading(self, stop_trading: bool):
-        self._stop_trading = stop_trading
+        self._stop_trading.set(stop_trading)
@@ -0,0 +1,225 @@
+import json
+import pickle
+import struct
+from typing import Any, List, Optional, Tuple
+
+from patron_arby.common.chain import AChain, AChainStep
+from patron_arby.common.order import Order, OrderSide
+from patron_arby.common.ticker import Ticker
+from patron_arby.common.trace import STAGES, Trace
+
+# Message type tags
+TAG_TICKER = b"T"
+TAG_CHAIN = b"C"
+TAG_CHAIN_LIST = b"L"
+TAG_CHAIN_SET = b"S"
+TAG_ORDER = b"O"
+# Orders of a single chain, dispatched together
+TAG_ORDER_LIST = b"R"
+TAG_STRING = b"M"
+# Anything else. Slow, but keeps the bus usable for rare messages of other types
+TAG_PICKLE = b"P"
+
+# Length of optional string, meaning None
+NONE_LENGTH = 0xFFFF
+
+STRING_LENGTH = struct.Struct(">H")
+COUNT = struct.Struct(">I")
+# best bid, best bid quantity, best ask, best ask quantity, time ms, exchange time ms
+TICKER_FIELDS = struct.Struct(">ddddqq")
+# roi, profit, profit usd, time ms, steps count
+CHAIN_FIELDS = struct.Struct(">dddqB")
+# side, price, volume
+STEP_FIELDS = struct.Struct(">Bdd")
+# side, quantity, price, created at, updated at, fired at, has arbitrage hash8, arbitrage hash8, transaction time
+ORDER_FIELDS = struct.Struct(">BddqqqBqq")
+# Trace marks count
+MARKS_COUNT = struct.Struct(">B")
+# stage, time ns
+MARK_FIELDS = struct.Struct(">Bq")
+
+SIDES = [None, OrderSide.BUY, OrderSide.SELL]
+
+
+class BusCodec:
+    """
+    Compact binary encoding of messages going through the Bus: tickers, arbitrage chains (single or collections) and
+    orders (single or lists). Fields are packed with `struct`, strings are length-prefixed UTF-8. Traces go along with
+    tickers, chains and orders
+    """
+
+    def encode(self, message: Any) -> bytes:
+        buffer = bytearray()
+        if isinstance(message, Ticker):
+            buffer += TAG_TICKER
+            self._put_ticker(buffer, message)
+        elif isinstance(message, AChain):
+            buffer += TAG_CHAIN
+            self._put_chain(buffer, message)
+        elif isinstance(message, (list, set, frozenset)) and all(isinstance(m, AChain) for m in message):
+            buffer += TAG_CHAIN_LIST if isinstance(message, list) else TAG_CHAIN_SET
+            buffer += COUNT.pack(len(message))
+            for chain in message:
+                self._put_chain(buffer, chain)
+        elif isinstance(message, Order):
+            buffer += TAG_ORDER
+            self._put_order(buffer, message)
+        elif isinstance(message, list) and all(isinstance(m, Order) for m in message):
+            buffer += TAG_ORDER_LIST
+            buffer += COUNT.pack(len(message))
+            for order in message:
+                self._put_order(buffer, order)
+        elif isinstance(message, str):
+            buffer += TAG_STRING
+            self._put_string(buffer, message)
+        else:
+            buffer += TAG_PICKLE
+            buffer += pickle.dumps(message, protocol=pickle.HIGHEST_PROTOCOL)
+        return bytes(buffer)
+
+    def decode(self, data: bytes) -> Any:
+        tag = data[0:1]
+        offset = 1
+        if tag == TAG_TICKER:
+            return self._get_ticker(data, offset)[0]
+        if tag == TAG_CHAIN:
+            return self._get_chain(data, offset)[0]
+        if tag == TAG_CHAIN_LIST or tag == TAG_CHAIN_SET:
+            count, = COUNT.unpack_from(data, offset)
+            offset += COUNT.size
+            chains = list()
+            for _ in range(count):
+                chain, offset = self._get_chain(data, offset)
+                chains.append(chain)
+            return chains if tag == TAG_CHAIN_LIST else set(chains)
+        if tag == TAG_ORDER:
+            return self._get_order(data, offset)[0]
+        if tag == TAG_ORDER_LIST:
+            count, = COUNT.unpack_from(data, offset)
+            offset += COUNT.size
+            orders = list()
+            for _ in range(count):
+                order, offset = self._get_order(data, offset)
+                orders.append(order)
+            return orders
+        if tag == TAG_STRING:
+            return self._get_string(data, offset)[0]
+        if tag == TAG_PICKLE:
+            return pickle.loads(data[offset:])
+        raise ValueError(f"Unknown message tag: {tag}")
+
+    def _put_ticker(self, buffer: bytearray, t: Ticker):
+        self._put_string(buffer, t.market)
+        buffer += TICKER_FIELDS.pack(t.best_bid, t.best_bid_quantity, t.best_ask, t.best_ask_quantity, t.time_ms,
+            t.exchange_time_ms)
+        self._put_trace(buffer, t.trace)
+
+    def _get_ticker(self, data: bytes, offset: int) -> Tuple[Ticker, int]:
+        market, offset = self._get_string(data, offset)
+        fields = TICKER_FIELDS.unpack_from(data, offset)
+        trace, offset = self._get_trace(data, offset + TICKER_FIELDS.size)
+        return Ticker(market, *fields, trace=trace), offset
+
+    def _put_chain(self, buffer: bytearray, c: AChain):
+        steps = c.steps if c.steps else []
+        self._put_string(buffer, c.initial_coin)
+        self._put_string(buffer, c.comment)
+        buffer += CHAIN_FIELDS.pack(c.roi, c.profit, c.profit_usd, c.timems, len(steps))
+        for step in steps:
+            self._put_string(buffer, step.market)
+            buffer += STEP_FIELDS.pack(SIDES.index(step.side), step.price, step.volume)
+        self._put_trace(buffer, c.trace)
+
+    def _get_chain(self, data: bytes, offset: int) -> Tuple[AChain, int]:
+        initial_coin, offset = self._get_string(data, offset)
+        comment, offset = self._get_string(data, offset)
+        roi, profit, profit_usd, timems, steps_count = CHAIN_FIELDS.unpack_from(data, offset)
+        offset += CHAIN_FIELDS.size
+        steps: List[AChainStep] = list()
+        for _ in range(steps_count):
+            market, offset = self._get_string(data, offset)
+            side, price, volume = STEP_FIELDS.unpack_from(data, offset)
+            offset += STEP_FIELDS.size
+            steps.append(AChainStep(market, SIDES[side], price, volume))
+        trace, offset = self._get_trace(data, offset)
+        return AChain(initial_coin, steps, roi, profit, profit_usd, timems, comment, trace), offset
+
+    def _put_order(self, buffer: bytearray, o: Order):
+        for s in [o.client_order_id, o.symbol, o.exchange, o.status, o.order_id, o.comment]:
+            self._put_string(buffer, s)
+        buffer += ORDER_FIELDS.pack(SIDES.index(o.order_side), o.quantity, o.price, o.created_at, o.updated_at,
+            o.fired_at, o.arbitrage_hash8 is not None, o.arbitrage_hash8 or 0, o.transaction_time)
+        # Raw exchange replies are rare and schemaless, so JSON
+        for raw in [o.rest_reply_raw_order, o.event_raw_order]:
+            self._put_string(buffer, json.dumps(raw) if raw is not None else None)
+        self._put_string(buffer, o.wire_price)
+        self._put_string(buffer, o.wire_quantity)
+        self._put_trace(buffer, o.trace)
+
+    def _get_order(self, data: bytes, offset: int) -> Tuple[Order, int]:
+        strings = list()
+        for _ in range(6):
+            s, offset = self._get_string(data, offset)
+            strings.append(s)
+        client_order_id, symbol, exchange, status, order_id, comment = strings
+        side, quantity, price, created_at, updated_at, fired_at, has_hash8, hash8, transaction_time = \
+            ORDER_FIELDS.unpack_from(data, offset)
+        offset += ORDER_FIELDS.size
+        rest_reply_raw_order, offset = self._get_string(data, offset)
+        event_raw_order, offset = self._get_string(data, offset)
+        wire_price, offset = self._get_string(data, offset)
+        wire_quantity, offset = self._get_string(data, offset)
+        trace, offset = self._get_trace(data, offset)
+        order = Order(client_order_id, SIDES[side], symbol, quantity, price,
+            created_at=created_at,
+            updated_at=updated_at,
+            fired_at=fired_at,
+            arbitrage_hash8=hash8 if has_hash8 else None,
+            rest_reply_raw_order=json.loads(rest_reply_raw_order) if rest_reply_raw_order is not None else None,
+            event_raw_order=json.loads(event_raw_order) if event_raw_order is not None else None,
+            exchange=exchange,
+            status=status,
+            order_id=order_id,
+            transaction_time=transaction_time,
+            comment=comment,
+            wire_price=wire_price,
+            wire_quantity=wire_quantity,
+            trace=trace)
+        return order, offset
+
+    @staticmethod
+    def _put_trace(buffer: bytearray, trace: Optional[Trace]):
+        marks = trace.marks() if trace else []
+        buffer += MARKS_COUNT.pack(len(marks))
+        for stage, time_ns in marks:
+            buffer += MARK_FIELDS.pack(STAGES.index(stage), time_ns)
+
+    @staticmethod
+    def _get_trace(data: bytes, offset: int) -> Tuple[Optional[Trace], int]:
+        count, = MARKS_COUNT.unpack_from(data, offset)
+        offset += MARKS_COUNT.size
+        marks = list()
+        for _ in range(count):
+            stage, time_ns = MARK_FIELDS.unpack_from(data, offset)
+            offset += MARK_FIELDS.size
+            marks.append((STAGES[stage], time_ns))
+        return Trace.from_marks(marks), offset
+
+    @staticmethod
+    def _put_string(buffer: bytearray, s: Optional[str]):
+        if s is None:
+            buffer += STRING_LENGTH.pack(NONE_LENGTH)
+            return
+        encoded = s.encode("utf-8")
+        if len(encoded) >= NONE_LENGTH:
+            raise ValueError(f"String is too long to be encoded: {len(encoded)} bytes")
+        buffer += STRING_LENGTH.pack(len(encoded))
+        buffer += encoded
+
+    @staticmethod
+    def _get_string(data: bytes, offset: int) -> Tuple[Optional[str], int]:
+        length, = STRING_LENGTH.unpack_from(data, offset)
+        offset += STRING_LENGTH.size
+        if length == NONE_LENGTH:
+            return None, offset
+        return bytes(data[offset:offset + length]).decode("utf-8"), offset + length
@@ -0,0 +1,242 @@
+import mmap
+import os
+import queue
+import select
+import socket
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from patron_arby.common.bus_codec import BusCodec
+from patron_arby.common.instrumented_queue import InstrumentedQueue
+from patron_arby.common.metrics import MetricsRegistry, metrics
+from patron_arby.config.base import (
+    BUS_SOCKET_BUFFER_SIZE_BYTES,
+    BUS_SOCKET_CONNECT_TIMEOUT_SECONDS,
+    BUS_SOCKET_MAX_MESSAGE_BYTES,
+)
+
+SOCKET_EXTENSION = ".sock"
+STOP_FLAG_FILE_NAME = "stop_trading.flag"
+
+
+class StopFlag(ABC):
+    @abstractmethod
+    def is_set(self) -> bool:
+        pass
+
+    @abstractmethod
+    def set(self, value: bool):
+        pass
+
+
+class LocalStopFlag(StopFlag):
+    def __init__(self) -> None:
+        self._value = False
+
+    def is_set(self) -> bool:
+        return self._value
+
+    def set(self, value: bool):
+        self._value = value
+
+
+class SharedMemoryStopFlag(StopFlag):
+    """
+    Single byte in a memory-mapped file, visible to every process mapping the same file
+    """
+
+    def __init__(self, path: str) -> None:
+        with open(path, "a+b") as f:
+            if os.fstat(f.fileno()).st_size < 1:
+                f.write(b"\x00")
+                f.flush()
+            self._mmap = mmap.mmap(f.fileno(), 1)
+
+    def is_set(self) -> bool:
+        return self._mmap[0] != 0
+
+    def set(self, value: bool):
+        self._mmap[0] = 1 if value else 0
+
+    def close(self):
+        self._mmap.close()
+
+
+class BusTransport(ABC):
+    """
+    Carries Bus messages. Each channel is a FIFO with `queue.Queue`-like `put`, `get` and `get_nowait`
+    """
+
+    @abstractmethod
+    def channel(self, name: str, factory: Callable[[str], Any] = None) -> Any:
+        """
+        :param factory: Creates in-process queue for the channel, when a specific one is needed. Transports which
+                don't keep queues in process ignore it
+        """
+        pass
+
+    @abstractmethod
+    def create_stop_flag(self) -> StopFlag:
+        pass
+
+    def close(self):
+        pass
+
+
+class InProcessBusTransport(BusTransport):
+    """
+    Channels are `queue.Queue`s, so all the components have to live in the same process. Queues are instrumented,
+    their stats are exposed as "bus_queues" gauge of the metrics registry
+    """
+
+    def __init__(self, registry: MetricsRegistry = metrics) -> None:
+        self.registry = registry
+        self._channels: Dict[str, Any] = dict()
+        self._lock = threading.Lock()
+        registry.gauge("bus_queues", self.snapshot)
+
+    def channel(self, name: str, factory: Callable[[str], Any] = None) -> Any:
+        with self._lock:
+            q = self._channels.get(name)
+            if q is None:
+                q = self._channels[name] = factory(name) if factory else InstrumentedQueue(name, registry=self.registry)
+            return q
+
+    def snapshot(self) -> Dict:
+        return {name: q.snapshot() for name, q in sorted(self._channels.items())}
+
+    def create_stop_flag(self) -> StopFlag:
+        return LocalStopFlag()
+
+
+class UnixSocketChannel:
+    """
+    Channel over a Unix domain datagram socket. Consuming process binds the socket, producers send datagrams to it.
+    Each message is a single datagram, so there's no framing, and message boundaries are preserved by the kernel.
+    When consumer's buffer is full, `put` blocks: slow consumer slows down producers rather than losing messages
+    (`put_nowait` raises `queue.Full` instead). Messages are limited in size by the socket buffer.
+
+    A channel can be consumed by any number of threads, but by a single process only
+    """
+
+    def __init__(self, path: str, codec: BusCodec,
+                 buffer_size_bytes: int = BUS_SOCKET_BUFFER_SIZE_BYTES,
+                 connect_timeout_seconds: float = BUS_SOCKET_CONNECT_TIMEOUT_SECONDS) -> None:
+        self.path = path
+        self.codec = codec
+        self.buffer_size_bytes = buffer_size_bytes
+        self.connect_timeout_seconds = connect_timeout_seconds
+        self._sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sender.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, buffer_size_bytes)
+        self._receiver: Optional[socket.socket] = None
+        self._lock = threading.Lock()
+        # Each consuming thread receives into its own preallocated buffer
+        self._thread_local = threading.local()
+
+    def bind(self):
+        """
+        Makes this process the consumer of the channel. Messages sent before that are lost
+        """
+        with self._lock:
+            if self._receiver:
+                return
+            if os.path.exists(self.path):
+                # Left from previous run
+                os.unlink(self.path)
+            receiver = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            receiver.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.buffer_size_bytes)
+            receiver.bind(self.path)
+            self._receiver = receiver
+
+    def put(self, message: Any, block: bool = True, timeout: float = None):
+        """
+        :param timeout: Ignored, kept for compatibility with `queue.Queue`
+        """
+        data = self.codec.encode(message)
+        flags = 0 if block else socket.MSG_DONTWAIT
+        # Consumer may be not started yet, give it some time
+        deadline = time.monotonic() + self.connect_timeout_seconds
+        while True:
+            try:
+                self._sender.sendto(data, flags, self.path)
+                return
+            except BlockingIOError:
+                raise queue.Full()
+            except (FileNotFoundError, ConnectionRefusedError):
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.01)
+
+    def get(self, block: bool = True, timeout: float = None) -> Any:
+        self.bind()
+        buffer = getattr(self._thread_local, "buffer", None)
+        if buffer is None:
+            buffer = self._thread_local.buffer = bytearray(BUS_SOCKET_MAX_MESSAGE_BYTES)
+        if not block or timeout is not None:
+            ready, _, _ = select.select([self._receiver], [], [], 0 if not block else timeout)
+            if not ready:
+                raise queue.Empty()
+            try:
+                size = self._receiver.recv_into(buffer, 0, socket.MSG_DONTWAIT)
+            except BlockingIOError:
+                # Taken by another consuming thread
+                raise queue.Empty()
+        else:
+            size = self._receiver.recv_into(buffer)
+        return self.codec.decode(memoryview(buffer)[:size])
+
+    def get_nowait(self) -> Any:
+        return self.get(block=False)
+
+    def put_nowait(self, message: Any):
+        self.put(message, block=False)
+
+    def close(self):
+        self._sender.close()
+        if self._receiver:
+            self._receiver.close()
+            self._receiver = None
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+
+
+class UnixSocketBusTransport(BusTransport):
+    """
+    Cross-process transport: each channel is a Unix domain socket in the given directory, messages are encoded with
+    BusCodec. That allows running ingestion, arbitrage search, trading and persistence as separate processes, each
+    declaring channels it consumes. Stop trading flag is shared via memory-mapped file in the same directory
+    """
+
+    def __init__(self, directory: str, consumed_channels: Iterable[str] = (), codec: BusCodec = None) -> None:
+        """
+        :param consumed_channels: Channels this process reads from. They're bound right away, so producers can send
+                    messages before the first `get`
+        """
+        self.directory = directory
+        self.codec = codec if codec else BusCodec()
+        self._channels: Dict[str, UnixSocketChannel] = dict()
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        for name in consumed_channels:
+            self.channel(name).bind()
+
+    def channel(self, name: str, factory: Callable[[str], Any] = None) -> UnixSocketChannel:
+        with self._lock:
+            c = self._channels.get(name)
+            if c is None:
+                c = self._channels[name] = UnixSocketChannel(os.path.join(self.directory, name + SOCKET_EXTENSION),
+                    self.codec)
+            return c
+
+    def create_stop_flag(self) -> StopFlag:
+        return SharedMemoryStopFlag(os.path.join(self.directory, STOP_FLAG_FILE_NAME))
+
+    def close(self):
+        for c in self._channels.values():
+            c.close()
+
+
+# Default transport: shared by all Bus instances in the process, as Bus queues have always been
+in_process_transport = InProcessBusTransport()
@@ -1,7 +1,9 @@
-from dataclasses import dataclass
+import zlib
+from dataclasses import dataclass, field
 from typing import Dict, List, Optional
 
 from patron_arby.common.order import OrderSide
+from patron_arby.common.trace import Trace
 from patron_arby.common.util import current_time_ms, dict_from_obj, obj_from_dict
 
 
@@ -71,6 +73,7 @@ class AChain:
     profit_usd: float = -1
     timems: int = -1
     comment: str = ""
+    trace: Optional[Trace] = field(default=None, compare=False, repr=False)
 
     def __post_init__(self):
         if self.timems == -1:
@@ -83,9 +86,9 @@ class AChain:
     def hash8(self):
         """
         :return: 8-digits Hash of UID of this chain. There's no guarantee that there will be no collisions,
-                    yet the probability is pretty low.
+                    yet the probability is pretty low. Same in every process, unlike `hash`, which is salted per process
         """
-        return abs(hash(self.uid())) % (10 ** 8)
+        return zlib.crc32(self.uid().encode()) % (10 ** 8)
 
     def is_for_same_chain(self, ac) -> bool:
         if not ac:
@@ -101,6 +104,7 @@ class AChain:
 
     def to_dict(self):
         d = dict_from_obj(self)
+        del d["trace"]
         d["steps"] = [s.to_dict() for s in self.steps]
         d["uid"] = self.uid()
         d["hash8"] = self.hash8()
@@ -0,0 +1,162 @@
+import queue
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Iterable, List
+
+from patron_arby.common.chain import AChain
+from patron_arby.common.instrumented_queue import QueueStats
+from patron_arby.common.metrics import MetricsRegistry, metrics
+from patron_arby.config.base import (
+    CHAIN_STORAGE_BATCH_SIZE,
+    CHAIN_STORAGE_CAPACITY,
+    CHAIN_STORAGE_OVERFLOW_POLICY,
+    CHAIN_STORAGE_SAMPLE_EVERY,
+    ChainStorageOverflowPolicy,
+)
+
+DROP_REASON_OVERFLOW = "overflow"
+DROP_REASON_SAMPLED_OUT = "sampled_out"
+
+
+class ChainStorageQueue:
+    """
+    Channel of all the evaluated chains, on their way to storage, `queue.Queue`-like. Bounded by number of chains:
+    when storage falls behind, the overflow policy decides what's lost, see ChainStorageOverflowPolicy. Unless the
+    policy is BLOCK, `put` never waits, so arbitrage search is not slowed down by storage.
+
+    Chain sets are kept as they're put, and only split when taken in batches (`take`). Measured like every bus queue
+    (see QueueStats), by chains
+    """
+
+    def __init__(self, name: str = "all_arbitrages",
+                 capacity: int = CHAIN_STORAGE_CAPACITY,
+                 overflow_policy: ChainStorageOverflowPolicy = CHAIN_STORAGE_OVERFLOW_POLICY,
+                 sample_every: int = CHAIN_STORAGE_SAMPLE_EVERY,
+                 batch_size: int = CHAIN_STORAGE_BATCH_SIZE,
+                 registry: MetricsRegistry = metrics) -> None:
+        """
+        :param batch_size: Consumers waiting in `take` are woken up once there's that many chains
+        """
+        self.name = name
+        self.capacity = capacity
+        self.overflow_policy = overflow_policy
+        self.sample_every = sample_every
+        self.batch_size = batch_size
+        self.stats = QueueStats(name, registry)
+        self.drop_counts: Dict[str, int] = {DROP_REASON_OVERFLOW: 0, DROP_REASON_SAMPLED_OUT: 0}
+        # (put time ns, chains) as put
+        self._chain_sets: Deque = deque()
+        self._size = 0
+        self._sample_counter = 0
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+
+    def put(self, chains: Iterable[AChain], block: bool = True, timeout: float = None):
+        """
+        :param block: Only matters for BLOCK policy. If False, `queue.Full` is raised when there's no room
+        """
+        chains = chains if isinstance(chains, list) else list(chains)
+        with self._lock:
+            put_count = len(chains)
+            if self.overflow_policy == ChainStorageOverflowPolicy.BLOCK:
+                if not self._wait_for_room(len(chains), block, timeout):
+                    raise queue.Full()
+            else:
+                if self.overflow_policy == ChainStorageOverflowPolicy.SAMPLE and self._size >= self.capacity >> 1:
+                    chains = self._sample(chains)
+                self._drop_oldest(self._size + len(chains) - self.capacity)
+            if chains:
+                self._chain_sets.append((time.perf_counter_ns(), chains))
+                self._size += len(chains)
+            self.stats.on_put(put_count, self._size)
+            if self._size >= self.batch_size:
+                self._not_empty.notify()
+
+    def put_nowait(self, chains: Iterable[AChain]):
+        self.put(chains, block=False)
+
+    def get(self, block: bool = True, timeout: float = None) -> List[AChain]:
+        """
+        :return: The oldest chain set, as put
+        """
+        with self._lock:
+            if not self._chain_sets:
+                if not block or not self._not_empty.wait_for(lambda: self._chain_sets, timeout):
+                    raise queue.Empty()
+            put_time_ns, chains = self._chain_sets.popleft()
+            self._on_taken(put_time_ns, len(chains))
+            return chains
+
+    def get_nowait(self) -> List[AChain]:
+        return self.get(block=False)
+
+    def take(self, timeout: float) -> List[AChain]:
+        """
+        Waits till there's a full batch, or for the given time at most
+        :return: Up to `batch_size` oldest chains, possibly none
+        """
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            while self._size < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._not_empty.wait(remaining)
+            batch: List[AChain] = list()
+            while self._chain_sets and len(batch) < self.batch_size:
+                put_time_ns, chains = self._chain_sets.popleft()
+                room = self.batch_size - len(batch)
+                if len(chains) > room:
+                    # Rest of the set stays at the head
+                    self._chain_sets.appendleft((put_time_ns, chains[room:]))
+                    chains = chains[:room]
+                batch += chains
+                self._on_taken(put_time_ns, len(chains))
+            if self._size >= self.batch_size:
+                # Wake up another consumer for the next batch
+                self._not_empty.notify()
+            return batch
+
+    def qsize(self) -> int:
+        return self._size
+
+    def empty(self) -> bool:
+        return self._size == 0
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return dict(self.stats.snapshot(self._size), capacity=self.capacity, dropped=dict(self.drop_counts))
+
+    def _wait_for_room(self, count: int, block: bool, timeout: float) -> bool:
+        # Chain set bigger than the capacity is let in once the queue is empty, rather than never
+        def has_room():
+            return self._size + count <= self.capacity or self._size == 0
+        if has_room():
+            return True
+        return block and self._not_full.wait_for(has_room, timeout)
+
+    def _sample(self, chains: List[AChain]) -> List[AChain]:
+        # Counter goes on across chain sets, so small sets are sampled too
+        offset = (self.sample_every - self._sample_counter) % self.sample_every
+        sampled = chains[offset::self.sample_every]
+        self._sample_counter = (self._sample_counter + len(chains)) % self.sample_every
+        self.drop_counts[DROP_REASON_SAMPLED_OUT] += len(chains) - len(sampled)
+        return sampled
+
+    def _drop_oldest(self, count: int):
+        while count > 0 and self._chain_sets:
+            put_time_ns, chains = self._chain_sets.popleft()
+            if len(chains) > count:
+                self._chain_sets.appendleft((put_time_ns, chains[count:]))
+                chains = chains[:count]
+            count -= len(chains)
+            self._size -= len(chains)
+            self.drop_counts[DROP_REASON_OVERFLOW] += len(chains)
+
+    def _on_taken(self, put_time_ns: int, count: int):
+        self._size -= count
+        self.stats.on_get(count, put_time_ns)
+        if self.overflow_policy == ChainStorageOverflowPolicy.BLOCK:
+            self._not_full.notify_all()
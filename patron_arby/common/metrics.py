@@ -0,0 +1,140 @@
+import json
+import logging
+import math
+import threading
+from typing import Any, Callable, Dict, Optional
+
+from patron_arby.config.base import METRICS_REPORT_PERIOD_SECONDS
+
+log = logging.getLogger(__name__)
+
+# Each power of 2 is split into that many buckets, which gives ~3% relative error for percentiles
+SUB_BUCKETS = 16
+ZERO_BUCKET = -(1 << 30)
+
+
+class Histogram:
+    """
+    Histogram with logarithmic buckets: O(1) recording, bounded memory, approximate percentiles.
+    Not synchronized on purpose: concurrent recording may lose a sample once in a while, that's fine for metrics
+    """
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self.buckets: Dict[int, int] = dict()
+
+    def record(self, value: float):
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+        bucket = self._to_bucket(value)
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+
+    def mean(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+
+    def percentile(self, p: float) -> Optional[float]:
+        """
+        :param p: Percentile, 0..100
+        """
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(self.count * p / 100))
+        seen = 0
+        for bucket in sorted(self.buckets.keys()):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min(max(self._from_bucket(bucket), self.min), self.max)
+        return self.max
+
+    def snapshot(self) -> Dict:
+        return {
+            "count": self.count,
+            "mean": self.mean(),
+            "min": self.min,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "max": self.max,
+        }
+
+    def reset(self):
+        self.__init__()
+
+    @staticmethod
+    def _to_bucket(value: float) -> int:
+        if value <= 0:
+            return ZERO_BUCKET
+        mantissa, exponent = math.frexp(value)
+        # mantissa is within [0.5, 1)
+        return exponent * SUB_BUCKETS + int((mantissa - 0.5) * 2 * SUB_BUCKETS)
+
+    @staticmethod
+    def _from_bucket(bucket: int) -> float:
+        if bucket == ZERO_BUCKET:
+            return 0
+        exponent, sub_bucket = divmod(bucket, SUB_BUCKETS)
+        # Middle of the bucket
+        return math.ldexp(0.5 + (sub_bucket + 0.5) / (2 * SUB_BUCKETS), exponent)
+
+
+class MetricsRegistry:
+    """
+    Named metrics, to be looked up by components and dumped all together
+    """
+
+    def __init__(self) -> None:
+        self.histograms: Dict[str, Histogram] = dict()
+        # Name -> function returning current value, evaluated on snapshot
+        self.gauges: Dict[str, Callable[[], Any]] = dict()
+
+    def histogram(self, name: str) -> Histogram:
+        h = self.histograms.get(name)
+        if h is None:
+            h = self.histograms.setdefault(name, Histogram())
+        return h
+
+    def gauge(self, name: str, value_supplier: Callable[[], Any]):
+        self.gauges[name] = value_supplier
+
+    def snapshot(self) -> Dict:
+        return {
+            "histograms": {name: h.snapshot() for name, h in sorted(self.histograms.items())},
+            "gauges": {name: supplier() for name, supplier in sorted(self.gauges.items())},
+        }
+
+
+# Process-wide registry
+metrics = MetricsRegistry()
+
+
+class MetricsReporter(threading.Thread):
+    """
+    Periodically writes registry snapshot to log, as JSON
+    """
+
+    def __init__(self, registry: MetricsRegistry = metrics,
+                 period_seconds: float = METRICS_REPORT_PERIOD_SECONDS) -> None:
+        super().__init__(name="MetricsReporter", daemon=True)
+        self.registry = registry
+        self.period_seconds = period_seconds
+        self._stopped = threading.Event()
+
+    def stop(self):
+        self._stopped.set()
+
+    def run(self) -> None:
+        while not self._stopped.wait(self.period_seconds):
+            self.report()
+
+    def report(self):
+        try:
+            log.info(f"Metrics: {json.dumps(self.registry.snapshot(), default=str)}")
+        except Exception as e:
+            log.error(f"Unable to report metrics: {e}", exc_info=True)
@@ -1,7 +1,8 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
-from typing import Dict
+from typing import Dict, Optional
 
+from patron_arby.common.trace import Trace
 from patron_arby.common.util import current_time_ms, dict_from_obj, obj_from_dict
 from patron_arby.exchange.binance.constants import Binance
 
@@ -36,6 +37,11 @@ class Order:
     order_id: str = None
     transaction_time: int = -1
     comment: str = ""
+    # Price and quantity exactly as sent to the exchange, rendered from integer ticks and lots when adjusted to the
+    # market requirements. Not stored
+    wire_price: str = None
+    wire_quantity: str = None
+    trace: Optional[Trace] = field(default=None, compare=False, repr=False)
 
     def __post_init__(self):
         if self.created_at == -1:
@@ -50,6 +56,8 @@ class Order:
     def to_dict(self):
         d = dict_from_obj(self)
         d["order_side"] = str(self.order_side) if self.order_side else None
+        # Only needed till the order is sent
+        del d["wire_price"], d["wire_quantity"], d["trace"]
         # Remove keys for None values explicitly
         return {k: v for k, v in d.items() if v is not None}
 
@@ -0,0 +1,140 @@
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterable, List, Tuple, Union
+
+from patron_arby.common.chain import AChain
+from patron_arby.common.instrumented_queue import QueueStats
+from patron_arby.common.metrics import MetricsRegistry, metrics
+from patron_arby.common.util import current_time_ms
+from patron_arby.config.base import (
+    POSITIVE_ARBITRAGE_DROPPED_BUFFER_SIZE,
+    POSITIVE_ARBITRAGE_MAX_AGE_MS,
+    TRADE_MANAGER_SORT_ARBITRAGE_BY_ROI,
+)
+
+DROP_REASON_EXPIRED = "expired"
+DROP_REASON_COALESCED = "coalesced"
+
+
+class PositiveArbitragesQueue:
+    """
+    Channel of profitable arbitrage chains, `queue.Queue`-like. Unlike FIFO, it keeps only the newest pending chain per
+    triangle (chain path): when a new one comes, the pending one is coalesced. `get` returns all pending chains at once,
+    ordered by ROI (or profit), skipping chains older than the age limit: if consumer falls behind, it gets the
+    freshest and best chains instead of a backlog of stale ones.
+
+    Dropped chains are commented with the reason and can be taken via `take_dropped`, to be stored along with processed
+    ones. Only the latest POSITIVE_ARBITRAGE_DROPPED_BUFFER_SIZE of them are kept.
+
+    Measured like every bus queue (see QueueStats), by chains: time in queue is of the chain taken, not coalesced ones
+    """
+
+    def __init__(self, name: str = "positive_arbitrages",
+                 max_age_ms: int = POSITIVE_ARBITRAGE_MAX_AGE_MS,
+                 sort_by_roi: bool = TRADE_MANAGER_SORT_ARBITRAGE_BY_ROI,
+                 dropped_buffer_size: int = POSITIVE_ARBITRAGE_DROPPED_BUFFER_SIZE,
+                 clock: Callable[[], int] = current_time_ms,
+                 registry: MetricsRegistry = metrics) -> None:
+        self.name = name
+        self.max_age_ms = max_age_ms
+        self.sort_by_roi = sort_by_roi
+        self.clock = clock
+        self.stats = QueueStats(name, registry)
+        self.drop_counts: Dict[str, int] = {DROP_REASON_EXPIRED: 0, DROP_REASON_COALESCED: 0}
+        # Chain path -> (put time ns, the newest chain for it)
+        self._pending: Dict[str, Tuple[int, AChain]] = dict()
+        self._dropped: Deque[AChain] = deque(maxlen=dropped_buffer_size)
+        self._sentinel = None
+        self._not_empty = threading.Condition()
+
+    def put(self, chains: Union[Iterable[AChain], Any], block: bool = True, timeout: float = None):
+        """
+        :param chains: Chain set, as found by PetroniusArbiter. Anything else is a control message (e.g. shutdown
+                sentinel), returned by `get` once there's no chains pending
+        """
+        with self._not_empty:
+            if isinstance(chains, str):
+                self._sentinel = chains
+            else:
+                put_time_ns = time.perf_counter_ns()
+                count = 0
+                for chain in chains:
+                    count += 1
+                    key = chain.to_chain()
+                    previous = self._pending.pop(key, None)
+                    if previous is not None:
+                        self._drop(previous[1], DROP_REASON_COALESCED,
+                            "Coalesced with a newer chain for the same path")
+                    self._pending[key] = (put_time_ns, chain)
+                self.stats.on_put(count, len(self._pending))
+            self._not_empty.notify()
+
+    def put_nowait(self, chains: Union[Iterable[AChain], Any]):
+        self.put(chains, block=False)
+
+    def get(self, block: bool = True, timeout: float = None) -> Union[List[AChain], Any]:
+        """
+        :return: All fresh pending chains, the most profitable first
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        with self._not_empty:
+            while True:
+                chains = self._take_fresh()
+                if chains:
+                    return chains
+                if self._sentinel is not None:
+                    sentinel, self._sentinel = self._sentinel, None
+                    return sentinel
+                if not block:
+                    raise queue.Empty()
+                if deadline is None:
+                    self._not_empty.wait()
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise queue.Empty()
+                    self._not_empty.wait(remaining)
+
+    def get_nowait(self) -> Union[List[AChain], Any]:
+        return self.get(block=False)
+
+    def take_dropped(self) -> List[AChain]:
+        with self._not_empty:
+            dropped = list(self._dropped)
+            self._dropped.clear()
+            return dropped
+
+    def qsize(self) -> int:
+        return len(self._pending)
+
+    def empty(self) -> bool:
+        return self.qsize() == 0
+
+    def snapshot(self) -> Dict:
+        with self._not_empty:
+            return dict(self.stats.snapshot(self.qsize()), dropped=dict(self.drop_counts))
+
+    def _take_fresh(self) -> List[AChain]:
+        if not self._pending:
+            return []
+        now_ms = self.clock()
+        fresh = list()
+        for put_time_ns, chain in self._pending.values():
+            if self.max_age_ms is not None and now_ms - chain.timems > self.max_age_ms:
+                self._drop(chain, DROP_REASON_EXPIRED, f"Expired: found {now_ms - chain.timems} ms ago")
+            else:
+                self.stats.on_get(1, put_time_ns)
+                fresh.append(chain)
+        self._pending.clear()
+        if self.sort_by_roi:
+            fresh.sort(key=lambda c: c.roi, reverse=True)
+        else:
+            fresh.sort(key=lambda c: c.profit, reverse=True)
+        return fresh
+
+    def _drop(self, chain: AChain, reason: str, comment: str):
+        self.drop_counts[reason] += 1
+        chain.comment = comment
+        self._dropped.append(chain)
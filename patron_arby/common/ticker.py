@@ -1,5 +1,7 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import Optional
 
+from patron_arby.common.trace import Trace
 from patron_arby.common.util import current_time_ms
 
 
@@ -10,8 +12,18 @@ class Ticker:
     best_bid_quantity: float
     best_ask: float
     best_ask_quantity: float
+    # Local time we've received the ticker at
     time_ms: int = -1
+    # Time of the event at the exchange, -1 if exchange doesn't provide it
+    exchange_time_ms: int = -1
+    trace: Optional[Trace] = field(default=None, compare=False, repr=False)
 
     def __post_init__(self):
         if self.time_ms == -1:
             self.time_ms = current_time_ms()
+
+    def age_ms(self, now_ms: int) -> int:
+        """
+        :return: How old the price is, by exchange time if known, by receive time otherwise
+        """
+        return now_ms - (self.exchange_time_ms if self.exchange_time_ms > 0 else self.time_ms)
@@ -0,0 +1,157 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from patron_arby.common.metrics import MetricsRegistry, metrics
+from patron_arby.config.base import (
+    TRADE_TRACING_MAX_PENDING_ORDERS,
+    TRADE_TRACING_SLOWEST_COUNT,
+)
+
+log = logging.getLogger(__name__)
+
+# Market data frame received
+STAGE_RECEIVED = "received"
+# Arbitrage search run on the ticker started and ended
+STAGE_FIND_START = "find_start"
+STAGE_FIND_END = "find_end"
+# TradeManager has put orders of the chain to execution
+STAGE_DECIDED = "decided"
+# Order executor has taken the orders
+STAGE_DEQUEUED = "dequeued"
+# Order request sent to the exchange, and replied
+STAGE_SENT = "sent"
+STAGE_ACKED = "acked"
+# First execution report of the order received from user data stream
+STAGE_FIRST_REPORT = "first_report"
+STAGES = (STAGE_RECEIVED, STAGE_FIND_START, STAGE_FIND_END, STAGE_DECIDED, STAGE_DEQUEUED, STAGE_SENT, STAGE_ACKED,
+          STAGE_FIRST_REPORT)
+
+
+class Trace:
+    """
+    Timestamps (epoch ns) of the stages a trade went through. Immutable: `mark` returns new trace, referring to the
+    previous one, so a ticker, chains found on it and their orders share the common stages instead of copying them
+    """
+    __slots__ = ("stage", "time_ns", "parent")
+
+    def __init__(self, stage: str, time_ns: int, parent: "Trace" = None) -> None:
+        self.stage = stage
+        self.time_ns = time_ns
+        self.parent = parent
+
+    @staticmethod
+    def start(time_ns: int = None) -> "Trace":
+        return Trace(STAGE_RECEIVED, time_ns if time_ns is not None else time.time_ns())
+
+    @staticmethod
+    def from_marks(marks: List[Tuple[str, int]]) -> Optional["Trace"]:
+        trace = None
+        for stage, time_ns in marks:
+            trace = Trace(stage, time_ns, trace)
+        return trace
+
+    def mark(self, stage: str, time_ns: int = None) -> "Trace":
+        return Trace(stage, time_ns if time_ns is not None else time.time_ns(), self)
+
+    def marks(self) -> List[Tuple[str, int]]:
+        """
+        :return: [(stage, time ns)], the first stage first
+        """
+        marks = list()
+        trace = self
+        while trace:
+            marks.append((trace.stage, trace.time_ns))
+            trace = trace.parent
+        marks.reverse()
+        return marks
+
+    def __repr__(self):
+        return f"Trace({self.marks()})"
+
+
+class TradeTracer:
+    """
+    Collects finished traces: records latency of every stage, from the previous one, to `trace_us.<previous>_to_<stage>`
+    histograms and the whole trace to `trace_us.total`, and keeps the slowest traces, reported as "trace_slowest" gauge.
+
+    Orders are finished when their first execution report comes: traces wait for it in a bounded map. The report may
+    come before the exchange reply to the order request: then it waits for the trace in another bounded map, and
+    `acked_to_first_report` stage is negative
+    """
+
+    def __init__(self, registry: MetricsRegistry = metrics,
+                 slowest_count: int = TRADE_TRACING_SLOWEST_COUNT,
+                 max_pending: int = TRADE_TRACING_MAX_PENDING_ORDERS) -> None:
+        self.registry = registry
+        self.slowest_count = slowest_count
+        self.max_pending = max_pending
+        self.total_us = registry.histogram("trace_us.total")
+        # Min-heap of (total us, sequence number, label, marks), the fastest of the slowest first
+        self._slowest: List[Tuple[float, int, str, List[Tuple[str, int]]]] = list()
+        self._sequence = itertools.count()
+        # Client order id -> trace, waiting for the first execution report
+        self._pending: OrderedDict = OrderedDict()
+        # Client order id -> time (ns) of execution report, which has come before the trace
+        self._early_reports: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        registry.gauge("trace_slowest", self.slowest)
+
+    def await_report(self, client_order_id: str, trace: Optional[Trace]):
+        if not trace:
+            return
+        with self._lock:
+            report_time_ns = self._early_reports.pop(client_order_id, None)
+            if report_time_ns is None:
+                self._put_bounded(self._pending, client_order_id, trace)
+        if report_time_ns is not None:
+            self.finish(trace.mark(STAGE_FIRST_REPORT, report_time_ns), client_order_id)
+
+    def on_execution_report(self, client_order_id: str, time_ns: int = None):
+        if time_ns is None:
+            time_ns = time.time_ns()
+        with self._lock:
+            trace = self._pending.pop(client_order_id, None)
+            if not trace:
+                # Either not traced, or not the first report, or the trace has not come yet
+                self._put_bounded(self._early_reports, client_order_id, time_ns)
+        if trace:
+            self.finish(trace.mark(STAGE_FIRST_REPORT, time_ns), client_order_id)
+
+    def finish(self, trace: Optional[Trace], label: str):
+        if not trace:
+            return
+        marks = trace.marks()
+        for (previous, previous_ns), (stage, time_ns) in zip(marks, marks[1:]):
+            self.registry.histogram(f"trace_us.{previous}_to_{stage}").record((time_ns - previous_ns) / 1_000)
+        total_us = (marks[-1][1] - marks[0][1]) / 1_000
+        self.total_us.record(total_us)
+        with self._lock:
+            if len(self._slowest) < self.slowest_count:
+                heapq.heappush(self._slowest, (total_us, next(self._sequence), label, marks))
+            elif self._slowest and total_us > self._slowest[0][0]:
+                heapq.heapreplace(self._slowest, (total_us, next(self._sequence), label, marks))
+
+    def _put_bounded(self, d: OrderedDict, key: str, value):
+        if key not in d:
+            d[key] = value
+        if len(d) > self.max_pending:
+            d.popitem(last=False)
+
+    def slowest(self) -> List[Dict]:
+        """
+        :return: Slowest traces, the slowest first, with stages times (us) since the first stage
+        """
+        with self._lock:
+            slowest = sorted(self._slowest, reverse=True)
+        return [{"label": label, "total_us": total_us,
+                 "stages_us": {stage: (time_ns - marks[0][1]) / 1_000 for stage, time_ns in marks}}
+                for total_us, _, label, marks in slowest]
+
+
+# Process-wide tracer
+trade_tracer = TradeTracer()
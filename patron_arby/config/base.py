@@ -7,13 +7,31 @@ ARBITRAGE_COINS = {"USDT", "DOGE", "EUR", "BTC", "BUSD", "ETH", "BNB"}  # "TRY"
 # If true, PetroniusArbiter will fire arbitrage chains as soon as he finds it. Otherwise, he will go till the end,
 # gather all profitable arbitrages together, and fire as a single message
 ARBITRAGE_FIRE_CHAIN_ASAP = False
+# If set, PetroniusArbiter ignores chains having a leg whose price is older than that, ms. Age is counted by exchange
+# event time if exchange provides it, by local receive time otherwise. Binance spot book tickers carry no event time,
+# so their age is always by receive time: network and exchange side delays are not seen. For the same reason, ingest
+# lag ("ingest_lag_ms.*" histograms) is only measured for streams with event time, e.g. user data, not book tickers.
+# Keep in mind that book tickers only come on change, so prices of quiet markets are "old" while still valid. None
+# disables the check
+ARBITRAGE_MAX_TICKER_AGE_MS = None
 
 # If true, TradeManager will fire orders only for the most profitable arbitrage in list he gets.
 # If false, he will fire all arbitrage chain, one by one, in order of profitability
 TRADE_MANAGER_FIRE_ONLY_TOP_ARBITRAGE = True
+# If true, and not firing only the top arbitrage, TradeManager fires the combination of chains, scaled down if needed,
+# that brings the most USD profit within balances (see ChainAllocator), instead of all the chains one by one
+TRADE_MANAGER_ALLOCATE_CHAINS = True
 
 # If True, arbitrage chains are sorted by ROI. Otherwise, sorted by profit
 TRADE_MANAGER_SORT_ARBITRAGE_BY_ROI = True
+# If True, TradeManager puts all the orders of a chain to the fire queue as a single message, and one executor fires
+# them all at once. Otherwise, orders go one by one, and legs of a chain are picked up by whichever executor is free
+TRADE_MANAGER_DISPATCH_CHAIN_ATOMICALLY = True
+
+# Profitable chains found longer ago than that, ms, are dropped before they reach TradeManager. None disables the limit
+POSITIVE_ARBITRAGE_MAX_AGE_MS = 300
+# How many dropped profitable chains are kept to be stored, if TradeManager doesn't take them quickly enough
+POSITIVE_ARBITRAGE_DROPPED_BUFFER_SIZE = 10_000
 
 # If profit is less than that value, USD, we don't put arbitrage orders
 ORDER_PROFIT_THRESHOLD_USD = 0.01
@@ -23,9 +41,104 @@ MAX_BALANCE_RATIO_PER_SINGLE_ORDER = 0.9    # 100%
 
 # If we see same arbitrage chain, with the same profit, coming within the given time frame, we throttle it
 ARBITRAGE_DUPLICATION_TIMEFRAME_MS = 1_000
+# Chains with ROI within the same band are the same arbitrage
+ARBITRAGE_DUPLICATION_ROI_BAND = 0.0001
+# Time frame is tracked in that many buckets: a bucket of chains expires at once
+ARBITRAGE_DUPLICATION_BUCKETS = 10
+# Hard limit of chains remembered, the oldest buckets are dropped beyond it
+ARBITRAGE_DUPLICATION_MAX_CHAINS = 100_000
 
 # How many OrderExecutor threads are run
 ORDER_EXECUTORS_NUMBER = 3
+# If True, orders are placed by a single AsyncOrderExecutor, concurrently on one event loop, instead of
+# ORDER_EXECUTORS_NUMBER threads
+ORDER_EXECUTOR_ASYNC = False
+# Max orders AsyncOrderExecutor has in flight at once
+ORDER_EXECUTOR_MAX_IN_FLIGHT_ORDERS = 32
+# OrderExecutor fires legs of a chain from that many slots, each a thread with its own API client. Slots wait for each
+# other to fire together, at most the given time, then fire anyway
+CHAIN_DISPATCH_LEG_SLOTS = 3
+CHAIN_DISPATCH_BARRIER_TIMEOUT_SECONDS = 1
+# AsyncBinanceRestClient: keep-alive connections pool size, max requests in flight, request timeout and
+# recvWindow of signed requests
+BINANCE_REST_MAX_CONNECTIONS = 8
+BINANCE_REST_MAX_CONCURRENT_REQUESTS = 32
+BINANCE_REST_TIMEOUT_SECONDS = 5
+BINANCE_REST_RECV_WINDOW_MS = 5_000
+# If True, BinanceApi places LIMIT orders via FastBinanceOrderClient (pre-built signed request templates over a warm
+# keep-alive connection) instead of python-binance. One client is shared by all the leg slots of an order executor.
+# Connection is pinged if idle for that long, to keep it warm. Off till the client has run against the real exchange
+BINANCE_FAST_ORDER_CLIENT = False
+BINANCE_FAST_ORDER_CLIENT_PING_PERIOD_SECONDS = 30
+# If True, orders are placed over a persistent Binance websocket API session (BinanceWsOrderSession), and via REST
+# only while the session is down. Session replies are awaited at most the given time
+BINANCE_WS_ORDER_SESSION = False
+BINANCE_WS_ORDER_TIMEOUT_SECONDS = 5
+
+# If True, exchange data is consumed by AsyncBinanceDataListener: all the websocket connections are served by a single
+# asyncio event loop. If False, thread-based unicorn_binance_websocket_api manager is used. Off till the async one has
+# run alongside it in production
+BINANCE_DATA_LISTENER_ASYNC = False
+# Binance allows up to 1024 streams per single websocket connection
+BINANCE_WS_MAX_SUBSCRIPTIONS_PER_CONNECTION = 1024
+BINANCE_WS_PING_INTERVAL_SECONDS = 10
+BINANCE_WS_PING_TIMEOUT_SECONDS = 10
+BINANCE_WS_CLOSE_TIMEOUT_SECONDS = 5
+# Reconnect delay grows twice on each consecutive failure, up to that value
+BINANCE_WS_RECONNECT_MAX_DELAY_SECONDS = 30
+# User data stream listen key expires in 60 minutes, unless kept alive
+BINANCE_LISTEN_KEY_KEEPALIVE_PERIOD_SECONDS = 30 * 60
+
+# Raw frames recorder (enabled by setting RAW_RECORDER_DIR). Frames are dropped if the buffer is full
+RAW_RECORDER_QUEUE_SIZE = 100_000
+# Frames are compressed and written in blocks of that size (uncompressed), or every flush period, whatever comes first
+RAW_RECORDER_BLOCK_SIZE_BYTES = 256 * 1024
+RAW_RECORDER_FLUSH_PERIOD_SECONDS = 1
+RAW_RECORDER_FILE_ROTATION_SECONDS = 60 * 60
+RAW_RECORDER_COMPRESSION_LEVEL = 3
+
+# If True, orders are saved by OrderWriteBehind: put to a buffer, merged by client order id, and written by a separate
+# thread in batches of up to the given size (25 is DynamoDB `batch_write_item` limit), or every flush period
+ORDER_WRITE_BEHIND_ENABLED = True
+ORDER_WRITE_BEHIND_BATCH_SIZE = 25
+ORDER_WRITE_BEHIND_FLUSH_PERIOD_SECONDS = 0.5
+# How many written orders OrderWriteBehind remembers creation time and arbitrage of, to preserve them on later updates
+ORDER_WRITE_BEHIND_KNOWN_ORDERS = 10_000
+# If True, the latest state of recent orders is kept in memory (OrderStateCache), shared by order executors and order
+# listener. Orders are evicted when not updated for the TTL, or least recently updated first when over the size
+ORDER_STATE_CACHE_ENABLED = True
+ORDER_STATE_CACHE_SIZE = 10_000
+ORDER_STATE_CACHE_TTL_SECONDS = 60 * 60
+# Orders are written to the store under one of that many locks: writes of different orders mostly go in parallel
+ORDER_STATE_CACHE_WRITE_LOCKS = 64
+
+# If True, StreamFreshnessMonitor watches market data connections, excludes markets of stalled connections from
+# arbitrage search and resubscribes them
+STREAM_FRESHNESS_MONITOR_ENABLED = True
+STREAM_FRESHNESS_CHECK_PERIOD_SECONDS = 1
+# Connection is stalled if it's silent for longer than that many its usual intervals between events...
+STREAM_STALL_EXPECTED_INTERVALS = 50
+# ...but not less than that, ms
+STREAM_STALL_MIN_SILENCE_MS = 5_000
+# Stalled connection is not resubscribed more often than that, ms
+STREAM_RESUBSCRIBE_COOLDOWN_MS = 30_000
+
+# How often metrics are written to log
+METRICS_REPORT_PERIOD_SECONDS = 60
+
+# Trades are traced from market data frame receipt to the first order execution report: per stage latency histograms,
+# and that many slowest traces are reported with metrics
+TRADE_TRACING_ENABLED = True
+TRADE_TRACING_SLOWEST_COUNT = 10
+# Orders waiting for their first execution report, the oldest are dropped beyond it
+TRADE_TRACING_MAX_PENDING_ORDERS = 10_000
+
+# Socket buffers of UnixSocketBusTransport channels. Kernel caps it by net.core.wmem_max/rmem_max
+BUS_SOCKET_BUFFER_SIZE_BYTES = 4 * 1024 * 1024
+# Max size of a single message going via UnixSocketBusTransport
+BUS_SOCKET_MAX_MESSAGE_BYTES = 1024 * 1024
+# How long producer waits for channel's consumer to bind the socket
+BUS_SOCKET_CONNECT_TIMEOUT_SECONDS = 30
 
 # Max records kinesis allowes to write in a batch
 KINESIS_MAX_BATCH_SIZE = 500
@@ -36,12 +149,37 @@ DEFAULT_USD_COIN = "BUSD"
 BALANCE_UPDATER_PERIOD_SECONDS = 5
 BALANCE_CHECKER_PERIOD_SECONDS = 10
 
+# Balances are tracked by BalanceLedger from user data stream account events, with reservations of orders in flight.
+# REST account polling is then a rare consistency check. Off till the ledger has been checked against REST balances
+# in a live run: order sizing relies on it
+BALANCE_LEDGER_ENABLED = False
+BALANCE_LEDGER_RECONCILE_PERIOD_SECONDS = 300
+# Exchange rates are live prices of market data. REST ones are the fallback for markets with no live price (stale, or
+# not streamed), refreshed every period, and not used when older than the max age, e.g. when REST API fails
+EXCHANGE_RATES_REFRESH_PERIOD_SECONDS = 60
+EXCHANGE_RATES_MAX_AGE_SECONDS = 180
+# Reservations of orders exchange has never reported on (e.g. rejected by REST API) are dropped after that time
+BALANCE_LEDGER_RESERVATION_TTL_SECONDS = 30
+# Relative difference between ledger and REST account balance to warn about
+BALANCE_LEDGER_DRIFT_TOLERANCE = 0.001
+
 BALANCE_CHECKER_DEVIATION_FROM_MEAN_TO_REBALANCE = 0.75
-POSITIVE_ARBITRAGE_STORE_PERIOD_SECONDS = 0.1
+
+# DynamoDB `batch_write_item` limit
+DYNAMODB_MAX_BATCH_SIZE = 25
+# Profitable chains are written to DynamoDB in batches, whatever is pending, up to that many chains at once
+PROFITABLE_ARBITRAGE_WRITER_MAX_DRAIN = 1_000
+# Items DynamoDB leaves unprocessed (throttling) are retried that many times, with exponential backoff
+PROFITABLE_ARBITRAGE_WRITER_MAX_RETRIES = 5
+PROFITABLE_ARBITRAGE_WRITER_RETRY_BACKOFF_SECONDS = 0.05
 
 # todo Is not a constant but rather a parameter
 # If we lose the following % (well, its ratio not percent) of initial balance, trading is stopped
 BALANCE_FALL_TO_STOP_TRADING_RATIO = 0.20
+# Stop loss is also checked on every balance and fill event of the user data stream, not only periodically
+STOP_LOSS_EVENT_DRIVEN = True
+# Realized P&L is reported for that many most recent chains
+STOP_LOSS_MAX_TRACKED_CHAINS = 1_000
 
 # How long order should live before get cancelled
 ORDER_CANCELATOR_ORDER_TTL_MS = 3_000
@@ -59,3 +197,53 @@ class BinanceTimeInForce(Enum):
 # @see https://github.com/binance-us/binance-official-api-docs/blob/master/rest-api.md#new-order--trade for details
 # If == BinanceTimeInForce.GOOD_TILL_CANCELLED, OrderCancelator is started automatically.
 BINANCE_LIMIT_ORDER_DEFAULT_TIME_IN_FORCE: BinanceTimeInForce = BinanceTimeInForce.IMMEDIATE_OR_CANCEL
+
+
+class ChainStorageOverflowPolicy(Enum):
+    # Oldest chains waiting to be stored are dropped to make room for the new ones
+    DROP_OLDEST = "drop_oldest"
+    # Once the buffer is half full, only every CHAIN_STORAGE_SAMPLE_EVERY-th chain is taken, then the oldest dropped
+    SAMPLE = "sample"
+    # Producer waits for room: arbitrage search is slowed down to storage pace, nothing is lost
+    BLOCK = "block"
+
+
+# All the evaluated chains are stored to Firehose by a pipeline of workers, taking them from a bounded buffer
+CHAIN_STORAGE_CAPACITY = 100_000
+CHAIN_STORAGE_OVERFLOW_POLICY = ChainStorageOverflowPolicy.DROP_OLDEST
+CHAIN_STORAGE_SAMPLE_EVERY = 10
+# Worker threads overlap Firehose writes. Encoding holds the GIL, so it's not parallel, and competes with arbitrage
+# search for CPU: a process pool would have to pickle the chains, costing about as much as encoding them
+CHAIN_STORAGE_WORKERS = 4
+# Chains taken by a worker at once. They're packed into as few Firehose records as the record size allows
+CHAIN_STORAGE_BATCH_SIZE = 5_000
+# Batch is written once it's full, otherwise whatever is buffered is written every flush period
+CHAIN_STORAGE_FLUSH_PERIOD_SECONDS = 1
+# Records Firehose has failed to put are retried that many times, with exponential backoff
+CHAIN_STORAGE_MAX_RETRIES = 3
+CHAIN_STORAGE_RETRY_BACKOFF_SECONDS = 0.1
+# Firehose `put_record_batch` limit, besides KINESIS_MAX_BATCH_SIZE records
+FIREHOSE_MAX_BATCH_BYTES = 4 * 1024 * 1024
+# Chains are aggregated into Firehose records as newline-delimited compact JSON, up to that size before compression.
+# Firehose limit is 1000 KiB per record
+CHAIN_RECORD_MAX_BYTES = 1_000_000
+# If True, aggregated records are gzip-compressed. Firehose concatenates records in S3, and concatenated gzip members
+# are still a valid gzip file. Off, as it changes the format of FIREHOSE_ARBITRAGE_STREAM objects for their consumers:
+# turn on along with a new stream, or S3 prefix
+CHAIN_RECORD_COMPRESSION = False
+FIREHOSE_ARBITRAGE_STREAM = "arbitrage"
+
+# All the evaluated chains are aggregated into per-path stats: evaluations, ROI distribution, time spent profitable and
+# lifetime of profitable windows. Stats are stored every flush period, while of raw chains only the profitable ones and
+# a sample of the rest are stored. Off until FIREHOSE_OPPORTUNITY_STATS_STREAM is created: stats writes are best-effort,
+# so with no stream the stats are lost while raw chains are already sampled
+OPPORTUNITY_STATS_ENABLED = False
+OPPORTUNITY_STATS_FLUSH_PERIOD_SECONDS = 60
+# Path is profitable while its ROI is above that
+OPPORTUNITY_STATS_ROI_THRESHOLD = 0
+# ROI histogram bucket width. ROIs out of +/- range are counted in the edge buckets
+OPPORTUNITY_STATS_ROI_BUCKET = 0.0001
+OPPORTUNITY_STATS_ROI_RANGE = 0.01
+# One in that many non-profitable chains is stored raw
+OPPORTUNITY_STATS_RAW_SAMPLE_EVERY = 1_000
+FIREHOSE_OPPORTUNITY_STATS_STREAM = "arbitrage-opportunity-stats"
@@ -7,3 +7,14 @@ BINANCE_API_URL = os.environ.get(
 )
 
 BINANCE_WEB_SOCKET_URL = "binance.com"
+
+BINANCE_WEB_SOCKET_STREAM_URL = os.environ.get(
+    "BINANCE_WEB_SOCKET_STREAM_URL", "wss://stream.binance.com:9443"
+)
+
+BINANCE_WEB_SOCKET_API_URL = os.environ.get(
+    "BINANCE_WEB_SOCKET_API_URL", "wss://ws-api.binance.com:443/ws-api/v3"
+)
+
+# If set, raw frames from exchange are recorded to the given local directory
+RAW_RECORDER_DIR = os.environ.get("RAW_RECORDER_DIR")
@@ -1,41 +1,102 @@
-import json
+import logging
+import math
 from decimal import Decimal
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 import boto3
 
 from patron_arby.common.chain import AChain
 from patron_arby.common.decorators import safely
+from patron_arby.config.base import (
+    FIREHOSE_ARBITRAGE_STREAM,
+    FIREHOSE_OPPORTUNITY_STATS_STREAM,
+    KINESIS_MAX_BATCH_SIZE,
+)
+from patron_arby.db.chain_records import ChainRecordsEncoder
+
+log = logging.getLogger(__name__)
+
+
+def _to_decimal(v: float) -> Optional[Decimal]:
+    # https://github.com/boto/boto3/issues/665: DynamoDB needs Decimals, and exact ones, hence via shortest repr.
+    # Not finite values are not supported at all
+    return Decimal(repr(v)) if math.isfinite(v) else None
+
+
+def profitable_arbitrage_item(arbitrage: AChain) -> Dict:
+    """
+    :return: DynamoDB item of the chain: floats are Decimals, not finite ones are dropped
+    """
+    item = _decimal_values(arbitrage.to_dict())
+    item["steps"] = [_decimal_values(step) for step in item["steps"]]
+    return item
+
+
+def _decimal_values(d: Dict) -> Dict:
+    result = dict()
+    for k, v in d.items():
+        if type(v) is float:
+            v = _to_decimal(v)
+            if v is None:
+                continue
+        result[k] = v
+    return result
 
 
 class ArbitrageDao:
     def __init__(self) -> None:
-        self.table = boto3.resource("dynamodb").Table("patron-arbitrage-arbitrages")
+        self.dynamodb = boto3.resource("dynamodb")
+        self.table = self.dynamodb.Table("patron-arbitrage-arbitrages")
         self.firehose = boto3.client("firehose")
+        self.records_encoder = ChainRecordsEncoder()
 
     @safely
     def put_profitable_arbitrage(self, arbitrage: AChain):
         return self.table.put_item(
-            Item=self._convert_record(arbitrage.to_dict())
+            Item=profitable_arbitrage_item(arbitrage)
         )
 
+    def put_profitable_arbitrage_items(self, items: List[Dict]) -> List[Dict]:
+        """
+        :param items: Made by `profitable_arbitrage_item`, no more than DYNAMODB_MAX_BATCH_SIZE items
+        :return: Items DynamoDB has not processed, to be retried
+        """
+        response = self.dynamodb.batch_write_item(
+            RequestItems={self.table.name: [{"PutRequest": {"Item": item}} for item in items]}
+        )
+        return [r["PutRequest"]["Item"] for r in response.get("UnprocessedItems", {}).get(self.table.name, [])]
+
     @safely
     def put_arbitrage_records(self, chains: List[AChain]):
         if len(chains) == 0:
             return
-        records = [{"Data": json.dumps(c.to_dict())} for c in chains]
-        self.firehose.put_record_batch(
-            DeliveryStreamName='arbitrage',
-            Records=records
-        )
+        records = [record for record, _ in self.records_encoder.encode(chains)]
+        for i in range(0, len(records), KINESIS_MAX_BATCH_SIZE):
+            self.put_serialized_arbitrage_records(records[i:i + KINESIS_MAX_BATCH_SIZE])
+
+    def put_serialized_arbitrage_records(self, records: List[bytes]) -> List[int]:
+        """
+        :param records: Records made by ChainRecordsEncoder, no more than Firehose accepts in a batch
+        :return: Indexes of the records Firehose has failed to put, to be retried
+        """
+        return self._put_record_batch(FIREHOSE_ARBITRAGE_STREAM, records)
 
-    def _convert_record(self, arbitrage_dict: Dict):
-        # https://github.com/boto/boto3/issues/665
-        # https://stackoverflow.com/questions/63026648/errormessage-class-decimal-inexact-class-decimal-rounded-while
-        for k, v in arbitrage_dict.items():
-            if isinstance(v, float):
-                arbitrage_dict[k] = Decimal(str(v))
-            if "steps" in arbitrage_dict:
-                for step_dict in arbitrage_dict.get("steps"):
-                    self._convert_record(step_dict)
-        return arbitrage_dict
+    @safely
+    def put_opportunity_stats(self, stats: List[Dict]):
+        """
+        :param stats: Per-path stats records, see OpportunityStats
+        """
+        records = [record for record, _ in self.records_encoder.encode_dicts(stats)]
+        for i in range(0, len(records), KINESIS_MAX_BATCH_SIZE):
+            failed = self._put_record_batch(FIREHOSE_OPPORTUNITY_STATS_STREAM, records[i:i + KINESIS_MAX_BATCH_SIZE])
+            if failed:
+                log.warning(f"Firehose has failed to put {len(failed)} opportunity stats records")
+
+    def _put_record_batch(self, stream: str, records: List[bytes]) -> List[int]:
+        response = self.firehose.put_record_batch(
+            DeliveryStreamName=stream,
+            Records=[{"Data": r} for r in records]
+        )
+        if not response.get("FailedPutCount"):
+            return list()
+        return [i for i, result in enumerate(response["RequestResponses"]) if result.get("ErrorCode")]
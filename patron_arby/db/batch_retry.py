@@ -0,0 +1,32 @@
+import logging
+import time
+from typing import Callable, List, Optional, TypeVar
+
+log = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def write_with_retries(write: Callable[[List[T]], List[T]], items: List[T], max_retries: int,
+                       retry_backoff_seconds: float, on_retry: Optional[Callable[[List[T]], None]] = None,
+                       what: str = "items") -> List[T]:
+    """
+    Writes items in batch, retrying the ones not written with exponential backoff. If `write` raises, the whole batch
+    is retried
+    :param write: Writes a batch, returns its items not written
+    :param on_retry: Called with items before each retry of them
+    :param what: Items name for the log
+    :return: Items not written after `max_retries` retries, to be dropped by the caller
+    """
+    for attempt in range(max_retries + 1):
+        if attempt:
+            if on_retry:
+                on_retry(items)
+            time.sleep(retry_backoff_seconds * (2 ** (attempt - 1)))
+        try:
+            items = write(items)
+        except Exception as e:
+            log.warning(f"Unable to write {len(items)} {what} (attempt {attempt + 1}): {e}")
+        if not items:
+            return items
+    return items
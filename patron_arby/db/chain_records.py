@@ -0,0 +1,95 @@
+import argparse
+import gzip
+import json
+import re
+import sys
+from typing import Dict, Iterable, List, Tuple
+
+from patron_arby.common.chain import AChain
+from patron_arby.config.base import CHAIN_RECORD_COMPRESSION, CHAIN_RECORD_MAX_BYTES
+
+GZIP_MAGIC = b"\x1f\x8b"
+# Fastest level: repeated keys make most of the gain anyway
+GZIP_COMPRESS_LEVEL = 1
+_NON_WHITESPACE = re.compile(r"\S")
+
+
+class ChainRecordsEncoder:
+    """
+    Aggregates chains into Firehose records: each record is newline-delimited compact JSON of `AChain.to_dict`, as
+    many chains as fit in `max_record_bytes`, optionally gzip-compressed. Use `decode_chain_records` to read them
+    """
+
+    def __init__(self, max_record_bytes: int = CHAIN_RECORD_MAX_BYTES, compress: bool = CHAIN_RECORD_COMPRESSION) \
+            -> None:
+        """
+        :param max_record_bytes: Limit of record size before compression. A chain bigger than that makes a record of
+                its own
+        """
+        self.max_record_bytes = max_record_bytes
+        self.compress = compress
+
+    def encode(self, chains: Iterable[AChain]) -> List[Tuple[bytes, int]]:
+        """
+        :return: [(record, number of chains in it)]
+        """
+        return self.encode_dicts(chain.to_dict() for chain in chains)
+
+    def encode_dicts(self, items: Iterable[Dict]) -> List[Tuple[bytes, int]]:
+        """
+        :return: [(record, number of items in it)]
+        """
+        records: List[Tuple[bytes, int]] = list()
+        lines: List[bytes] = list()
+        size = 0
+        for item in items:
+            line = json.dumps(item, separators=(",", ":")).encode("utf-8") + b"\n"
+            if lines and size + len(line) > self.max_record_bytes:
+                records.append(self._record(lines))
+                lines, size = list(), 0
+            lines.append(line)
+            size += len(line)
+        if lines:
+            records.append(self._record(lines))
+        return records
+
+    def _record(self, lines: List[bytes]) -> Tuple[bytes, int]:
+        data = b"".join(lines)
+        if self.compress:
+            data = gzip.compress(data, GZIP_COMPRESS_LEVEL)
+        return data, len(lines)
+
+
+def decode_chain_records(data: bytes) -> List[Dict]:
+    """
+    Reads chains written by ChainRecordsEncoder: a single record, or records concatenated, e.g. a Firehose S3 object.
+    Objects written before aggregation, a JSON object per record with nothing in between, are read too
+    :return: Chains as `AChain.to_dict` has made them
+    """
+    if data[:2] == GZIP_MAGIC:
+        data = gzip.decompress(data)
+    text = data.decode("utf-8")
+    decoder = json.JSONDecoder()
+    chains = list()
+    match = _NON_WHITESPACE.search(text)
+    while match:
+        chain, end = decoder.raw_decode(text, match.start())
+        chains.append(chain)
+        match = _NON_WHITESPACE.search(text, end)
+    return chains
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m patron_arby.db.chain_records",
+        description="Decodes chains stored to Firehose, e.g. S3 objects, and prints them as JSON lines")
+    parser.add_argument("files", nargs="+")
+    args = parser.parse_args(argv)
+
+    for path in args.files:
+        with open(path, "rb") as f:
+            for chain in decode_chain_records(f.read()):
+                sys.stdout.write(json.dumps(chain) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+import logging
+import threading
+import time
+from typing import Dict, List, Tuple
+
+from patron_arby.arbitrage.opportunity_stats import OpportunityStats
+from patron_arby.common.chain import AChain
+from patron_arby.common.chain_storage_queue import ChainStorageQueue
+from patron_arby.common.metrics import MetricsRegistry, metrics
+from patron_arby.common.util import current_time_ms
+from patron_arby.config.base import (
+    CHAIN_STORAGE_FLUSH_PERIOD_SECONDS,
+    CHAIN_STORAGE_MAX_RETRIES,
+    CHAIN_STORAGE_RETRY_BACKOFF_SECONDS,
+    CHAIN_STORAGE_WORKERS,
+    FIREHOSE_MAX_BATCH_BYTES,
+    KINESIS_MAX_BATCH_SIZE,
+)
+from patron_arby.db.arbitrage_dao import ArbitrageDao
+from patron_arby.db.batch_retry import write_with_retries
+from patron_arby.db.chain_records import ChainRecordsEncoder
+
+log = logging.getLogger(__name__)
+
+
+class ChainStoragePipeline:
+    """
+    Stores all the evaluated chains, taken from ChainStorageQueue, to Firehose. Each worker thread takes a batch,
+    aggregates it into records (see ChainRecordsEncoder) and writes them, so encoding of one batch goes along with writes
+    of others, and a slow write holds up only its own worker. Encoding itself is not parallel: it holds the GIL.
+
+    If opportunity stats are given, all the chains are aggregated by them, and only the chains they return are stored.
+
+    Records Firehose fails to put are retried with exponential backoff, and dropped after `max_retries`. Stats, with
+    dropped records, are exposed as "chain_storage" gauge, chains age when written as "chain_storage.lag_ms" histogram
+    """
+
+    def __init__(self, chains_queue: ChainStorageQueue, arbitrage_dao: ArbitrageDao,
+                 workers: int = CHAIN_STORAGE_WORKERS,
+                 flush_period_seconds: float = CHAIN_STORAGE_FLUSH_PERIOD_SECONDS,
+                 max_batch_records: int = KINESIS_MAX_BATCH_SIZE,
+                 max_batch_bytes: int = FIREHOSE_MAX_BATCH_BYTES,
+                 records_encoder: ChainRecordsEncoder = None,
+                 opportunity_stats: OpportunityStats = None,
+                 max_retries: int = CHAIN_STORAGE_MAX_RETRIES,
+                 retry_backoff_seconds: float = CHAIN_STORAGE_RETRY_BACKOFF_SECONDS,
+                 registry: MetricsRegistry = metrics) -> None:
+        self.chains_queue = chains_queue
+        self.arbitrage_dao = arbitrage_dao
+        self.flush_period_seconds = flush_period_seconds
+        self.max_batch_records = max_batch_records
+        self.max_batch_bytes = max_batch_bytes
+        self.records_encoder = records_encoder if records_encoder else ChainRecordsEncoder()
+        self.opportunity_stats = opportunity_stats
+        self.max_retries = max_retries
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self.stored_count = 0
+        self.records_count = 0
+        self.retried_count = 0
+        self.failed_count = 0
+        self._stats_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._workers = [threading.Thread(target=self._run_worker, name=f"ChainStorage-{i}", daemon=True)
+                         for i in range(workers)]
+        self.lag_ms = registry.histogram("chain_storage.lag_ms")
+        self.write_time_us = registry.histogram("chain_storage.write_us")
+        registry.gauge("chain_storage", self.snapshot)
+
+    def start(self):
+        for worker in self._workers:
+            worker.start()
+
+    def stop(self):
+        """
+        Stores what's buffered so far
+        """
+        self._stopped.set()
+        for worker in self._workers:
+            worker.join()
+
+    def snapshot(self) -> Dict:
+        # Not the queue snapshot: that one is taken by the bus queues gauge, and starts the next rates period
+        return {
+            "queued": self.chains_queue.qsize(),
+            "stored": self.stored_count,
+            "records": self.records_count,
+            "retried": self.retried_count,
+            "dropped": dict(self.chains_queue.drop_counts, failed=self.failed_count),
+        }
+
+    def _run_worker(self):
+        log.debug("Starting")
+        while True:
+            chains = self.chains_queue.take(self.flush_period_seconds)
+            if chains:
+                self._store(chains)
+            elif self._stopped.is_set():
+                break
+        log.debug("Ending")
+
+    def _store(self, chains: List[AChain]):
+        self.lag_ms.record(current_time_ms() - min(c.timems for c in chains))
+        if self.opportunity_stats:
+            chains = self.opportunity_stats.observe(chains)
+        # (record, number of chains in it)
+        batch: List[Tuple[bytes, int]] = list()
+        batch_bytes = 0
+        for record in self.records_encoder.encode(chains):
+            if batch and (len(batch) >= self.max_batch_records or batch_bytes + len(record[0]) > self.max_batch_bytes):
+                self._write(batch)
+                batch, batch_bytes = list(), 0
+            batch.append(record)
+            batch_bytes += len(record[0])
+        if batch:
+            self._write(batch)
+
+    def _write(self, batch: List[Tuple[bytes, int]]):
+        start_ns = time.perf_counter_ns()
+        failed_batch = write_with_retries(self._put_records, batch, self.max_retries, self.retry_backoff_seconds,
+            on_retry=lambda records: self._add_stats(retried=sum(count for _, count in records)), what="records")
+        if not failed_batch:
+            self.write_time_us.record((time.perf_counter_ns() - start_ns) / 1_000)
+            return
+        failed_count = sum(count for _, count in failed_batch)
+        log.error(f"Dropping {failed_count} chains Firehose has failed to put {self.max_retries + 1} times")
+        self._add_stats(failed=failed_count)
+
+    def _put_records(self, batch: List[Tuple[bytes, int]]) -> List[Tuple[bytes, int]]:
+        failed = self.arbitrage_dao.put_serialized_arbitrage_records([record for record, _ in batch])
+        failed_batch = [batch[i] for i in failed]
+        self._add_stats(stored=sum(count for _, count in batch) - sum(count for _, count in failed_batch),
+            records=len(batch) - len(failed_batch))
+        return failed_batch
+
+    def _add_stats(self, stored: int = 0, records: int = 0, retried: int = 0, failed: int = 0):
+        with self._stats_lock:
+            self.stored_count += stored
+            self.records_count += records
+            self.retried_count += retried
+            self.failed_count += failed
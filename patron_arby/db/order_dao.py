@@ -1,5 +1,5 @@
 from decimal import Decimal
-from typing import Dict, Optional
+from typing import Dict, Iterable, Optional
 
 import boto3
 from botocore.exceptions import ClientError
@@ -8,6 +8,27 @@ from patron_arby.common.decorators import safely
 from patron_arby.common.order import Order
 from patron_arby.common.util import current_time_ms
 
+# Default values of Order fields meaning "not known", e.g. websocket events don't carry transaction time
+UNSET_ORDER_VALUES = {"transaction_time": -1, "fired_at": 0, "comment": ""}
+
+
+def merge_order_update(prev: Order, update: Order) -> Order:
+    """
+    :return: Update applied over the previous version of the order: creation time and arbitrage are preserved, fields
+    missing in the update are kept
+    """
+    merged_dict = prev.to_dict()
+    # None values are not there
+    for k, v in update.to_dict().items():
+        if k in UNSET_ORDER_VALUES and UNSET_ORDER_VALUES[k] == v:
+            continue
+        merged_dict[k] = v
+    merged = Order.from_dict(merged_dict)
+    merged.created_at = prev.created_at
+    merged.updated_at = current_time_ms()
+    merged.arbitrage_hash8 = prev.arbitrage_hash8 if prev.arbitrage_hash8 else update.arbitrage_hash8
+    return merged
+
 
 class OrderDao:
     def __init__(self, table=None) -> None:
@@ -43,6 +64,14 @@ class OrderDao:
             Item=self._convert_floats_to_decimals(order.to_dict())
         )
 
+    def put_orders(self, orders: Iterable[Order]):
+        """
+        Writes the orders as they are, without reading previous versions, in `batch_write_item` batches
+        """
+        with self.table.batch_writer(overwrite_by_pkeys=["client_order_id"]) as batch:
+            for order in orders:
+                batch.put_item(Item=self._convert_floats_to_decimals(order.to_dict()))
+
     @staticmethod
     def _convert_floats_to_decimals(order: Dict):
         # https://github.com/boto/boto3/issues/665
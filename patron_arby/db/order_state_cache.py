@@ -0,0 +1,129 @@
+import copy
+import itertools
+import logging
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Optional
+
+from patron_arby.common.decorators import safely
+from patron_arby.common.metrics import MetricsRegistry, metrics
+from patron_arby.common.order import Order
+from patron_arby.config.base import (
+    ORDER_STATE_CACHE_SIZE,
+    ORDER_STATE_CACHE_TTL_SECONDS,
+    ORDER_STATE_CACHE_WRITE_LOCKS,
+)
+from patron_arby.db.order_dao import OrderDao, merge_order_update
+
+log = logging.getLogger(__name__)
+
+
+class OrderStateCache:
+    """
+    Latest state of recent orders, in front of the order store (OrderDao, or OrderWriteBehind).
+    Reads are served from memory, the store is read only on a miss. Writes merge the update into the cached state (see
+    `merge_order_update`) and write the result through to the store as is, so the store is never read on write.
+    An order missing in the cache is considered new on write: orders are put by executors first, and updated within
+    the TTL, so that only happens to orders evicted long ago.
+
+    Orders are evicted when not updated for `ttl_seconds`, and least recently updated first over `max_size`.
+
+    The store is written outside of the cache lock, so a slow store holds up only the writes of the same order (or
+    orders sharing its write lock). Each state cached gets a version: a state is not written if a newer one has been
+    cached meanwhile, as the newer one is written instead. Store errors are logged, not raised
+    """
+
+    def __init__(self, store: OrderDao,
+                 max_size: int = ORDER_STATE_CACHE_SIZE,
+                 ttl_seconds: float = ORDER_STATE_CACHE_TTL_SECONDS,
+                 clock: Callable[[], float] = time.monotonic,
+                 write_locks: int = ORDER_STATE_CACHE_WRITE_LOCKS,
+                 registry: MetricsRegistry = metrics) -> None:
+        """
+        :param store: Has to support `put_orders`, writing orders without reading them first
+        :param write_locks: Orders are written under one of that many locks, picked by client order id
+        """
+        self.store = store
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self.hits_count = 0
+        self.misses_count = 0
+        self.evictions_count = 0
+        # Client order id -> (last update time, version, order), least recently updated first
+        self._orders: OrderedDict = OrderedDict()
+        self._versions = itertools.count(1)
+        self._lock = threading.Lock()
+        # Writes of an order go under the same lock, so the store gets its versions in the same order as the cache
+        self._write_locks = [threading.Lock() for _ in range(write_locks)]
+        registry.gauge("order_state_cache", self.snapshot)
+
+    def get_order(self, client_order_id: str) -> Optional[Order]:
+        with self._lock:
+            self._evict()
+            cached = self._orders.get(client_order_id)
+            if cached:
+                self.hits_count += 1
+                return copy.copy(cached[2])
+            self.misses_count += 1
+
+        order = self.store.get_order(client_order_id)
+        if order:
+            with self._lock:
+                # Unless it has been updated meanwhile
+                if client_order_id not in self._orders:
+                    self._cache(copy.copy(order))
+        return order
+
+    def put_order(self, order: Order):
+        client_order_id = order.client_order_id
+        with self._lock:
+            self._evict()
+            cached = self._orders.get(client_order_id)
+            state = merge_order_update(cached[2], order) if cached else copy.copy(order)
+            version = self._cache(state)
+
+        with self._write_locks[zlib.crc32(client_order_id.encode()) % len(self._write_locks)]:
+            with self._lock:
+                cached = self._orders.get(client_order_id)
+                if cached and cached[1] != version:
+                    # Newer state has been written already, or is about to be
+                    return
+            self._write(state)
+
+    def put_orders(self, orders: Iterable[Order]):
+        for order in orders:
+            self.put_order(order)
+
+    def snapshot(self) -> Dict:
+        return {
+            "size": len(self._orders),
+            "hits": self.hits_count,
+            "misses": self.misses_count,
+            "evictions": self.evictions_count,
+        }
+
+    def _cache(self, order: Order) -> int:
+        """
+        :return: Version of the order state
+        """
+        version = next(self._versions)
+        self._orders.pop(order.client_order_id, None)
+        self._orders[order.client_order_id] = (self.clock(), version, order)
+        self._evict()
+        return version
+
+    @safely
+    def _write(self, order: Order):
+        self.store.put_orders([order])
+
+    def _evict(self):
+        expired_before = self.clock() - self.ttl_seconds
+        while self._orders:
+            updated_at, _, _ = next(iter(self._orders.values()))
+            if len(self._orders) <= self.max_size and updated_at > expired_before:
+                return
+            self._orders.popitem(last=False)
+            self.evictions_count += 1
@@ -0,0 +1,162 @@
+import copy
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from patron_arby.common.metrics import MetricsRegistry, metrics
+from patron_arby.common.order import Order
+from patron_arby.common.util import current_time_ms
+from patron_arby.config.base import (
+    ORDER_WRITE_BEHIND_BATCH_SIZE,
+    ORDER_WRITE_BEHIND_FLUSH_PERIOD_SECONDS,
+    ORDER_WRITE_BEHIND_KNOWN_ORDERS,
+)
+from patron_arby.db.order_dao import OrderDao, merge_order_update
+
+log = logging.getLogger(__name__)
+
+
+class OrderWriteBehind(threading.Thread):
+    """
+    Stand-in for OrderDao taking order writes off the caller's thread: `put_order` only puts the order into a buffer.
+    Buffered updates of the same order are merged, see `merge_order_update`: creation time and arbitrage are preserved,
+    missing fields are kept. This thread writes the buffer in
+    batches, as soon as there is a full batch, or every flush period.
+
+    `get_order` sees buffered orders first, so readers get the latest version even before it's written. It returns a
+    copy, as readers change the order they get
+    """
+
+    def __init__(self, order_dao: OrderDao,
+                 batch_size: int = ORDER_WRITE_BEHIND_BATCH_SIZE,
+                 flush_period_seconds: float = ORDER_WRITE_BEHIND_FLUSH_PERIOD_SECONDS,
+                 known_orders: int = ORDER_WRITE_BEHIND_KNOWN_ORDERS,
+                 registry: MetricsRegistry = metrics) -> None:
+        super().__init__(name="OrderWriteBehind", daemon=True)
+        self.order_dao = order_dao
+        self.batch_size = batch_size
+        self.flush_period_seconds = flush_period_seconds
+        self.known_orders = known_orders
+        self.put_count = 0
+        self.merged_count = 0
+        self.written_count = 0
+        self.failed_batches_count = 0
+        # Client order id -> order to be written
+        self._pending: Dict[str, Order] = dict()
+        # Client order id -> (created at, arbitrage hash8) of written orders, least recently written first
+        self._written: OrderedDict = OrderedDict()
+        self._lock = threading.Condition()
+        self._stopped = False
+        self.flush_time_us = registry.histogram("order_write_behind_flush_us")
+        registry.gauge("order_write_behind", self.snapshot)
+
+    def put_order(self, order: Order):
+        with self._lock:
+            self.put_count += 1
+            # Caller may keep changing its instance
+            self._merge(copy.copy(order))
+            if len(self._pending) >= self.batch_size:
+                self._lock.notify()
+
+    def put_orders(self, orders: Iterable[Order]):
+        for order in orders:
+            self.put_order(order)
+
+    def get_order(self, client_order_id: str) -> Optional[Order]:
+        with self._lock:
+            pending = self._pending.get(client_order_id)
+        if pending:
+            return copy.copy(pending)
+        return self.order_dao.get_order(client_order_id)
+
+    def stop(self):
+        """
+        Writes everything buffered so far
+        """
+        with self._lock:
+            self._stopped = True
+            self._lock.notify()
+        self.join()
+
+    def snapshot(self) -> Dict:
+        return {
+            "pending": len(self._pending),
+            "put": self.put_count,
+            "merged": self.merged_count,
+            "written": self.written_count,
+            "failed_batches": self.failed_batches_count,
+        }
+
+    def run(self) -> None:
+        log.debug("Starting")
+        next_flush_time = time.monotonic() + self.flush_period_seconds
+        while True:
+            with self._lock:
+                timeout = next_flush_time - time.monotonic()
+                if len(self._pending) < self.batch_size and not self._stopped and timeout > 0:
+                    self._lock.wait(timeout)
+                stopped = self._stopped
+            flush_due = stopped or time.monotonic() >= next_flush_time
+            # Between flush periods, only full batches are written
+            self._flush(full_batches_only=not flush_due)
+            if flush_due:
+                next_flush_time = time.monotonic() + self.flush_period_seconds
+            if stopped:
+                break
+        log.debug(f"Ending. {self.snapshot()}")
+
+    def _flush(self, full_batches_only: bool):
+        while True:
+            batch = self._take_batch(full_batches_only)
+            if not batch:
+                return
+            start_ns = time.perf_counter_ns()
+            try:
+                self.order_dao.put_orders(batch)
+            except Exception as e:
+                log.error(f"Unable to write {len(batch)} orders, will retry in {self.flush_period_seconds}s: {e}",
+                    exc_info=True)
+                self.failed_batches_count += 1
+                self._requeue(batch)
+                if not self._stopped:
+                    time.sleep(self.flush_period_seconds)
+                return
+            self.flush_time_us.record((time.perf_counter_ns() - start_ns) / 1_000)
+            self._remember_written(batch)
+
+    def _take_batch(self, full_only: bool) -> List[Order]:
+        with self._lock:
+            if full_only and len(self._pending) < self.batch_size:
+                return list()
+            ids = list(self._pending.keys())[:self.batch_size]
+            return [self._pending.pop(client_order_id) for client_order_id in ids]
+
+    def _merge(self, order: Order):
+        prev = self._pending.get(order.client_order_id)
+        if prev:
+            self.merged_count += 1
+            self._pending[order.client_order_id] = merge_order_update(prev, order)
+            return
+        known: Optional[Tuple[int, int]] = self._written.get(order.client_order_id)
+        if known:
+            order.created_at = known[0]
+            order.arbitrage_hash8 = known[1] if known[1] else order.arbitrage_hash8
+            order.updated_at = current_time_ms()
+        self._pending[order.client_order_id] = order
+
+    def _requeue(self, batch: List[Order]):
+        with self._lock:
+            for order in batch:
+                newer = self._pending.get(order.client_order_id)
+                self._pending[order.client_order_id] = merge_order_update(order, newer) if newer else order
+
+    def _remember_written(self, batch: List[Order]):
+        with self._lock:
+            self.written_count += len(batch)
+            for order in batch:
+                self._written.pop(order.client_order_id, None)
+                self._written[order.client_order_id] = (order.created_at, order.arbitrage_hash8)
+            while len(self._written) > self.known_orders:
+                self._written.popitem(last=False)
@@ -0,0 +1,121 @@
+import logging
+import queue
+import threading
+import time
+from typing import Dict, List
+
+from patron_arby.common.chain import AChain
+from patron_arby.common.metrics import MetricsRegistry, metrics
+from patron_arby.config.base import (
+    DYNAMODB_MAX_BATCH_SIZE,
+    PROFITABLE_ARBITRAGE_WRITER_MAX_DRAIN,
+    PROFITABLE_ARBITRAGE_WRITER_MAX_RETRIES,
+    PROFITABLE_ARBITRAGE_WRITER_RETRY_BACKOFF_SECONDS,
+)
+from patron_arby.db.arbitrage_dao import ArbitrageDao, profitable_arbitrage_item
+from patron_arby.db.batch_retry import write_with_retries
+
+log = logging.getLogger(__name__)
+
+# Time to wait for chains before checking if stopped, by default, seconds
+POLL_TIMEOUT_SECONDS = 1
+
+
+class ProfitableArbitrageWriter(threading.Thread):
+    """
+    Writes profitable chains, processed by TradeManager, to DynamoDB: waits for a chain, takes whatever else is pending
+    (up to `max_drain`), and writes them all in `batch_write_item` batches. Items DynamoDB leaves unprocessed are
+    retried with exponential backoff, and dropped after `max_retries`.
+
+    Stats, with the backlog of chains waiting, are exposed as "profitable_arbitrage_writer" gauge, time to write a
+    batch as "profitable_arbitrage_writer.write_us" histogram
+    """
+
+    def __init__(self, chains_queue: queue.Queue, arbitrage_dao: ArbitrageDao,
+                 max_drain: int = PROFITABLE_ARBITRAGE_WRITER_MAX_DRAIN,
+                 batch_size: int = DYNAMODB_MAX_BATCH_SIZE,
+                 max_retries: int = PROFITABLE_ARBITRAGE_WRITER_MAX_RETRIES,
+                 retry_backoff_seconds: float = PROFITABLE_ARBITRAGE_WRITER_RETRY_BACKOFF_SECONDS,
+                 poll_timeout_seconds: float = POLL_TIMEOUT_SECONDS,
+                 registry: MetricsRegistry = metrics) -> None:
+        super().__init__(name="ProfitableArbitrageWriter", daemon=True)
+        self.chains_queue = chains_queue
+        self.arbitrage_dao = arbitrage_dao
+        self.max_drain = max_drain
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self.poll_timeout_seconds = poll_timeout_seconds
+        self.written_count = 0
+        self.retried_count = 0
+        self.dropped_count = 0
+        self.batches_count = 0
+        self._stopped = threading.Event()
+        self.write_time_us = registry.histogram("profitable_arbitrage_writer.write_us")
+        self.drained = registry.histogram("profitable_arbitrage_writer.drained")
+        registry.gauge("profitable_arbitrage_writer", self.snapshot)
+
+    def stop(self):
+        """
+        Writes what's pending so far
+        """
+        self._stopped.set()
+        self.join()
+
+    def snapshot(self) -> Dict:
+        return {
+            "backlog": self.chains_queue.qsize(),
+            "written": self.written_count,
+            "retried": self.retried_count,
+            "dropped": self.dropped_count,
+            "batches": self.batches_count,
+        }
+
+    def run(self) -> None:
+        log.debug("Starting")
+        while True:
+            chains = self._drain()
+            if chains:
+                self.drained.record(len(chains))
+                self._write(chains)
+            elif self._stopped.is_set():
+                break
+        log.debug(f"Ending. {self.snapshot()}")
+
+    def _drain(self) -> List[AChain]:
+        try:
+            chains = [self.chains_queue.get(timeout=self.poll_timeout_seconds)]
+        except queue.Empty:
+            return list()
+        while len(chains) < self.max_drain:
+            try:
+                chains.append(self.chains_queue.get_nowait())
+            except queue.Empty:
+                break
+        return chains
+
+    def _write(self, chains: List[AChain]):
+        # A batch can't have the same item twice, the latest version wins
+        items = list({chain.uid(): profitable_arbitrage_item(chain) for chain in chains}.values())
+        for i in range(0, len(items), self.batch_size):
+            self._write_batch(items[i:i + self.batch_size])
+
+    def _write_batch(self, items: List[Dict]):
+        start_ns = time.perf_counter_ns()
+        unprocessed = write_with_retries(self._put_items, items, self.max_retries, self.retry_backoff_seconds,
+            on_retry=self._count_retried, what="profitable chains")
+        if not unprocessed:
+            self.batches_count += 1
+            self.write_time_us.record((time.perf_counter_ns() - start_ns) / 1_000)
+            return
+        log.error(f"Dropping {len(unprocessed)} profitable chains DynamoDB has not processed {self.max_retries + 1} "
+                  f"times")
+        self.dropped_count += len(unprocessed)
+
+    def _put_items(self, items: List[Dict]) -> List[Dict]:
+        unprocessed = self.arbitrage_dao.put_profitable_arbitrage_items(items)
+        self.written_count += len(items) - len(unprocessed)
+        return unprocessed
+
+    def _count_retried(self, items: List[Dict]):
+        self.retried_count += len(items)
@@ -0,0 +1,203 @@
+import logging
+import os
+import queue
+import struct
+import threading
+import time
+import zlib
+from typing import BinaryIO, Iterator, List, Optional, Tuple
+
+from patron_arby.config.base import (
+    RAW_RECORDER_BLOCK_SIZE_BYTES,
+    RAW_RECORDER_COMPRESSION_LEVEL,
+    RAW_RECORDER_FILE_ROTATION_SECONDS,
+    RAW_RECORDER_FLUSH_PERIOD_SECONDS,
+    RAW_RECORDER_QUEUE_SIZE,
+)
+
+log = logging.getLogger(__name__)
+
+# File layout: sequence of blocks, each block is a header followed by zlib-compressed records.
+# Block header: magic, first record receive time (ns), last record receive time (ns), records count, compressed size.
+# Having time range in the header allows skipping blocks while seeking, without decompressing them
+BLOCK_MAGIC = b"RFB1"
+BLOCK_HEADER = struct.Struct(">4sqqII")
+# Record: receive time (ns), frame length in bytes, followed by frame itself (UTF-8)
+RECORD_HEADER = struct.Struct(">qI")
+
+FILE_EXTENSION = ".frames"
+
+
+class RawFramesRecorder(threading.Thread):
+    """
+    Appends raw exchange frames, along with their receive time, to rotating compressed files in the given directory.
+    `record` never blocks: frames are put into a bounded queue and written by this thread. If the queue is full, frames
+    are dropped (and counted), as we'd rather lose a recording than add latency to the hot path.
+
+    Each file is named after the receive time (ns) of its first frame, so files can be looked up by time.
+    """
+
+    def __init__(self, directory: str,
+                 queue_size: int = RAW_RECORDER_QUEUE_SIZE,
+                 block_size_bytes: int = RAW_RECORDER_BLOCK_SIZE_BYTES,
+                 flush_period_seconds: float = RAW_RECORDER_FLUSH_PERIOD_SECONDS,
+                 file_rotation_seconds: float = RAW_RECORDER_FILE_ROTATION_SECONDS,
+                 compression_level: int = RAW_RECORDER_COMPRESSION_LEVEL) -> None:
+        super().__init__(name="RawFramesRecorder", daemon=True)
+        self.directory = directory
+        self.block_size_bytes = block_size_bytes
+        self.flush_period_seconds = flush_period_seconds
+        self.file_rotation_ns = int(file_rotation_seconds * 1_000_000_000)
+        self.compression_level = compression_level
+        self.recorded_count = 0
+        self.dropped_count = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._stopped = threading.Event()
+        self._file: Optional[BinaryIO] = None
+        self._file_first_time_ns = 0
+        self._block = bytearray()
+        self._block_first_time_ns = 0
+        self._block_last_time_ns = 0
+        self._block_records_count = 0
+        self._block_started_at = time.monotonic()
+        os.makedirs(directory, exist_ok=True)
+
+    def record(self, raw_frame: str, receive_time_ns: int = None) -> bool:
+        """
+        :return: True if frame is accepted for writing, False if it's dropped because of full buffer
+        """
+        try:
+            self._queue.put_nowait((time.time_ns() if receive_time_ns is None else receive_time_ns, raw_frame))
+            return True
+        except queue.Full:
+            self.dropped_count += 1
+            return False
+
+    def stop(self):
+        """
+        Writes everything recorded so far and closes the current file
+        """
+        self._stopped.set()
+        self.join()
+
+    def run(self) -> None:
+        log.info(f"Recording raw frames to {self.directory}")
+        while not (self._stopped.is_set() and self._queue.empty()):
+            try:
+                receive_time_ns, raw_frame = self._queue.get(timeout=self.flush_period_seconds)
+                self._append(receive_time_ns, raw_frame)
+            except queue.Empty:
+                pass
+            if len(self._block) >= self.block_size_bytes or \
+                    time.monotonic() - self._block_started_at >= self.flush_period_seconds:
+                self._write_block()
+        self._write_block()
+        self._close_file()
+        log.info(f"Stopped. Recorded {self.recorded_count} frames, dropped {self.dropped_count}")
+
+    def _append(self, receive_time_ns: int, raw_frame: str):
+        frame_bytes = raw_frame.encode("utf-8") if isinstance(raw_frame, str) else raw_frame
+        if self._block_records_count == 0:
+            self._block_first_time_ns = receive_time_ns
+        self._block_last_time_ns = receive_time_ns
+        self._block += RECORD_HEADER.pack(receive_time_ns, len(frame_bytes))
+        self._block += frame_bytes
+        self._block_records_count += 1
+        self.recorded_count += 1
+
+    def _write_block(self):
+        self._block_started_at = time.monotonic()
+        if self._block_records_count == 0:
+            return
+        if not self._file or self._block_first_time_ns - self._file_first_time_ns >= self.file_rotation_ns:
+            self._rotate_file(self._block_first_time_ns)
+
+        compressed = zlib.compress(bytes(self._block), self.compression_level)
+        self._file.write(BLOCK_HEADER.pack(BLOCK_MAGIC, self._block_first_time_ns, self._block_last_time_ns,
+            self._block_records_count, len(compressed)))
+        self._file.write(compressed)
+        self._file.flush()
+
+        self._block.clear()
+        self._block_records_count = 0
+
+    def _rotate_file(self, first_time_ns: int):
+        self._close_file()
+        self._file_first_time_ns = first_time_ns
+        path = os.path.join(self.directory, f"{first_time_ns:019d}{FILE_EXTENSION}")
+        log.info(f"Writing raw frames to {path}")
+        self._file = open(path, "ab")
+
+    def _close_file(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+
+class RawFramesReader:
+    """
+    Reads frames written by RawFramesRecorder, in order of receive time, optionally limited to the given time range
+    """
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+
+    def read(self, from_time_ns: int = None, to_time_ns: int = None) -> Iterator[Tuple[int, str]]:
+        """
+        :return: Iterator of (receive time ns, raw frame) tuples
+        """
+        for path in self._files_for_time_range(from_time_ns, to_time_ns):
+            with open(path, "rb") as f:
+                for receive_time_ns, raw_frame in self._read_file(f, from_time_ns, to_time_ns):
+                    yield receive_time_ns, raw_frame
+
+    def list_files(self) -> List[str]:
+        return sorted(os.path.join(self.directory, name) for name in os.listdir(self.directory)
+                      if name.endswith(FILE_EXTENSION))
+
+    def _files_for_time_range(self, from_time_ns: Optional[int], to_time_ns: Optional[int]) -> List[str]:
+        files = self.list_files()
+        first_times = [int(os.path.basename(path)[:-len(FILE_EXTENSION)]) for path in files]
+        result = list()
+        for i, path in enumerate(files):
+            # File contains frames from its first time up to the next file's first time
+            if from_time_ns is not None and i + 1 < len(first_times) and first_times[i + 1] <= from_time_ns:
+                continue
+            if to_time_ns is not None and first_times[i] > to_time_ns:
+                break
+            result.append(path)
+        return result
+
+    @staticmethod
+    def _read_file(f: BinaryIO, from_time_ns: Optional[int], to_time_ns: Optional[int]) \
+            -> Iterator[Tuple[int, str]]:
+        while True:
+            header = f.read(BLOCK_HEADER.size)
+            if len(header) < BLOCK_HEADER.size:
+                return
+            magic, first_time_ns, last_time_ns, _, compressed_size = BLOCK_HEADER.unpack(header)
+            if magic != BLOCK_MAGIC:
+                log.error(f"Corrupted block found in {f.name}, skipping the rest of the file")
+                return
+            if to_time_ns is not None and first_time_ns > to_time_ns:
+                return
+            if from_time_ns is not None and last_time_ns < from_time_ns:
+                f.seek(compressed_size, os.SEEK_CUR)
+                continue
+
+            compressed = f.read(compressed_size)
+            if len(compressed) < compressed_size:
+                # Last block has not been fully written
+                return
+            block = zlib.decompress(compressed)
+            offset = 0
+            while offset < len(block):
+                receive_time_ns, length = RECORD_HEADER.unpack_from(block, offset)
+                offset += RECORD_HEADER.size
+                frame = block[offset:offset + length].decode("utf-8")
+                offset += length
+                if from_time_ns is not None and receive_time_ns < from_time_ns:
+                    continue
+                if to_time_ns is not None and receive_time_ns > to_time_ns:
+                    return
+                yield receive_time_ns, frame
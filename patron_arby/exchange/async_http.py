@@ -0,0 +1,183 @@
+import asyncio
+import logging
+import ssl
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from patron_arby.exchange.http_response import (
+    READ_EXACTLY,
+    READ_LINE,
+    HttpResponse,
+    parse_response,
+)
+
+log = logging.getLogger(__name__)
+
+# Methods safe to resend when it's unknown whether the server has processed the request
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+
+class _Connection:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.reader = reader
+        self.writer = writer
+        self.requests_count = 0
+
+    def close(self):
+        self.writer.close()
+
+
+class AsyncHttpConnectionPool:
+    """
+    Minimal HTTP/1.1 client over asyncio streams, keeping connections to a single host alive and reusing them.
+    Covers what REST APIs need: request with headers and optional body, response with Content-Length or chunked body.
+
+    Number of open connections is limited: requests beyond the limit wait for a free connection
+    """
+
+    def __init__(self, base_url: str, max_connections: int, timeout_seconds: float,
+                 default_headers: Dict[str, str] = None) -> None:
+        """
+        :param base_url: E.g. "https://api.binance.com/api". Path is prepended to every request path
+        """
+        url = urlsplit(base_url)
+        self.host = url.hostname
+        self.is_https = url.scheme == "https"
+        self.port = url.port if url.port else (443 if self.is_https else 80)
+        self.base_path = url.path.rstrip("/")
+        self.timeout_seconds = timeout_seconds
+        self.host_header = self.host if url.port is None else f"{self.host}:{self.port}"
+        self.default_headers = default_headers if default_headers else dict()
+        self._ssl_context = ssl.create_default_context() if self.is_https else None
+        self._idle: List[_Connection] = list()
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._max_connections = max_connections
+
+    async def request(self, method: str, path: str, query: str = None, headers: Dict[str, str] = None,
+                      body: bytes = b"") -> HttpResponse:
+        if self._slots is None:
+            # Created lazily to bind to the running loop
+            self._slots = asyncio.Semaphore(self._max_connections)
+        async with self._slots:
+            request = self._build_request(method, path, query, headers, body)
+            return await asyncio.wait_for(self._send(method, request), self.timeout_seconds)
+
+    async def warm_up(self, connections: int = 1):
+        """
+        Opens connections in advance, so the first requests don't pay for TCP and TLS handshakes
+        """
+        for c in await asyncio.gather(*[self._open() for _ in range(min(connections, self._max_connections))]):
+            self._idle.append(c)
+
+    async def close(self):
+        idle, self._idle = self._idle, list()
+        for c in idle:
+            c.close()
+        for c in idle:
+            try:
+                await c.writer.wait_closed()
+            except Exception:
+                # Connection has been broken anyway
+                pass
+
+    def _build_request(self, method: str, path: str, query: Optional[str], headers: Optional[Dict[str, str]],
+                       body: bytes) -> bytes:
+        target = f"{self.base_path}{path}?{query}" if query else f"{self.base_path}{path}"
+        lines = [f"{method} {target} HTTP/1.1", f"Host: {self.host_header}", f"Content-Length: {len(body)}"]
+        for name, value in self.default_headers.items():
+            lines.append(f"{name}: {value}")
+        if headers:
+            for name, value in headers.items():
+                lines.append(f"{name}: {value}")
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body
+
+    async def _send(self, method: str, request: bytes) -> HttpResponse:
+        connection = self._idle_connection()
+        reused = connection is not None
+        if not connection:
+            connection = await self._open()
+        try:
+            await self._write(connection, request)
+        except ConnectionError as e:
+            connection.close()
+            if not reused:
+                raise
+            # Request has not been sent in full, so the server can't have processed it: retry on a new connection
+            log.debug(f"Reused connection is broken ({e}), retrying on a new one")
+            connection = await self._open()
+            await self._write_or_close(connection, request)
+        except BaseException:
+            connection.close()
+            raise
+
+        try:
+            response, keep_alive = await self._read_response(connection)
+        except (ConnectionError, asyncio.IncompleteReadError) as e:
+            connection.close()
+            # Request has been sent: it may have been processed, so it's only resent if that's harmless
+            if not reused or method not in IDEMPOTENT_METHODS:
+                raise
+            log.debug(f"Reused connection is broken ({e}), retrying {method} on a new one")
+            connection = await self._open()
+            await self._write_or_close(connection, request)
+            response, keep_alive = await self._read_response_or_close(connection)
+        except BaseException:
+            connection.close()
+            raise
+
+        if keep_alive:
+            self._idle.append(connection)
+        else:
+            connection.close()
+        return response
+
+    def _idle_connection(self) -> Optional[_Connection]:
+        while self._idle:
+            connection = self._idle.pop()
+            if not connection.reader.at_eof() and not connection.writer.is_closing():
+                return connection
+            # Closed by the server meanwhile
+            connection.close()
+        return None
+
+    async def _open(self) -> _Connection:
+        reader, writer = await asyncio.open_connection(self.host, self.port, ssl=self._ssl_context)
+        return _Connection(reader, writer)
+
+    @staticmethod
+    async def _write(connection: _Connection, request: bytes):
+        connection.writer.write(request)
+        await connection.writer.drain()
+        connection.requests_count += 1
+
+    async def _write_or_close(self, connection: _Connection, request: bytes):
+        try:
+            await self._write(connection, request)
+        except BaseException:
+            connection.close()
+            raise
+
+    async def _read_response_or_close(self, connection: _Connection) -> Tuple[HttpResponse, bool]:
+        try:
+            return await self._read_response(connection)
+        except BaseException:
+            connection.close()
+            raise
+
+    @staticmethod
+    async def _read_response(connection: _Connection) -> Tuple[HttpResponse, bool]:
+        reader = connection.reader
+        parser = parse_response()
+        instruction = next(parser)
+        while True:
+            kind, size = instruction
+            if kind == READ_LINE:
+                data = await reader.readuntil(b"\r\n")
+            elif kind == READ_EXACTLY:
+                data = await reader.readexactly(size)
+            else:
+                data = await reader.read()
+            try:
+                instruction = parser.send(data)
+            except StopIteration as e:
+                return e.value
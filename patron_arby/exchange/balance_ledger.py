@@ -0,0 +1,242 @@
+import itertools
+import logging
+import threading
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Callable, Dict, Optional, Union
+
+from patron_arby.arbitrage.market_data import MarketData
+from patron_arby.common.metrics import MetricsRegistry, metrics
+from patron_arby.common.util import current_time_ms
+from patron_arby.config.base import (
+    BALANCE_LEDGER_DRIFT_TOLERANCE,
+    BALANCE_LEDGER_RESERVATION_TTL_SECONDS,
+    DEFAULT_USD_COIN,
+)
+from patron_arby.exchange.registry import BalancesRegistry
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class CoinBalance:
+    """
+    Coin balance as the exchange reports it
+    """
+    free: float
+    # Taken by open orders
+    locked: float = 0
+
+
+@dataclass
+class Reservation:
+    coin: str
+    volume: float
+    reserved_at_ms: int
+    # Event time of the first exchange event on the order. Account updates since then reflect the order
+    acknowledged_at_ms: Optional[int] = None
+
+
+@dataclass
+class LedgerEntry:
+    free: float
+    locked: float
+    # Reserved for orders the exchange has not reported on yet
+    reserved: float
+    # Reserved for orders the exchange has reported on, which account updates do not reflect yet
+    in_flight: float
+
+    @property
+    def available(self) -> float:
+        return self.free - self.reserved - self.in_flight
+
+
+class BalanceLedger(BalancesRegistry):
+    """
+    Thread-safe balances registry, kept up to date by account events of the user data stream (`on_account_position`,
+    `on_balance_delta`), with volumes of orders reserved until the exchange reflects them in the account.
+
+    A reservation is made for an order before it's placed, and lives until:
+    - the order is reported by the exchange (`on_order_update`), and an account update not older than that report
+      arrives: the balance then accounts for the order, whether it's open, filled or cancelled
+    - the order has not been placed (`release_balance`)
+    - nothing has been heard about the order for `reservation_ttl_seconds`
+
+    `get_balance` is the available balance: free minus reservations. REST account snapshots (`reconcile`) are only
+    a consistency check, they never drop reservations of orders the snapshot may not reflect
+    """
+
+    def __init__(self, balances: Dict[str, float] = None, exchange_rates: Dict[str, float] = None,
+                 usd_coin: str = DEFAULT_USD_COIN,
+                 market_data: MarketData = None,
+                 reservation_ttl_seconds: float = BALANCE_LEDGER_RESERVATION_TTL_SECONDS,
+                 drift_tolerance: float = BALANCE_LEDGER_DRIFT_TOLERANCE,
+                 clock: Callable[[], int] = current_time_ms,
+                 registry: MetricsRegistry = metrics) -> None:
+        """
+        :param balances: Initial free balances
+        :param clock: Current time, ms
+        """
+        self._lock = threading.RLock()
+        self._balances: Dict[str, CoinBalance] = dict()
+        # Coin -> time (ms) of the latest account update of its balance
+        self._updated_at_ms: Dict[str, int] = dict()
+        # Client order id -> reservation
+        self._reservations: Dict[str, Reservation] = dict()
+        self._last_account_update_ms = 0
+        self._anonymous_ids = itertools.count(1)
+        self.reservation_ttl_ms = reservation_ttl_seconds * 1_000
+        self.drift_tolerance = drift_tolerance
+        self.clock = clock
+        self.drifts_count = 0
+        self.expired_count = 0
+        super().__init__(balances, exchange_rates, usd_coin, market_data, clock=clock)
+        registry.gauge("balance_ledger", self.snapshot)
+
+    @property
+    def balances(self) -> Dict[str, float]:
+        """
+        :return: {coin -> available balance}
+        """
+        with self._lock:
+            self._expire_reservations()
+            return {coin: e.available for coin, e in self._entries().items()}
+
+    @balances.setter
+    def balances(self, balances: Dict[str, float]):
+        with self._lock:
+            self._balances = {coin: CoinBalance(float(v)) for coin, v in balances.items()}
+
+    def get_balance(self, coin: str) -> Optional[float]:
+        entry = self.get_entry(coin)
+        return entry.available if entry else None
+
+    def get_total_balance(self, coin: str) -> Optional[float]:
+        with self._lock:
+            balance = self._balances.get(coin)
+            return balance.free + balance.locked if balance else None
+
+    def get_entry(self, coin: str) -> Optional[LedgerEntry]:
+        with self._lock:
+            self._expire_reservations()
+            return self._entries().get(coin)
+
+    def is_empty(self):
+        with self._lock:
+            return not self._balances
+
+    def reserve_balance(self, coin: str, volume: Union[float, Decimal], client_order_id: str = None):
+        with self._lock:
+            if client_order_id is None:
+                client_order_id = f"anonymous_{next(self._anonymous_ids)}"
+            reservation = Reservation(coin, float(volume), self.clock())
+            self._reservations[client_order_id] = reservation
+            entry = self._entries().get(coin)
+            if entry and entry.available < 0:
+                # No harm in it, the exchange will reject the order. Yet issue a warning
+                log.warning(f"{coin} available balance went below zero: {entry}")
+
+    def reduce_balance(self, coin: str, volume: Union[float, Decimal]):
+        self.reserve_balance(coin, volume)
+
+    def release_balance(self, client_order_id: str):
+        with self._lock:
+            self._reservations.pop(client_order_id, None)
+
+    def on_order_update(self, client_order_id: str, event_time_ms: int):
+        """
+        Exchange has reported on the order: the next account update reflects it
+        """
+        with self._lock:
+            reservation = self._reservations.get(client_order_id)
+            if not reservation or reservation.acknowledged_at_ms is not None:
+                return
+            if event_time_ms <= self._last_account_update_ms:
+                # Account update has come first
+                del self._reservations[client_order_id]
+                return
+            reservation.acknowledged_at_ms = event_time_ms
+
+    def on_account_position(self, balances: Dict[str, CoinBalance], event_time_ms: int):
+        """
+        Balances of the coins which have changed, as of the given time
+        """
+        with self._lock:
+            for coin, balance in balances.items():
+                self._balances[coin] = balance
+                self._updated_at_ms[coin] = event_time_ms
+            self._last_account_update_ms = max(self._last_account_update_ms, event_time_ms)
+            self._drop_reflected_reservations(event_time_ms)
+
+    def on_balance_delta(self, coin: str, delta: float, event_time_ms: int):
+        """
+        Deposit, withdrawal or transfer
+        """
+        with self._lock:
+            balance = self._balances.setdefault(coin, CoinBalance(0))
+            balance.free += delta
+            self._updated_at_ms[coin] = event_time_ms
+
+    def update_balances(self, balances: Dict[str, float]):
+        self.reconcile({coin: CoinBalance(v) for coin, v in balances.items()}, self.clock())
+
+    def reconcile(self, balances: Dict[str, CoinBalance], as_of_ms: int):
+        """
+        Checks ledger against REST account snapshot, requested at the given time. Coins updated by account events
+        since then are skipped, the rest are set from the snapshot
+        """
+        with self._lock:
+            for coin, balance in balances.items():
+                updated_at_ms = self._updated_at_ms.get(coin)
+                if updated_at_ms is not None and updated_at_ms > as_of_ms:
+                    continue
+                known = self._balances.get(coin)
+                if updated_at_ms is not None and known and self._is_drift(known, balance):
+                    self.drifts_count += 1
+                    log.warning(f"{coin} balance drift: ledger has {known}, REST account snapshot has {balance}")
+                self._balances[coin] = balance
+                self._updated_at_ms[coin] = as_of_ms
+            self._expire_reservations()
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "reservations": len(self._reservations),
+                "expired": self.expired_count,
+                "drifts": self.drifts_count,
+                "coins": {coin: {"available": e.available, "reserved": e.reserved, "in_flight": e.in_flight}
+                          for coin, e in self._entries().items() if e.reserved or e.in_flight},
+            }
+
+    def _entries(self) -> Dict[str, LedgerEntry]:
+        entries = {coin: LedgerEntry(b.free, b.locked, 0, 0) for coin, b in self._balances.items()}
+        for r in self._reservations.values():
+            entry = entries.get(r.coin)
+            if not entry:
+                # Balance is unknown: so is what's available
+                continue
+            if r.acknowledged_at_ms is None:
+                entry.reserved += r.volume
+            else:
+                entry.in_flight += r.volume
+        return entries
+
+    def _drop_reflected_reservations(self, as_of_ms: int):
+        reflected = [client_order_id for client_order_id, r in self._reservations.items()
+                     if r.acknowledged_at_ms is not None and r.acknowledged_at_ms <= as_of_ms]
+        for client_order_id in reflected:
+            del self._reservations[client_order_id]
+
+    def _expire_reservations(self):
+        expire_before_ms = self.clock() - self.reservation_ttl_ms
+        expired = [client_order_id for client_order_id, r in self._reservations.items()
+                   if max(r.reserved_at_ms, r.acknowledged_at_ms or 0) < expire_before_ms]
+        for client_order_id in expired:
+            log.debug(f"Reservation of order {client_order_id} has expired: {self._reservations[client_order_id]}")
+            del self._reservations[client_order_id]
+        self.expired_count += len(expired)
+
+    def _is_drift(self, known: CoinBalance, actual: CoinBalance) -> bool:
+        known_total = known.free + known.locked
+        actual_total = actual.free + actual.locked
+        return abs(known_total - actual_total) > self.drift_tolerance * max(abs(known_total), abs(actual_total))
@@ -11,7 +11,9 @@ from patron_arby.config.base import (
     BinanceTimeInForce,
 )
 from patron_arby.db.keys_provider import KeysProvider
+from patron_arby.exchange.balance_ledger import CoinBalance
 from patron_arby.exchange.binance.constants import Binance
+from patron_arby.exchange.binance.fast_order_client import FastBinanceOrderClient
 from patron_arby.exchange.binance.order_converter import BinanceOrderConverter
 from patron_arby.exchange.exchange_api import ExchangeApi
 from patron_arby.exchange.exchange_order_converter import ExchangeOrderConverter
@@ -24,13 +26,17 @@ QUANTIZE_PATTERN = Decimal("1.00000000")
 
 class BinanceApi(ExchangeApi):
     def __init__(self, keys_provider: KeysProvider, order_convertor: ExchangeOrderConverter = BinanceOrderConverter(),
-                 api_url: str = None) -> None:
+                 api_url: str = None, order_client: FastBinanceOrderClient = None) -> None:
+        """
+        :param order_client: If given, LIMIT orders are placed via it, rather than via python-binance
+        """
         self.client = Client(*keys_provider.get_exchange_api_keys(Binance.NAME))
         if api_url:
             log.info(f"Setting API URL = {api_url}")
             self.client.API_URL = api_url
 
         self.order_convertor = order_convertor
+        self.order_client = order_client
 
     def get_exchange_info(self):
         return self.client.get_exchange_info()
@@ -61,6 +67,13 @@ class BinanceApi(ExchangeApi):
         account = self.client.get_account()
         return {bal["asset"]: float(bal["free"]) + float(bal["locked"]) for bal in account.get("balances")}
 
+    def get_account_balances(self) -> Dict[str, CoinBalance]:
+        """
+        :return: {coin -> free and locked balance}
+        """
+        account = self.client.get_account()
+        return {bal["asset"]: CoinBalance(float(bal["free"]), float(bal["locked"])) for bal in account.get("balances")}
+
     def get_latest_prices(self) -> Dict[str, float]:
         tickers = self.client.get_all_tickers()
         return {market_ticker.get("symbol"): float(market_ticker.get("price")) for market_ticker in tickers}
@@ -73,11 +86,14 @@ class BinanceApi(ExchangeApi):
                 https://github.com/binance/binance-spot-api-docs/blob/master/rest-api.md#new-order--trade
         :return: Orders as responded from the exchange
         """
+        if self.order_client:
+            return self.order_convertor.from_rest_api_response(self.order_client.put_order(o, time_in_force))
+
         result_order = self.client.order_limit(
             side=SIDE_BUY if o.is_buy() else SIDE_SELL,
             symbol=o.symbol,
-            quantity=self._norm(o.quantity),
-            price=self._norm(o.price),
+            quantity=o.wire_quantity if o.wire_quantity else self._norm(o.quantity),
+            price=o.wire_price if o.wire_price else self._norm(o.price),
             newClientOrderId=o.client_order_id,
             timeInForce=time_in_force.value
         )
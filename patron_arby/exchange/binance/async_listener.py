@@ -0,0 +1,200 @@
+import asyncio
+import logging
+import math
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+import websockets
+from binance.client import Client
+
+from patron_arby.arbitrage.market_data import MarketData
+from patron_arby.config.base import (
+    BINANCE_LISTEN_KEY_KEEPALIVE_PERIOD_SECONDS,
+    BINANCE_WS_CLOSE_TIMEOUT_SECONDS,
+    BINANCE_WS_MAX_SUBSCRIPTIONS_PER_CONNECTION,
+    BINANCE_WS_PING_INTERVAL_SECONDS,
+    BINANCE_WS_PING_TIMEOUT_SECONDS,
+    BINANCE_WS_RECONNECT_MAX_DELAY_SECONDS,
+)
+from patron_arby.db.keys_provider import KeysProvider
+from patron_arby.db.raw_recorder import RawFramesRecorder
+from patron_arby.exchange.binance.constants import Binance
+from patron_arby.exchange.binance.listener import BinanceDataListener
+from patron_arby.exchange.stream_freshness_monitor import StreamFreshnessMonitor
+from patron_arby.settings import BINANCE_WEB_SOCKET_STREAM_URL
+
+log = logging.getLogger(__name__)
+
+USER_DATA_CONNECTION_LABEL = "user_data"
+
+
+class AsyncBinanceDataListener(BinanceDataListener):
+    """
+    asyncio implementation of BinanceDataListener. Combined market streams and the user data stream are all served by
+    a single event loop, with reconnects and ping/pong handled here.
+
+    Frames are decoded and dispatched right in the coroutine reading the socket, with no intermediate buffer: if
+    consumers are slow, we simply read the socket slower (backpressure), instead of piling up data in memory.
+
+    See also https://binance-docs.github.io/apidocs/spot/en/#websocket-market-streams
+    """
+
+    def __init__(self, market_data: MarketData, keys_provider: Optional[KeysProvider], markets: Set[str],
+                 ws_url: str = BINANCE_WEB_SOCKET_STREAM_URL,
+                 listen_key_provider: Callable[[], str] = None,
+                 max_subscriptions_per_connection: int = BINANCE_WS_MAX_SUBSCRIPTIONS_PER_CONNECTION,
+                 raw_frames_recorder: RawFramesRecorder = None,
+                 freshness_monitor: StreamFreshnessMonitor = None) -> None:
+        """
+        :param keys_provider: Used to obtain user data stream listen key. If None and no listen_key_provider given,
+                    user data stream is not opened
+        :param ws_url: Base websocket URL, without path
+        :param listen_key_provider: Function returning user data stream listen key. If None, listen key is obtained
+                    via REST API using keys_provider
+        """
+        super().__init__(market_data, keys_provider, markets, raw_frames_recorder, freshness_monitor)
+        self.ws_url = ws_url.rstrip("/")
+        self.listen_key_provider = listen_key_provider
+        self.max_subscriptions_per_connection = max_subscriptions_per_connection
+        # Connection label -> currently open websocket
+        self.connections: Dict[str, websockets.WebSocketClientProtocol] = dict()
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stopped = False
+        self._tasks: List[asyncio.Future] = list()
+        self._rest_client: Optional[Client] = None
+
+    def run(self):
+        asyncio.run(self.run_async())
+
+    async def run_async(self):
+        self.loop = asyncio.get_event_loop()
+        self._stopped = False
+
+        log.info(f"Totally markets: {len(self.markets)}")
+
+        connections = list()
+        for label, (channel, markets) in self._market_connections().items():
+            self._register_connection(label, None, markets)
+            connections.append(self._run_connection(label, self._market_stream_url(channel, markets)))
+        if self.listen_key_provider or self.keys_provider:
+            connections.append(self._run_connection(USER_DATA_CONNECTION_LABEL, None))
+            connections.append(self._keep_listen_key_alive())
+
+        self._tasks = [asyncio.ensure_future(c) for c in connections]
+        try:
+            await asyncio.gather(*self._tasks)
+        except asyncio.CancelledError:
+            if not self._stopped:
+                raise
+        finally:
+            self._cancel_tasks()
+
+    def stop(self):
+        """
+        Closes all the connections and makes `run` return. Safe to call from any thread
+        """
+        self._stopped = True
+        if self.loop:
+            self.loop.call_soon_threadsafe(self._cancel_tasks)
+
+    def resubscribe(self, label: str):
+        """
+        Closes the given connection, so it's reopened by its reconnect loop. Safe to call from any thread
+        """
+        ws = self.connections.get(label)
+        if ws and self.loop:
+            self.loop.call_soon_threadsafe(lambda: asyncio.ensure_future(ws.close()))
+
+    def _cancel_tasks(self):
+        for t in self._tasks:
+            t.cancel()
+
+    def _market_stream_urls(self) -> Dict[str, str]:
+        """
+        :return: {connection label -> combined stream URL}
+        """
+        return {label: self._market_stream_url(channel, markets)
+                for label, (channel, markets) in self._market_connections().items()}
+
+    def _market_connections(self) -> Dict[str, Tuple[str, List[str]]]:
+        """
+        :return: {connection label -> (channel, markets)}. Markets are evenly spread among the minimal number of connections
+                allowed by subscriptions limit
+        """
+        connections = dict()
+        for channel in self.channels:
+            for i, chunk in enumerate(self._split_evenly(sorted(self.markets), self.max_subscriptions_per_connection)):
+                connections[f"{channel}_{i + 1}"] = (channel, chunk)
+        return connections
+
+    def _market_stream_url(self, channel: str, markets: List[str]) -> str:
+        return f"{self.ws_url}/stream?streams={'/'.join(f'{m.lower()}@{channel}' for m in markets)}"
+
+    async def _run_connection(self, label: str, url: Optional[str]):
+        """
+        Reads the given connection until stopped, reconnecting on any failure
+        :param url: Stream URL. If None, user data stream URL is built with a fresh listen key on each (re)connect
+        """
+        reconnect_delay = 1
+        while not self._stopped:
+            try:
+                connection_url = url if url else await self._user_data_stream_url()
+                async with websockets.connect(connection_url,
+                        ping_interval=BINANCE_WS_PING_INTERVAL_SECONDS,
+                        ping_timeout=BINANCE_WS_PING_TIMEOUT_SECONDS,
+                        close_timeout=BINANCE_WS_CLOSE_TIMEOUT_SECONDS) as ws:
+                    self.connections[label] = ws
+                    log.info(f"Connection '{label}' is open")
+                    reconnect_delay = 1
+                    async for frame in ws:
+                        self._on_raw_frame(frame)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.warning(f"Connection '{label}' failed: {e}")
+            finally:
+                self.connections.pop(label, None)
+
+            if self._stopped:
+                break
+            log.info(f"Reconnecting '{label}' in {reconnect_delay} s")
+            await asyncio.sleep(reconnect_delay)
+            reconnect_delay = min(reconnect_delay * 2, BINANCE_WS_RECONNECT_MAX_DELAY_SECONDS)
+
+        log.info(f"Connection '{label}' is closed")
+
+    async def _user_data_stream_url(self) -> str:
+        listen_key = await self.loop.run_in_executor(None, self._get_listen_key)
+        return f"{self.ws_url}/ws/{listen_key}"
+
+    async def _keep_listen_key_alive(self):
+        while not self._stopped:
+            await asyncio.sleep(BINANCE_LISTEN_KEY_KEEPALIVE_PERIOD_SECONDS)
+            if self.listen_key_provider:
+                # Listen key is managed by whoever provides it
+                continue
+            try:
+                await self.loop.run_in_executor(None, self._keep_listen_key_alive_sync)
+            except Exception as e:
+                log.error(f"Unable to keep listen key alive: {e}", exc_info=True)
+
+    def _get_listen_key(self) -> str:
+        if self.listen_key_provider:
+            return self.listen_key_provider()
+        return self._get_rest_client().stream_get_listen_key()
+
+    def _keep_listen_key_alive_sync(self):
+        client = self._get_rest_client()
+        client.stream_keepalive(client.stream_get_listen_key())
+
+    def _get_rest_client(self) -> Client:
+        if not self._rest_client:
+            self._rest_client = Client(*self.keys_provider.get_exchange_api_keys(Binance.NAME))
+        return self._rest_client
+
+    @staticmethod
+    def _split_evenly(items: List, max_chunk_size: int) -> List[List]:
+        if not items:
+            return []
+        chunks_number = math.ceil(len(items) / max_chunk_size)
+        chunk_size = math.ceil(len(items) / chunks_number)
+        return [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
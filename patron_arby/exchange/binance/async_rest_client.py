@@ -0,0 +1,102 @@
+import asyncio
+import json
+import logging
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlencode
+
+from patron_arby.common.order import Order
+from patron_arby.common.util import current_time_ms
+from patron_arby.config.base import (
+    BINANCE_LIMIT_ORDER_DEFAULT_TIME_IN_FORCE,
+    BINANCE_REST_MAX_CONCURRENT_REQUESTS,
+    BINANCE_REST_MAX_CONNECTIONS,
+    BINANCE_REST_RECV_WINDOW_MS,
+    BINANCE_REST_TIMEOUT_SECONDS,
+    BinanceTimeInForce,
+)
+from patron_arby.exchange.async_http import AsyncHttpConnectionPool
+from patron_arby.exchange.binance.order_converter import BinanceOrderConverter
+from patron_arby.exchange.binance.signer import BinanceRequestSigner, limit_order_params
+from patron_arby.settings import BINANCE_API_URL
+
+log = logging.getLogger(__name__)
+
+ORDER_PATH = "/v3/order"
+PING_PATH = "/v3/ping"
+API_KEY_HEADER = "X-MBX-APIKEY"
+
+
+class BinanceApiError(Exception):
+    """
+    Error replied by Binance REST API. `code` is Binance error code, e.g. -2010 for insufficient balance
+    """
+
+    def __init__(self, status: int, code: Optional[int], message: str) -> None:
+        super().__init__(f"APIError(code={code}): {message}")
+        self.status = status
+        self.code = code
+        self.message = message
+
+
+class AsyncBinanceRestClient:
+    """
+    asyncio client for Binance order endpoints: place, query and cancel orders, signing requests itself.
+    All the requests go via a pool of keep-alive connections, at most `max_concurrent_requests` in flight
+    """
+
+    def __init__(self, api_key: str, api_secret: str,
+                 api_url: str = BINANCE_API_URL,
+                 max_connections: int = BINANCE_REST_MAX_CONNECTIONS,
+                 max_concurrent_requests: int = BINANCE_REST_MAX_CONCURRENT_REQUESTS,
+                 timeout_seconds: float = BINANCE_REST_TIMEOUT_SECONDS,
+                 recv_window_ms: int = BINANCE_REST_RECV_WINDOW_MS) -> None:
+        """
+        :param api_url: Base API URL, e.g. "https://api.binance.com/api"
+        """
+        self.pool = AsyncHttpConnectionPool(api_url, max_connections, timeout_seconds, {API_KEY_HEADER: api_key})
+        self.signer = BinanceRequestSigner(api_secret)
+        self.max_concurrent_requests = max_concurrent_requests
+        self.recv_window_ms = recv_window_ms
+        self.order_converter = BinanceOrderConverter()
+        self._requests_slots: Optional[asyncio.Semaphore] = None
+
+    async def put_order(self, o: Order, time_in_force: BinanceTimeInForce = BINANCE_LIMIT_ORDER_DEFAULT_TIME_IN_FORCE) \
+            -> Order:
+        """
+        Places LIMIT order
+        :return: Order as responded from the exchange
+        """
+        reply = await self._signed_request("POST", ORDER_PATH, limit_order_params(o, time_in_force))
+        return self.order_converter.from_rest_api_response(reply)
+
+    async def get_order(self, symbol: str, client_order_id: str) -> Order:
+        reply = await self._signed_request("GET", ORDER_PATH,
+            [("symbol", symbol), ("origClientOrderId", client_order_id)])
+        return self.order_converter.from_rest_api_response(reply)
+
+    async def cancel_order(self, symbol: str, order_id: str) -> Dict:
+        return await self._signed_request("DELETE", ORDER_PATH, [("symbol", symbol), ("orderId", order_id)])
+
+    async def ping(self):
+        await self._request("GET", PING_PATH, None)
+
+    async def warm_up(self, connections: int = 1):
+        await self.pool.warm_up(connections)
+
+    async def close(self):
+        await self.pool.close()
+
+    async def _signed_request(self, method: str, path: str, params: List[Tuple[str, str]]) -> Dict:
+        query = urlencode(params + [("recvWindow", self.recv_window_ms), ("timestamp", current_time_ms())])
+        return await self._request(method, path, self.signer.signed_query(query))
+
+    async def _request(self, method: str, path: str, query: Optional[str]) -> Dict:
+        if self._requests_slots is None:
+            self._requests_slots = asyncio.Semaphore(self.max_concurrent_requests)
+        async with self._requests_slots:
+            response = await self.pool.request(method, path, query)
+        reply = json.loads(response.body) if response.body else dict()
+        if response.status >= 400:
+            raise BinanceApiError(response.status, reply.get("code") if isinstance(reply, dict) else None,
+                reply.get("msg") if isinstance(reply, dict) else str(reply))
+        return reply
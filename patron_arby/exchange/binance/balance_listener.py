@@ -0,0 +1,37 @@
+import logging
+from typing import Dict
+
+from patron_arby.exchange.balance_ledger import BalanceLedger, CoinBalance
+from patron_arby.exchange.binance.constants import Binance
+from patron_arby.exchange.exchange_event_listener import ExchangeEventListener
+
+log = logging.getLogger(__name__)
+
+
+class BinanceBalanceListener(ExchangeEventListener):
+    """
+    Feeds BalanceLedger with user data stream events: order reports, account positions and balance updates
+    """
+
+    def __init__(self, ledger: BalanceLedger) -> None:
+        super().__init__()
+        self.ledger = ledger
+
+    def on_exchange_event(self, event: Dict):
+        event_type = event.get(Binance.EVENT_KEY_TYPE)
+        if event_type == Binance.EVENT_TYPE_EXECUTION_REPORT:
+            self._on_execution_report(event)
+        elif event_type == Binance.EVENT_TYPE_ACCOUNT_POSITION:
+            balances = {b[Binance.EVENT_KEY_ASSET]: CoinBalance(float(b[Binance.EVENT_KEY_FREE]),
+                float(b[Binance.EVENT_KEY_LOCKED])) for b in event.get(Binance.EVENT_KEY_BALANCES, [])}
+            self.ledger.on_account_position(balances, event[Binance.EVENT_KEY_EVENT_TIME])
+        elif event_type == Binance.EVENT_TYPE_BALANCE_UPDATE:
+            log.info(f"Got balance update {event}")
+            self.ledger.on_balance_delta(event[Binance.EVENT_KEY_ASSET], float(event[Binance.EVENT_KEY_BALANCE_DELTA]),
+                event[Binance.EVENT_KEY_EVENT_TIME])
+
+    def _on_execution_report(self, event: Dict):
+        # Cancellation reports come with cancel request id, and the order's one as original
+        client_order_id = event.get(Binance.EVENT_KEY_ORIGINAL_CLIENT_ORDER_ID) or \
+            event.get(Binance.EVENT_KEY_CLIENT_ORDER_ID)
+        self.ledger.on_order_update(client_order_id, event[Binance.EVENT_KEY_EVENT_TIME])
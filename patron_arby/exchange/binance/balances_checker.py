@@ -1,9 +1,17 @@
 import logging
+import threading
+import time
+from collections import OrderedDict
 from decimal import Decimal
-from typing import Set
+from typing import Dict, Optional, Set
 
 from patron_arby.common.bus import Bus
-from patron_arby.config.base import ARBITRAGE_COINS, BALANCE_FALL_TO_STOP_TRADING_RATIO
+from patron_arby.common.metrics import MetricsRegistry, metrics
+from patron_arby.config.base import (
+    ARBITRAGE_COINS,
+    BALANCE_FALL_TO_STOP_TRADING_RATIO,
+    STOP_LOSS_MAX_TRACKED_CHAINS,
+)
 from patron_arby.exchange.registry import BalancesRegistry
 
 log = logging.getLogger(__name__)
@@ -14,9 +22,23 @@ DECIMAL_PATTERN = Decimal('1.00000')
 
 
 class BalancesChecker:
+    """
+    Stop loss: stops trading when total USD balance of the coins of interest falls below the given ratio of the
+    initial one, or when realized loss of the orders filled reaches that amount.
+
+    Checked periodically (`check_balance`), and on every balance and fill event of the user data stream
+    (`on_balances_updated`, `on_fill`), so a fast loss halts trading as soon as the exchange reports it. Time from
+    receiving the breaching event to raising the stop trading flag is recorded to "stop_loss.breach_to_halt_us"
+    """
+
     def __init__(self, bus: Bus, registry: BalancesRegistry,
                  coins_of_interest: Set[str] = ARBITRAGE_COINS,
-                 balance_fall_to_stop_trading_ratio: float = BALANCE_FALL_TO_STOP_TRADING_RATIO) -> None:
+                 balance_fall_to_stop_trading_ratio: float = BALANCE_FALL_TO_STOP_TRADING_RATIO,
+                 max_tracked_chains: int = STOP_LOSS_MAX_TRACKED_CHAINS,
+                 metrics_registry: MetricsRegistry = metrics) -> None:
+        """
+        :param max_tracked_chains: Realized P&L is kept for that many most recent chains, for reporting
+        """
         super().__init__()
         self.bus = bus
         self.registry = registry
@@ -24,6 +46,15 @@ class BalancesChecker:
         self.initial_balance = -1
         self.stop_loss_balance = -1
         self.balance_fall_to_stop_trading_ratio = balance_fall_to_stop_trading_ratio
+        self.max_tracked_chains = max_tracked_chains
+        # Sum of USD values of coin amounts bought and sold by the orders filled, fees included
+        self.realized_pnl_usd = 0.0
+        # Arbitrage hash8 -> realized P&L of its orders, USD
+        self._chains_pnl_usd: OrderedDict = OrderedDict()
+        self.breaches_count = 0
+        self._lock = threading.RLock()
+        self.breach_to_halt_us = metrics_registry.histogram("stop_loss.breach_to_halt_us")
+        metrics_registry.gauge("stop_loss", self.snapshot)
         log.info(f"Watching balance for the following coins: {sorted(coins_of_interest)} ")
         log.info(f"Stop Loss: Trading will be forcibly stopped if those coins total balance decreases by "
                  f"{balance_fall_to_stop_trading_ratio * 100}%")
@@ -33,16 +64,69 @@ class BalancesChecker:
             log.warning("Balances Registry is still empty, skipping run")
             return
 
-        balances = self.registry.get_balances(self.coins_of_interest)
-        total_balance_usd = sum([b.value_usd for b in balances.values() if b.value_usd])    # Protect from None
-
         self.log_balances()
+        self._check_balance(self._get_total_balance_usd())
 
-        if self.initial_balance == -1:
-            self._set_initial_balances(total_balance_usd)
+    def on_balances_updated(self, received_at_ns: int = None):
+        """
+        Balances registry has got account update from the exchange
+        :param received_at_ns: Time the update has been received at
+        """
+        if self.registry.is_empty():
             return
+        self._check_balance(self._get_total_balance_usd(), received_at_ns)
+
+    def on_fill(self, client_order_id: str, coin_deltas: Dict[str, float], received_at_ns: int = None):
+        """
+        Order has been (partially) filled
+        :param coin_deltas: {coin -> amount got by the fill}, negative for the amounts given, e.g.
+                {"BTC": 0.1, "USDT": -5000} for BTC bought. Fee is there too
+        :param received_at_ns: Time the fill report has been received at
+        """
+        pnl_usd = 0.0
+        for coin, delta in coin_deltas.items():
+            delta_usd = self.registry.to_usd(coin, delta)
+            if delta_usd is None:
+                log.warning(f"Unable to value {delta} {coin} of order {client_order_id} fill, skipping it")
+                continue
+            pnl_usd += delta_usd
+        hash8 = client_order_id.split("_order_")[0]
+        with self._lock:
+            self.realized_pnl_usd += pnl_usd
+            self._chains_pnl_usd[hash8] = self._chains_pnl_usd.pop(hash8, 0) + pnl_usd
+            if len(self._chains_pnl_usd) > self.max_tracked_chains:
+                self._chains_pnl_usd.popitem(last=False)
+            if self._is_realized_loss_breached():
+                self._stop_trading(f"Realized loss ${-self.realized_pnl_usd} reached stop loss amount "
+                                   f"${self.initial_balance - self.stop_loss_balance}", received_at_ns)
+
+    def get_chain_pnl_usd(self, hash8: str) -> Optional[float]:
+        with self._lock:
+            return self._chains_pnl_usd.get(hash8)
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            worst = sorted(self._chains_pnl_usd.items(), key=lambda item: item[1])[:5]
+            return {
+                "stop_trading": self.bus.is_stop_trading(),
+                "initial_balance_usd": self.initial_balance,
+                "stop_loss_balance_usd": self.stop_loss_balance,
+                "realized_pnl_usd": self.realized_pnl_usd,
+                "breaches": self.breaches_count,
+                "worst_chains_pnl_usd": dict(worst),
+            }
+
+    def _get_total_balance_usd(self) -> float:
+        balances = self.registry.get_balances(self.coins_of_interest)
+        return sum([b.value_usd for b in balances.values() if b.value_usd])    # Protect from None
+
+    def _check_balance(self, total_balance_usd: float, received_at_ns: int = None):
+        with self._lock:
+            if self.initial_balance == -1:
+                self._set_initial_balances(total_balance_usd)
+                return
 
-        self._check_stop_or_resume_trading(total_balance_usd)
+            self._check_stop_or_resume_trading(total_balance_usd, received_at_ns)
 
     def _set_initial_balances(self, total_balance_usd: float):
         self.initial_balance = total_balance_usd
@@ -50,17 +134,32 @@ class BalancesChecker:
         log.info(f"Setting initial USD balance to ${self.initial_balance}")
         log.info(f"Setting stop loss USD balance to ${self.stop_loss_balance}")
 
-    def _check_stop_or_resume_trading(self, total_balance_usd: float):
+    def _check_stop_or_resume_trading(self, total_balance_usd: float, received_at_ns: int = None):
         if total_balance_usd <= self.stop_loss_balance:
-            log.critical(f"Current trading balance {total_balance_usd} fell below stop loss balance "
-                         f"${self.stop_loss_balance}. Stopping trading.")
-            self.bus.set_stop_trading(True)
+            self._stop_trading(f"Current trading balance {total_balance_usd} fell below stop loss balance "
+                               f"${self.stop_loss_balance}", received_at_ns)
+        elif self._is_realized_loss_breached():
+            # Balance may be back thanks to exchange rates, while trading keeps losing: stay stopped
+            pass
         else:
             if self.bus.is_stop_trading():
                 log.info(f"Current trading balance {total_balance_usd} raised back above threshold balance "
                          f"${self.stop_loss_balance}. Resuming trading")
                 self.bus.set_stop_trading(False)
 
+    def _is_realized_loss_breached(self) -> bool:
+        return self.initial_balance > 0 and \
+            -self.realized_pnl_usd >= self.initial_balance - self.stop_loss_balance
+
+    def _stop_trading(self, reason: str, received_at_ns: Optional[int]):
+        if self.bus.is_stop_trading():
+            return
+        self.bus.set_stop_trading(True)
+        if received_at_ns:
+            self.breach_to_halt_us.record((time.time_ns() - received_at_ns) / 1_000)
+        self.breaches_count += 1
+        log.critical(f"{reason}. Stopping trading.")
+
     def balances_report(self) -> str:
         if self.registry.is_empty():
             return "Balances Registry is still empty, skipping report"
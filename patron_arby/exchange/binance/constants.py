@@ -12,6 +12,26 @@ class Binance:
     EVENT_KEY_CLIENT_ORDER_ID = "c"
     EVENT_KEY_ORIGINAL_CLIENT_ORDER_ID = "C"
     EVENT_KEY_EVENT_TIME = "E"
+    EVENT_KEY_TRANSACTION_TIME = "T"
+    EVENT_TYPE_EXECUTION_REPORT = "executionReport"
+    EVENT_KEY_EXECUTION_TYPE = "x"
+    EVENT_KEY_LAST_EXECUTED_QUANTITY = "l"
+    EVENT_KEY_LAST_EXECUTED_PRICE = "L"
+    EVENT_KEY_COMMISSION = "n"
+    EVENT_KEY_COMMISSION_ASSET = "N"
+    EXECUTION_TYPE_TRADE = "TRADE"
+    # https://binance-docs.github.io/apidocs/spot/en/#payload-account-update
+    EVENT_TYPE_ACCOUNT_POSITION = "outboundAccountPosition"
+    EVENT_TYPE_BALANCE_UPDATE = "balanceUpdate"
+    EVENT_KEY_BALANCES = "B"
+    EVENT_KEY_ASSET = "a"
+    EVENT_KEY_FREE = "f"
+    EVENT_KEY_LOCKED = "l"
+    EVENT_KEY_BALANCE_DELTA = "d"
+    # Not a Binance key: local time (ms) the frame has been received at, added by BinanceDataListener
+    EVENT_KEY_RECEIVE_TIME = "receive_time_ms"
+    # Not a Binance key either: the same, ns
+    EVENT_KEY_RECEIVE_TIME_NS = "receive_time_ns"
 
     ORDER_STATUS_FILLED = "FILLED"
     ORDER_STATUS_CANCELLED = "CANCELLED"
@@ -0,0 +1,252 @@
+import json
+import logging
+import select
+import socket
+import ssl
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+from patron_arby.common.metrics import MetricsRegistry, metrics
+from patron_arby.common.order import Order
+from patron_arby.common.util import current_time_ms
+from patron_arby.config.base import (
+    BINANCE_FAST_ORDER_CLIENT_PING_PERIOD_SECONDS,
+    BINANCE_LIMIT_ORDER_DEFAULT_TIME_IN_FORCE,
+    BINANCE_REST_RECV_WINDOW_MS,
+    BINANCE_REST_TIMEOUT_SECONDS,
+    BinanceTimeInForce,
+)
+from patron_arby.exchange.binance.async_rest_client import (
+    API_KEY_HEADER,
+    ORDER_PATH,
+    PING_PATH,
+    BinanceApiError,
+)
+from patron_arby.exchange.binance.signer import BinanceRequestSigner
+from patron_arby.exchange.http_response import read_response_sync
+from patron_arby.settings import BINANCE_API_URL
+
+log = logging.getLogger(__name__)
+
+TIMING_SERIALIZE = "serialize"
+TIMING_SIGN = "sign"
+TIMING_SEND = "send"
+TIMING_FIRST_BYTE = "first_byte"
+TIMING_TIME_TO_WIRE = "time_to_wire"
+
+
+class FastBinanceOrderClient:
+    """
+    Places Binance LIMIT orders with as little work as possible between "fire" and the request being on the wire:
+    - request head is built once, and order params prefix once per (symbol, side): only quantity, price, client order
+      id and timestamp are formatted per order
+    - HMAC is keyed once, see BinanceRequestSigner
+    - single keep-alive connection, with TCP_NODELAY, pinged when idle so it doesn't go cold
+
+    Thread-safe: requests are serialized by a lock, so threads sharing a client take turns on its connection.
+    Every request is timed: serialize, sign, send, first byte of the response. See `last_timings` and the
+    "order_client_*_us" histograms
+    """
+
+    def __init__(self, api_key: str, api_secret: str,
+                 api_url: str = BINANCE_API_URL,
+                 time_in_force: BinanceTimeInForce = BINANCE_LIMIT_ORDER_DEFAULT_TIME_IN_FORCE,
+                 recv_window_ms: int = BINANCE_REST_RECV_WINDOW_MS,
+                 timeout_seconds: float = BINANCE_REST_TIMEOUT_SECONDS,
+                 ping_period_seconds: float = BINANCE_FAST_ORDER_CLIENT_PING_PERIOD_SECONDS,
+                 registry: MetricsRegistry = metrics) -> None:
+        url = urlsplit(api_url)
+        self.host = url.hostname
+        self.is_https = url.scheme == "https"
+        self.port = url.port if url.port else (443 if self.is_https else 80)
+        self.timeout_seconds = timeout_seconds
+        self.time_in_force = time_in_force
+        self.ping_period_seconds = ping_period_seconds
+        self.signer = BinanceRequestSigner(api_secret)
+        self._recv_window_suffix = f"&recvWindow={recv_window_ms}&timestamp="
+
+        host_header = self.host if url.port is None else f"{self.host}:{self.port}"
+        base_path = url.path.rstrip("/")
+        self._order_head = (f"POST {base_path}{ORDER_PATH} HTTP/1.1\r\nHost: {host_header}\r\n"
+                            f"{API_KEY_HEADER}: {api_key}\r\n"
+                            f"Content-Type: application/x-www-form-urlencoded\r\nContent-Length: ").encode("ascii")
+        self._ping_request = f"GET {base_path}{PING_PATH} HTTP/1.1\r\nHost: {host_header}\r\n\r\n".encode("ascii")
+        # (symbol, is buy) -> params prefix, till quantity value
+        self._templates: Dict[Tuple[str, bool], str] = dict()
+
+        self._ssl_context = ssl.create_default_context() if self.is_https else None
+        self._sock: Optional[socket.socket] = None
+        self._reader = None
+        self._lock = threading.Lock()
+        self._last_used = time.monotonic()
+        self._stopped = threading.Event()
+
+        self.last_timings: Dict[str, float] = dict()
+        self._histograms = {name: registry.histogram(f"order_client_{name}_us")
+                            for name in [TIMING_SERIALIZE, TIMING_SIGN, TIMING_SEND, TIMING_FIRST_BYTE,
+                                         TIMING_TIME_TO_WIRE]}
+
+    def put_order(self, o: Order, time_in_force: BinanceTimeInForce = None) -> Dict:
+        """
+        :return: Order as replied by the exchange, raw
+        """
+        t0 = time.perf_counter_ns()
+        template = self._template(o.symbol, o.is_buy(), time_in_force)
+        quantity = o.wire_quantity if o.wire_quantity else f"{o.quantity:.8f}"
+        price = o.wire_price if o.wire_price else f"{o.price:.8f}"
+        body_params = (f"{template}{quantity}&price={price}&newClientOrderId={o.client_order_id}"
+                       f"{self._recv_window_suffix}{current_time_ms()}")
+        t1 = time.perf_counter_ns()
+        body = f"{body_params}&signature={self.signer.sign(body_params)}".encode("ascii")
+        request = b"%s%d\r\n\r\n%s" % (self._order_head, len(body), body)
+        t2 = time.perf_counter_ns()
+        with self._lock:
+            status, reply, t3, t4 = self._exchange(request)
+        self._record_timings(t0, t1, t2, t3, t4)
+        if status >= 400:
+            raise BinanceApiError(status, reply.get("code") if isinstance(reply, dict) else None,
+                reply.get("msg") if isinstance(reply, dict) else str(reply))
+        return reply
+
+    def warm_up(self):
+        """
+        Connects in advance, and prebuilds nothing else: templates are cheap, connection handshake isn't
+        """
+        with self._lock:
+            if not self._sock:
+                self._connect()
+
+    def ping(self):
+        with self._lock:
+            self._exchange(self._ping_request)
+
+    def start_keep_warm(self):
+        threading.Thread(target=self._keep_warm, name="FastBinanceOrderClientKeepWarm", daemon=True).start()
+
+    def close(self):
+        self._stopped.set()
+        with self._lock:
+            self._disconnect()
+
+    def _template(self, symbol: str, is_buy: bool, time_in_force: Optional[BinanceTimeInForce]) -> str:
+        if time_in_force and time_in_force != self.time_in_force:
+            return f"symbol={symbol}&side={'BUY' if is_buy else 'SELL'}&type=LIMIT&timeInForce={time_in_force.value}" \
+                   f"&quantity="
+        template = self._templates.get((symbol, is_buy))
+        if template is None:
+            template = f"symbol={symbol}&side={'BUY' if is_buy else 'SELL'}&type=LIMIT" \
+                       f"&timeInForce={self.time_in_force.value}&quantity="
+            self._templates[(symbol, is_buy)] = template
+        return template
+
+    def _keep_warm(self):
+        while not self._stopped.wait(self.ping_period_seconds / 2):
+            if time.monotonic() - self._last_used < self.ping_period_seconds:
+                continue
+            try:
+                self.ping()
+                log.debug("Pinged to keep connection warm")
+            except Exception as e:
+                log.warning(f"Keep warm ping failed: {e}")
+
+    def _exchange(self, request: bytes) -> Tuple[int, object, int, int]:
+        """
+        :return: Status, parsed reply, time the request is sent, time of the first response byte
+        """
+        if self._sock is not None and self._is_closed_by_server():
+            # Idle connection has been closed by the server meanwhile: reconnect before sending anything
+            log.debug("Idle connection is closed by server, reconnecting")
+            self._disconnect()
+        reused = self._sock is not None
+        if not reused:
+            self._connect()
+        try:
+            sent_ns = self._send(request)
+        except ConnectionError as e:
+            self._disconnect()
+            if not reused:
+                raise
+            # Request has not been sent in full, so the server can't have processed it: retry on a new connection
+            log.debug(f"Reused connection is broken ({e}), retrying on a new one")
+            self._connect()
+            sent_ns = self._send_or_disconnect(request)
+        except BaseException:
+            self._disconnect()
+            raise
+        # Request is on the wire: whatever happens from now on, it may have been processed, so it's never resent
+        try:
+            first_byte_ns = self._wait_first_byte()
+        except BaseException:
+            self._disconnect()
+            raise
+        try:
+            status, reply, keep_alive = self._read_response()
+        except BaseException:
+            self._disconnect()
+            raise
+        if not keep_alive:
+            self._disconnect()
+        self._last_used = time.monotonic()
+        return status, reply, sent_ns, first_byte_ns
+
+    def _connect(self):
+        sock = socket.create_connection((self.host, self.port), self.timeout_seconds)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        if self._ssl_context:
+            sock = self._ssl_context.wrap_socket(sock, server_hostname=self.host)
+        self._sock = sock
+        self._reader = sock.makefile("rb")
+
+    def _disconnect(self):
+        if self._sock:
+            try:
+                self._reader.close()
+                self._sock.close()
+            except OSError:
+                pass
+        self._sock = None
+        self._reader = None
+
+    def _send_or_disconnect(self, request: bytes) -> int:
+        try:
+            return self._send(request)
+        except BaseException:
+            self._disconnect()
+            raise
+
+    def _is_closed_by_server(self) -> bool:
+        """
+        Nothing is expected from the server on an idle connection: if it's readable, it's closed, or broken
+        """
+        try:
+            readable, _, _ = select.select([self._sock], [], [], 0)
+        except (OSError, ValueError):
+            return True
+        return bool(readable)
+
+    def _send(self, request: bytes) -> int:
+        self._sock.sendall(request)
+        return time.perf_counter_ns()
+
+    def _wait_first_byte(self) -> int:
+        if not self._reader.peek(1):
+            raise ConnectionResetError("Connection closed by server")
+        return time.perf_counter_ns()
+
+    def _read_response(self) -> Tuple[int, object, bool]:
+        response, keep_alive = read_response_sync(self._reader)
+        return response.status, json.loads(response.body) if response.body else dict(), keep_alive
+
+    def _record_timings(self, t0: int, t1: int, t2: int, t3: int, t4: int):
+        timings = {
+            TIMING_SERIALIZE: (t1 - t0) / 1_000,
+            TIMING_SIGN: (t2 - t1) / 1_000,
+            TIMING_SEND: (t3 - t2) / 1_000,
+            TIMING_FIRST_BYTE: (t4 - t3) / 1_000,
+            TIMING_TIME_TO_WIRE: (t3 - t0) / 1_000,
+        }
+        for name, value in timings.items():
+            self._histograms[name].record(value)
+        self.last_timings = timings
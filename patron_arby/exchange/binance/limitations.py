@@ -1,40 +1,49 @@
 import logging
-from decimal import Decimal
 from typing import Dict, Optional, Tuple, Union
 
 from patron_arby.common.order import Order
-from patron_arby.common.util import to_decimal
 from patron_arby.exchange.exchange_limitations import (
     ExchangeLimitationName,
     ExchangeLimitations,
 )
+from patron_arby.exchange.quantizer import Quantizer, SymbolQuantizers
 
 log = logging.getLogger(__name__)
 
 
 class BinanceExchangeLimitations(ExchangeLimitations):
     limits: Dict[str, Dict[ExchangeLimitationName, float]] = dict()
+    # Symbol -> its filters, compiled
+    quantizers: Dict[str, SymbolQuantizers] = dict()
 
     def __init__(self, binance_exchange_info: Dict) -> None:
         super().__init__()
+        self.limits = dict()
+        self.quantizers = dict()
         self._build_exchange_limitations(binance_exchange_info)
 
     def get_limitations(self) -> Dict[str, Dict[ExchangeLimitationName, float]]:
         return self.limits
 
     def adjust_price_and_volume_to_market_requirements(self, order: Order):
-        symbol_limits = self.limits.get(order.symbol)
-        if not symbol_limits:
+        """
+        Rounds price to the tick size and quantity to the lot step of the symbol. Order also gets them rendered, as
+        `wire_price` and `wire_quantity`, to be sent as is
+        """
+        quantizers = self.quantizers.get(order.symbol)
+        if not quantizers:
             log.fine(f"Limits for {order.symbol} not found")
             return order
 
-        min_price_step = symbol_limits.get(ExchangeLimitationName.MIN_PRICE_STEP)
-        if min_price_step:
-            order.price = to_decimal(order.price, Decimal(str(min_price_step)))
+        if quantizers.price:
+            ticks = quantizers.price.to_steps(order.price)
+            order.price = quantizers.price.to_float(ticks)
+            order.wire_price = quantizers.price.render(ticks)
 
-        min_volume_step = symbol_limits.get(ExchangeLimitationName.MIN_VOLUME_STEP)
-        if min_volume_step:
-            order.quantity = to_decimal(order.quantity, Decimal(str(min_volume_step)))
+        if quantizers.quantity:
+            lots = quantizers.quantity.to_steps(order.quantity)
+            order.quantity = quantizers.quantity.to_float(lots)
+            order.wire_quantity = quantizers.quantity.render(lots)
 
         return order
 
@@ -51,11 +60,11 @@ class BinanceExchangeLimitations(ExchangeLimitations):
         :return: True if order volume meets MIN_NOTIONAL exchange requirement, or if no MIN_NOTIONAL set.
         If MIN_NOTIONAL set, and requirement is not met, returns False
         """
-        limits = self.limits.get(order.symbol)
-        if not limits:
+        quantizers = self.quantizers.get(order.symbol)
+        if not quantizers:
             log.fine(f"Limits for {order.symbol} not found")
             return True, None
-        min_notional = limits.get(ExchangeLimitationName.MIN_NOTIONAL)
+        min_notional = quantizers.min_notional
         if not min_notional:
             return True, None
 
@@ -78,6 +87,15 @@ class BinanceExchangeLimitations(ExchangeLimitations):
                     # Min notional is set in base coin (e.g. BTCBUSD: 10 => 10 BUSD)
                     market_dict[ExchangeLimitationName.MIN_NOTIONAL] = self._get_value(f, "minNotional")
             self.limits[market] = market_dict
+            self.quantizers[market] = self._compile(market_dict)
+
+    @staticmethod
+    def _compile(market_dict: Dict[ExchangeLimitationName, float]) -> SymbolQuantizers:
+        price_step = market_dict.get(ExchangeLimitationName.MIN_PRICE_STEP)
+        volume_step = market_dict.get(ExchangeLimitationName.MIN_VOLUME_STEP)
+        return SymbolQuantizers(Quantizer(price_step) if price_step else None,
+            Quantizer(volume_step) if volume_step else None,
+            market_dict.get(ExchangeLimitationName.MIN_NOTIONAL))
 
     def _get_value(self, f: Dict, key: str):
         return float(self._remote_trailing_zeros(f.get(key)))
@@ -1,6 +1,7 @@
 import json
 import logging
 import math
+import time
 from typing import Dict, List, Set, Union
 
 from unicorn_binance_websocket_api.unicorn_binance_websocket_api_manager import (
@@ -8,10 +9,13 @@ from unicorn_binance_websocket_api.unicorn_binance_websocket_api_manager import
 )
 
 from patron_arby.arbitrage.market_data import MarketData
+from patron_arby.common.metrics import metrics
 from patron_arby.db.keys_provider import KeysProvider
+from patron_arby.db.raw_recorder import RawFramesRecorder
 from patron_arby.exchange.binance.constants import Binance
 from patron_arby.exchange.binance.ticker_converter import BinanceTickerConverter
 from patron_arby.exchange.exchange_event_listener import ExchangeEventListener
+from patron_arby.exchange.stream_freshness_monitor import StreamFreshnessMonitor
 from patron_arby.settings import BINANCE_WEB_SOCKET_URL
 
 log = logging.getLogger(__name__)
@@ -29,12 +33,19 @@ class BinanceDataListener:
     event_listeners: Set[ExchangeEventListener] = set()
 
     # Todo Replace MarketData with Bus
-    def __init__(self, market_data: MarketData, keys_provider: KeysProvider, markets: Set[str]) -> None:
+    def __init__(self, market_data: MarketData, keys_provider: KeysProvider, markets: Set[str],
+                 raw_frames_recorder: RawFramesRecorder = None,
+                 freshness_monitor: StreamFreshnessMonitor = None) -> None:
         super().__init__()
         self.market_data = market_data
         self.keys_provider = keys_provider
         self.markets = markets
+        self.raw_frames_recorder = raw_frames_recorder
         self.ticker_converter = BinanceTickerConverter()
+        self.event_listeners = set()
+        self.freshness_monitor = freshness_monitor
+        # Connection label -> unicorn stream id
+        self.stream_ids: Dict[str, str] = dict()
 
     def run(self):
         self.ws_manager = BinanceWebSocketApiManager(exchange=BINANCE_WEB_SOCKET_URL)
@@ -51,29 +62,73 @@ class BinanceDataListener:
             if not oldest_stream_data_from_stream_buffer:
                 continue
 
-            exchange_event = self._to_dict(oldest_stream_data_from_stream_buffer)
-            if not exchange_event:
-                continue
-
-            # Refresh data BEFORE notifying listeners
-            if "data" in exchange_event:
-                self.market_data.put(
-                    self.ticker_converter.from_ws_event(exchange_event)
-                )
+            self._on_raw_frame(oldest_stream_data_from_stream_buffer)
+
+    def _on_raw_frame(self, raw_frame: str, receive_time_ns: int = None):
+        """
+        :param receive_time_ns: When the frame has been received. Now, if not given
+        """
+        if receive_time_ns is None:
+            receive_time_ns = time.time_ns()
+        if self.raw_frames_recorder:
+            self.raw_frames_recorder.record(raw_frame, receive_time_ns)
+
+        exchange_event = self._to_dict(raw_frame)
+        if not exchange_event:
+            return
+        receive_time_ms = receive_time_ns // 1_000_000
+        exchange_event[Binance.EVENT_KEY_RECEIVE_TIME] = receive_time_ms
+        exchange_event[Binance.EVENT_KEY_RECEIVE_TIME_NS] = receive_time_ns
+        self._record_ingest_lag(exchange_event, receive_time_ms)
+
+        # Refresh data BEFORE notifying listeners
+        if "data" in exchange_event:
+            ticker = self.ticker_converter.from_ws_event(exchange_event)
+            symbol = ticker.market
+            self.market_data.put(ticker)
+            if self.freshness_monitor:
+                self.freshness_monitor.on_market_event(symbol, receive_time_ms)
+
+        for el in self.event_listeners:
+            el.on_exchange_event(exchange_event)
 
-            for el in self.event_listeners:
-                el.on_exchange_event(exchange_event)
+    @staticmethod
+    def _record_ingest_lag(exchange_event: Dict, receive_time_ms: int):
+        # Combined stream events are wrapped: {"stream": ..., "data": {...}}, user data events are not
+        data = exchange_event.get("data", exchange_event)
+        if not isinstance(data, dict):
+            return
+        exchange_time_ms = data.get(Binance.EVENT_KEY_EVENT_TIME, data.get(Binance.EVENT_KEY_TRANSACTION_TIME))
+        if not exchange_time_ms:
+            # Spot book tickers carry neither: their lag can't be measured, see ARBITRAGE_MAX_TICKER_AGE_MS
+            return
+        stream = exchange_event.get("stream", "user_data")
+        metrics.histogram(f"ingest_lag_ms.{stream}").record(receive_time_ms - exchange_time_ms)
 
     def add_event_listener(self, el: ExchangeEventListener):
         self.event_listeners.add(el)
 
+    def resubscribe(self, label: str):
+        """
+        Reopens the given connection. Called by StreamFreshnessMonitor from its own thread
+        """
+        stream_id = self.stream_ids.get(label)
+        if stream_id:
+            self.ws_manager.set_restart_request(stream_id)
+
+    def _register_connection(self, label: str, stream_id, markets: List[str]):
+        self.stream_ids[label] = stream_id
+        if self.freshness_monitor:
+            self.freshness_monitor.add_connection(label, markets, self.resubscribe)
+
     def _create_streams(self, markets: List):
         divisor = math.ceil(len(markets) / self.ws_manager.get_limit_of_subscriptions_per_stream())
         max_subscriptions = math.ceil(len(markets) / divisor)
 
         for channel in self.channels:
             if len(markets) <= max_subscriptions:
-                self.ws_manager.create_stream(channel, markets, stream_label=channel)
+                stream_id = self.ws_manager.create_stream(channel, markets, stream_label=channel)
+                self._register_connection(channel, stream_id, markets)
                 continue
             loops = 1
             i = 1
@@ -81,8 +136,10 @@ class BinanceDataListener:
             for market in markets:
                 markets_sub.append(market)
                 if i == max_subscriptions or loops * max_subscriptions + i == len(markets):
-                    self.ws_manager.create_stream(channel, markets_sub, stream_label=str(channel + "_" + str(i)),
+                    label = str(channel + "_" + str(i))
+                    stream_id = self.ws_manager.create_stream(channel, markets_sub, stream_label=label,
                         ping_interval=10, ping_timeout=10, close_timeout=5)
+                    self._register_connection(label, stream_id, markets_sub)
                     markets_sub = []
                     i = 1
                     loops += 1
@@ -3,6 +3,7 @@ from typing import Dict
 
 from patron_arby.common.bus import Bus
 from patron_arby.common.order import Order
+from patron_arby.common.trace import TradeTracer, trade_tracer
 from patron_arby.db.order_dao import OrderDao
 from patron_arby.exchange.binance.constants import Binance
 from patron_arby.exchange.binance.order_converter import BinanceOrderConverter
@@ -12,10 +13,11 @@ log = logging.getLogger(__name__)
 
 
 class BinanceOrderListener(ExchangeEventListener):
-    def __init__(self, bus: Bus, order_dao: OrderDao) -> None:
+    def __init__(self, bus: Bus, order_dao: OrderDao, tracer: TradeTracer = trade_tracer) -> None:
         super().__init__()
         self.bus = Bus
         self.order_dao = order_dao
+        self.tracer = tracer
         self.converter = BinanceOrderConverter()
 
     def on_exchange_event(self, event: Dict):
@@ -24,6 +26,7 @@ class BinanceOrderListener(ExchangeEventListener):
 
         log.debug(f"Got order event {event}")
         order = self.converter.from_ws_event(event)
+        self.tracer.on_execution_report(order.client_order_id, event.get(Binance.EVENT_KEY_RECEIVE_TIME_NS))
         if not order.is_our_order():
             log.warning(f"Not out order, ignoring: {order}")
             return
@@ -0,0 +1,50 @@
+import hashlib
+import hmac
+from decimal import Decimal
+from typing import List, Tuple
+
+from patron_arby.common.order import Order
+from patron_arby.config.base import BinanceTimeInForce
+
+# 8 digits precision in prices and quantities
+QUANTIZE_PATTERN = Decimal("1.00000000")
+
+
+class BinanceRequestSigner:
+    """
+    Signs Binance SIGNED endpoint requests: HMAC SHA256 of the query string, hex encoded.
+    HMAC is keyed once, each signature starts from a copy of the keyed state
+    """
+
+    def __init__(self, api_secret: str) -> None:
+        self._keyed = hmac.new(api_secret.encode("utf-8"), digestmod=hashlib.sha256)
+
+    def sign(self, query: str) -> str:
+        h = self._keyed.copy()
+        h.update(query.encode("ascii"))
+        return h.hexdigest()
+
+    def signed_query(self, query: str) -> str:
+        return f"{query}&signature={self.sign(query)}"
+
+
+def norm(f: float) -> str:
+    """
+    Avoids floating point notation in prices and quantities: 1E-3 => 0.00100000
+    """
+    return str(Decimal.from_float(float(f)).quantize(QUANTIZE_PATTERN))
+
+
+def limit_order_params(o: Order, time_in_force: BinanceTimeInForce) -> List[Tuple[str, str]]:
+    """
+    :return: Parameters of LIMIT order, the same python-binance `order_limit` sends
+    """
+    return [
+        ("symbol", o.symbol),
+        ("side", "BUY" if o.is_buy() else "SELL"),
+        ("type", "LIMIT"),
+        ("timeInForce", time_in_force.value),
+        ("quantity", o.wire_quantity if o.wire_quantity else norm(o.quantity)),
+        ("price", o.wire_price if o.wire_price else norm(o.price)),
+        ("newClientOrderId", o.client_order_id),
+    ]
@@ -0,0 +1,53 @@
+import logging
+from typing import Dict
+
+from patron_arby.exchange.binance.balances_checker import BalancesChecker
+from patron_arby.exchange.binance.constants import Binance
+from patron_arby.exchange.exchange_event_listener import ExchangeEventListener
+
+log = logging.getLogger(__name__)
+
+
+class BinanceStopLossListener(ExchangeEventListener):
+    """
+    Feeds BalancesChecker with user data stream events: fills of our orders, and account updates. Should be added
+    after the listener updating balances registry, so the checker sees the updated balances
+    """
+
+    def __init__(self, balances_checker: BalancesChecker, symbol_to_base_quote_coins: Dict[str, str]) -> None:
+        """
+        :param symbol_to_base_quote_coins: { "BTCETH": "BTC/ETH"... }
+        """
+        super().__init__()
+        self.balances_checker = balances_checker
+        self.symbol_to_base_quote_coins = symbol_to_base_quote_coins
+
+    def on_exchange_event(self, event: Dict):
+        event_type = event.get(Binance.EVENT_KEY_TYPE)
+        if event_type == Binance.EVENT_TYPE_EXECUTION_REPORT:
+            if event.get(Binance.EVENT_KEY_EXECUTION_TYPE) == Binance.EXECUTION_TYPE_TRADE:
+                self._on_fill(event)
+        elif event_type in (Binance.EVENT_TYPE_ACCOUNT_POSITION, Binance.EVENT_TYPE_BALANCE_UPDATE):
+            self.balances_checker.on_balances_updated(event.get(Binance.EVENT_KEY_RECEIVE_TIME_NS))
+
+    def _on_fill(self, event: Dict):
+        client_order_id = event.get(Binance.EVENT_KEY_CLIENT_ORDER_ID)
+        if not client_order_id or "_order_" not in client_order_id:
+            # Not our order
+            return
+        base_quote = self.symbol_to_base_quote_coins.get(event.get(Binance.EVENT_KEY_SYMBOL))
+        if not base_quote:
+            log.warning(f"Unknown symbol of order fill, ignoring: {event}")
+            return
+        base, quote = base_quote.split("/")
+        quantity = float(event[Binance.EVENT_KEY_LAST_EXECUTED_QUANTITY])
+        quote_quantity = quantity * float(event[Binance.EVENT_KEY_LAST_EXECUTED_PRICE])
+        if event.get(Binance.EVENT_KEY_ORDER_SIDE) == "BUY":
+            coin_deltas = {base: quantity, quote: -quote_quantity}
+        else:
+            coin_deltas = {base: -quantity, quote: quote_quantity}
+        commission_asset = event.get(Binance.EVENT_KEY_COMMISSION_ASSET)
+        if commission_asset:
+            commission = float(event.get(Binance.EVENT_KEY_COMMISSION) or 0)
+            coin_deltas[commission_asset] = coin_deltas.get(commission_asset, 0) - commission
+        self.balances_checker.on_fill(client_order_id, coin_deltas, event.get(Binance.EVENT_KEY_RECEIVE_TIME_NS))
@@ -1,12 +1,17 @@
 from typing import Dict
 
 from patron_arby.common.ticker import Ticker
+from patron_arby.exchange.binance.constants import Binance
 from patron_arby.exchange.exchange_ticker_converter import ExchangeTickerConverter
 
 
 class BinanceTickerConverter(ExchangeTickerConverter):
     def from_ws_event(self, ticker_event: Dict) -> Ticker:
         data = ticker_event["data"]
+        # Spot book ticker doesn't carry event time, other streams (e.g. futures book ticker) do
+        exchange_time_ms = data.get(Binance.EVENT_KEY_EVENT_TIME, data.get(Binance.EVENT_KEY_TRANSACTION_TIME, -1))
         return Ticker(market=data.get("s"),
             best_bid=float(data.get("b")), best_bid_quantity=float(data.get("B")),
-            best_ask=float(data.get("a")), best_ask_quantity=float(data.get("A")))
+            best_ask=float(data.get("a")), best_ask_quantity=float(data.get("A")),
+            time_ms=ticker_event.get(Binance.EVENT_KEY_RECEIVE_TIME, -1),
+            exchange_time_ms=exchange_time_ms)
@@ -0,0 +1,234 @@
+import asyncio
+import concurrent.futures
+import itertools
+import json
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+import websockets
+
+from patron_arby.common.metrics import MetricsRegistry, metrics
+from patron_arby.common.order import Order
+from patron_arby.common.util import current_time_ms
+from patron_arby.config.base import (
+    BINANCE_LIMIT_ORDER_DEFAULT_TIME_IN_FORCE,
+    BINANCE_REST_RECV_WINDOW_MS,
+    BINANCE_WS_CLOSE_TIMEOUT_SECONDS,
+    BINANCE_WS_ORDER_TIMEOUT_SECONDS,
+    BINANCE_WS_PING_INTERVAL_SECONDS,
+    BINANCE_WS_PING_TIMEOUT_SECONDS,
+    BINANCE_WS_RECONNECT_MAX_DELAY_SECONDS,
+    BinanceTimeInForce,
+)
+from patron_arby.exchange.binance.async_rest_client import BinanceApiError
+from patron_arby.exchange.binance.order_converter import BinanceOrderConverter
+from patron_arby.exchange.binance.signer import BinanceRequestSigner
+from patron_arby.exchange.exchange_api import ExchangeApi
+from patron_arby.settings import BINANCE_WEB_SOCKET_API_URL
+
+log = logging.getLogger(__name__)
+
+METHOD_ORDER_PLACE = "order.place"
+METHOD_ORDER_CANCEL = "order.cancel"
+
+
+class WsSessionNotConnectedError(ConnectionError):
+    """
+    Request has not been sent, as there is no session. Safe to retry elsewhere
+    """
+
+
+class WsSessionLostError(ConnectionError):
+    """
+    Session has been lost after the request was sent: exchange might have processed it
+    """
+
+
+class BinanceWsOrderSession(ExchangeApi):
+    """
+    Places and cancels orders over a persistent Binance websocket API session, saving HTTP request overhead per order.
+    Every request is signed (HMAC keys don't allow session logon), replies are matched to requests by id and converted
+    to the same Order objects REST replies are.
+
+    Session is served by its own event loop thread, so orders can be placed from any thread. While the session is down,
+    orders go via `fallback` REST API. A request in flight when the session is lost is not retried, as it might have
+    been processed: it fails with WsSessionLostError. Everything besides orders is delegated to `fallback`
+    """
+
+    def __init__(self, api_key: str, api_secret: str, fallback: ExchangeApi,
+                 ws_api_url: str = BINANCE_WEB_SOCKET_API_URL,
+                 time_in_force: BinanceTimeInForce = BINANCE_LIMIT_ORDER_DEFAULT_TIME_IN_FORCE,
+                 recv_window_ms: int = BINANCE_REST_RECV_WINDOW_MS,
+                 timeout_seconds: float = BINANCE_WS_ORDER_TIMEOUT_SECONDS,
+                 registry: MetricsRegistry = metrics) -> None:
+        """
+        :param fallback: REST API, placing orders with the same time in force
+        """
+        self.api_key = api_key
+        self.signer = BinanceRequestSigner(api_secret)
+        self.fallback = fallback
+        self.ws_api_url = ws_api_url
+        self.time_in_force = time_in_force
+        self.recv_window_ms = recv_window_ms
+        self.timeout_seconds = timeout_seconds
+        self.order_converter = BinanceOrderConverter()
+        self.round_trip_us = registry.histogram("ws_order_round_trip_us")
+        self.fallback_requests_count = 0
+
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self._ws: Optional[websockets.WebSocketClientProtocol] = None
+        self._connected = threading.Event()
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+        self._request_ids = itertools.count(1)
+        self._pending: Dict[str, asyncio.Future] = dict()
+
+    def start(self):
+        self._thread = threading.Thread(target=lambda: asyncio.run(self._run()), name="BinanceWsOrderSession",
+            daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped = True
+        ws, loop = self._ws, self.loop
+        if ws and loop:
+            loop.call_soon_threadsafe(lambda: asyncio.ensure_future(ws.close()))
+        if self._thread:
+            self._thread.join(self.timeout_seconds)
+
+    def is_connected(self) -> bool:
+        return self._connected.is_set()
+
+    def wait_connected(self, timeout_seconds: float) -> bool:
+        return self._connected.wait(timeout_seconds)
+
+    def put_order(self, o: Order) -> Order:
+        params = {
+            "symbol": o.symbol,
+            "side": "BUY" if o.is_buy() else "SELL",
+            "type": "LIMIT",
+            "timeInForce": self.time_in_force.value,
+            "quantity": o.wire_quantity if o.wire_quantity else f"{o.quantity:.8f}",
+            "price": o.wire_price if o.wire_price else f"{o.price:.8f}",
+            "newClientOrderId": o.client_order_id,
+        }
+        try:
+            result = self._call(METHOD_ORDER_PLACE, params)
+        except WsSessionNotConnectedError:
+            log.debug(f"No websocket session, placing order {o.client_order_id} via REST")
+            self.fallback_requests_count += 1
+            return self.fallback.put_order(o)
+        return self.order_converter.from_rest_api_response(result)
+
+    def cancel_order(self, symbol: str, order_id: str) -> object:
+        try:
+            return self._call(METHOD_ORDER_CANCEL, {"symbol": symbol, "orderId": order_id})
+        except WsSessionNotConnectedError:
+            self.fallback_requests_count += 1
+            return self.fallback.cancel_order(symbol, order_id)
+
+    def put_market_order(self, o: Order) -> Order:
+        return self.fallback.put_market_order(o)
+
+    def get_all_markets(self) -> List[str]:
+        return self.fallback.get_all_markets()
+
+    def get_trade_fees(self) -> Dict[str, float]:
+        return self.fallback.get_trade_fees()
+
+    def get_default_trade_fee(self) -> Optional[float]:
+        return self.fallback.get_default_trade_fee()
+
+    def get_balances(self) -> Dict[str, float]:
+        return self.fallback.get_balances()
+
+    def get_latest_prices(self) -> Dict[str, float]:
+        return self.fallback.get_latest_prices()
+
+    def get_open_orders(self) -> List[Order]:
+        return self.fallback.get_open_orders()
+
+    def _call(self, method: str, params: Dict) -> Dict:
+        if not self.is_connected():
+            raise WsSessionNotConnectedError("No session")
+        start_ns = time.perf_counter_ns()
+        future = asyncio.run_coroutine_threadsafe(self._request(method, params), self.loop)
+        try:
+            result = future.result(self.timeout_seconds)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise TimeoutError(f"No reply to {method} in {self.timeout_seconds}s")
+        self.round_trip_us.record((time.perf_counter_ns() - start_ns) / 1_000)
+        return result
+
+    async def _request(self, method: str, params: Dict) -> Dict:
+        ws = self._ws
+        if not ws:
+            raise WsSessionNotConnectedError("No session")
+        request_id = str(next(self._request_ids))
+        reply_future = self.loop.create_future()
+        self._pending[request_id] = reply_future
+        try:
+            try:
+                await ws.send(json.dumps({"id": request_id, "method": method, "params": self._signed(params)}))
+            except websockets.ConnectionClosed as e:
+                raise WsSessionNotConnectedError(f"Session is closed: {e}")
+            reply = await reply_future
+        finally:
+            self._pending.pop(request_id, None)
+        if reply.get("status", 200) >= 400:
+            error = reply.get("error") or dict()
+            raise BinanceApiError(reply.get("status"), error.get("code"), error.get("msg"))
+        return reply.get("result")
+
+    def _signed(self, params: Dict) -> Dict:
+        """
+        Signature is HMAC of all the params, sorted by name, as query string
+        """
+        signed = dict(params, apiKey=self.api_key, recvWindow=self.recv_window_ms, timestamp=current_time_ms())
+        signed["signature"] = self.signer.sign("&".join(f"{k}={v}" for k, v in sorted(signed.items())))
+        return signed
+
+    async def _run(self):
+        self.loop = asyncio.get_event_loop()
+        reconnect_delay = 1
+        while not self._stopped:
+            try:
+                async with websockets.connect(self.ws_api_url,
+                        ping_interval=BINANCE_WS_PING_INTERVAL_SECONDS,
+                        ping_timeout=BINANCE_WS_PING_TIMEOUT_SECONDS,
+                        close_timeout=BINANCE_WS_CLOSE_TIMEOUT_SECONDS) as ws:
+                    self._ws = ws
+                    self._connected.set()
+                    log.info("Order session is open")
+                    reconnect_delay = 1
+                    async for frame in ws:
+                        self._on_reply(frame)
+            except Exception as e:
+                log.warning(f"Order session failed: {e}")
+            finally:
+                self._connected.clear()
+                self._ws = None
+                self._fail_pending()
+
+            if self._stopped:
+                break
+            log.info(f"Reconnecting order session in {reconnect_delay} s")
+            await asyncio.sleep(reconnect_delay)
+            reconnect_delay = min(reconnect_delay * 2, BINANCE_WS_RECONNECT_MAX_DELAY_SECONDS)
+        log.info("Order session is closed")
+
+    def _on_reply(self, frame: str):
+        reply = json.loads(frame)
+        future = self._pending.get(str(reply.get("id")))
+        if not future or future.done():
+            log.debug(f"Reply to unknown or expired request: {frame}")
+            return
+        future.set_result(reply)
+
+    def _fail_pending(self):
+        for request_id, future in list(self._pending.items()):
+            if not future.done():
+                future.set_exception(WsSessionLostError(f"Session lost while request {request_id} was in flight"))
@@ -0,0 +1,79 @@
+from typing import Dict, Generator, Tuple
+
+# What the parser needs read next: a line (till "\r\n", inclusive), exactly the given number of bytes, or all the bytes
+# till the connection is closed
+READ_LINE = "line"
+READ_EXACTLY = "exactly"
+READ_TO_EOF = "eof"
+
+EMPTY_LINES = (b"\r\n", b"\n", b"")
+
+
+class HttpResponse:
+    def __init__(self, status: int, headers: Dict[str, str], body: bytes) -> None:
+        self.status = status
+        # Lower-cased header names
+        self.headers = headers
+        self.body = body
+
+
+def parse_response() -> Generator[Tuple[str, int], bytes, Tuple[HttpResponse, bool]]:
+    """
+    HTTP/1.1 response parser, not bound to any kind of I/O: yields what to read next, as (READ_* kind, size), and is sent
+    the bytes read. Covers what REST APIs need: Content-Length or chunked body, or body till the connection is closed.
+    See `read_response_sync` for a driver over a blocking reader
+    :return: Response, and whether the connection can be kept alive
+    """
+    status_line = yield READ_LINE, 0
+    if not status_line:
+        raise ConnectionResetError("Connection closed by server")
+    status = int(status_line.split(b" ", 2)[1])
+    headers = dict()
+    while True:
+        line = yield READ_LINE, 0
+        if line in EMPTY_LINES:
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    keep_alive = headers.get("connection", "").lower() != "close"
+    if headers.get("transfer-encoding", "").lower() == "chunked":
+        chunks = bytearray()
+        while True:
+            size = int((yield READ_LINE, 0).split(b";")[0], 16)
+            if size == 0:
+                # Trailers, if any, till the empty line
+                while (yield READ_LINE, 0) not in EMPTY_LINES:
+                    pass
+                break
+            chunks += yield READ_EXACTLY, size
+            yield READ_LINE, 0
+        body = bytes(chunks)
+    elif "content-length" in headers:
+        body = yield READ_EXACTLY, int(headers["content-length"])
+    else:
+        body = yield READ_TO_EOF, 0
+        keep_alive = False
+    return HttpResponse(status, headers, body), keep_alive
+
+
+def read_response_sync(reader) -> Tuple[HttpResponse, bool]:
+    """
+    :param reader: Blocking binary reader, e.g. `socket.makefile("rb")`
+    """
+    parser = parse_response()
+    instruction = next(parser)
+    while True:
+        kind, size = instruction
+        if kind == READ_LINE:
+            data = reader.readline()
+        elif kind == READ_EXACTLY:
+            data = reader.read(size)
+            if len(data) < size:
+                raise ConnectionResetError(f"Connection closed by server: {len(data)} of {size} bytes read")
+        else:
+            data = reader.read()
+        try:
+            instruction = parser.send(data)
+        except StopIteration as e:
+            return e.value
@@ -0,0 +1,50 @@
+from decimal import Decimal
+from typing import Optional, Union
+
+
+class Quantizer:
+    """
+    Rounds prices or quantities to the nearest multiple of a step (tick size, lot step), as exact integer number of
+    steps, and renders them as strings to send to the exchange. Everything about the step is compiled once, so
+    rounding and rendering are integer and float arithmetic only
+    """
+
+    def __init__(self, step: Union[str, float]) -> None:
+        """
+        :param step: E.g. "0.01000000", or 0.01
+        """
+        step_decimal = Decimal(str(step)).normalize()
+        if step_decimal <= 0:
+            raise ValueError(f"Step has to be positive, got {step}")
+        self.decimals = max(0, -step_decimal.as_tuple().exponent)
+        # Values are rendered from integer units of 10^-decimals
+        self.scale = 10 ** self.decimals
+        self.step_units = int(step_decimal * self.scale)
+        self._steps_per_value = self.scale / self.step_units
+
+    def to_steps(self, value: float) -> int:
+        return round(float(value) * self._steps_per_value)
+
+    def to_float(self, steps: int) -> float:
+        # Single correctly rounded division: 3 steps of 0.1 is 0.3, not 0.30000000000000004
+        return steps * self.step_units / self.scale
+
+    def render(self, steps: int) -> str:
+        units = steps * self.step_units
+        if not self.decimals:
+            return str(units)
+        sign = "-" if units < 0 else ""
+        whole, fraction = divmod(abs(units), self.scale)
+        return f"{sign}{whole}.{fraction:0{self.decimals}d}"
+
+
+class SymbolQuantizers:
+    """
+    Compiled exchange filters of a symbol
+    """
+
+    def __init__(self, price: Optional[Quantizer], quantity: Optional[Quantizer], min_notional: Optional[float]) \
+            -> None:
+        self.price = price
+        self.quantity = quantity
+        self.min_notional = min_notional
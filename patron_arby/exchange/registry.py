@@ -1,9 +1,11 @@
 import logging
 from dataclasses import dataclass
 from decimal import Decimal
-from typing import Dict, Optional, Set, Union
+from typing import Callable, Dict, Optional, Set, Union
 
-from patron_arby.config.base import DEFAULT_USD_COIN
+from patron_arby.arbitrage.market_data import MarketData
+from patron_arby.common.util import current_time_ms
+from patron_arby.config.base import DEFAULT_USD_COIN, EXCHANGE_RATES_MAX_AGE_SECONDS
 
 log = logging.getLogger(__name__)
 
@@ -17,26 +19,51 @@ class Balance:
 class BalancesRegistry:
 
     def __init__(self, balances: Dict[str, float] = None, exchange_rates: Dict[str, float] = None,
-                 usd_coin: str = DEFAULT_USD_COIN) -> None:
+                 usd_coin: str = DEFAULT_USD_COIN, market_data: MarketData = None,
+                 exchange_rates_max_age_seconds: Optional[float] = EXCHANGE_RATES_MAX_AGE_SECONDS,
+                 clock: Callable[[], int] = current_time_ms) -> None:
+        """
+        :param exchange_rates: {market -> price}, e.g. from REST API. Fallback for markets market data has no live
+        price of (yet)
+        :param market_data: Live prices
+        :param exchange_rates_max_age_seconds: Fallback rates older than that are not used. None means no limit
+        :param clock: Current time, ms
+        """
         self.balances = balances if balances else dict()
-        self.exchange_rates = exchange_rates if exchange_rates else dict()
+        self.clock = clock
+        self.exchange_rates_max_age_ms = exchange_rates_max_age_seconds * 1_000 \
+            if exchange_rates_max_age_seconds is not None else None
+        self.update_exchange_rates(exchange_rates if exchange_rates else dict())
         self.usd_coin = usd_coin
+        self.market_data = market_data
 
     def get_balance(self, coin: str) -> Optional[float]:
         return self.balances.get(coin)
 
+    def get_total_balance(self, coin: str) -> Optional[float]:
+        """
+        :return: Whole balance of the coin, including amounts taken by orders. That's what the coin is worth
+        """
+        return self.get_balance(coin)
+
     def get_balance_usd(self, coin: str) -> Optional[float]:
         if self.is_empty():
             return None
-        balance = self.get_balance(coin)
+        balance = self.get_total_balance(coin)
         if not balance:
             log.warning(f"No balance found for {coin}")
             return None
+        return self.to_usd(coin, balance)
+
+    def to_usd(self, coin: str, volume: float) -> Optional[float]:
+        """
+        :return: Volume of the coin in USD, at the current exchange rate
+        """
         if self._is_usd_coin(coin):
             # Let's neglect USD coins cross exchange rates (e.g. we consider BUSD = USDT, for the purpose of balance)
-            return balance
+            return volume
 
-        if not self.exchange_rates or len(self.exchange_rates) == 0:
+        if not self.exchange_rates and not self.market_data:
             return None
         # We suggest that we always have trading pair coin/usd_coin
         market = f"{coin}{self.usd_coin}"
@@ -45,7 +72,7 @@ class BalancesRegistry:
             log.warning(f"No exchange rate found for {coin}")
             return None
 
-        return balance * exchange_rate
+        return volume * exchange_rate
 
     def get_balances(self, coins_of_interest: Set[str]) -> Dict[str, Balance]:
         """
@@ -75,10 +102,38 @@ class BalancesRegistry:
             log.warning(f"{coin} balance went below zero. Was {amount}, became {new_amount}")
         self.balances[coin] = new_amount
 
+    def reserve_balance(self, coin: str, volume: Union[float, Decimal], client_order_id: str = None):
+        """
+        Takes given volume of the coin for the order which is about to be placed
+        """
+        self.reduce_balance(coin, volume)
+
+    def release_balance(self, client_order_id: str):
+        """
+        Gives back volume reserved for the order which has not been placed
+        """
+        pass
+
     def update_exchange_rates(self, exchange_rates: Dict):
         self.exchange_rates = exchange_rates
+        self.exchange_rates_updated_at_ms = self.clock()
 
-    def get_exchange_rate(self, market: str):
+    def set_market_data(self, market_data: MarketData):
+        self.market_data = market_data
+
+    def get_exchange_rate(self, market: str) -> Optional[float]:
+        """
+        :param market: Exchange symbol, e.g. "BTCBUSD"
+        :return: Live mid price, or the last one set by `update_exchange_rates` if there's no live one, unless that one
+        is too old
+        """
+        if self.market_data:
+            mid_price = self.market_data.get_mid_price(market)
+            if mid_price:
+                return mid_price
+        if self.exchange_rates_max_age_ms is not None and \
+                self.clock() - self.exchange_rates_updated_at_ms > self.exchange_rates_max_age_ms:
+            return None
         return self.exchange_rates.get(market)
 
     def is_empty(self):
@@ -0,0 +1,186 @@
+import logging
+import threading
+from typing import Callable, Dict, Iterable, Optional, Set
+
+from patron_arby.arbitrage.market_data import MarketData
+from patron_arby.common.metrics import MetricsRegistry, metrics
+from patron_arby.common.util import current_time_ms
+from patron_arby.config.base import (
+    STREAM_FRESHNESS_CHECK_PERIOD_SECONDS,
+    STREAM_RESUBSCRIBE_COOLDOWN_MS,
+    STREAM_STALL_EXPECTED_INTERVALS,
+    STREAM_STALL_MIN_SILENCE_MS,
+)
+
+log = logging.getLogger(__name__)
+
+# Weight of the latest interval in the moving average of intervals between events
+EXPECTED_INTERVAL_SMOOTHING = 0.01
+
+
+def _smooth_interval(expected_interval_ms: Optional[float], interval_ms: int) -> float:
+    if expected_interval_ms is None:
+        return interval_ms
+    return expected_interval_ms + EXPECTED_INTERVAL_SMOOTHING * (interval_ms - expected_interval_ms)
+
+
+class StreamConnection:
+    def __init__(self, label: str, markets: Set[str], resubscribe: Callable[[str], None], now_ms: int) -> None:
+        self.label = label
+        self.markets = markets
+        self.resubscribe = resubscribe
+        # Counted from registration, so a connection that never delivers anything is detected as well
+        self.last_event_ms = now_ms
+        self.events_count = 0
+        # Moving average of intervals between events, ms. None till we've seen 2 events
+        self.expected_interval_ms: Optional[float] = None
+        self.stalled = False
+        self.stalls_count = 0
+        self.resubscribes_count = 0
+        self.last_resubscribe_ms: Optional[int] = None
+
+
+class StreamFreshnessMonitor(threading.Thread):
+    """
+    Watchdog for market data connections. Listener reports every market event via `on_market_event`, this thread
+    checks each connection's silence against its usual pace of events. When a connection is stalled:
+        - its markets are marked stale in MarketData, so PetroniusArbiter doesn't use their frozen prices
+        - connection is resubscribed, via callback given by the listener
+    Each market's silence is checked against its own pace as well, so a market frozen on a live connection is marked
+    stale too. Each market becomes fresh again with its next event.
+
+    Freshness is exposed via the metrics registry, see `snapshot`
+    """
+
+    def __init__(self, market_data: MarketData,
+                 check_period_seconds: float = STREAM_FRESHNESS_CHECK_PERIOD_SECONDS,
+                 stall_expected_intervals: float = STREAM_STALL_EXPECTED_INTERVALS,
+                 stall_min_silence_ms: int = STREAM_STALL_MIN_SILENCE_MS,
+                 resubscribe_cooldown_ms: int = STREAM_RESUBSCRIBE_COOLDOWN_MS,
+                 clock: Callable[[], int] = current_time_ms,
+                 registry: MetricsRegistry = metrics) -> None:
+        super().__init__(name="StreamFreshnessMonitor", daemon=True)
+        self.market_data = market_data
+        self.check_period_seconds = check_period_seconds
+        self.stall_expected_intervals = stall_expected_intervals
+        self.stall_min_silence_ms = stall_min_silence_ms
+        self.resubscribe_cooldown_ms = resubscribe_cooldown_ms
+        self.clock = clock
+        self.connections: Dict[str, StreamConnection] = dict()
+        self.market_to_connection: Dict[str, StreamConnection] = dict()
+        # Market -> time of its last event, ms
+        self.market_last_event_ms: Dict[str, int] = dict()
+        # Market -> moving average of intervals between its events, ms. Absent till we've seen 2 events
+        self.market_expected_interval_ms: Dict[str, float] = dict()
+        self.market_stalls_count = 0
+        self.stale_markets: Set[str] = set()
+        # Guards events bookkeeping and stale state: `on_market_event` and `check` run on different threads
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        registry.gauge("stream_freshness", self.snapshot)
+
+    def add_connection(self, label: str, markets: Iterable[str], resubscribe: Callable[[str], None]):
+        """
+        :param markets: Exchange symbols served by the connection, e.g. "BTCUSDT"
+        :param resubscribe: Called with connection label when connection is stalled
+        """
+        connection = StreamConnection(label, {m.upper() for m in markets}, resubscribe, self.clock())
+        self.connections[label] = connection
+        for market in connection.markets:
+            self.market_to_connection[market] = connection
+
+    def on_market_event(self, market: str, receive_time_ms: int):
+        """
+        Called by the listener thread for every market event, so keep it cheap
+        """
+        with self._lock:
+            last_event_ms = self.market_last_event_ms.get(market)
+            if last_event_ms is not None:
+                self.market_expected_interval_ms[market] = _smooth_interval(
+                    self.market_expected_interval_ms.get(market), max(receive_time_ms - last_event_ms, 0))
+            self.market_last_event_ms[market] = receive_time_ms
+            connection = self.market_to_connection.get(market)
+            if connection:
+                if connection.events_count > 0:
+                    connection.expected_interval_ms = _smooth_interval(
+                        connection.expected_interval_ms, max(receive_time_ms - connection.last_event_ms, 0))
+                connection.events_count += 1
+                connection.last_event_ms = receive_time_ms
+                if connection.stalled:
+                    connection.stalled = False
+                    log.info(f"Connection '{connection.label}' is alive again")
+            if market in self.stale_markets:
+                self.stale_markets.discard(market)
+                self.market_data.set_stale([market], False)
+
+    def stop(self):
+        self._stopped.set()
+
+    def run(self) -> None:
+        while not self._stopped.wait(self.check_period_seconds):
+            self.check()
+
+    def check(self):
+        now_ms = self.clock()
+        to_resubscribe = list()
+        with self._lock:
+            for connection in list(self.connections.values()):
+                silence_ms = now_ms - connection.last_event_ms
+                if silence_ms <= self._stall_threshold_ms(connection.expected_interval_ms):
+                    continue
+
+                if not connection.stalled:
+                    connection.stalled = True
+                    connection.stalls_count += 1
+                    log.warning(f"Connection '{connection.label}' is stalled: no events for {silence_ms} ms, "
+                                f"marking its {len(connection.markets)} markets stale")
+                    self.stale_markets |= connection.markets
+                    self.market_data.set_stale(connection.markets, True)
+
+                if connection.last_resubscribe_ms is None or \
+                        now_ms - connection.last_resubscribe_ms >= self.resubscribe_cooldown_ms:
+                    connection.last_resubscribe_ms = now_ms
+                    connection.resubscribes_count += 1
+                    to_resubscribe.append(connection)
+
+            for market, expected_interval_ms in self.market_expected_interval_ms.items():
+                if market in self.stale_markets:
+                    continue
+                silence_ms = now_ms - self.market_last_event_ms[market]
+                if silence_ms > self._stall_threshold_ms(expected_interval_ms):
+                    self.market_stalls_count += 1
+                    log.warning(f"Market {market} is stalled: no events for {silence_ms} ms, marking it stale")
+                    self.stale_markets.add(market)
+                    self.market_data.set_stale([market], True)
+
+        # Resubscribe may block, so it's called out of the lock
+        for connection in to_resubscribe:
+            log.warning(f"Resubscribing connection '{connection.label}'")
+            try:
+                connection.resubscribe(connection.label)
+            except Exception as e:
+                log.error(f"Unable to resubscribe connection '{connection.label}': {e}", exc_info=True)
+
+    def get_market_age_ms(self, market: str) -> Optional[int]:
+        last_event_ms = self.market_last_event_ms.get(market)
+        return self.clock() - last_event_ms if last_event_ms is not None else None
+
+    def snapshot(self) -> Dict:
+        now_ms = self.clock()
+        return {
+            "stale_markets": len(self.stale_markets),
+            "market_stalls": self.market_stalls_count,
+            "connections": {c.label: {
+                "silence_ms": now_ms - c.last_event_ms,
+                "expected_interval_ms": c.expected_interval_ms,
+                "events": c.events_count,
+                "stalled": c.stalled,
+                "stalls": c.stalls_count,
+                "resubscribes": c.resubscribes_count,
+            } for c in self.connections.values()},
+        }
+
+    def _stall_threshold_ms(self, expected_interval_ms: Optional[float]) -> float:
+        if expected_interval_ms is None:
+            return self.stall_min_silence_ms
+        return max(self.stall_min_silence_ms, self.stall_expected_intervals * expected_interval_ms)
@@ -0,0 +1,54 @@
+import argparse
+import json
+import logging
+import sys
+
+from patron_arby.db.raw_recorder import RawFramesReader
+from patron_arby.replay.harness import ReplayHarness
+
+
+def _load_json(path: str):
+    if not path:
+        return None
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m patron_arby.replay",
+        description="Replays frames recorded by RawFramesRecorder through the trading pipeline, with stubbed exchange "
+                    "and DAOs, and prints per-stage latency and throughput report as JSON")
+    parser.add_argument("--frames", required=True, help="Directory with recorded frames")
+    parser.add_argument("--symbols", required=True, help='JSON file with symbol mapping: {"BTCETH": "BTC/ETH", ...}')
+    parser.add_argument("--exchange-info", help="JSON file with Binance exchange info, to apply exchange limitations")
+    parser.add_argument("--balances", help='JSON file with balances: {"BTC": 0.1, ...}')
+    parser.add_argument("--trade-fees", help='JSON file with trade fees: {"BTCUSDT": 0.001, ...}')
+    parser.add_argument("--from-ns", type=int, help="Replay frames received at or after that time, ns")
+    parser.add_argument("--to-ns", type=int, help="Replay frames received at or before that time, ns")
+    parser.add_argument("--realtime", action="store_true", help="Feed frames at the pace they've been recorded")
+    parser.add_argument("--speed", type=float, default=1.0, help="Pace multiplier for --realtime mode")
+    parser.add_argument("--output", help="Write report to that file instead of stdout")
+    parser.add_argument("--log-level", default="WARNING",
+        help="Logging level for pipeline components. Verbose logging heavily affects latencies")
+    args = parser.parse_args(argv)
+
+    logging.getLogger("patron_arby").setLevel(args.log_level)
+
+    harness = ReplayHarness(_load_json(args.symbols),
+        exchange_info=_load_json(args.exchange_info),
+        balances=_load_json(args.balances),
+        trade_fees=_load_json(args.trade_fees),
+        realtime=args.realtime,
+        speed=args.speed)
+    report = harness.run(RawFramesReader(args.frames).read(args.from_ns, args.to_ns))
+
+    report_json = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report_json)
+    else:
+        sys.stdout.write(report_json + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+import logging
+import random
+import time
+from queue import Empty, Queue
+from typing import Callable, Dict, Iterable, Tuple
+
+from patron_arby.arbitrage.arbitrage_event_listener import ArbitrageEventListener
+from patron_arby.arbitrage.arbitrage_thread import ArbitrageThread
+from patron_arby.arbitrage.arby import PetroniusArbiter
+from patron_arby.arbitrage.market_data import MarketData
+from patron_arby.common.bus import Bus
+from patron_arby.common.metrics import Histogram
+from patron_arby.config.base import ARBITRAGE_COINS
+from patron_arby.exchange.binance.limitations import BinanceExchangeLimitations
+from patron_arby.exchange.binance.listener import BinanceDataListener
+from patron_arby.exchange.binance.order_listener import BinanceOrderListener
+from patron_arby.exchange.registry import BalancesRegistry
+from patron_arby.replay.stubs import (
+    InMemoryArbitrageDao,
+    InMemoryOrderDao,
+    StubExchangeApi,
+)
+from patron_arby.trade.executor import OrderExecutor
+from patron_arby.trade.manager import TradeManager
+
+log = logging.getLogger(__name__)
+
+STAGE_INGEST = "ingest"
+STAGE_ARBITRAGE_FIND = "arbitrage_find"
+STAGE_TRADE_MANAGER = "trade_manager"
+STAGE_ORDER_EXECUTOR = "order_executor"
+STAGE_FRAME_TOTAL = "frame_total"
+
+DEFAULT_REPLAY_BALANCE = 1_000
+
+
+class ReplayHarness:
+    """
+    Feeds recorded frames through the live pipeline: BinanceDataListener event path, MarketData, PetroniusArbiter (via
+    ArbitrageThread), TradeManager and OrderExecutor. Orders go to StubExchangeApi, DAOs are in-memory.
+
+    Everything is driven synchronously from a single thread, stage by stage, draining the Bus queues after each frame.
+    That makes runs reproducible and lets us measure each stage separately. Keep in mind that components relying on
+    wall clock (e.g. duplicated arbitrages filter) see replay time, not recording time. Ticker ages are an exception:
+    tickers carry recorded receive time, and PetroniusArbiter is given recording time as its clock.
+    """
+
+    def __init__(self, symbol_to_base_quote: Dict[str, str],
+                 exchange_info: Dict = None,
+                 balances: Dict[str, float] = None,
+                 trade_fees: Dict[str, float] = None,
+                 default_trade_fee: float = 0.001,
+                 realtime: bool = False,
+                 speed: float = 1.0,
+                 seed: int = 0) -> None:
+        """
+        :param symbol_to_base_quote: { "BTCETH": "BTC/ETH"... }, see MarketData
+        :param exchange_info: Binance exchange info, to apply exchange limitations. If None, no limitations applied
+        :param balances: {coin -> balance}. If None, every arbitrage coin gets DEFAULT_REPLAY_BALANCE
+        :param realtime: If True, frames are fed with the same pace they've been received. Otherwise, as fast as
+                possible
+        :param speed: Pace multiplier for realtime mode, e.g. 2 means twice as fast as recorded
+        """
+        random.seed(seed)
+        self.realtime = realtime
+        self.speed = speed
+        self.stages: Dict[str, Histogram] = {stage: Histogram() for stage in
+            [STAGE_INGEST, STAGE_ARBITRAGE_FIND, STAGE_TRADE_MANAGER, STAGE_ORDER_EXECUTOR, STAGE_FRAME_TOTAL]}
+        self.frames_count = 0
+        self.chains_count = 0
+        self.positive_chain_sets_count = 0
+        self.frame_time_ms = 0
+
+        self.bus = Bus()
+        # Bus queues are shared, make sure nothing is left from whoever used them before
+        for queue in [self.bus.tickers_queue, self.bus.positive_arbitrages_queue, self.bus.fire_orders_queue,
+                      self.bus.all_arbitrages_queue, self.bus.store_positive_arbitrages_queue]:
+            list(self._drain(queue))
+
+        self.exchange_api = StubExchangeApi(list(symbol_to_base_quote.keys()))
+        self.order_dao = InMemoryOrderDao()
+        self.arbitrage_dao = InMemoryArbitrageDao()
+        self.market_data = MarketData(symbol_to_base_quote, only_coins=ARBITRAGE_COINS)
+        self.balances_registry = BalancesRegistry(balances if balances is not None else
+            {coin: DEFAULT_REPLAY_BALANCE for coin in ARBITRAGE_COINS})
+
+        self.listener = BinanceDataListener(self.market_data, None, set(symbol_to_base_quote.keys()))
+        self.listener.add_event_listener(BinanceOrderListener(self.bus, self.order_dao))
+        self.listener.add_event_listener(ArbitrageEventListener(self.bus))
+
+        arby = PetroniusArbiter(self.market_data, trade_fees if trade_fees else dict(),
+            self._on_positive_arbitrage_found_callback, default_trade_fee=default_trade_fee,
+            clock=lambda: self.frame_time_ms)
+        self.arbitrage_thread = ArbitrageThread(self.bus, arby)
+        self.trade_manager = TradeManager(self.bus,
+            BinanceExchangeLimitations(exchange_info if exchange_info else {"symbols": []}), self.balances_registry)
+        self.order_executor = OrderExecutor(self.bus, self.exchange_api, self.order_dao, self.market_data)
+
+    def run(self, frames: Iterable[Tuple[int, str]]) -> Dict:
+        """
+        :param frames: (receive time ns, raw frame) tuples, as read by RawFramesReader
+        :return: Report, see `report`
+        """
+        start_ns = time.perf_counter_ns()
+        first_frame_time_ns = None
+        for receive_time_ns, raw_frame in frames:
+            if self.realtime:
+                if first_frame_time_ns is None:
+                    first_frame_time_ns = receive_time_ns
+                self._wait_till((receive_time_ns - first_frame_time_ns) / self.speed, start_ns)
+            self.process_frame(raw_frame, receive_time_ns)
+
+        return self.report(time.perf_counter_ns() - start_ns)
+
+    def process_frame(self, raw_frame: str, receive_time_ns: int = None):
+        """
+        :param receive_time_ns: Recorded receive time. Now, if not given
+        """
+        if receive_time_ns is None:
+            receive_time_ns = time.time_ns()
+        self.frame_time_ms = receive_time_ns // 1_000_000
+        frame_start_ns = time.perf_counter_ns()
+        self.frames_count += 1
+
+        self._measure(STAGE_INGEST, lambda: self.listener._on_raw_frame(raw_frame, receive_time_ns))
+        self._consume(self.bus.tickers_queue, STAGE_ARBITRAGE_FIND, self._find_arbitrage)
+        self._consume(self.bus.positive_arbitrages_queue, STAGE_TRADE_MANAGER, self.trade_manager._process_chain_set)
+        self._consume(self.bus.fire_orders_queue, STAGE_ORDER_EXECUTOR, self.order_executor._process)
+
+        self._store_arbitrages()
+
+        self.stages[STAGE_FRAME_TOTAL].record((time.perf_counter_ns() - frame_start_ns) / 1_000)
+
+    def report(self, duration_ns: int) -> Dict:
+        """
+        :return: Per-stage latencies (microseconds) and throughput numbers. Plain dict, so can be dumped to JSON and
+                compared across versions
+        """
+        duration_seconds = duration_ns / 1_000_000_000
+        return {
+            "mode": "realtime" if self.realtime else "fast",
+            "duration_seconds": duration_seconds,
+            "frames": self.frames_count,
+            "frames_per_second": self.frames_count / duration_seconds if duration_seconds > 0 else None,
+            "chains_evaluated": self.chains_count,
+            "positive_chain_sets": self.positive_chain_sets_count,
+            "orders_placed": len(self.exchange_api.placed_orders),
+            "stale_chains_skipped": self.arbitrage_thread.arby.stale_chains_count,
+            "stages_latency_us": {stage: h.snapshot() for stage, h in self.stages.items()},
+        }
+
+    def _on_positive_arbitrage_found_callback(self, chains):
+        self.positive_chain_sets_count += 1
+        self.bus.positive_arbitrages_queue.put(chains)
+
+    def _find_arbitrage(self, ticker):
+        self.chains_count += len(self.arbitrage_thread._process_ticker(ticker))
+
+    def _store_arbitrages(self):
+        for chains in self._drain(self.bus.all_arbitrages_queue):
+            self.arbitrage_dao.put_arbitrage_records(chains)
+        for chain in self._drain(self.bus.store_positive_arbitrages_queue):
+            self.arbitrage_dao.put_profitable_arbitrage(chain)
+
+    def _consume(self, queue: Queue, stage: str, consumer: Callable):
+        for message in self._drain(queue):
+            self._measure(stage, lambda: consumer(message))
+
+    def _measure(self, stage: str, action: Callable):
+        start_ns = time.perf_counter_ns()
+        action()
+        self.stages[stage].record((time.perf_counter_ns() - start_ns) / 1_000)
+
+    @staticmethod
+    def _drain(queue: Queue):
+        while True:
+            try:
+                yield queue.get_nowait()
+            except Empty:
+                return
+
+    @staticmethod
+    def _wait_till(offset_ns: float, start_ns: int):
+        delay_seconds = (start_ns + offset_ns - time.perf_counter_ns()) / 1_000_000_000
+        if delay_seconds > 0:
+            time.sleep(delay_seconds)
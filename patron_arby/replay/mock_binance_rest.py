@@ -0,0 +1,177 @@
+import argparse
+import asyncio
+import json
+import logging
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+from patron_arby.common.util import current_time_ms
+from patron_arby.exchange.binance.signer import BinanceRequestSigner
+
+log = logging.getLogger(__name__)
+
+MOCK_API_KEY = "mock-api-key"
+MOCK_API_SECRET = "mock-api-secret"
+
+ERROR_INVALID_SIGNATURE = (-1022, "Signature for this request is not valid.")
+ERROR_INVALID_API_KEY = (-2015, "Invalid API-key, IP, or permissions for action.")
+ERROR_NO_SUCH_ORDER = (-2013, "Order does not exist.")
+ERROR_UNKNOWN_PATH = (-1000, "Unknown path.")
+
+
+class MockOrderBook:
+    """
+    Orders of mock Binance APIs: every LIMIT order is filled right away
+    """
+
+    def __init__(self) -> None:
+        self.orders: Dict[str, Dict] = dict()
+        # (receive time ms, client order id) of placed orders
+        self.placed: List[Tuple[int, str]] = list()
+
+    def place(self, params: Dict[str, str]) -> Dict:
+        now = current_time_ms()
+        order = {
+            "symbol": params["symbol"],
+            "orderId": len(self.orders) + 1,
+            "clientOrderId": params["newClientOrderId"],
+            "transactTime": now,
+            "price": params["price"],
+            "origQty": params["quantity"],
+            "executedQty": params["quantity"],
+            "status": "FILLED",
+            "timeInForce": params.get("timeInForce"),
+            "type": params["type"],
+            "side": params["side"],
+        }
+        self.orders[order["clientOrderId"]] = order
+        self.placed.append((now, order["clientOrderId"]))
+        return order
+
+    def find(self, params: Dict[str, str]) -> Optional[Dict]:
+        if "origClientOrderId" in params:
+            return self.orders.get(params["origClientOrderId"])
+        for order in self.orders.values():
+            if str(order["orderId"]) == str(params.get("orderId")):
+                return order
+        return None
+
+
+class MockBinanceRestServer:
+    """
+    Local stand-in for Binance REST API order endpoints, to test and benchmark order placement offline.
+    Speaks HTTP/1.1 with keep-alive, checks API key and signatures, and fills every LIMIT order right away.
+    Optional artificial latency emulates network round trip
+    """
+
+    def __init__(self, api_key: str = MOCK_API_KEY, api_secret: str = MOCK_API_SECRET, latency_seconds: float = 0,
+                 host: str = "127.0.0.1", port: int = 0, book: MockOrderBook = None) -> None:
+        """
+        :param book: Orders, can be shared with other mock APIs
+        """
+        self.api_key = api_key
+        self.signer = BinanceRequestSigner(api_secret)
+        self.latency_seconds = latency_seconds
+        self.host = host
+        self.port = port
+        self.book = book if book else MockOrderBook()
+        self.requests_count = 0
+        self.connections_count = 0
+        # Number of the next requests to process, then drop the connection instead of replying
+        self.drop_replies = 0
+        self.server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> str:
+        """
+        :return: Base API URL, to be given to the client
+        """
+        self.server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return f"http://{self.host}:{self.port}/api"
+
+    async def close(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections_count += 1
+        try:
+            while True:
+                try:
+                    request_line = await reader.readuntil(b"\r\n")
+                except (asyncio.IncompleteReadError, ConnectionError, asyncio.CancelledError):
+                    # Client has gone, or server is shutting down
+                    return
+                method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = dict()
+                while True:
+                    line = await reader.readuntil(b"\r\n")
+                    if line == b"\r\n":
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+                self.requests_count += 1
+                if self.latency_seconds:
+                    await asyncio.sleep(self.latency_seconds)
+                status, reply = self._dispatch(method, target, headers, body)
+                if self.drop_replies:
+                    self.drop_replies -= 1
+                    return
+                payload = json.dumps(reply).encode("utf-8")
+                writer.write(f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+                             f"Content-Type: application/json\r\nContent-Length: {len(payload)}\r\n\r\n"
+                             .encode("latin-1") + payload)
+                await writer.drain()
+        finally:
+            writer.close()
+
+    def _dispatch(self, method: str, target: str, headers: Dict[str, str], body: bytes) -> Tuple[int, Dict]:
+        url = urlsplit(target)
+        if url.path == "/api/v3/ping":
+            return 200, {}
+        if url.path != "/api/v3/order":
+            return self._error(404, ERROR_UNKNOWN_PATH)
+
+        if headers.get("x-mbx-apikey") != self.api_key:
+            return self._error(401, ERROR_INVALID_API_KEY)
+        query = url.query if url.query else body.decode("utf-8")
+        unsigned, _, signature = query.rpartition("&signature=")
+        if signature != self.signer.sign(unsigned):
+            return self._error(400, ERROR_INVALID_SIGNATURE)
+        params = dict(parse_qsl(unsigned))
+
+        if method == "POST":
+            return 200, self.book.place(params)
+        order = self.book.find(params)
+        if not order:
+            return self._error(400, ERROR_NO_SUCH_ORDER)
+        if method == "DELETE":
+            order["status"] = "CANCELED"
+        return 200, order
+
+    @staticmethod
+    def _error(status: int, error: Tuple[int, str]) -> Tuple[int, Dict]:
+        return status, {"code": error[0], "msg": error[1]}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m patron_arby.replay.mock_binance_rest",
+        description="Runs mock Binance REST API for order endpoints")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency-ms", type=float, default=0, help="Artificial latency added to every request")
+    args = parser.parse_args(argv)
+
+    async def serve():
+        server = MockBinanceRestServer(latency_seconds=args.latency_ms / 1_000, host=args.host, port=args.port)
+        url = await server.start()
+        print(f"Serving mock Binance REST API at {url}, API key '{MOCK_API_KEY}', secret '{MOCK_API_SECRET}'")
+        await server.server.serve_forever()
+
+    asyncio.run(serve())
+
+
+if __name__ == "__main__":
+    main()
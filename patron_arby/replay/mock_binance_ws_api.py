@@ -0,0 +1,133 @@
+import argparse
+import asyncio
+import json
+import logging
+from typing import Dict, Optional, Set, Tuple
+
+import websockets
+
+from patron_arby.exchange.binance.signer import BinanceRequestSigner
+from patron_arby.replay.mock_binance_rest import (
+    ERROR_INVALID_API_KEY,
+    ERROR_INVALID_SIGNATURE,
+    ERROR_NO_SUCH_ORDER,
+    MOCK_API_KEY,
+    MOCK_API_SECRET,
+    MockOrderBook,
+)
+
+log = logging.getLogger(__name__)
+
+ERROR_UNKNOWN_METHOD = (-1000, "Unknown method.")
+
+
+class MockBinanceWsApiServer:
+    """
+    Local stand-in for Binance websocket API order methods: order.place, order.cancel and ping.
+    Checks API key and signatures, fills every LIMIT order right away, and replies after optional artificial latency,
+    concurrently, so replies may come out of requests order as they do for real
+    """
+
+    def __init__(self, api_key: str = MOCK_API_KEY, api_secret: str = MOCK_API_SECRET, latency_seconds: float = 0,
+                 host: str = "127.0.0.1", port: int = 0, book: MockOrderBook = None) -> None:
+        """
+        :param book: Orders, can be shared with mock REST API
+        """
+        self.api_key = api_key
+        self.signer = BinanceRequestSigner(api_secret)
+        self.latency_seconds = latency_seconds
+        self.host = host
+        self.port = port
+        self.book = book if book else MockOrderBook()
+        self.requests_count = 0
+        self.connections_count = 0
+        self.connections: Set = set()
+        # If True, requests are read but never replied: emulates session lost while requests are in flight
+        self.swallow_requests = False
+        self.server = None
+
+    async def start(self) -> str:
+        """
+        :return: Websocket API URL, to be given to the client
+        """
+        self.server = await websockets.serve(self._handle, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return f"ws://{self.host}:{self.port}/ws-api/v3"
+
+    async def close(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def drop_connections(self):
+        """
+        Closes all the open sessions, as the exchange does on maintenance or network failure
+        """
+        await asyncio.gather(*[ws.close() for ws in list(self.connections)])
+
+    async def _handle(self, ws, path: str = None):
+        self.connections_count += 1
+        self.connections.add(ws)
+        try:
+            async for message in ws:
+                if not self.swallow_requests:
+                    asyncio.ensure_future(self._reply(ws, message))
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            self.connections.discard(ws)
+
+    async def _reply(self, ws, message: str):
+        request = json.loads(message)
+        self.requests_count += 1
+        if self.latency_seconds:
+            await asyncio.sleep(self.latency_seconds)
+        status, payload = self._dispatch(request.get("method"), dict(request.get("params") or dict()))
+        reply = {"id": request.get("id"), "status": status, "result" if status == 200 else "error": payload}
+        try:
+            await ws.send(json.dumps(reply))
+        except websockets.ConnectionClosed:
+            pass
+
+    def _dispatch(self, method: str, params: Dict) -> Tuple[int, Optional[Dict]]:
+        if method == "ping":
+            return 200, dict()
+        if method not in ("order.place", "order.cancel"):
+            return self._error(400, ERROR_UNKNOWN_METHOD)
+        if params.get("apiKey") != self.api_key:
+            return self._error(401, ERROR_INVALID_API_KEY)
+        signature = params.pop("signature", None)
+        if signature != self.signer.sign("&".join(f"{k}={v}" for k, v in sorted(params.items()))):
+            return self._error(400, ERROR_INVALID_SIGNATURE)
+
+        if method == "order.place":
+            return 200, self.book.place(params)
+        order = self.book.find(params)
+        if not order:
+            return self._error(400, ERROR_NO_SUCH_ORDER)
+        order["status"] = "CANCELED"
+        return 200, order
+
+    @staticmethod
+    def _error(status: int, error: Tuple[int, str]) -> Tuple[int, Dict]:
+        return status, {"code": error[0], "msg": error[1]}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m patron_arby.replay.mock_binance_ws_api",
+        description="Runs mock Binance websocket API for order methods")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency-ms", type=float, default=0, help="Artificial latency added to every request")
+    args = parser.parse_args(argv)
+
+    async def serve():
+        server = MockBinanceWsApiServer(latency_seconds=args.latency_ms / 1_000, host=args.host, port=args.port)
+        url = await server.start()
+        print(f"Serving mock Binance websocket API at {url}, API key '{MOCK_API_KEY}', secret '{MOCK_API_SECRET}'")
+        await asyncio.Future()
+
+    asyncio.run(serve())
+
+
+if __name__ == "__main__":
+    main()
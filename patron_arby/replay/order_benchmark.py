@@ -0,0 +1,82 @@
+import argparse
+import asyncio
+import json
+import sys
+import time
+from typing import Dict
+
+from patron_arby.common.metrics import Histogram
+from patron_arby.common.order import Order, OrderSide
+from patron_arby.exchange.binance.async_rest_client import AsyncBinanceRestClient
+from patron_arby.replay.mock_binance_rest import (
+    MOCK_API_KEY,
+    MOCK_API_SECRET,
+    MockBinanceRestServer,
+)
+
+
+async def run_benchmark(api_url: str, orders: int, concurrency: int, connections: int,
+                        api_key: str = MOCK_API_KEY, api_secret: str = MOCK_API_SECRET) -> Dict:
+    """
+    Places the given number of orders, at most `concurrency` at once
+    :return: Throughput and per-order latency (microseconds) report
+    """
+    client = AsyncBinanceRestClient(api_key, api_secret, api_url, max_connections=connections,
+        max_concurrent_requests=concurrency)
+    await client.warm_up(connections)
+    latency = Histogram()
+    errors = 0
+    slots = asyncio.Semaphore(concurrency)
+
+    async def place(i: int):
+        nonlocal errors
+        async with slots:
+            start_ns = time.perf_counter_ns()
+            try:
+                await client.put_order(Order(f"{i:08d}_order_1", OrderSide.BUY, "BTCUSDT", 0.001, 50000))
+            except Exception:
+                errors += 1
+            latency.record((time.perf_counter_ns() - start_ns) / 1_000)
+
+    start_ns = time.perf_counter_ns()
+    await asyncio.gather(*[place(i) for i in range(orders)])
+    duration_seconds = (time.perf_counter_ns() - start_ns) / 1_000_000_000
+    await client.close()
+    return {
+        "orders": orders,
+        "errors": errors,
+        "concurrency": concurrency,
+        "connections": connections,
+        "duration_seconds": duration_seconds,
+        "orders_per_second": orders / duration_seconds if duration_seconds > 0 else None,
+        "latency_us": latency.snapshot(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m patron_arby.replay.order_benchmark",
+        description="Benchmarks AsyncBinanceRestClient order placement against mock Binance REST API, and prints "
+                    "report as JSON")
+    parser.add_argument("--url", help="API URL of already running mock server. If not given, mock server is run "
+                                      "in the same process")
+    parser.add_argument("--orders", type=int, default=1_000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--connections", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=0, help="Artificial latency of in-process mock server")
+    args = parser.parse_args(argv)
+
+    async def run():
+        if args.url:
+            return await run_benchmark(args.url, args.orders, args.concurrency, args.connections)
+        server = MockBinanceRestServer(latency_seconds=args.latency_ms / 1_000)
+        url = await server.start()
+        try:
+            return await run_benchmark(url, args.orders, args.concurrency, args.connections)
+        finally:
+            await server.close()
+
+    sys.stdout.write(json.dumps(asyncio.run(run()), indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
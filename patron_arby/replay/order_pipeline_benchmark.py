@@ -0,0 +1,84 @@
+import argparse
+import json
+import random
+import sys
+import time
+from decimal import Decimal
+from typing import Dict, List
+
+from patron_arby.common.metrics import Histogram
+from patron_arby.common.order import Order, OrderSide
+from patron_arby.common.util import to_decimal
+from patron_arby.config.base import BinanceTimeInForce
+from patron_arby.exchange.binance.limitations import BinanceExchangeLimitations
+from patron_arby.exchange.binance.signer import limit_order_params, norm
+from patron_arby.exchange.exchange_limitations import ExchangeLimitationName
+
+# Symbol, tick size, step size, typical price
+SYMBOLS = [
+    ("BTCUSDT", "0.01000000", "0.00000100", 50_000),
+    ("ETHBTC", "0.00000100", "0.00010000", 0.06),
+    ("DOGEBTC", "0.00000001", "1.00000000", 0.000005),
+    ("BNBBUSD", "0.10000000", "0.00100000", 400),
+]
+
+
+def exchange_info() -> Dict:
+    return {"symbols": [{"symbol": symbol, "filters": [
+        {"filterType": "PRICE_FILTER", "tickSize": tick_size},
+        {"filterType": "LOT_SIZE", "stepSize": step_size},
+        {"filterType": "MIN_NOTIONAL", "minNotional": "10.00000000"},
+    ]} for symbol, tick_size, step_size, _ in SYMBOLS]}
+
+
+def decimal_pipeline(limitations: BinanceExchangeLimitations, o: Order):
+    """
+    Order adjustment and wire parameters the way they used to be: Decimal quantization, then Decimal rendering
+    """
+    symbol_limits = limitations.limits.get(o.symbol)
+    o.price = to_decimal(o.price, Decimal(str(symbol_limits.get(ExchangeLimitationName.MIN_PRICE_STEP))))
+    o.quantity = to_decimal(o.quantity, Decimal(str(symbol_limits.get(ExchangeLimitationName.MIN_VOLUME_STEP))))
+    return [("quantity", norm(o.quantity)), ("price", norm(o.price))]
+
+
+def quantizer_pipeline(limitations: BinanceExchangeLimitations, o: Order):
+    limitations.adjust_price_and_volume_to_market_requirements(o)
+    return limit_order_params(o, BinanceTimeInForce.IMMEDIATE_OR_CANCEL)
+
+
+def run_benchmark(orders: int, seed: int = 42) -> Dict:
+    """
+    Runs orders through both pipelines: adjustment to market requirements, then building the wire parameters
+    :return: Per-order latency (nanoseconds) report of each pipeline
+    """
+    limitations = BinanceExchangeLimitations(exchange_info())
+    rnd = random.Random(seed)
+    samples: List[Order] = list()
+    for i in range(orders):
+        symbol, _, _, price = rnd.choice(SYMBOLS)
+        samples.append(Order(f"{i:08d}_order_1", OrderSide.BUY, symbol, rnd.uniform(1, 100) * 20 / price,
+            price * rnd.uniform(0.99, 1.01)))
+
+    report = {"orders": orders}
+    for name, pipeline in [("decimal", decimal_pipeline), ("quantizer", quantizer_pipeline)]:
+        latency = Histogram()
+        for sample in samples:
+            o = Order(sample.client_order_id, sample.order_side, sample.symbol, sample.quantity, sample.price)
+            start_ns = time.perf_counter_ns()
+            pipeline(limitations, o)
+            latency.record(time.perf_counter_ns() - start_ns)
+        report[f"{name}_ns"] = latency.snapshot()
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m patron_arby.replay.order_pipeline_benchmark",
+        description="Benchmarks per order price and quantity quantization, from adjustment to market requirements to "
+                    "wire parameters, with Decimal and with compiled quantizers, and prints report as JSON")
+    parser.add_argument("--orders", type=int, default=100_000)
+    args = parser.parse_args(argv)
+    sys.stdout.write(json.dumps(run_benchmark(args.orders), indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
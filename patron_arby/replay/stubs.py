@@ -0,0 +1,103 @@
+import copy
+from typing import Dict, Iterable, List, Optional
+
+from patron_arby.common.chain import AChain
+from patron_arby.common.order import Order
+from patron_arby.common.util import current_time_ms
+from patron_arby.db.chain_records import decode_chain_records
+from patron_arby.exchange.exchange_api import ExchangeApi
+
+
+class StubExchangeApi(ExchangeApi):
+    """
+    Exchange API which never goes to the exchange: every LIMIT order is acknowledged as filled right away
+    """
+
+    def __init__(self, markets: List[str] = None, balances: Dict[str, float] = None) -> None:
+        super().__init__()
+        self.markets = markets if markets else list()
+        self.balances = balances if balances else dict()
+        self.placed_orders: List[Order] = list()
+        self.cancelled_orders: List[str] = list()
+
+    def get_all_markets(self) -> List[str]:
+        return self.markets
+
+    def get_trade_fees(self) -> Dict[str, float]:
+        return dict()
+
+    def get_default_trade_fee(self) -> Optional[float]:
+        return None
+
+    def get_balances(self) -> Dict[str, float]:
+        return self.balances
+
+    def get_latest_prices(self) -> Dict[str, float]:
+        return dict()
+
+    def put_order(self, o: Order) -> Order:
+        result = copy.copy(o)
+        result.status = "FILLED"
+        result.order_id = str(len(self.placed_orders) + 1)
+        result.transaction_time = current_time_ms()
+        self.placed_orders.append(result)
+        return result
+
+    def put_market_order(self, o: Order) -> Order:
+        return self.put_order(o)
+
+    def get_open_orders(self) -> List[Order]:
+        return list()
+
+    def cancel_order(self, symbol: str, order_id: str) -> object:
+        self.cancelled_orders.append(order_id)
+        return {"symbol": symbol, "orderId": order_id}
+
+
+class InMemoryOrderDao:
+    """
+    Stand-in for OrderDao, keeping orders in a dict
+    """
+
+    def __init__(self) -> None:
+        self.orders: Dict[str, Order] = dict()
+
+    def get_order(self, client_order_id: str) -> Optional[Order]:
+        return self.orders.get(client_order_id)
+
+    def put_order(self, order: Order):
+        self.orders[order.client_order_id] = order
+
+    def put_orders(self, orders: Iterable[Order]):
+        for order in orders:
+            self.orders[order.client_order_id] = order
+
+
+class InMemoryArbitrageDao:
+    """
+    Stand-in for ArbitrageDao, keeping arbitrages in lists
+    """
+
+    def __init__(self) -> None:
+        self.profitable_arbitrages: List[AChain] = list()
+        self.profitable_arbitrage_items: List[Dict] = list()
+        self.arbitrage_records_count = 0
+        self.opportunity_stats: List[Dict] = list()
+
+    def put_profitable_arbitrage(self, arbitrage: AChain):
+        self.profitable_arbitrages.append(arbitrage)
+
+    def put_profitable_arbitrage_items(self, items: List[Dict]) -> List[Dict]:
+        self.profitable_arbitrage_items += items
+        return list()
+
+    def put_arbitrage_records(self, chains: List[AChain]):
+        # Only count them: keeping all evaluated chains would eat all the memory on long replays
+        self.arbitrage_records_count += len(chains)
+
+    def put_serialized_arbitrage_records(self, records: List[bytes]) -> List[int]:
+        self.arbitrage_records_count += sum(len(decode_chain_records(r)) for r in records)
+        return list()
+
+    def put_opportunity_stats(self, stats: List[Dict]):
+        self.opportunity_stats += stats
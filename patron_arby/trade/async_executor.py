@@ -0,0 +1,130 @@
+import asyncio
+import logging
+import time
+from typing import List, Optional, Set
+
+from patron_arby.arbitrage.market_data import MarketData
+from patron_arby.common.bus import Bus
+from patron_arby.common.metrics import metrics
+from patron_arby.common.order import Order
+from patron_arby.common.trace import STAGE_SENT, TradeTracer, trade_tracer
+from patron_arby.common.util import current_time_ms
+from patron_arby.config.base import ORDER_EXECUTOR_MAX_IN_FLIGHT_ORDERS
+from patron_arby.db.order_dao import OrderDao
+from patron_arby.exchange.binance.async_rest_client import AsyncBinanceRestClient
+from patron_arby.exchange.binance.balances_checker import BalancesChecker
+from patron_arby.trade.executor import SENTINEL_MESSAGE, OrderExecutor
+
+log = logging.getLogger(__name__)
+
+
+class AsyncOrderExecutor(OrderExecutor):
+    """
+    OrderExecutor placing orders concurrently on its own event loop, via AsyncBinanceRestClient. Replaces a pool of
+    OrderExecutor threads each blocked on a REST call: one thread, up to `max_in_flight` orders at once.
+    Orders are saved in the default executor, as OrderDao is blocking
+    """
+
+    def __init__(self, bus: Bus, rest_client: AsyncBinanceRestClient, order_dao: OrderDao,
+                 market_data: MarketData = None,
+                 balances_checker: BalancesChecker = None,
+                 max_in_flight: int = ORDER_EXECUTOR_MAX_IN_FLIGHT_ORDERS,
+                 tracer: TradeTracer = trade_tracer) -> None:
+        super().__init__(bus, None, order_dao, market_data, balances_checker, tracer=tracer)
+        self.rest_client = rest_client
+        self.max_in_flight = max_in_flight
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.order_latency_us = metrics.histogram("order_place_latency_us")
+
+    def run(self):
+        asyncio.run(self.run_async())
+
+    async def run_async(self):
+        log.debug("Starting")
+        self.loop = asyncio.get_event_loop()
+        in_flight = asyncio.Semaphore(self.max_in_flight)
+        tasks: Set[asyncio.Future] = set()
+
+        def on_done(task: asyncio.Future):
+            tasks.discard(task)
+            in_flight.release()
+
+        while True:
+            msg = await self.loop.run_in_executor(None, self.bus.fire_orders_queue.get)
+            if msg == SENTINEL_MESSAGE:
+                self._on_sentinel()
+                break
+            self._trace_dequeued(msg)
+            if isinstance(msg, list):
+                execution = self._execute_chain(msg)
+            elif isinstance(msg, Order):
+                execution = self._execute(msg)
+            else:
+                log.error(f"Message should be either of type {Order}, list of orders or == '{SENTINEL_MESSAGE}' "
+                          f"for quit. Got {msg}, skipping")
+                continue
+            await in_flight.acquire()
+            task = asyncio.ensure_future(execution)
+            tasks.add(task)
+            task.add_done_callback(on_done)
+
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        await self.rest_client.close()
+        log.debug("Ending")
+
+    async def _execute(self, order: Order):
+        try:
+            self._print_ticker_info(order)
+            result_order = await self._post_order_async(order)
+            await self.loop.run_in_executor(None, self.order_dao.put_order, result_order)
+        except Exception as e:
+            log.error(f"Unable to execute order {order.client_order_id}: {e}", exc_info=True)
+
+    async def _execute_chain(self, orders: List[Order]):
+        """
+        Fires all the legs at once, as concurrent requests
+        """
+        send_times_ns = [0] * len(orders)
+
+        async def fire(i: int, order: Order) -> Order:
+            send_times_ns[i] = time.perf_counter_ns()
+            return await self._post_order_async(order)
+
+        try:
+            for order in orders:
+                self._print_ticker_info(order)
+            result_orders = await asyncio.gather(*[fire(i, order) for i, order in enumerate(orders)])
+            self.leg_skew.record(send_times_ns, result_orders)
+            for result_order in result_orders:
+                await self.loop.run_in_executor(None, self.order_dao.put_order, result_order)
+        except Exception as e:
+            log.error(f"Unable to execute chain orders {[o.client_order_id for o in orders]}: {e}", exc_info=True)
+
+    async def _post_order_async(self, o: Order) -> Order:
+        if self.bus.is_stop_trading():
+            return self._skip_order(o)
+        log.info(f"Placing order {o.client_order_id}")
+        # Set fire time for statistics
+        o.fired_at = current_time_ms()
+        start_ns = time.perf_counter_ns()
+        self._trace(o, STAGE_SENT)
+        try:
+            result_order = await self.rest_client.put_order(o)
+        except Exception as ex:
+            # Add log line to identify which order failed
+            log.error(f"Error placing order {o}: {ex}")
+            self._print_extra_info_for_exception(ex)
+            self._release_balance(o, ex)
+            o.status = "ERROR"
+            o.comment = f"{ex}"
+            self._trace_acked(o, o)
+            return o
+        finally:
+            self.order_latency_us.record((time.perf_counter_ns() - start_ns) / 1_000)
+        # Preserve correct times
+        result_order.created_at = o.created_at
+        result_order.fired_at = o.fired_at
+        self._trace_acked(o, result_order)
+        log.debug(f"Placed order: {result_order}")
+        return result_order
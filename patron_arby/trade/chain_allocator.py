@@ -0,0 +1,95 @@
+import logging
+import math
+import time
+from dataclasses import dataclass, replace
+from typing import Dict, Iterable, List, Optional
+
+from patron_arby.common.chain import AChain, AChainStep
+from patron_arby.common.metrics import MetricsRegistry, metrics
+from patron_arby.config.base import (
+    MAX_BALANCE_RATIO_PER_SINGLE_ORDER,
+    ORDER_PROFIT_THRESHOLD_USD,
+)
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class ChainAllocation:
+    chain: AChain
+    # Share of the chain volume to fire, (0, 1]
+    scale: float
+
+
+def scale_chain(chain: AChain, scale: float) -> AChain:
+    """
+    :return: Copy of the chain, with volumes and profit scaled. The chain itself if it's not scaled down
+    """
+    if scale >= 1:
+        return chain
+    return replace(chain, steps=[AChainStep(s.market, s.side, s.price, s.volume * scale) for s in chain.steps],
+        profit=chain.profit * scale, profit_usd=chain.profit_usd * scale)
+
+
+class ChainAllocator:
+    """
+    Chooses which chains of a batch to fire, and at which sizes, to maximize expected USD profit without spending more
+    than `max_balance_ratio` of any coin balance over all of them.
+
+    Greedy, as it has to decide in microseconds for dozens of chains: chains are taken in order of USD profit per
+    balances they use (use of each coin relative to its available balance, summed), each one scaled down to what is
+    left of the balances. Chains whose (scaled) profit is below `min_profit_usd` are skipped, leaving balances to others
+    """
+
+    def __init__(self, max_balance_ratio: float = MAX_BALANCE_RATIO_PER_SINGLE_ORDER,
+                 min_profit_usd: float = ORDER_PROFIT_THRESHOLD_USD,
+                 registry: MetricsRegistry = metrics) -> None:
+        self.max_balance_ratio = max_balance_ratio
+        self.min_profit_usd = min_profit_usd
+        self.decision_time_us = registry.histogram("chain_allocation_us")
+
+    def allocate(self, chains: Iterable[AChain], balances: Dict[str, Optional[float]]) -> List[ChainAllocation]:
+        """
+        :param balances: {coin -> balance}. Coins without balance information are not limited
+        :return: Chains to fire, with their scales, most profitable per balance use first
+        """
+        start_ns = time.perf_counter_ns()
+        remaining = {coin: balance * self.max_balance_ratio for coin, balance in balances.items()
+                     if balance is not None}
+
+        candidates = list()
+        for chain in chains:
+            if chain.profit_usd < self.min_profit_usd:
+                continue
+            needs = self._needs(chain, remaining)
+            balance_use = sum(need / remaining[coin] if remaining[coin] > 0 else math.inf
+                              for coin, need in needs.items())
+            if balance_use == math.inf:
+                continue
+            profit_per_use = chain.profit_usd / balance_use if balance_use > 0 else math.inf
+            candidates.append((profit_per_use, chain.profit_usd, chain, needs))
+        candidates.sort(key=lambda c: (c[0], c[1]), reverse=True)
+
+        allocations = list()
+        for _, profit_usd, chain, needs in candidates:
+            scale = min([1.0] + [remaining[coin] / need for coin, need in needs.items()])
+            if scale <= 0 or profit_usd * scale < self.min_profit_usd:
+                continue
+            for coin, need in needs.items():
+                remaining[coin] -= need * scale
+            allocations.append(ChainAllocation(chain, scale))
+
+        self.decision_time_us.record((time.perf_counter_ns() - start_ns) / 1_000)
+        return allocations
+
+    @staticmethod
+    def _needs(chain: AChain, limited_coins: Dict[str, float]) -> Dict[str, float]:
+        """
+        :return: {coin -> volume the chain spends}, of limited coins only
+        """
+        needs: Dict[str, float] = dict()
+        for step in chain.steps:
+            coin = step.spending_coin()
+            if coin in limited_coins:
+                needs[coin] = needs.get(coin, 0) + float(step.get_what_we_propose_volume())
+        return {coin: need for coin, need in needs.items() if need > 0}
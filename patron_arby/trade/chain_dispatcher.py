@@ -0,0 +1,82 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from queue import Queue
+from typing import Callable, List, Tuple
+
+from patron_arby.common.metrics import MetricsRegistry, metrics
+from patron_arby.common.order import Order
+from patron_arby.config.base import CHAIN_DISPATCH_BARRIER_TIMEOUT_SECONDS
+from patron_arby.exchange.exchange_api import ExchangeApi
+
+log = logging.getLogger(__name__)
+
+
+class LegSkewRecorder:
+    """
+    Records how far apart in time legs of a chain are fired, as it drives slippage: spread of local send times, and
+    spread of exchange transaction times when the exchange reports them (ms precision only)
+    """
+
+    def __init__(self, registry: MetricsRegistry = metrics) -> None:
+        self.send_skew_us = registry.histogram("chain_leg_send_skew_us")
+        self.exchange_skew_ms = registry.histogram("chain_leg_exchange_skew_ms")
+
+    def record(self, send_times_ns: List[int], orders: List[Order]):
+        if len(send_times_ns) < 2:
+            return
+        self.send_skew_us.record((max(send_times_ns) - min(send_times_ns)) / 1_000)
+        exchange_times = [o.transaction_time for o in orders if o.transaction_time and o.transaction_time > 0]
+        if len(exchange_times) == len(orders):
+            self.exchange_skew_ms.record(max(exchange_times) - min(exchange_times))
+
+
+class ChainDispatcher:
+    """
+    Fires all legs of a chain at the same time, each from its own slot: a thread with a dedicated ExchangeApi.
+    Slots meet at a barrier before sending, so no leg waits for reply to another one
+    """
+
+    def __init__(self, exchange_apis: List[ExchangeApi],
+                 barrier_timeout_seconds: float = CHAIN_DISPATCH_BARRIER_TIMEOUT_SECONDS) -> None:
+        """
+        :param exchange_apis: One per slot, as ExchangeApi is not necessarily thread-safe
+        """
+        self.slots = len(exchange_apis)
+        self.barrier_timeout_seconds = barrier_timeout_seconds
+        self._free_apis: Queue = Queue()
+        for api in exchange_apis:
+            self._free_apis.put(api)
+        self._slot = threading.local()
+        self._pool = ThreadPoolExecutor(max_workers=self.slots, thread_name_prefix="ChainDispatcherSlot",
+            initializer=self._bind_slot)
+
+    def dispatch(self, orders: List[Order], post_order: Callable[[Order, ExchangeApi], Order]) \
+            -> Tuple[List[Order], List[int]]:
+        """
+        :param post_order: Places the order via the given API, returns the order as replied by exchange
+        :return: Resulting orders, in the same order as given, and their send times (`time.perf_counter_ns()`)
+        """
+        if len(orders) > self.slots:
+            raise ValueError(f"Chain of {len(orders)} legs doesn't fit {self.slots} slots")
+        barrier = threading.Barrier(len(orders))
+        send_times_ns = [0] * len(orders)
+
+        def fire(i: int, order: Order) -> Order:
+            try:
+                barrier.wait(self.barrier_timeout_seconds)
+            except threading.BrokenBarrierError:
+                log.warning(f"Not all the legs are ready to fire in {self.barrier_timeout_seconds}s, "
+                            f"firing {order.client_order_id} anyway")
+            send_times_ns[i] = time.perf_counter_ns()
+            return post_order(order, self._slot.exchange_api)
+
+        futures = [self._pool.submit(fire, i, order) for i, order in enumerate(orders)]
+        return [f.result() for f in futures], send_times_ns
+
+    def shutdown(self):
+        self._pool.shutdown()
+
+    def _bind_slot(self):
+        self._slot.exchange_api = self._free_apis.get_nowait()
@@ -1,14 +1,24 @@
 import logging
 import threading
+import time
+from typing import List
 
 from patron_arby.arbitrage.market_data import MarketData
 from patron_arby.common.bus import Bus
 from patron_arby.common.decorators import safely
 from patron_arby.common.order import Order
+from patron_arby.common.trace import (
+    STAGE_ACKED,
+    STAGE_DEQUEUED,
+    STAGE_SENT,
+    TradeTracer,
+    trade_tracer,
+)
 from patron_arby.common.util import current_time_ms
 from patron_arby.db.order_dao import OrderDao
 from patron_arby.exchange.binance.balances_checker import BalancesChecker
 from patron_arby.exchange.exchange_api import ExchangeApi
+from patron_arby.trade.chain_dispatcher import ChainDispatcher, LegSkewRecorder
 
 log = logging.getLogger(__name__)
 
@@ -20,10 +30,15 @@ SENTINEL_MESSAGE = "SHUTDOWN"
 class OrderExecutor(threading.Thread):
     def __init__(self, bus: Bus, exchange_api: ExchangeApi, order_dao: OrderDao,
                  market_data: MarketData = None,
-                 balances_checker: BalancesChecker = None) -> None:
+                 balances_checker: BalancesChecker = None,
+                 chain_dispatcher: ChainDispatcher = None,
+                 tracer: TradeTracer = trade_tracer) -> None:
         """
         :param bus: Message bus
         :param exchange_api:  ExchangeApi. Be careful, and create 1 API instance per thread if its not thread-safe
+        :param chain_dispatcher: Fires legs of a chain, coming as a list of orders, all at once. If not set, the legs
+        are fired one after another
+        :param tracer: Gets traces of orders placed, to be finished by their first execution report
         """
         super().__init__()
         self.bus = bus
@@ -31,23 +46,32 @@ class OrderExecutor(threading.Thread):
         self.order_dao = order_dao
         self.market_data = market_data
         self.balances_checker = balances_checker
+        self.chain_dispatcher = chain_dispatcher
+        self.leg_skew = LegSkewRecorder()
+        self.tracer = tracer
 
-    def _post_order(self, o: Order) -> Order:
+    def _post_order(self, o: Order, exchange_api: ExchangeApi = None) -> Order:
+        if self.bus.is_stop_trading():
+            return self._skip_order(o)
         log.info(f"Placing order {o.client_order_id}")
         # Set fire time for statistics
         o.fired_at = current_time_ms()
+        self._trace(o, STAGE_SENT)
         try:
-            result_order = self.exchange_api.put_order(o)
+            result_order = (exchange_api if exchange_api else self.exchange_api).put_order(o)
         except Exception as ex:
             # Add log line to identify which order failed
             log.error(f"Error placing order {o}: {ex}")
             self._print_extra_info_for_exception(ex)
+            self._release_balance(o, ex)
             o.status = "ERROR"
             o.comment = f"{ex}"
+            self._trace_acked(o, o)
             return o
         # Preserve correct times
         result_order.created_at = o.created_at
         result_order.fired_at = o.fired_at
+        self._trace_acked(o, result_order)
         log.debug(f"Placed order: {result_order}")
         return result_order
 
@@ -64,8 +88,13 @@ class OrderExecutor(threading.Thread):
         if msg == SENTINEL_MESSAGE:
             return self._on_sentinel()
 
+        self._trace_dequeued(msg)
+        if isinstance(msg, list):
+            self._process_chain_orders(msg)
+            return False
+
         if not isinstance(msg, Order):
-            log.error(f"Message should be either of type {Order} or == '{SENTINEL_MESSAGE}' for quit. "
+            log.error(f"Message should be either of type {Order}, list of orders or == '{SENTINEL_MESSAGE}' for quit. "
                       f"Got {msg}, skipping")
             return False
 
@@ -79,12 +108,64 @@ class OrderExecutor(threading.Thread):
 
         return False
 
+    def _process_chain_orders(self, orders: List[Order]):
+        for order in orders:
+            self._print_ticker_info(order)
+        if self.chain_dispatcher:
+            result_orders, send_times_ns = self.chain_dispatcher.dispatch(orders, self._post_order)
+        else:
+            result_orders, send_times_ns = list(), list()
+            for order in orders:
+                send_times_ns.append(time.perf_counter_ns())
+                result_orders.append(self._post_order(order))
+        self.leg_skew.record(send_times_ns, result_orders)
+        for result_order in result_orders:
+            self.order_dao.put_order(result_order)
+
     def _print_ticker_info(self, order: Order):
         if not self.market_data:
             return
         ticker = self.market_data.get_ticker(order.symbol)
         log.debug(f"Current ticker info for order_client_id {order.client_order_id}: {ticker}")
 
+    def _trace_dequeued(self, msg):
+        for o in (msg if isinstance(msg, list) else [msg]):
+            if isinstance(o, Order):
+                self._trace(o, STAGE_DEQUEUED)
+
+    @staticmethod
+    def _trace(o: Order, stage: str):
+        if o.trace:
+            o.trace = o.trace.mark(stage)
+
+    def _trace_acked(self, o: Order, result_order: Order):
+        if not o.trace:
+            return
+        result_order.trace = o.trace.mark(STAGE_ACKED)
+        if result_order.status == "ERROR":
+            # No execution report is coming
+            self.tracer.finish(result_order.trace, f"{o.client_order_id} (error)")
+        else:
+            self.tracer.await_report(o.client_order_id, result_order.trace)
+
+    def _skip_order(self, o: Order) -> Order:
+        # Trading has been stopped since the order was queued
+        log.warning(f"Stop trading flag is True, not placing order {o.client_order_id}")
+        if self.balances_checker:
+            self.balances_checker.registry.release_balance(o.client_order_id)
+        o.status = "ERROR"
+        o.comment = "Stop trading flag is True, order has not been placed"
+        return o
+
+    def _release_balance(self, o: Order, ex: Exception):
+        # Exchange has rejected the order (4xx), so it has not been placed, and the balance reserved for it is free
+        # again. On 5xx the order status is unknown, and on timeout the order might have been placed: let the
+        # reservation expire
+        # BinanceApiError has `status`, python-binance BinanceAPIException has `status_code`
+        status = getattr(ex, "status", getattr(ex, "status_code", None))
+        if self.balances_checker and isinstance(status, int) and 400 <= status < 500:
+            self.balances_checker.registry.release_balance(o.client_order_id)
+
     def _print_extra_info_for_exception(self, ex: Exception):
         if not self.balances_checker:
             return
@@ -1,21 +1,25 @@
 import logging
 import random
 import threading
-from typing import List, Set, Tuple
+from typing import Iterable, List, Tuple
 
 from patron_arby.common.bus import Bus
 from patron_arby.common.chain import AChain, AChainStep
 from patron_arby.common.decorators import safely
 from patron_arby.common.order import Order
+from patron_arby.common.trace import STAGE_DECIDED
 from patron_arby.config.base import (
     MAX_BALANCE_RATIO_PER_SINGLE_ORDER,
     ORDER_PROFIT_THRESHOLD_USD,
+    TRADE_MANAGER_ALLOCATE_CHAINS,
+    TRADE_MANAGER_DISPATCH_CHAIN_ATOMICALLY,
     TRADE_MANAGER_FIRE_ONLY_TOP_ARBITRAGE,
     TRADE_MANAGER_SORT_ARBITRAGE_BY_ROI,
 )
 from patron_arby.exchange.binance.constants import Binance
 from patron_arby.exchange.exchange_limitations import ExchangeLimitations
 from patron_arby.exchange.registry import BalancesRegistry
+from patron_arby.trade.chain_allocator import ChainAllocator, scale_chain
 from patron_arby.trade.recent_arbitragers_filter import RecentArbitragersFilter
 
 log = logging.getLogger(__name__)
@@ -33,7 +37,9 @@ class TradeManager(threading.Thread):
                  exchange_limitations: ExchangeLimitations,
                  balances_registry: BalancesRegistry,
                  fire_only_top_arbitrage: bool = TRADE_MANAGER_FIRE_ONLY_TOP_ARBITRAGE,
-                 sort_arbitrage_by_roi: bool = TRADE_MANAGER_SORT_ARBITRAGE_BY_ROI) -> None:
+                 sort_arbitrage_by_roi: bool = TRADE_MANAGER_SORT_ARBITRAGE_BY_ROI,
+                 dispatch_chain_atomically: bool = TRADE_MANAGER_DISPATCH_CHAIN_ATOMICALLY,
+                 allocate_chains: bool = TRADE_MANAGER_ALLOCATE_CHAINS) -> None:
         """
         :param bus: Message bus
         :param exchange_limitations: Dictionary of exchange limitations for all trading pairs
@@ -44,6 +50,9 @@ class TradeManager(threading.Thread):
         self.balances_registry = balances_registry
         self.fire_only_top_arbitrage = fire_only_top_arbitrage
         self.sort_arbitrage_by_roi = sort_arbitrage_by_roi
+        self.dispatch_chain_atomically = dispatch_chain_atomically
+        self.allocate_chains = allocate_chains
+        self.chain_allocator = ChainAllocator()
         self.recent_arbitragers_filter = RecentArbitragersFilter()
 
     def run(self) -> None:
@@ -56,10 +65,11 @@ class TradeManager(threading.Thread):
             log.debug(f"Got {len(chains)} chains to process")
 
             self._process_chain_set(chains)
+            self._store_dropped_chains()
 
         log.debug("Ending")
 
-    def _process_chain_set(self, chains: Set[AChain]):
+    def _process_chain_set(self, chains: Iterable[AChain]):
         chains_list = self._sort_chains_by_profitability(chains)
 
         if self.fire_only_top_arbitrage:
@@ -68,6 +78,8 @@ class TradeManager(threading.Thread):
             self._process_chain(chains_list[0])
             for i in range(1, len(chains_list)):
                 chains_list[i].comment = message
+        elif self.allocate_chains:
+            self._process_allocated_chains(chains_list)
         else:
             log.debug(f"Processing all {len(chains_list)} arbitrage chains")
             for chain in chains_list:
@@ -76,6 +88,30 @@ class TradeManager(threading.Thread):
         for chain in chains_list:
             self.bus.store_positive_arbitrages_queue.put(chain)
 
+    def _process_allocated_chains(self, chains_list: List[AChain]):
+        allocations = self.chain_allocator.allocate(chains_list, self.balances_registry.balances)
+        log.debug(f"Processing {len(allocations)} of {len(chains_list)} arbitrage chains allocated balances")
+        allocated = set()
+        for allocation in allocations:
+            chain = allocation.chain
+            allocated.add(id(chain))
+            # Chain is stored as found: a scaled copy is fired
+            scaled = scale_chain(chain, allocation.scale)
+            self._process_chain(scaled)
+            if scaled is not chain:
+                chain.comment = f"{scaled.comment}. Allocated {allocation.scale:.4f} of the volume"
+        for chain in chains_list:
+            if id(chain) not in allocated:
+                chain.comment = "Not allocated: too low profit, or balances are taken by more profitable chains"
+
+    def _store_dropped_chains(self):
+        # Chains dropped by the positive arbitrages channel (expired or coalesced) are stored along with the rest
+        take_dropped = getattr(self.bus.positive_arbitrages_queue, "take_dropped", None)
+        if not take_dropped:
+            return
+        for chain in take_dropped():
+            self.bus.store_positive_arbitrages_queue.put(chain)
+
     @safely
     def _process_chain(self, chain: AChain) -> AChain:
         if self.bus.is_stop_trading():
@@ -112,6 +148,11 @@ class TradeManager(threading.Thread):
         if not meets_all_filters:
             return error
 
+        if chain.trace:
+            decided = chain.trace.mark(STAGE_DECIDED)
+            for order in orders:
+                order.trace = decided
+
         self._put_orders_to_execution_queue(orders)
 
         self._reduce_cached_balances(orders, chain)
@@ -119,6 +160,12 @@ class TradeManager(threading.Thread):
         return "Orders created successfully"
 
     def _put_orders_to_execution_queue(self, orders: List[Order]):
+        if self.dispatch_chain_atomically:
+            # Single message, for a single executor to fire all the legs together
+            self.bus.fire_orders_queue.put(list(orders))
+            log.debug(f"Put chain orders {orders}")
+            return
+
         # Do not change original list
         orders_copy = orders.copy()
         # Iterate in random order to provide better balances distribution
@@ -136,9 +183,10 @@ class TradeManager(threading.Thread):
             # balance cache has not been refreshed yet)
             # https://linear.app/good-it-works/issue/ACT-440/
             # Here, its important to use orders volume (not chain), as orders volumes are subject of adjustment
-            self.balances_registry.reduce_balance(step.spending_coin(), order.get_what_we_propose_volume())
+            self.balances_registry.reserve_balance(step.spending_coin(), order.get_what_we_propose_volume(),
+                order.client_order_id)
 
-    def _sort_chains_by_profitability(self, chains: Set[AChain]) -> List[AChain]:
+    def _sort_chains_by_profitability(self, chains: Iterable[AChain]) -> List[AChain]:
         if self.sort_arbitrage_by_roi:
             return sorted(list(chains), key=lambda c: c.roi, reverse=True)
         return sorted(list(chains), key=lambda c: c.profit, reverse=True)
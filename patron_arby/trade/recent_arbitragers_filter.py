@@ -1,22 +1,53 @@
 import logging
-from typing import Dict
+import math
+from typing import Callable, Dict, List, Set, Tuple
 
 from patron_arby.common.chain import AChain
+from patron_arby.common.metrics import MetricsRegistry, metrics
 from patron_arby.common.util import current_time_ms
-from patron_arby.config.base import ARBITRAGE_DUPLICATION_TIMEFRAME_MS
+from patron_arby.config.base import (
+    ARBITRAGE_DUPLICATION_BUCKETS,
+    ARBITRAGE_DUPLICATION_MAX_CHAINS,
+    ARBITRAGE_DUPLICATION_ROI_BAND,
+    ARBITRAGE_DUPLICATION_TIMEFRAME_MS,
+)
 
 log = logging.getLogger(__name__)
 
 
 class RecentArbitragersFilter:
     """
-    Class to filter arbitrage duplication coming withing predefined time frame
+    Class to filter arbitrage duplication coming withing predefined time frame.
+
+    Chain is keyed by id of its path plus ROI band. Keys are kept in a ring of time buckets, covering the time frame
+    and one bucket more: when time moves to the next bucket, the oldest one is dropped with all its keys, so memory is
+    bounded by chains seen within the time frame, and both register and expire are O(1) per chain
     """
 
-    def __init__(self, arbitrage_duplication_ttl: int = ARBITRAGE_DUPLICATION_TIMEFRAME_MS) -> None:
+    def __init__(self, arbitrage_duplication_ttl: int = ARBITRAGE_DUPLICATION_TIMEFRAME_MS,
+                 roi_band: float = ARBITRAGE_DUPLICATION_ROI_BAND,
+                 buckets: int = ARBITRAGE_DUPLICATION_BUCKETS,
+                 max_chains: int = ARBITRAGE_DUPLICATION_MAX_CHAINS,
+                 clock: Callable[[], int] = current_time_ms,
+                 registry: MetricsRegistry = metrics) -> None:
         super().__init__()
-        self.recent_chains: Dict[str, int] = dict()
         self.arbitrage_duplication_ttl = arbitrage_duplication_ttl
+        self.roi_band = roi_band
+        self.max_chains = max_chains
+        self.clock = clock
+        self.bucket_ms = max(1, arbitrage_duplication_ttl // buckets)
+        ring_size = math.ceil(arbitrage_duplication_ttl / self.bucket_ms) + 1
+        # Buckets of keys registered within the same `bucket_ms`, by bucket number modulo ring size
+        self._ring: List[Set[Tuple[int, int]]] = [set() for _ in range(ring_size)]
+        self._bucket_number = clock() // self.bucket_ms
+        # Key -> time registered at
+        self.recent_chains: Dict[Tuple[int, int], int] = dict()
+        # Path, e.g. "[BTC/USDT -> ETH/USDT -> ETH/BTC]" -> its compact id
+        self._path_ids: Dict[str, int] = dict()
+        self.hits_count = 0
+        self.misses_count = 0
+        self.evictions_count = 0
+        registry.gauge("recent_arbitrages_filter", self.snapshot)
         log.info(f"Arbitrages duplications timeframe = {self.arbitrage_duplication_ttl} ms")
 
     def register_and_return_contained(self, chain: AChain):
@@ -27,15 +58,57 @@ class RecentArbitragersFilter:
         """
         if not chain:
             return False
+        now = self.clock()
+        self._expire(now)
+        # Clock may step back a bit, but registration time has to be within the current bucket
+        now = max(now, self._bucket_number * self.bucket_ms)
         key = self._to_key(chain)
-        last_seen_time = self.recent_chains.pop(key, 0)
-        now = current_time_ms()
-        contains_duplication = now - last_seen_time < self.arbitrage_duplication_ttl
-        if contains_duplication:
+        registered_at = self.recent_chains.get(key)
+        if registered_at is not None and now - registered_at < self.arbitrage_duplication_ttl:
+            self.hits_count += 1
             return True
 
+        self.misses_count += 1
+        if len(self.recent_chains) >= self.max_chains:
+            self._drop_oldest_bucket()
         self.recent_chains[key] = now
+        self._ring[self._bucket_number % len(self._ring)].add(key)
         return False
 
-    def _to_key(self, chain: AChain):
-        return f"{chain.to_chain()}_roi_{chain.roi}"
+    def snapshot(self) -> Dict:
+        return {
+            "size": len(self.recent_chains),
+            "hits": self.hits_count,
+            "misses": self.misses_count,
+            "evictions": self.evictions_count,
+        }
+
+    def _to_key(self, chain: AChain) -> Tuple[int, int]:
+        path = chain.to_chain()
+        path_id = self._path_ids.get(path)
+        if path_id is None:
+            path_id = self._path_ids[path] = len(self._path_ids)
+        return path_id, round(chain.roi / self.roi_band)
+
+    def _expire(self, now: int):
+        bucket_number = now // self.bucket_ms
+        # Buckets time has moved through, at most a full turn of the ring
+        for n in range(max(self._bucket_number, bucket_number - len(self._ring)) + 1, bucket_number + 1):
+            self._drop_bucket(n % len(self._ring))
+        self._bucket_number = max(self._bucket_number, bucket_number)
+
+    def _drop_oldest_bucket(self):
+        for n in range(self._bucket_number + 1, self._bucket_number + len(self._ring)):
+            if self._ring[n % len(self._ring)]:
+                self._drop_bucket(n % len(self._ring))
+                return
+
+    def _drop_bucket(self, index: int):
+        bucket = self._ring[index]
+        for key in bucket:
+            registered_at = self.recent_chains.get(key)
+            # Key re-registered since, in a later bucket, lives on
+            if registered_at is not None and registered_at // self.bucket_ms % len(self._ring) == index:
+                del self.recent_chains[key]
+                self.evictions_count += 1
+        bucket.clear()
@@ -91,6 +91,29 @@ class TestArby(TestCase):
         self.assertEqual(bidask.best_ask * 1.1, step_btc.price)
         self.assertEqual(bidask.best_bid * 0.9, step_usdt.price)
 
+    def test__find__stale_leg_skipped(self):
+        # 1. Arrange
+        market_data = MarketData({"BTCUSDT": "BTC/USDT", "ETHBTC": "ETH/BTC", "ETHUSDT": "ETH/USDT"},
+            {"BTC", "ETH", "USDT"})
+        market_data.put(Ticker("BTCUSDT", 49990, 1, 50000, 1, time_ms=10_000))
+        market_data.put(Ticker("ETHBTC", 0.0499, 10, 0.05, 10, time_ms=10_000))
+        market_data.put(Ticker("ETHUSDT", 2600, 10, 2610, 10, time_ms=1_000, exchange_time_ms=9_500))
+        arby = PetroniusArbiter(market_data, {}, lambda chains: None, default_trade_fee=0, max_ticker_age_ms=1_000,
+            clock=lambda: 10_200)
+        arby_no_age_limit = PetroniusArbiter(market_data, {}, lambda chains: None, default_trade_fee=0)
+
+        # 2. Act
+        fresh_result = arby.find({"BTC/USDT"})
+        market_data.put(Ticker("ETHUSDT", 2600, 10, 2610, 10, time_ms=10_000, exchange_time_ms=9_000))
+        stale_result = arby.find({"BTC/USDT"})
+        no_age_limit_result = arby_no_age_limit.find({"BTC/USDT"})
+
+        # 3. Assert
+        self.assertTrue(len(fresh_result) > 0)
+        self.assertEqual(0, len(stale_result))
+        self.assertTrue(arby.stale_chains_count > 0)
+        self.assertEqual(len(fresh_result), len(no_age_limit_result))
+
     @skip
     def test__find_using_real_market_snapshot(self):
         # 1. Arrange
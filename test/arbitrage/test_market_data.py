@@ -4,6 +4,7 @@ from typing import List
 from unittest import TestCase, skip
 
 from patron_arby.arbitrage.market_data import MarketData
+from patron_arby.common.ticker import Ticker
 from patron_arby.config.base import ARBITRAGE_COINS
 
 
@@ -116,3 +117,16 @@ class TestMarketData(TestCase):
             bidasks = json.load(f)
 
         return symbol_to_base_quote_coins, bidasks
+
+    def test__get_mid_price(self):
+        # 1. Arrange
+        market_data = MarketData({"BTCUSDT": "BTC/USDT", "ETHUSDT": "ETH/USDT"})
+        market_data.put(Ticker("BTCUSDT", 50_000, 1, 50_010, 1))
+        market_data.put(Ticker("ETHUSDT", 3_000, 1, 3_002, 1))
+        # 2. Act
+        market_data.set_stale(["ETHUSDT"], True)
+        # 3. Assert
+        self.assertEqual(50_005, market_data.get_mid_price("BTCUSDT"))
+        self.assertEqual(50_005, market_data.get_mid_price("BTC/USDT"))
+        self.assertIsNone(market_data.get_mid_price("ETHUSDT"))
+        self.assertIsNone(market_data.get_mid_price("DOGEUSDT"))
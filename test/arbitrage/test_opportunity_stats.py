@@ -0,0 +1,87 @@
+from unittest import TestCase
+
+from patron_arby.arbitrage.opportunity_stats import OpportunityStats
+from patron_arby.common.chain import AChain, AChainStep
+from patron_arby.common.metrics import MetricsRegistry
+from patron_arby.common.order import OrderSide
+from patron_arby.replay.stubs import InMemoryArbitrageDao
+
+PATH_A = [AChainStep("BTC/USDT", OrderSide.BUY, 50000, 0.1), AChainStep("ETH/BTC", OrderSide.BUY, 0.05, 2),
+          AChainStep("ETH/USDT", OrderSide.SELL, 2600, 2)]
+PATH_B = [AChainStep("BNB/USDT", OrderSide.BUY, 500, 1), AChainStep("BNB/BTC", OrderSide.SELL, 0.01, 1),
+          AChainStep("BTC/USDT", OrderSide.SELL, 50000, 0.01)]
+
+
+def chain(steps, roi: float, timems: int) -> AChain:
+    return AChain("USDT", steps, roi, 0, 0, timems)
+
+
+class TestOpportunityStats(TestCase):
+    def setUp(self) -> None:
+        self.now = 0
+        self.dao = InMemoryArbitrageDao()
+        self.stats = OpportunityStats(self.dao, raw_sample_every=3, clock=lambda: self.now,
+            registry=MetricsRegistry())
+
+    def test__profitable_windows_and_roi_distribution(self):
+        # 1. Arrange
+        chains = [chain(PATH_A, -0.001, 0), chain(PATH_A, 0.002, 10), chain(PATH_A, 0.001, 20),
+                  chain(PATH_A, -0.0005, 50), chain(PATH_A, 0.003, 60), chain(PATH_B, -0.001, 5)]
+        self.stats.observe(chains)
+        self.now = 100
+        # 2. Act
+        records = {r["path"]: r for r in self.stats.flush()}
+        # 3. Assert
+        a = records[chains[0].to_chain()]
+        self.assertEqual(5, a["evaluations"])
+        self.assertEqual(3, a["profitable"])
+        self.assertEqual(0.003, a["roi_max"])
+        self.assertEqual({"-10": 1, "-5": 1, "10": 1, "20": 1, "30": 1}, a["roi_histogram"])
+        # Closed window 10..50 and open one since 60, the latest chain
+        self.assertEqual(1, a["windows"])
+        self.assertEqual(40, a["window_lifetime_ms"]["max"])
+        self.assertEqual(40, a["time_above_threshold_ms"])
+        self.assertTrue(a["window_open"])
+        self.assertEqual(0, records[chains[5].to_chain()]["time_above_threshold_ms"])
+        self.assertEqual(list(records.values()), self.dao.opportunity_stats)
+
+    def test__open_window_carried_over_flushes(self):
+        # 1. Arrange
+        self.stats.observe([chain(PATH_A, 0.001, 0), chain(PATH_B, -0.001, 0)])
+        self.now = 100
+        self.stats.flush()
+        # 2. Act
+        self.now = 150
+        self.stats.observe([chain(PATH_A, -0.001, 150)])
+        self.now = 200
+        records = self.stats.flush()
+        # 3. Assert
+        self.assertEqual(1, len(records))
+        self.assertEqual(150, records[0]["time_above_threshold_ms"])
+        self.assertEqual(150, records[0]["window_lifetime_ms"]["max"])
+        self.assertEqual(100, records[0]["from_ms"])
+        # Nothing left to track
+        self.assertEqual(0, self.stats.snapshot()["paths"])
+
+    def test__chain_evaluated_before_flush_closes_window_after_it(self):
+        # 1. Arrange
+        self.stats.observe([chain(PATH_A, 0.001, 1000)])
+        self.now = 10000
+        first = self.stats.flush()
+        # 2. Act
+        # Evaluated before the flush, stored after it
+        self.stats.observe([chain(PATH_A, -0.001, 1500)])
+        self.now = 20000
+        second = self.stats.flush()
+        # 3. Assert
+        self.assertEqual(0, first[0]["time_above_threshold_ms"])
+        self.assertEqual(500, second[0]["time_above_threshold_ms"])
+        self.assertEqual(500, second[0]["window_lifetime_ms"]["max"])
+
+    def test__profitable_and_sampled_chains_kept_raw(self):
+        # 1. Arrange
+        chains = [chain(PATH_A, -0.001 if i % 4 else 0.001, i) for i in range(12)]
+        # 2. Act
+        raw = self.stats.observe(chains)
+        # 3. Assert
+        self.assertEqual([0, 2, 4, 5, 8, 11], [c.timems for c in raw])
@@ -0,0 +1,60 @@
+from unittest import TestCase
+
+from patron_arby.common.bus_codec import BusCodec
+from patron_arby.common.chain import AChain, AChainStep
+from patron_arby.common.order import Order, OrderSide
+from patron_arby.common.ticker import Ticker
+from patron_arby.trade.executor import SENTINEL_MESSAGE
+
+
+class TestBusCodec(TestCase):
+    def setUp(self) -> None:
+        self.codec = BusCodec()
+
+    def test__ticker(self):
+        # 1. Arrange
+        ticker = Ticker("BTCUSDT", 49990.5, 1.25, 50000.1, 0.5, time_ms=1_000, exchange_time_ms=990)
+        # 2. Act
+        result = self.codec.decode(self.codec.encode(ticker))
+        # 3. Assert
+        self.assertEqual(ticker, result)
+
+    def test__chains(self):
+        # 1. Arrange
+        chain1 = AChain("USDT", [AChainStep("BTC/USDT", OrderSide.BUY, 50000, 0.1),
+                                 AChainStep("ETH/BTC", OrderSide.BUY, 0.05, 2),
+                                 AChainStep("ETH/USDT", OrderSide.SELL, 2600, 2)], 0.01, 5, 5, 1_000, "Комментарий")
+        chain2 = AChain("BTC", [AChainStep("BTC/USDT", OrderSide.SELL, 50000, 0.1)], -0.01, -1, -1, 2_000)
+        # 2. Act
+        single = self.codec.decode(self.codec.encode(chain1))
+        chains_list = self.codec.decode(self.codec.encode([chain1, chain2]))
+        chains_set = self.codec.decode(self.codec.encode({chain1, chain2}))
+        # 3. Assert
+        self.assertEqual(chain1, single)
+        self.assertEqual(chain1.uid(), single.uid())
+        self.assertEqual(OrderSide.SELL, single.steps[2].side)
+        self.assertEqual([chain1, chain2], chains_list)
+        self.assertEqual({chain1.uid(), chain2.uid()}, {c.uid() for c in chains_set})
+
+    def test__order_and_sentinel(self):
+        # 1. Arrange
+        order = Order("12345678_order_1", OrderSide.BUY, "BTCUSDT", 0.1, 50000, created_at=1_000,
+            arbitrage_hash8=12345678, rest_reply_raw_order={"orderId": 1, "fills": []}, comment="test")
+        # 2. Act
+        result = self.codec.decode(self.codec.encode(order))
+        sentinel = self.codec.decode(self.codec.encode(SENTINEL_MESSAGE))
+        # 3. Assert
+        self.assertEqual(order, result)
+        self.assertIsNone(result.event_raw_order)
+        self.assertIsNone(result.order_id)
+        self.assertEqual(SENTINEL_MESSAGE, sentinel)
+
+    def test__chain_orders(self):
+        # 1. Arrange
+        orders = [Order(f"12345678_order_{i}", OrderSide.SELL, "ETHBTC", 2, 0.05, arbitrage_hash8=12345678)
+                  for i in range(1, 4)]
+        orders[0].wire_price, orders[0].wire_quantity = "0.050000", "2.0000"
+        # 2. Act
+        result = self.codec.decode(self.codec.encode(orders))
+        # 3. Assert
+        self.assertEqual(orders, result)
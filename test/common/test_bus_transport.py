@@ -0,0 +1,55 @@
+import multiprocessing
+import queue
+import tempfile
+from unittest import TestCase
+
+from patron_arby.common.bus import CHANNEL_FIRE_ORDERS, CHANNEL_TICKERS, Bus
+from patron_arby.common.bus_transport import (
+    InProcessBusTransport,
+    UnixSocketBusTransport,
+)
+from patron_arby.common.metrics import MetricsRegistry
+from patron_arby.common.order import Order, OrderSide
+from patron_arby.common.ticker import Ticker
+
+
+def _produce(directory: str):
+    bus = Bus(UnixSocketBusTransport(directory))
+    for i in range(100):
+        bus.tickers_queue.put(Ticker("BTCUSDT", 50000 + i, 1, 50001 + i, 1, time_ms=i))
+    bus.fire_orders_queue.put(Order("1_order_1", OrderSide.SELL, "BTCUSDT", 0.1, 50000, created_at=1))
+    bus.set_stop_trading(True)
+
+
+class TestBusTransport(TestCase):
+    def test__in_process__queues_shared_by_transport(self):
+        # 1. Arrange
+        transport = InProcessBusTransport(MetricsRegistry())
+        # 2. Act
+        Bus(transport).tickers_queue.put("message")
+        # 3. Assert
+        self.assertEqual("message", Bus(transport).tickers_queue.get_nowait())
+        self.assertFalse(Bus(transport).is_stop_trading())
+
+    def test__unix_socket__messages_go_across_processes(self):
+        with tempfile.TemporaryDirectory() as directory:
+            # 1. Arrange
+            bus = Bus(UnixSocketBusTransport(directory, consumed_channels=[CHANNEL_TICKERS, CHANNEL_FIRE_ORDERS]))
+
+            # 2. Act
+            producer = multiprocessing.Process(target=_produce, args=(directory,))
+            producer.start()
+            # Producer blocks when socket buffer is full, so consume before joining it
+            tickers = [bus.tickers_queue.get(timeout=5) for _ in range(100)]
+            order = bus.fire_orders_queue.get(timeout=5)
+            producer.join(10)
+
+            # 3. Assert
+            self.assertEqual(0, producer.exitcode)
+            self.assertEqual(list(range(100)), [t.time_ms for t in tickers])
+            self.assertEqual(50099, tickers[-1].best_bid)
+            self.assertEqual("1_order_1", order.client_order_id)
+            self.assertTrue(bus.is_stop_trading())
+            with self.assertRaises(queue.Empty):
+                bus.tickers_queue.get_nowait()
+            bus.transport.close()
@@ -0,0 +1,26 @@
+import os
+import subprocess
+import sys
+from unittest import TestCase
+
+from patron_arby.common.chain import AChain, AChainStep
+from patron_arby.common.order import OrderSide
+
+HASH8_SCRIPT = """
+from patron_arby.common.chain import AChain, AChainStep
+from patron_arby.common.order import OrderSide
+print(AChain("USDT", [AChainStep("BTC/USDT", OrderSide.BUY, 50000, 0.1)], timems=1_000).hash8())
+"""
+
+
+class TestAChain(TestCase):
+    def test__hash8_same_in_every_process(self):
+        # 1. Arrange
+        chain = AChain("USDT", [AChainStep("BTC/USDT", OrderSide.BUY, 50000, 0.1)], timems=1_000)
+        # 2. Act
+        hashes = {subprocess.check_output([sys.executable, "-c", HASH8_SCRIPT],
+                                          env=dict(os.environ, PYTHONHASHSEED=seed)).decode().strip()
+                  for seed in ["1", "2"]}
+        # 3. Assert
+        self.assertEqual({str(chain.hash8())}, hashes)
+        self.assertLess(chain.hash8(), 10 ** 8)
@@ -0,0 +1,69 @@
+import queue
+import threading
+from unittest import TestCase
+
+from patron_arby.common.chain import AChain
+from patron_arby.common.chain_storage_queue import (
+    DROP_REASON_OVERFLOW,
+    DROP_REASON_SAMPLED_OUT,
+    ChainStorageQueue,
+)
+from patron_arby.common.metrics import MetricsRegistry
+from patron_arby.config.base import ChainStorageOverflowPolicy
+
+
+def chains(start: int, count: int):
+    return [AChain("BTC", [], timems=i) for i in range(start, start + count)]
+
+
+class TestChainStorageQueue(TestCase):
+    def test__drop_oldest(self):
+        # 1. Arrange
+        registry = MetricsRegistry()
+        q = ChainStorageQueue(capacity=10, overflow_policy=ChainStorageOverflowPolicy.DROP_OLDEST, batch_size=4,
+            registry=registry)
+        # 2. Act
+        q.put(chains(0, 6))
+        q.put(chains(6, 7))
+        # 3. Assert
+        self.assertEqual(10, q.qsize())
+        self.assertEqual(3, q.snapshot()["dropped"][DROP_REASON_OVERFLOW])
+        self.assertEqual([3, 4, 5, 6], [c.timems for c in q.take(0)])
+        self.assertEqual([7, 8, 9, 10], [c.timems for c in q.take(0)])
+        self.assertEqual([11, 12], [c.timems for c in q.take(0)])
+        self.assertEqual([], q.take(0))
+        snapshot = q.snapshot()
+        self.assertEqual((10, 13, 10), (snapshot["high_water_mark"], snapshot["put_count"], snapshot["get_count"]))
+        self.assertEqual(4, registry.snapshot()["histograms"]["bus_time_in_queue_us.all_arbitrages"]["count"])
+
+    def test__sample_when_half_full(self):
+        # 1. Arrange
+        q = ChainStorageQueue(capacity=20, overflow_policy=ChainStorageOverflowPolicy.SAMPLE, sample_every=5,
+            registry=MetricsRegistry())
+        q.put(chains(0, 10))
+        # 2. Act
+        for i in range(10, 30, 2):
+            q.put(chains(i, 2))
+        # 3. Assert
+        self.assertEqual(14, q.qsize())
+        self.assertEqual(16, q.snapshot()["dropped"][DROP_REASON_SAMPLED_OUT])
+        self.assertEqual(list(range(0, 10)) + [10, 15, 20, 25], [c.timems for c in q.take(0)])
+
+    def test__block_waits_for_room(self):
+        # 1. Arrange
+        q = ChainStorageQueue(capacity=4, overflow_policy=ChainStorageOverflowPolicy.BLOCK, batch_size=2,
+            registry=MetricsRegistry())
+        q.put(chains(0, 4))
+        producer = threading.Thread(target=lambda: q.put(chains(4, 2)))
+        # 2. Act
+        producer.start()
+        producer.join(0.1)
+        blocked = producer.is_alive()
+        taken = q.take(0)
+        producer.join(1)
+        # 3. Assert
+        self.assertTrue(blocked)
+        self.assertEqual([0, 1], [c.timems for c in taken])
+        self.assertFalse(producer.is_alive())
+        self.assertEqual(4, q.qsize())
+        self.assertRaises(queue.Full, q.put_nowait, chains(6, 1))
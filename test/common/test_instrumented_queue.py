@@ -0,0 +1,41 @@
+import time
+from unittest import TestCase
+
+from patron_arby.common.instrumented_queue import InstrumentedQueue
+from patron_arby.common.metrics import MetricsRegistry
+
+
+class TestInstrumentedQueue(TestCase):
+    def test__depth_high_water_mark_and_time_in_queue(self):
+        # 1. Arrange
+        registry = MetricsRegistry()
+        q = InstrumentedQueue("tickers", registry=registry)
+
+        # 2. Act
+        for i in range(5):
+            q.put(i)
+        time.sleep(0.01)
+        items = [q.get_nowait() for _ in range(3)]
+        snapshot = q.snapshot()
+
+        # 3. Assert
+        self.assertEqual([0, 1, 2], items)
+        self.assertEqual(2, snapshot["depth"])
+        self.assertEqual(5, snapshot["high_water_mark"])
+        self.assertEqual(5, snapshot["put_count"])
+        self.assertEqual(3, snapshot["get_count"])
+        self.assertTrue(snapshot["put_per_second"] > 0)
+        time_in_queue = registry.snapshot()["histograms"]["bus_time_in_queue_us.tickers"]
+        self.assertEqual(3, time_in_queue["count"])
+        self.assertGreaterEqual(time_in_queue["min"], 10_000)
+
+    def test__rates_are_since_previous_snapshot(self):
+        # 1. Arrange
+        q = InstrumentedQueue("orders", registry=MetricsRegistry())
+        q.put(1)
+        q.snapshot()
+        # 2. Act
+        snapshot = q.snapshot()
+        # 3. Assert
+        self.assertEqual(0, snapshot["put_per_second"])
+        self.assertEqual(1, snapshot["depth"])
@@ -0,0 +1,47 @@
+from unittest import TestCase
+
+from patron_arby.common.metrics import Histogram, MetricsRegistry
+
+
+class TestHistogram(TestCase):
+    def test__percentiles_are_within_relative_error(self):
+        # 1. Arrange
+        h = Histogram()
+        # 2. Act
+        for v in range(1, 10_001):
+            h.record(v)
+        # 3. Assert
+        self.assertEqual(10_000, h.count)
+        self.assertEqual(1, h.min)
+        self.assertEqual(10_000, h.max)
+        self.assertAlmostEqual(5_000.5, h.mean())
+        for p in [50, 90, 99]:
+            self.assertAlmostEqual(p * 100, h.percentile(p), delta=p * 100 * 0.04)
+
+    def test__zero_and_negative_values(self):
+        # 1. Arrange
+        h = Histogram()
+        # 2. Act
+        h.record(-5)
+        h.record(0)
+        h.record(10)
+        # 3. Assert
+        self.assertEqual(-5, h.min)
+        self.assertEqual(0, h.percentile(50))
+        self.assertAlmostEqual(10, h.percentile(100), delta=0.4)
+
+    def test__empty_snapshot(self):
+        snapshot = Histogram().snapshot()
+        self.assertEqual(0, snapshot["count"])
+        self.assertIsNone(snapshot["p99"])
+
+    def test__registry__same_histogram_by_name(self):
+        # 1. Arrange
+        registry = MetricsRegistry()
+        # 2. Act
+        registry.histogram("ingest_lag_ms.user_data").record(3)
+        registry.histogram("ingest_lag_ms.user_data").record(5)
+        # 3. Assert
+        snapshot = registry.snapshot()["histograms"]
+        self.assertEqual(["ingest_lag_ms.user_data"], list(snapshot.keys()))
+        self.assertEqual(2, snapshot["ingest_lag_ms.user_data"]["count"])
@@ -0,0 +1,94 @@
+import queue
+import threading
+from unittest import TestCase
+
+from patron_arby.common.chain import AChain, AChainStep
+from patron_arby.common.metrics import MetricsRegistry
+from patron_arby.common.order import OrderSide
+from patron_arby.common.positive_arbitrages_queue import (
+    DROP_REASON_COALESCED,
+    DROP_REASON_EXPIRED,
+    PositiveArbitragesQueue,
+)
+from patron_arby.trade.manager import SENTINEL_MESSAGE
+
+
+def _chain(markets, roi: float, timems: int) -> AChain:
+    return AChain("USDT", [AChainStep(m, OrderSide.BUY, 1, 1) for m in markets], roi, roi, roi, timems)
+
+
+TRIANGLE_1 = ["BTC/USDT", "ETH/BTC", "ETH/USDT"]
+TRIANGLE_2 = ["BNB/USDT", "BNB/BTC", "BTC/USDT"]
+
+
+class TestPositiveArbitragesQueue(TestCase):
+    def setUp(self) -> None:
+        self.now_ms = 1_000
+        self.registry = MetricsRegistry()
+        self.q = PositiveArbitragesQueue(max_age_ms=100, clock=lambda: self.now_ms, registry=self.registry)
+
+    def test__newest_chain_per_path_most_profitable_first(self):
+        # 1. Arrange
+        old = _chain(TRIANGLE_1, 0.05, 990)
+        new = _chain(TRIANGLE_1, 0.01, 995)
+        other = _chain(TRIANGLE_2, 0.02, 990)
+
+        # 2. Act
+        self.q.put({old, other})
+        self.q.put({new})
+        result = self.q.get_nowait()
+
+        # 3. Assert
+        self.assertEqual([other, new], result)
+        self.assertEqual([old], self.q.take_dropped())
+        self.assertTrue(old.comment.startswith("Coalesced"))
+        self.assertEqual(1, self.q.snapshot()["dropped"][DROP_REASON_COALESCED])
+        with self.assertRaises(queue.Empty):
+            self.q.get_nowait()
+
+    def test__expired_chains_dropped(self):
+        # 1. Arrange
+        expired = _chain(TRIANGLE_1, 0.05, 800)
+        fresh = _chain(TRIANGLE_2, 0.01, 950)
+        self.q.put([expired, fresh])
+
+        # 2. Act
+        result = self.q.get_nowait()
+
+        # 3. Assert
+        self.assertEqual([fresh], result)
+        self.assertEqual("Expired: found 200 ms ago", self.q.take_dropped()[0].comment)
+        self.assertEqual(1, self.q.snapshot()["dropped"][DROP_REASON_EXPIRED])
+
+    def test__blocking_get_and_sentinel(self):
+        # 1. Arrange
+        chain = _chain(TRIANGLE_1, 0.05, 1_000)
+        results = list()
+
+        def consume():
+            results.append(self.q.get())
+            results.append(self.q.get())
+
+        consumer = threading.Thread(target=consume)
+        consumer.start()
+
+        # 2. Act
+        self.q.put({chain})
+        self.q.put(SENTINEL_MESSAGE)
+        consumer.join(5)
+
+        # 3. Assert
+        self.assertEqual([[chain], SENTINEL_MESSAGE], results)
+
+    def test__measured_like_other_bus_queues(self):
+        # 1. Arrange
+        self.q.put({_chain(TRIANGLE_1, 0.01, 990), _chain(TRIANGLE_2, 0.01, 990)})
+        self.q.put({_chain(TRIANGLE_1, 0.02, 995)})
+        # 2. Act
+        self.q.get_nowait()
+        snapshot = self.q.snapshot()
+        # 3. Assert
+        self.assertEqual((0, 2, 3, 2), (snapshot["depth"], snapshot["high_water_mark"], snapshot["put_count"],
+                                        snapshot["get_count"]))
+        self.assertGreater(snapshot["put_per_second"], 0)
+        self.assertEqual(2, self.registry.snapshot()["histograms"]["bus_time_in_queue_us.positive_arbitrages"]["count"])
@@ -0,0 +1,85 @@
+from unittest import TestCase
+
+from patron_arby.common.bus_codec import BusCodec
+from patron_arby.common.metrics import MetricsRegistry
+from patron_arby.common.order import Order, OrderSide
+from patron_arby.common.trace import (
+    STAGE_ACKED,
+    STAGE_DECIDED,
+    STAGE_FIND_END,
+    STAGE_FIND_START,
+    STAGE_FIRST_REPORT,
+    STAGE_RECEIVED,
+    Trace,
+    TradeTracer,
+)
+
+US = 1_000
+
+
+class TestTrace(TestCase):
+    def test__marks_share_common_stages(self):
+        # 1. Arrange
+        found = Trace.start(0).mark(STAGE_FIND_START, 10 * US).mark(STAGE_FIND_END, 30 * US)
+        # 2. Act
+        order1 = found.mark(STAGE_DECIDED, 40 * US)
+        order2 = found.mark(STAGE_DECIDED, 45 * US)
+        # 3. Assert
+        self.assertIs(order1.parent, order2.parent)
+        self.assertEqual([(STAGE_RECEIVED, 0), (STAGE_FIND_START, 10 * US), (STAGE_FIND_END, 30 * US),
+                          (STAGE_DECIDED, 40 * US)], order1.marks())
+        self.assertEqual(3, len(found.marks()))
+
+    def test__codec_carries_trace(self):
+        # 1. Arrange
+        codec = BusCodec()
+        order = Order("ABC_order_1", OrderSide.BUY, "BTC/USDT", 0.1, 50000,
+                      trace=Trace.start(1).mark(STAGE_FIND_START, 2).mark(STAGE_DECIDED, 3))
+        # 2. Act
+        result = codec.decode(codec.encode(order))
+        # 3. Assert
+        self.assertEqual(order.trace.marks(), result.trace.marks())
+
+
+class TestTradeTracer(TestCase):
+    def setUp(self) -> None:
+        self.registry = MetricsRegistry()
+        self.tracer = TradeTracer(self.registry, slowest_count=2)
+
+    def test__stages_recorded_when_first_report_comes(self):
+        # 1. Arrange
+        trace = Trace.start(0).mark(STAGE_DECIDED, 100 * US).mark(STAGE_ACKED, 300 * US)
+        # 2. Act
+        self.tracer.await_report("order_1", trace)
+        self.tracer.on_execution_report("order_1", 350 * US)
+        # Not the first report
+        self.tracer.on_execution_report("order_1", 400 * US)
+        # 3. Assert
+        histograms = self.registry.snapshot()["histograms"]
+        self.assertEqual(1, histograms["trace_us.total"]["count"])
+        self.assertEqual(350, histograms["trace_us.total"]["max"])
+        self.assertEqual(200, histograms[f"trace_us.{STAGE_DECIDED}_to_{STAGE_ACKED}"]["max"])
+        self.assertEqual(50, histograms[f"trace_us.{STAGE_ACKED}_to_{STAGE_FIRST_REPORT}"]["max"])
+
+    def test__report_before_exchange_reply(self):
+        # 1. Arrange
+        self.tracer.on_execution_report("order_1", 250 * US)
+        # 2. Act
+        self.tracer.await_report("order_1", Trace.start(0).mark(STAGE_ACKED, 300 * US))
+        # 3. Assert
+        slowest = self.tracer.slowest()
+        self.assertEqual(1, len(slowest))
+        self.assertEqual(250, slowest[0]["total_us"])
+        self.assertEqual(-50, self.registry.snapshot()["histograms"][
+            f"trace_us.{STAGE_ACKED}_to_{STAGE_FIRST_REPORT}"]["min"])
+
+    def test__slowest_kept(self):
+        # 1. Arrange
+        totals_us = [30, 10, 50, 20, 40]
+        # 2. Act
+        for i, total_us in enumerate(totals_us):
+            self.tracer.finish(Trace.start(1).mark(STAGE_ACKED, 1 + total_us * US), f"order_{i}")
+        # 3. Assert
+        self.assertEqual([("order_2", 50), ("order_4", 40)],
+                         [(t["label"], t["total_us"]) for t in self.tracer.slowest()])
+        self.assertEqual({STAGE_RECEIVED: 0, STAGE_ACKED: 50}, self.tracer.slowest()[0]["stages_us"])
@@ -0,0 +1,32 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+from patron_arby.db.batch_retry import write_with_retries
+
+
+class TestWriteWithRetries(TestCase):
+    @patch("patron_arby.db.batch_retry.time.sleep")
+    def test__not_written_items_retried_with_backoff(self, sleep):
+        # 1. Arrange
+        attempts = list()
+
+        def write(items):
+            attempts.append(items)
+            if len(attempts) == 1:
+                raise IOError("Throttled")
+            return items[1:]
+        retried = list()
+
+        # 2. Act
+        failed = write_with_retries(write, [1, 2, 3], max_retries=2, retry_backoff_seconds=0.1,
+            on_retry=retried.append)
+
+        # 3. Assert
+        self.assertEqual([[1, 2, 3], [1, 2, 3], [2, 3]], attempts)
+        self.assertEqual([[1, 2, 3], [2, 3]], retried)
+        self.assertEqual([3], failed)
+        self.assertEqual([0.1, 0.2], [c.args[0] for c in sleep.call_args_list])
+
+    def test__nothing_retried_when_written(self):
+        # 2. Act & 3. Assert
+        self.assertEqual([], write_with_retries(lambda items: [], [1, 2], max_retries=2, retry_backoff_seconds=0))
@@ -0,0 +1,49 @@
+import json
+from unittest import TestCase
+
+from patron_arby.common.chain import AChain, AChainStep
+from patron_arby.common.order import OrderSide
+from patron_arby.db.chain_records import ChainRecordsEncoder, decode_chain_records
+
+
+def chain(i: int) -> AChain:
+    return AChain("USDT", [AChainStep("BTC/USDT", OrderSide.BUY, 50000 + i, 0.1),
+                           AChainStep("ETH/BTC", OrderSide.BUY, 0.05, 2),
+                           AChainStep("ETH/USDT", OrderSide.SELL, 2600, 2)], 0.001 * i, 5, 5, 1_000 + i)
+
+
+class TestChainRecords(TestCase):
+    def test__chains_packed_under_size_limit_and_decoded(self):
+        # 1. Arrange
+        chains = [chain(i) for i in range(100)]
+        encoder = ChainRecordsEncoder(max_record_bytes=10_000, compress=False)
+        # 2. Act
+        records = encoder.encode(chains)
+        # 3. Assert
+        self.assertGreater(len(records), 1)
+        self.assertTrue(all(len(r) <= 10_000 for r, _ in records))
+        self.assertEqual(100, sum(count for _, count in records))
+        # Firehose concatenates records in S3
+        self.assertEqual([c.to_dict() for c in chains], decode_chain_records(b"".join(r for r, _ in records)))
+
+    def test__compressed(self):
+        # 1. Arrange
+        chains = [chain(i) for i in range(100)]
+        # 2. Act
+        plain = ChainRecordsEncoder(compress=False).encode(chains)
+        compressed = ChainRecordsEncoder(compress=True).encode(chains + chains)
+        # 3. Assert
+        self.assertEqual(1, len(compressed))
+        self.assertLess(len(compressed[0][0]) * 4, len(plain[0][0]))
+        self.assertEqual([c.to_dict() for c in chains + chains + chains],
+                         decode_chain_records(compressed[0][0] + ChainRecordsEncoder(compress=True).encode(chains)[0][0]))
+
+    def test__records_written_before_aggregation_decoded(self):
+        # 1. Arrange
+        chains = [chain(i) for i in range(3)]
+        # A JSON object per record, concatenated by Firehose
+        data = "".join(json.dumps(c.to_dict()) for c in chains).encode("utf-8")
+        # 2. Act
+        decoded = decode_chain_records(data)
+        # 3. Assert
+        self.assertEqual([c.to_dict() for c in chains], decoded)
@@ -0,0 +1,82 @@
+import json
+from typing import List
+from unittest import TestCase
+
+from patron_arby.common.chain import AChain
+from patron_arby.common.chain_storage_queue import ChainStorageQueue
+from patron_arby.common.metrics import MetricsRegistry
+from patron_arby.db.chain_records import ChainRecordsEncoder, decode_chain_records
+from patron_arby.db.chain_storage_pipeline import ChainStoragePipeline
+
+
+class FlakyArbitrageDao:
+    """
+    Fails to put records with chains of odd time, the given number of times each
+    """
+
+    def __init__(self, failures: int) -> None:
+        self.failures = failures
+        self.attempts = dict()
+        self.stored: List[int] = list()
+        self.batch_sizes: List[int] = list()
+
+    def put_serialized_arbitrage_records(self, records: List[bytes]) -> List[int]:
+        self.batch_sizes.append(len(records))
+        failed = list()
+        for i, r in enumerate(records):
+            times = [c["timems"] for c in decode_chain_records(r)]
+            self.attempts[r] = self.attempts.get(r, 0) + 1
+            if any(t % 2 for t in times) and self.attempts[r] <= self.failures:
+                failed.append(i)
+            else:
+                self.stored += times
+        return failed
+
+
+class TestChainStoragePipeline(TestCase):
+    def setUp(self) -> None:
+        self.registry = MetricsRegistry()
+        self.queue = ChainStorageQueue(batch_size=10, registry=self.registry)
+        for i in range(0, 25, 5):
+            self.queue.put([AChain("BTC", [], timems=t) for t in range(i, i + 5)])
+        # A chain per record
+        line_bytes = len(json.dumps(AChain("BTC", [], timems=10).to_dict(), separators=(",", ":"))) + 1
+        self.encoder = ChainRecordsEncoder(line_bytes, compress=False)
+
+    def test__failed_records_retried(self):
+        # 1. Arrange
+        dao = FlakyArbitrageDao(failures=2)
+        pipeline = ChainStoragePipeline(self.queue, dao, workers=2, flush_period_seconds=0.01,
+            records_encoder=self.encoder, retry_backoff_seconds=0, registry=self.registry)
+        # 2. Act
+        pipeline.start()
+        pipeline.stop()
+        # 3. Assert
+        self.assertEqual(list(range(25)), sorted(dao.stored))
+        self.assertEqual({"queued": 0, "stored": 25, "records": 25, "retried": 24,
+                          "dropped": {"overflow": 0, "sampled_out": 0, "failed": 0}}, pipeline.snapshot())
+
+    def test__records_dropped_after_retries_and_batches_split(self):
+        # 1. Arrange
+        dao = FlakyArbitrageDao(failures=10)
+        pipeline = ChainStoragePipeline(self.queue, dao, workers=1, flush_period_seconds=0.01, max_batch_records=4,
+            records_encoder=self.encoder, max_retries=1, retry_backoff_seconds=0, registry=self.registry)
+        # 2. Act
+        pipeline.start()
+        pipeline.stop()
+        # 3. Assert
+        self.assertEqual(list(range(0, 25, 2)), sorted(dao.stored))
+        self.assertEqual(12, pipeline.snapshot()["dropped"]["failed"])
+        self.assertEqual(4, max(dao.batch_sizes))
+
+    def test__chains_aggregated(self):
+        # 1. Arrange
+        dao = FlakyArbitrageDao(failures=0)
+        pipeline = ChainStoragePipeline(self.queue, dao, workers=1, flush_period_seconds=0.01,
+            registry=self.registry)
+        # 2. Act
+        pipeline.start()
+        pipeline.stop()
+        # 3. Assert
+        self.assertEqual(list(range(25)), sorted(dao.stored))
+        self.assertLessEqual(pipeline.snapshot()["records"], 3)
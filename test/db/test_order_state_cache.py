@@ -0,0 +1,149 @@
+import threading
+from unittest import TestCase
+from unittest.mock import Mock
+
+from patron_arby.common.metrics import MetricsRegistry
+from patron_arby.common.order import Order, OrderSide
+from patron_arby.db.order_state_cache import OrderStateCache
+from patron_arby.exchange.binance.order_listener import BinanceOrderListener
+from patron_arby.replay.stubs import InMemoryOrderDao
+
+
+class CountingOrderDao(InMemoryOrderDao):
+    def __init__(self) -> None:
+        super().__init__()
+        self.reads_count = 0
+        self.writes = list()
+
+    def get_order(self, client_order_id: str):
+        self.reads_count += 1
+        return super().get_order(client_order_id)
+
+    def put_orders(self, orders):
+        self.writes += [o.status for o in orders]
+        super().put_orders(orders)
+
+
+class BlockingOrderDao(InMemoryOrderDao):
+    """
+    Holds writes of the given order till released, fails writes of the order "12345678_order_9"
+    """
+
+    def __init__(self, blocked_client_order_id: str) -> None:
+        super().__init__()
+        self.blocked_client_order_id = blocked_client_order_id
+        self.blocked = threading.Event()
+        self.released = threading.Event()
+
+    def put_orders(self, orders):
+        for o in orders:
+            if o.client_order_id == "12345678_order_9":
+                raise ConnectionError("DynamoDB is unreachable")
+            if o.client_order_id == self.blocked_client_order_id:
+                self.blocked.set()
+                self.released.wait(5)
+        super().put_orders(orders)
+
+
+def an_order(i: int = 1, **kwargs) -> Order:
+    return Order(f"12345678_order_{i}", OrderSide.BUY, "BTCUSDT", 1, 100, **kwargs)
+
+
+class TestOrderStateCache(TestCase):
+    def setUp(self) -> None:
+        self.now = 0
+        self.store = CountingOrderDao()
+        self.cache = OrderStateCache(self.store, max_size=2, ttl_seconds=10, clock=lambda: self.now,
+            registry=MetricsRegistry())
+
+    def test__writes_merged_and_written_through_without_reads(self):
+        # 1. Arrange
+        self.cache.put_order(an_order(created_at=1_000, arbitrage_hash8=12345678, transaction_time=5))
+        # 2. Act
+        self.cache.put_order(an_order(created_at=2_000, status="FILLED", event_raw_order={"E": 7}))
+        order = self.cache.get_order("12345678_order_1")
+        # 3. Assert
+        self.assertEqual("FILLED", order.status)
+        self.assertEqual(1_000, order.created_at)
+        self.assertEqual(5, order.transaction_time)
+        self.assertEqual(["NEW", "FILLED"], self.store.writes)
+        self.assertEqual(1_000, self.store.orders["12345678_order_1"].created_at)
+        self.assertEqual(0, self.store.reads_count)
+
+    def test__miss_read_from_store_once(self):
+        # 1. Arrange
+        self.store.put_order(an_order(status="FILLED"))
+        # 2. Act
+        first = self.cache.get_order("12345678_order_1")
+        second = self.cache.get_order("12345678_order_1")
+        missing = self.cache.get_order("12345678_order_2")
+        # 3. Assert
+        self.assertEqual("FILLED", first.status)
+        self.assertEqual("FILLED", second.status)
+        self.assertIsNone(missing)
+        self.assertEqual(2, self.store.reads_count)
+        self.assertEqual({"size": 1, "hits": 1, "misses": 2, "evictions": 0}, self.cache.snapshot())
+
+    def test__least_recently_updated_evicted_over_size(self):
+        # 1. Arrange
+        for i in range(1, 4):
+            self.cache.put_order(an_order(i))
+        # 2. Act
+        evicted = self.cache.get_order("12345678_order_1")
+        # 3. Assert
+        # Evicted one is read from the store
+        self.assertEqual("12345678_order_1", evicted.client_order_id)
+        self.assertEqual(1, self.store.reads_count)
+
+    def test__evicted_when_not_updated_for_ttl(self):
+        # 1. Arrange
+        self.cache.put_order(an_order(1))
+        self.now = 5
+        self.cache.put_order(an_order(2))
+        # 2. Act
+        self.now = 12
+        self.cache.get_order("12345678_order_2")
+        # 3. Assert
+        self.assertEqual({"size": 1, "hits": 1, "misses": 0, "evictions": 1}, self.cache.snapshot())
+
+    def test__order_listener_applies_events_locally(self):
+        # 1. Arrange
+        listener = BinanceOrderListener(Mock(), self.cache)
+        self.cache.put_order(an_order(arbitrage_hash8=12345678, transaction_time=1_000))
+        event = {"e": "executionReport", "E": 1_001, "s": "BTCUSDT", "c": "12345678_order_1", "S": "BUY",
+                 "X": "FILLED", "p": "100", "q": "1", "i": 1}
+        old_event = dict(event, E=999, X="PARTIALLY_FILLED")
+        # 2. Act
+        listener.on_exchange_event(event)
+        listener.on_exchange_event(old_event)
+        # 3. Assert
+        order = self.cache.get_order("12345678_order_1")
+        self.assertEqual("FILLED", order.status)
+        self.assertEqual(1_001, order.event_raw_order["E"])
+        self.assertEqual(["NEW", "FILLED"], self.store.writes)
+        self.assertEqual(0, self.store.reads_count)
+
+    def test__slow_write_holds_up_only_its_order(self):
+        # 1. Arrange
+        store = BlockingOrderDao("12345678_order_1")
+        cache = OrderStateCache(store, write_locks=4, registry=MetricsRegistry())
+        writer = threading.Thread(target=cache.put_order, args=(an_order(1),))
+        writer.start()
+        store.blocked.wait(5)
+        # 2. Act
+        cache.put_order(an_order(2))
+        cached = cache.get_order("12345678_order_1")
+        # 3. Assert
+        self.assertIn("12345678_order_2", store.orders)
+        self.assertEqual("NEW", cached.status)
+        store.released.set()
+        writer.join()
+        self.assertIn("12345678_order_1", store.orders)
+
+    def test__store_error_not_raised(self):
+        # 1. Arrange
+        cache = OrderStateCache(BlockingOrderDao(""), registry=MetricsRegistry())
+        # 2. Act
+        cache.put_order(an_order(9))
+        # 3. Assert
+        self.assertEqual("12345678_order_9", cache.get_order("12345678_order_9").client_order_id)
@@ -0,0 +1,118 @@
+import time
+from unittest import TestCase
+from unittest.mock import MagicMock
+
+from patron_arby.common.metrics import MetricsRegistry
+from patron_arby.common.order import Order, OrderSide
+from patron_arby.db.order_dao import OrderDao
+from patron_arby.db.order_write_behind import OrderWriteBehind
+from patron_arby.replay.stubs import InMemoryOrderDao
+
+
+class RecordingOrderDao(InMemoryOrderDao):
+    def __init__(self, failures: int = 0) -> None:
+        super().__init__()
+        self.batches = list()
+        self.failures = failures
+
+    def put_orders(self, orders):
+        if self.failures > 0:
+            self.failures -= 1
+            raise IOError("Throttled")
+        self.batches.append([o.client_order_id for o in orders])
+        super().put_orders(orders)
+
+
+def an_order(i: int, **kwargs) -> Order:
+    return Order(f"12345678_order_{i}", OrderSide.BUY, "BTCUSDT", 1, 100, **kwargs)
+
+
+class TestOrderWriteBehind(TestCase):
+    def test__updates_merged_before_written(self):
+        # 1. Arrange
+        dao = RecordingOrderDao()
+        write_behind = OrderWriteBehind(dao, batch_size=25, flush_period_seconds=60, registry=MetricsRegistry())
+        write_behind.start()
+
+        # 2. Act
+        write_behind.put_order(an_order(1, created_at=1_000, arbitrage_hash8=12345678, status="NEW",
+            rest_reply_raw_order={"orderId": 1}))
+        write_behind.put_order(an_order(1, created_at=2_000, status="FILLED", event_raw_order={"E": 3}))
+        buffered = write_behind.get_order("12345678_order_1")
+        write_behind.stop()
+
+        # 3. Assert
+        self.assertEqual("FILLED", buffered.status)
+        self.assertEqual([["12345678_order_1"]], dao.batches)
+        written = dao.get_order("12345678_order_1")
+        self.assertEqual("FILLED", written.status)
+        self.assertEqual(1_000, written.created_at)
+        self.assertEqual(12345678, written.arbitrage_hash8)
+        self.assertEqual({"orderId": 1}, written.rest_reply_raw_order)
+        self.assertEqual({"E": 3}, written.event_raw_order)
+        self.assertEqual(1, write_behind.merged_count)
+
+    def test__buffered_order_returned_as_copy(self):
+        # 1. Arrange
+        dao = RecordingOrderDao()
+        write_behind = OrderWriteBehind(dao, batch_size=25, flush_period_seconds=60, registry=MetricsRegistry())
+        write_behind.start()
+        write_behind.put_order(an_order(1, status="NEW"))
+
+        # 2. Act
+        write_behind.get_order("12345678_order_1").status = "FILLED"
+        write_behind.stop()
+
+        # 3. Assert
+        self.assertEqual("NEW", dao.get_order("12345678_order_1").status)
+
+    def test__flushed_on_batch_size_and_on_time(self):
+        # 1. Arrange
+        dao = RecordingOrderDao()
+        write_behind = OrderWriteBehind(dao, batch_size=2, flush_period_seconds=0.2, registry=MetricsRegistry())
+        write_behind.start()
+
+        # 2. Act
+        for i in range(1, 4):
+            write_behind.put_order(an_order(i))
+        time.sleep(0.1)
+        batches_before_period = list(dao.batches)
+        time.sleep(0.3)
+
+        # 3. Assert
+        self.assertEqual([["12345678_order_1", "12345678_order_2"]], batches_before_period)
+        self.assertEqual([["12345678_order_1", "12345678_order_2"], ["12345678_order_3"]], dao.batches)
+        write_behind.stop()
+
+    def test__failed_batch_retried_and_creation_time_preserved(self):
+        # 1. Arrange
+        dao = RecordingOrderDao(failures=1)
+        write_behind = OrderWriteBehind(dao, batch_size=25, flush_period_seconds=0.05, registry=MetricsRegistry())
+        write_behind.start()
+
+        # 2. Act
+        write_behind.put_order(an_order(1, created_at=1_000, arbitrage_hash8=12345678))
+        time.sleep(0.3)
+        # Update comes after the order has been written
+        write_behind.put_order(an_order(1, created_at=5_000, status="FILLED"))
+        write_behind.stop()
+
+        # 3. Assert
+        self.assertEqual(1, write_behind.failed_batches_count)
+        self.assertEqual([["12345678_order_1"], ["12345678_order_1"]], dao.batches)
+        self.assertEqual("FILLED", dao.get_order("12345678_order_1").status)
+        self.assertEqual(1_000, dao.get_order("12345678_order_1").created_at)
+        self.assertEqual(12345678, dao.get_order("12345678_order_1").arbitrage_hash8)
+
+
+class TestOrderDao(TestCase):
+    def test__put_orders_in_batch(self):
+        # 1. Arrange
+        table = MagicMock()
+        batch = table.batch_writer.return_value.__enter__.return_value
+        dao = OrderDao(table)
+        # 2. Act
+        dao.put_orders([an_order(1), an_order(2)])
+        # 3. Assert
+        self.assertEqual(2, batch.put_item.call_count)
+        self.assertFalse(table.get_item.called)
@@ -0,0 +1,84 @@
+import queue
+from decimal import Decimal
+from typing import Dict, List
+from unittest import TestCase
+
+from patron_arby.common.chain import AChain, AChainStep
+from patron_arby.common.metrics import MetricsRegistry
+from patron_arby.common.order import OrderSide
+from patron_arby.db.arbitrage_dao import profitable_arbitrage_item
+from patron_arby.db.profitable_arbitrage_writer import ProfitableArbitrageWriter
+
+
+class ThrottledArbitrageDao:
+    """
+    Leaves the last item of every batch unprocessed, the given number of times in total
+    """
+
+    def __init__(self, throttles: int) -> None:
+        self.throttles = throttles
+        self.batches: List[List[Dict]] = list()
+        self.items: List[Dict] = list()
+
+    def put_profitable_arbitrage_items(self, items: List[Dict]) -> List[Dict]:
+        self.batches.append(items)
+        if self.throttles > 0:
+            self.throttles -= 1
+            self.items += items[:-1]
+            return items[-1:]
+        self.items += items
+        return list()
+
+
+def a_chain(i: int, roi: float = 0.001) -> AChain:
+    return AChain("USDT", [AChainStep("BTC/USDT", OrderSide.BUY, 50000.1, 0.1)], roi, 0.5, 0.5, i)
+
+
+class TestProfitableArbitrageWriter(TestCase):
+    def setUp(self) -> None:
+        self.queue = queue.Queue()
+        self.registry = MetricsRegistry()
+
+    def test__pending_chains_written_in_batches(self):
+        # 1. Arrange
+        for i in range(60):
+            self.queue.put(a_chain(i))
+        # The same chain again
+        self.queue.put(a_chain(59, roi=0.002))
+        dao = ThrottledArbitrageDao(throttles=2)
+        writer = ProfitableArbitrageWriter(self.queue, dao, retry_backoff_seconds=0,
+            poll_timeout_seconds=0.01, registry=self.registry)
+        # 2. Act
+        writer.start()
+        writer.stop()
+        # 3. Assert
+        self.assertEqual(list(range(60)), sorted(item["timems"] for item in dao.items))
+        self.assertEqual(Decimal("0.002"), [item for item in dao.items if item["timems"] == 59][0]["roi"])
+        self.assertEqual(25, max(len(b) for b in dao.batches))
+        self.assertEqual({"backlog": 0, "written": 60, "retried": 2, "dropped": 0, "batches": 3},
+                         writer.snapshot())
+
+    def test__unprocessed_items_dropped_after_retries(self):
+        # 1. Arrange
+        self.queue.put(a_chain(1))
+        dao = ThrottledArbitrageDao(throttles=10)
+        writer = ProfitableArbitrageWriter(self.queue, dao, max_retries=2, retry_backoff_seconds=0,
+            poll_timeout_seconds=0.01, registry=self.registry)
+        # 2. Act
+        writer.start()
+        writer.stop()
+        # 3. Assert
+        self.assertEqual(3, len(dao.batches))
+        self.assertEqual(1, writer.snapshot()["dropped"])
+
+    def test__item_has_exact_decimals(self):
+        # 1. Arrange
+        chain = a_chain(1, roi=0.1 + 0.2)
+        chain.profit_usd = float("nan")
+        # 2. Act
+        item = profitable_arbitrage_item(chain)
+        # 3. Assert
+        self.assertEqual(Decimal("0.30000000000000004"), item["roi"])
+        self.assertEqual(Decimal("50000.1"), item["steps"][0]["price"])
+        self.assertNotIn("profit_usd", item)
+        self.assertEqual("BUY", item["steps"][0]["side"])
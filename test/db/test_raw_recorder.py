@@ -0,0 +1,64 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from patron_arby.db.raw_recorder import RawFramesReader, RawFramesRecorder
+
+
+class TestRawFramesRecorder(TestCase):
+    def test__recorded_frames_are_read_back(self):
+        # 1. Arrange
+        directory = tempfile.mkdtemp()
+        recorder = RawFramesRecorder(directory)
+        frames = [f'{{"stream":"btcusdt@bookTicker","data":{{"u":{i}}}}}' for i in range(100)]
+        recorder.start()
+        # 2. Act
+        for i, frame in enumerate(frames):
+            recorder.record(frame, receive_time_ns=1_000 + i)
+        recorder.stop()
+        # 3. Assert
+        self.assertEqual([(1_000 + i, frame) for i, frame in enumerate(frames)],
+            list(RawFramesReader(directory).read()))
+
+    def test__seek_by_time_across_rotated_files(self):
+        # 1. Arrange
+        directory = tempfile.mkdtemp()
+        # Tiny blocks and 100 ns files, to have many blocks in many files
+        recorder = RawFramesRecorder(directory, block_size_bytes=64, file_rotation_seconds=100e-9)
+        recorder.start()
+        for i in range(1_000):
+            recorder.record(f"frame_{i}", receive_time_ns=10 * i)
+        recorder.stop()
+        reader = RawFramesReader(directory)
+        # 2. Act
+        frames = list(reader.read(from_time_ns=5_000, to_time_ns=5_050))
+        # 3. Assert
+        self.assertGreater(len(reader.list_files()), 10)
+        self.assertEqual([(10 * i, f"frame_{i}") for i in range(500, 506)], frames)
+
+    def test__frames_are_dropped_when_buffer_is_full(self):
+        # 1. Arrange
+        directory = tempfile.mkdtemp()
+        # Not started, so nobody drains the queue
+        recorder = RawFramesRecorder(directory, queue_size=2)
+        # 2. Act
+        results = [recorder.record("frame") for _ in range(3)]
+        # 3. Assert
+        self.assertEqual([True, True, False], results)
+        self.assertEqual(1, recorder.dropped_count)
+
+    def test__truncated_last_block_is_ignored(self):
+        # 1. Arrange
+        directory = tempfile.mkdtemp()
+        recorder = RawFramesRecorder(directory, block_size_bytes=1)
+        recorder.start()
+        for i in range(3):
+            recorder.record(f"frame_{i}", receive_time_ns=i + 1)
+        recorder.stop()
+        path = RawFramesReader(directory).list_files()[0]
+        with open(path, "r+b") as f:
+            f.truncate(os.path.getsize(path) - 3)
+        # 2. Act
+        frames = list(RawFramesReader(directory).read())
+        # 3. Assert
+        self.assertEqual([(1, "frame_0"), (2, "frame_1")], frames)
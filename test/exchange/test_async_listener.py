@@ -0,0 +1,164 @@
+import asyncio
+import os
+from typing import Dict, List
+from unittest import TestCase
+
+import websockets
+
+from patron_arby.arbitrage.market_data import MarketData
+from patron_arby.common.metrics import MetricsRegistry
+from patron_arby.exchange.binance.async_listener import AsyncBinanceDataListener
+from patron_arby.exchange.exchange_event_listener import ExchangeEventListener
+from patron_arby.exchange.stream_freshness_monitor import StreamFreshnessMonitor
+
+SYMBOL_TO_BASE_QUOTE = {"BTCUSDT": "BTC/USDT", "ETHUSDT": "ETH/USDT", "ETHBTC": "ETH/BTC"}
+
+
+class CollectingListener(ExchangeEventListener):
+    def __init__(self) -> None:
+        self.events: List[Dict] = list()
+
+    def on_exchange_event(self, event: Dict):
+        self.events.append(event)
+
+
+class ReplayingServer:
+    """
+    Local stand-in for Binance websocket server: replays recorded frames to each connection and then closes it,
+    optionally holding it silently open for a while before that
+    """
+    def __init__(self, market_frames: List[str], user_data_frames: List[str], hold_seconds: float = 0) -> None:
+        self.market_frames = market_frames
+        self.user_data_frames = user_data_frames
+        self.hold_seconds = hold_seconds
+        self.paths: List[str] = list()
+        self.server = None
+
+    async def start(self) -> str:
+        self.server = await websockets.serve(self._handle, "127.0.0.1", 0)
+        return f"ws://127.0.0.1:{self.server.sockets[0].getsockname()[1]}"
+
+    def close(self):
+        self.server.close()
+
+    async def _handle(self, ws, path):
+        self.paths.append(path)
+        frames = self.market_frames if path.startswith("/stream") else self.user_data_frames
+        for frame in frames:
+            await ws.send(frame)
+        await asyncio.sleep(self.hold_seconds)
+
+
+class TestAsyncBinanceDataListener(TestCase):
+    def test__market_stream_urls_split_evenly(self):
+        # 1. Arrange
+        listener = AsyncBinanceDataListener(MarketData({}), None, {f"COIN{i}USDT" for i in range(5)},
+            ws_url="ws://localhost/", max_subscriptions_per_connection=2)
+        # 2. Act
+        urls = listener._market_stream_urls()
+        # 3. Assert
+        self.assertEqual(["bookTicker_1", "bookTicker_2", "bookTicker_3"], list(urls.keys()))
+        self.assertEqual("ws://localhost/stream?streams=coin0usdt@bookTicker/coin1usdt@bookTicker",
+            urls["bookTicker_1"])
+        self.assertEqual("ws://localhost/stream?streams=coin4usdt@bookTicker", urls["bookTicker_3"])
+
+    def test__replayed_frames_feed_market_data_and_listeners(self):
+        # 1. Arrange
+        market_frames = self._load_frames("binance_frames.jsonl")
+        user_data_frames = self._load_frames("binance_user_data_frames.jsonl")
+        market_data = MarketData(SYMBOL_TO_BASE_QUOTE)
+        collector = CollectingListener()
+        expected_events = len(market_frames) + len(user_data_frames)
+
+        async def run():
+            server = ReplayingServer(market_frames, user_data_frames)
+            url = await server.start()
+            listener = AsyncBinanceDataListener(market_data, None, set(SYMBOL_TO_BASE_QUOTE.keys()), ws_url=url,
+                listen_key_provider=lambda: "test-listen-key")
+            listener.add_event_listener(collector)
+            listener_task = asyncio.ensure_future(listener.run_async())
+            await self._wait_for(lambda: len(collector.events) >= expected_events)
+            listener.stop()
+            await asyncio.wait_for(listener_task, 5)
+            server.close()
+            return server
+
+        # 2. Act
+        server = asyncio.run(run())
+        # 3. Assert
+        self.assertEqual(expected_events, len(collector.events))
+        self.assertIn("/ws/test-listen-key", server.paths)
+        self.assertEqual("executionReport", [e for e in collector.events if "e" in e][0]["e"])
+        # Last BTCUSDT ticker wins
+        self.assertEqual(55101.0, market_data.get_ticker("BTCUSDT").best_bid)
+        self.assertEqual(0.04531, market_data.get_ticker("ETHBTC").best_ask)
+
+    def test__reconnects_after_connection_is_closed(self):
+        # 1. Arrange
+        market_frames = self._load_frames("binance_frames.jsonl")
+        collector = CollectingListener()
+
+        async def run():
+            server = ReplayingServer(market_frames, [])
+            url = await server.start()
+            listener = AsyncBinanceDataListener(MarketData(SYMBOL_TO_BASE_QUOTE), None,
+                set(SYMBOL_TO_BASE_QUOTE.keys()), ws_url=url)
+            listener.add_event_listener(collector)
+            listener_task = asyncio.ensure_future(listener.run_async())
+            # Server closes connection after replaying frames, so getting them twice means we reconnected
+            await self._wait_for(lambda: len(collector.events) >= 2 * len(market_frames))
+            listener.stop()
+            await asyncio.wait_for(listener_task, 5)
+            server.close()
+            return server
+
+        # 2. Act
+        server = asyncio.run(run())
+        # 3. Assert
+        self.assertGreaterEqual(len(server.paths), 2)
+        self.assertGreaterEqual(len(collector.events), 2 * len(market_frames))
+
+    def test__stalled_connection_resubscribed(self):
+        # 1. Arrange
+        market_frames = self._load_frames("binance_frames.jsonl")
+        market_data = MarketData(SYMBOL_TO_BASE_QUOTE, {"BTC", "ETH", "USDT"})
+        monitor = StreamFreshnessMonitor(market_data, stall_min_silence_ms=100, stall_expected_intervals=1,
+            registry=MetricsRegistry())
+
+        async def run():
+            # Server goes silent after replaying frames, but keeps connection open
+            server = ReplayingServer(market_frames, [], hold_seconds=30)
+            url = await server.start()
+            listener = AsyncBinanceDataListener(market_data, None, set(SYMBOL_TO_BASE_QUOTE.keys()), ws_url=url,
+                freshness_monitor=monitor)
+            listener_task = asyncio.ensure_future(listener.run_async())
+            await self._wait_for(lambda: monitor.connections.get("bookTicker_1")
+                and monitor.connections["bookTicker_1"].events_count >= len(market_frames))
+            await asyncio.sleep(0.2)
+            monitor.check()
+            stale_markets = set(market_data.stale_markets)
+            await self._wait_for(lambda: len(server.paths) >= 2)
+            listener.stop()
+            await asyncio.wait_for(listener_task, 5)
+            server.close()
+            return server, stale_markets
+
+        # 2. Act
+        server, stale_markets = asyncio.run(run())
+        # 3. Assert
+        self.assertEqual({"BTC/USDT", "ETH/USDT", "ETH/BTC"}, stale_markets)
+        self.assertEqual(1, monitor.connections["bookTicker_1"].resubscribes_count)
+        self.assertGreaterEqual(len(server.paths), 2)
+
+    @staticmethod
+    async def _wait_for(condition, timeout_seconds: float = 5):
+        waited = 0
+        while not condition() and waited < timeout_seconds:
+            await asyncio.sleep(0.01)
+            waited += 0.01
+
+    @staticmethod
+    def _load_frames(file_name: str) -> List[str]:
+        path_to_current_dir = os.path.dirname(os.path.realpath(__file__))
+        with open(f"{path_to_current_dir}/{file_name}", "r") as f:
+            return [line.strip() for line in f if line.strip()]
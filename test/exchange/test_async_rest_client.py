@@ -0,0 +1,109 @@
+import asyncio
+from unittest import TestCase
+
+from patron_arby.common.order import Order, OrderSide
+from patron_arby.config.base import BinanceTimeInForce
+from patron_arby.exchange.binance.async_rest_client import (
+    AsyncBinanceRestClient,
+    BinanceApiError,
+)
+from patron_arby.replay.mock_binance_rest import (
+    MOCK_API_KEY,
+    MOCK_API_SECRET,
+    MockBinanceRestServer,
+)
+
+
+class TestAsyncBinanceRestClient(TestCase):
+    def test__place_get_and_cancel_order(self):
+        # 1. Arrange
+        order = Order("12345678_order_1", OrderSide.BUY, "BTCUSDT", 0.001, 50000.5)
+
+        async def run():
+            server = MockBinanceRestServer()
+            client = AsyncBinanceRestClient(MOCK_API_KEY, MOCK_API_SECRET, await server.start())
+            placed = await client.put_order(order, BinanceTimeInForce.IMMEDIATE_OR_CANCEL)
+            fetched = await client.get_order("BTCUSDT", order.client_order_id)
+            cancelled = await client.cancel_order("BTCUSDT", placed.order_id)
+            await client.close()
+            await server.close()
+            return server, placed, fetched, cancelled
+
+        # 2. Act
+        server, placed, fetched, cancelled = asyncio.run(run())
+
+        # 3. Assert
+        self.assertEqual("FILLED", placed.status)
+        self.assertEqual(12345678, placed.arbitrage_hash8)
+        self.assertEqual("50000.50000000", placed.price)
+        self.assertEqual("0.00100000", placed.quantity)
+        self.assertEqual("IOC", placed.rest_reply_raw_order["timeInForce"])
+        self.assertEqual(placed.order_id, fetched.order_id)
+        self.assertEqual("CANCELED", cancelled["status"])
+        # All the requests went over a single keep-alive connection
+        self.assertEqual(1, server.connections_count)
+
+    def test__wrong_signature(self):
+        # 1. Arrange
+        async def run():
+            server = MockBinanceRestServer()
+            client = AsyncBinanceRestClient(MOCK_API_KEY, "wrong-secret", await server.start())
+            try:
+                await client.put_order(Order("1_order_1", OrderSide.SELL, "BTCUSDT", 1, 1))
+            finally:
+                await client.close()
+                await server.close()
+
+        # 2. Act
+        with self.assertRaises(BinanceApiError) as context:
+            asyncio.run(run())
+
+        # 3. Assert
+        self.assertEqual(-1022, context.exception.code)
+        self.assertEqual(400, context.exception.status)
+
+    def test__concurrent_orders_share_limited_connections(self):
+        # 1. Arrange
+        async def run():
+            server = MockBinanceRestServer(latency_seconds=0.01)
+            client = AsyncBinanceRestClient(MOCK_API_KEY, MOCK_API_SECRET, await server.start(), max_connections=4)
+            orders = await asyncio.gather(*[
+                client.put_order(Order(f"{i}_order_1", OrderSide.BUY, "BTCUSDT", 1, 1)) for i in range(40)])
+            await client.close()
+            await server.close()
+            return server, orders
+
+        # 2. Act
+        server, orders = asyncio.run(run())
+
+        # 3. Assert
+        self.assertEqual(40, len({o.order_id for o in orders}))
+        self.assertEqual(4, server.connections_count)
+
+    def test__order_is_placed_once_when_connection_drops_after_send(self):
+        # 1. Arrange
+        async def run():
+            server = MockBinanceRestServer()
+            client = AsyncBinanceRestClient(MOCK_API_KEY, MOCK_API_SECRET, await server.start())
+            await client.put_order(Order("1_order_1", OrderSide.BUY, "BTCUSDT", 1, 1))
+            server.drop_replies = 1
+            try:
+                await client.put_order(Order("1_order_2", OrderSide.BUY, "BTCUSDT", 1, 1))
+                error = None
+            except (ConnectionError, asyncio.IncompleteReadError) as e:
+                error = e
+            # Querying the order is harmless to resend
+            await client.get_order("BTCUSDT", "1_order_2")
+            server.drop_replies = 1
+            fetched = await client.get_order("BTCUSDT", "1_order_2")
+            await client.close()
+            await server.close()
+            return server, error, fetched
+
+        # 2. Act
+        server, error, fetched = asyncio.run(run())
+
+        # 3. Assert
+        self.assertIsNotNone(error)
+        self.assertEqual(["1_order_1", "1_order_2"], [o for _, o in server.book.placed])
+        self.assertEqual("1_order_2", fetched.client_order_id)
@@ -1,9 +1,12 @@
+import time
 from unittest import TestCase
 from unittest.mock import Mock
 
 from patron_arby.common.bus import Bus
+from patron_arby.common.metrics import MetricsRegistry
 from patron_arby.exchange.binance.balances_checker import BalancesChecker
-from patron_arby.exchange.registry import Balance
+from patron_arby.exchange.binance.stop_loss_listener import BinanceStopLossListener
+from patron_arby.exchange.registry import Balance, BalancesRegistry
 
 
 class TestBalancesChecker(TestCase):
@@ -46,3 +49,46 @@ class TestBalancesChecker(TestCase):
         registry.get_balances.return_value = {"BTC": Balance(1, 100 * (1 - threshold) + 1)}
         balances_checker.check_balance()
         self.assertFalse(bus.is_stop_trading())
+
+    def test__realized_loss_stops_trading_on_fill(self):
+        # 1. Arrange
+        bus = Bus()
+        registry = BalancesRegistry({"BTC": 1, "USDT": 50_000}, {"BTCBUSD": 50_000})
+        metrics = MetricsRegistry()
+        balances_checker = BalancesChecker(bus, registry, {"BTC", "USDT"}, 0.2, metrics_registry=metrics)
+        balances_checker.on_balances_updated()
+        listener = BinanceStopLossListener(balances_checker, {"BTCUSDT": "BTC/USDT"})
+
+        # 2. Act & Assert
+        # Bought at the market price, paid fee
+        listener.on_exchange_event(fill_event("1_order_1", "BUY", "0.5", "50000", "0.0005", "BTC"))
+        self.assertAlmostEqual(-25, balances_checker.realized_pnl_usd)
+        self.assertFalse(bus.is_stop_trading())
+        # Sold far below: loss of $20,000 reaches 20% of initial $100,000
+        listener.on_exchange_event(fill_event("2_order_1", "SELL", "1", "30000", "0", None))
+        self.assertTrue(bus.is_stop_trading())
+        self.assertAlmostEqual(-20_000, balances_checker.get_chain_pnl_usd("2"))
+        self.assertEqual(1, metrics.snapshot()["histograms"]["stop_loss.breach_to_halt_us"]["count"])
+        # Balance has not changed yet, but trading stays stopped
+        balances_checker.check_balance()
+        self.assertTrue(bus.is_stop_trading())
+
+    def test__balance_fall_stops_trading_on_account_update(self):
+        # 1. Arrange
+        bus = Bus()
+        registry = BalancesRegistry({"USDT": 100})
+        balances_checker = BalancesChecker(bus, registry, {"USDT"}, 0.2, metrics_registry=MetricsRegistry())
+        listener = BinanceStopLossListener(balances_checker, {})
+        listener.on_exchange_event({"e": "outboundAccountPosition", "E": 1})
+
+        # 2. Act
+        registry.update_balances({"USDT": 79})
+        listener.on_exchange_event({"e": "outboundAccountPosition", "E": 2, "receive_time_ns": time.time_ns()})
+
+        # 3. Assert
+        self.assertTrue(bus.is_stop_trading())
+
+
+def fill_event(client_order_id: str, side: str, quantity: str, price: str, commission: str, commission_asset):
+    return {"e": "executionReport", "E": 1, "s": "BTCUSDT", "c": client_order_id, "S": side, "x": "TRADE",
+            "l": quantity, "L": price, "n": commission, "N": commission_asset, "receive_time_ns": time.time_ns()}
@@ -0,0 +1,118 @@
+import threading
+from unittest import TestCase
+
+from patron_arby.common.metrics import MetricsRegistry
+from patron_arby.exchange.balance_ledger import BalanceLedger, CoinBalance
+from patron_arby.exchange.binance.balance_listener import BinanceBalanceListener
+
+
+class TestBalanceLedger(TestCase):
+    def setUp(self) -> None:
+        self.now_ms = 1_000_000
+        self.ledger = BalanceLedger({"BTC": 1, "USDT": 1_000}, reservation_ttl_seconds=30,
+            clock=lambda: self.now_ms, registry=MetricsRegistry())
+        self.listener = BinanceBalanceListener(self.ledger)
+
+    def _account_position(self, event_time_ms: int, **balances):
+        self.listener.on_exchange_event({"e": "outboundAccountPosition", "E": event_time_ms, "u": event_time_ms,
+            "B": [{"a": coin, "f": str(free), "l": str(locked)} for coin, (free, locked) in balances.items()]})
+
+    def _execution_report(self, event_time_ms: int, client_order_id: str, status: str = "NEW"):
+        self.listener.on_exchange_event({"e": "executionReport", "E": event_time_ms, "c": client_order_id, "C": "",
+            "X": status})
+
+    def test__reservation_lives_till_account_reflects_the_order(self):
+        # 1. Arrange
+        self.ledger.reserve_balance("USDT", 400, "12345678_order_1")
+        reserved = self.ledger.get_entry("USDT")
+        # 2. Act
+        self._execution_report(self.now_ms + 10, "12345678_order_1")
+        in_flight = self.ledger.get_entry("USDT")
+        self._account_position(self.now_ms + 11, USDT=(600, 400))
+        # 3. Assert
+        self.assertEqual((400, 0, 600), (reserved.reserved, reserved.in_flight, reserved.available))
+        self.assertEqual((0, 400, 600), (in_flight.reserved, in_flight.in_flight, in_flight.available))
+        self.assertEqual(600, self.ledger.get_balance("USDT"))
+        self.assertEqual(1_000, self.ledger.get_total_balance("USDT"))
+
+    def test__account_update_ahead_of_order_report(self):
+        # 1. Arrange
+        self.ledger.reserve_balance("BTC", 0.5, "12345678_order_1")
+        # 2. Act
+        self._account_position(self.now_ms + 11, BTC=(0.5, 0))
+        before_report = self.ledger.get_balance("BTC")
+        self._execution_report(self.now_ms + 10, "12345678_order_1", "FILLED")
+        # 3. Assert
+        self.assertEqual(0, before_report)
+        self.assertEqual(0.5, self.ledger.get_balance("BTC"))
+
+    def test__cancelled_order_released_by_original_client_order_id(self):
+        # 1. Arrange
+        self.ledger.reserve_balance("USDT", 100, "12345678_order_2")
+        # 2. Act
+        self.listener.on_exchange_event({"e": "executionReport", "E": self.now_ms + 5, "c": "cancel-request",
+            "C": "12345678_order_2", "X": "CANCELED"})
+        self._account_position(self.now_ms + 6, USDT=(1_000, 0))
+        # 3. Assert
+        self.assertEqual(1_000, self.ledger.get_balance("USDT"))
+
+    def test__release_and_expiration(self):
+        # 1. Arrange
+        self.ledger.reserve_balance("USDT", 100, "12345678_order_1")
+        self.ledger.reserve_balance("USDT", 200, "12345678_order_2")
+        # 2. Act
+        self.ledger.release_balance("12345678_order_1")
+        after_release = self.ledger.get_balance("USDT")
+        self.now_ms += 31_000
+        # 3. Assert
+        self.assertEqual(800, after_release)
+        self.assertEqual(1_000, self.ledger.get_balance("USDT"))
+        self.assertEqual(1, self.ledger.snapshot()["expired"])
+
+    def test__rest_reconcile_keeps_reservations_and_newer_stream_updates(self):
+        # 1. Arrange
+        self.ledger.reserve_balance("USDT", 100, "12345678_order_1")
+        self._account_position(self.now_ms + 100, BTC=(2, 0))
+        # 2. Act
+        self.ledger.reconcile({"BTC": CoinBalance(1), "USDT": CoinBalance(900, 100), "ETH": CoinBalance(5)},
+            self.now_ms + 50)
+        # 3. Assert
+        self.assertEqual(2, self.ledger.get_balance("BTC"))
+        self.assertEqual(800, self.ledger.get_balance("USDT"))
+        self.assertEqual(5, self.ledger.get_balance("ETH"))
+        self.assertEqual(0, self.ledger.snapshot()["drifts"])
+
+    def test__rest_reconcile_reports_drift_from_stream(self):
+        # 1. Arrange
+        self._account_position(self.now_ms, USDT=(1_000, 0))
+        # 2. Act
+        self.ledger.reconcile({"USDT": CoinBalance(990)}, self.now_ms + 1)
+        # 3. Assert
+        self.assertEqual(990, self.ledger.get_balance("USDT"))
+        self.assertEqual(1, self.ledger.snapshot()["drifts"])
+
+    def test__balance_update_and_usd_valuation(self):
+        # 1. Arrange
+        self.ledger.update_exchange_rates({"BTCBUSD": 50_000})
+        self.ledger.reserve_balance("BTC", 0.5, "12345678_order_1")
+        # 2. Act
+        self.listener.on_exchange_event({"e": "balanceUpdate", "E": self.now_ms, "a": "BTC", "d": "0.25"})
+        # 3. Assert
+        self.assertEqual(0.75, self.ledger.get_balance("BTC"))
+        # Reservations don't change what the coin is worth
+        self.assertEqual(62_500, self.ledger.get_balance_usd("BTC"))
+
+    def test__concurrent_reservations(self):
+        # 1. Arrange
+        def reserve(thread: int):
+            for i in range(1_000):
+                self.ledger.reserve_balance("USDT", 0.001, f"{thread}_{i}")
+        threads = [threading.Thread(target=reserve, args=(t,)) for t in range(4)]
+        # 2. Act
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        # 3. Assert
+        self.assertAlmostEqual(996, self.ledger.get_balance("USDT"))
+        self.assertEqual(4_000, self.ledger.snapshot()["reservations"])
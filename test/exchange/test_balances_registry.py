@@ -0,0 +1,46 @@
+from unittest import TestCase
+
+from patron_arby.arbitrage.market_data import MarketData
+from patron_arby.common.ticker import Ticker
+from patron_arby.exchange.registry import BalancesRegistry
+
+
+class TestBalancesRegistry(TestCase):
+    def test__exchange_rates_live_with_rest_fallback(self):
+        # 1. Arrange
+        market_data = MarketData({"BTCBUSD": "BTC/BUSD", "ETHBUSD": "ETH/BUSD"})
+        registry = BalancesRegistry({"BTC": 2, "ETH": 10, "BNB": 5}, {"BTCBUSD": 40_000, "BNBBUSD": 400})
+        cold_start_usd = registry.get_balance_usd("BTC")
+        registry.set_market_data(market_data)
+        # 2. Act
+        market_data.put(Ticker("BTCBUSD", 49_990, 1, 50_010, 1))
+        # 3. Assert
+        self.assertEqual(80_000, cold_start_usd)
+        self.assertEqual(100_000, registry.get_balance_usd("BTC"))
+        # No live price for the market, nor a REST one
+        self.assertIsNone(registry.get_balance_usd("ETH"))
+        # Not a market of market data
+        self.assertEqual(2_000, registry.get_balance_usd("BNB"))
+
+    def test__live_exchange_rates_only(self):
+        # 1. Arrange
+        market_data = MarketData({"ETHBUSD": "ETH/BUSD"})
+        registry = BalancesRegistry({"ETH": 10}, market_data=market_data)
+        # 2. Act
+        market_data.put(Ticker("ETHBUSD", 3_000, 1, 3_000, 1))
+        # 3. Assert
+        self.assertEqual(30_000, registry.get_balance_usd("ETH"))
+
+    def test__old_rest_exchange_rates_not_used(self):
+        # 1. Arrange
+        now_ms = 0
+        registry = BalancesRegistry({"BNB": 5}, {"BNBBUSD": 400}, exchange_rates_max_age_seconds=60,
+            clock=lambda: now_ms)
+        # 2. Act
+        now_ms = 61_000
+        too_old = registry.get_balance_usd("BNB")
+        registry.update_exchange_rates({"BNBBUSD": 500})
+        refreshed = registry.get_balance_usd("BNB")
+        # 3. Assert
+        self.assertIsNone(too_old)
+        self.assertEqual(2_500, refreshed)
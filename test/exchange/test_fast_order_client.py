@@ -0,0 +1,118 @@
+import asyncio
+import threading
+import time
+from unittest import TestCase
+
+from patron_arby.common.metrics import MetricsRegistry
+from patron_arby.common.order import Order, OrderSide
+from patron_arby.config.base import BinanceTimeInForce
+from patron_arby.exchange.binance.async_rest_client import BinanceApiError
+from patron_arby.exchange.binance.fast_order_client import (
+    TIMING_FIRST_BYTE,
+    TIMING_SERIALIZE,
+    TIMING_SIGN,
+    TIMING_TIME_TO_WIRE,
+    FastBinanceOrderClient,
+)
+from patron_arby.replay.mock_binance_rest import (
+    MOCK_API_KEY,
+    MOCK_API_SECRET,
+    MockBinanceRestServer,
+)
+
+
+class TestFastBinanceOrderClient(TestCase):
+    def setUp(self) -> None:
+        self.server_loop = asyncio.new_event_loop()
+        threading.Thread(target=self.server_loop.run_forever, daemon=True).start()
+        self.server = MockBinanceRestServer()
+        self.api_url = asyncio.run_coroutine_threadsafe(self.server.start(), self.server_loop).result()
+
+    def tearDown(self) -> None:
+        asyncio.run_coroutine_threadsafe(self.server.close(), self.server_loop).result()
+        self.server_loop.call_soon_threadsafe(self.server_loop.stop)
+
+    def test__put_orders_over_single_connection(self):
+        # 1. Arrange
+        registry = MetricsRegistry()
+        client = FastBinanceOrderClient(MOCK_API_KEY, MOCK_API_SECRET, self.api_url,
+            time_in_force=BinanceTimeInForce.IMMEDIATE_OR_CANCEL, registry=registry)
+        client.warm_up()
+
+        # 2. Act
+        replies = [client.put_order(Order(f"12345678_order_{i}", OrderSide.SELL, "BTCUSDT", 0.001, 50000.5))
+                   for i in range(1, 4)]
+        gtc_reply = client.put_order(Order("12345678_order_4", OrderSide.BUY, "ETHBTC", 1e-3, 0.05),
+            BinanceTimeInForce.GOOD_TILL_CANCELLED)
+        client.close()
+
+        # 3. Assert
+        self.assertEqual(["FILLED"] * 3, [r["status"] for r in replies])
+        self.assertEqual("50000.50000000", replies[0]["price"])
+        self.assertEqual("0.00100000", replies[0]["origQty"])
+        self.assertEqual("SELL", replies[0]["side"])
+        self.assertEqual("IOC", replies[0]["timeInForce"])
+        self.assertEqual("GTC", gtc_reply["timeInForce"])
+        self.assertEqual("0.00100000", gtc_reply["origQty"])
+        self.assertEqual(1, self.server.connections_count)
+        for timing in [TIMING_SERIALIZE, TIMING_SIGN, TIMING_FIRST_BYTE, TIMING_TIME_TO_WIRE]:
+            self.assertGreater(client.last_timings[timing], 0)
+        self.assertEqual(4, registry.snapshot()["histograms"]["order_client_time_to_wire_us"]["count"])
+
+    def test__error_reply(self):
+        # 1. Arrange
+        client = FastBinanceOrderClient(MOCK_API_KEY, "wrong-secret", self.api_url, registry=MetricsRegistry())
+        # 2. Act
+        with self.assertRaises(BinanceApiError) as context:
+            client.put_order(Order("1_order_1", OrderSide.BUY, "BTCUSDT", 1, 1))
+        client.close()
+        # 3. Assert
+        self.assertEqual(-1022, context.exception.code)
+
+    def test__keep_warm_pings_idle_connection(self):
+        # 1. Arrange
+        client = FastBinanceOrderClient(MOCK_API_KEY, MOCK_API_SECRET, self.api_url, ping_period_seconds=0.05,
+            registry=MetricsRegistry())
+        client.warm_up()
+        # 2. Act
+        client.start_keep_warm()
+        time.sleep(0.3)
+        client.close()
+        # 3. Assert
+        self.assertGreaterEqual(self.server.requests_count, 2)
+        self.assertEqual(1, self.server.connections_count)
+
+    def test__recovers_after_timeout(self):
+        # 1. Arrange
+        client = FastBinanceOrderClient(MOCK_API_KEY, MOCK_API_SECRET, self.api_url, timeout_seconds=0.1,
+            registry=MetricsRegistry())
+        client.warm_up()
+        self.server.latency_seconds = 0.3
+        with self.assertRaises(OSError):
+            client.put_order(Order("1_order_1", OrderSide.BUY, "BTCUSDT", 1, 1))
+        self.server.latency_seconds = 0
+        # Let the server reply to the timed out request
+        time.sleep(0.3)
+
+        # 2. Act
+        reply = client.put_order(Order("1_order_2", OrderSide.BUY, "BTCUSDT", 1, 1))
+        client.close()
+
+        # 3. Assert
+        self.assertEqual("1_order_2", reply["clientOrderId"])
+
+    def test__order_is_not_resent_when_connection_drops_after_send(self):
+        # 1. Arrange
+        client = FastBinanceOrderClient(MOCK_API_KEY, MOCK_API_SECRET, self.api_url, registry=MetricsRegistry())
+        client.warm_up()
+        self.server.drop_replies = 1
+
+        # 2. Act
+        with self.assertRaises(ConnectionError):
+            client.put_order(Order("1_order_1", OrderSide.BUY, "BTCUSDT", 1, 1))
+        reply = client.put_order(Order("1_order_2", OrderSide.BUY, "BTCUSDT", 1, 1))
+        client.close()
+
+        # 3. Assert
+        self.assertEqual(["1_order_1", "1_order_2"], [o for _, o in self.server.book.placed])
+        self.assertEqual("1_order_2", reply["clientOrderId"])
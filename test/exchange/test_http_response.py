@@ -0,0 +1,36 @@
+import io
+from unittest import TestCase
+
+from patron_arby.exchange.http_response import read_response_sync
+
+
+class TestHttpResponse(TestCase):
+    def test__chunked_body_with_trailers(self):
+        # 1. Arrange
+        reader = io.BytesIO(b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n"
+                            b"4;ext=1\r\n{\"a\"\r\n3\r\n:1}\r\n0\r\nX-Trailer: 1\r\n\r\nnext")
+        # 2. Act
+        response, keep_alive = read_response_sync(reader)
+        # 3. Assert
+        self.assertEqual(200, response.status)
+        self.assertEqual(b'{"a":1}', response.body)
+        self.assertTrue(keep_alive)
+        self.assertEqual(b"next", reader.read())
+
+    def test__content_length_and_body_till_close(self):
+        # 1. Arrange
+        with_length = io.BytesIO(b"HTTP/1.1 400 Bad Request\r\nContent-Length: 2\r\nConnection: close\r\n\r\n{}")
+        till_close = io.BytesIO(b"HTTP/1.1 200 OK\r\n\r\n[]")
+        # 2. Act
+        response, keep_alive = read_response_sync(with_length)
+        response_till_close, keep_alive_till_close = read_response_sync(till_close)
+        # 3. Assert
+        self.assertEqual((400, b"{}", False), (response.status, response.body, keep_alive))
+        self.assertEqual((b"[]", False), (response_till_close.body, keep_alive_till_close))
+
+    def test__truncated_body(self):
+        # 1. Arrange
+        reader = io.BytesIO(b"HTTP/1.1 200 OK\r\nContent-Length: 10\r\n\r\n{}")
+        # 2. Act & 3. Assert
+        with self.assertRaises(ConnectionResetError):
+            read_response_sync(reader)
@@ -0,0 +1,33 @@
+from unittest import TestCase
+
+from patron_arby.exchange.quantizer import Quantizer
+
+
+class TestQuantizer(TestCase):
+    def test__round_and_render(self):
+        # 1. Arrange
+        cases = [
+            # step, value, steps, float, rendered
+            ("0.01000000", 12.34245435, 1234, 12.34, "12.34"),
+            (0.001, 44.345945345345, 44346, 44.346, "44.346"),
+            ("0.05", 1.1749, 23, 1.15, "1.15"),
+            ("1.00000000", 20.5001, 21, 21, "21"),
+            ("10", 1234, 123, 1230, "1230"),
+            (1e-08, 0.000005678, 568, 0.00000568, "0.00000568"),
+            ("0.1", 0.3, 3, 0.3, "0.3"),
+        ]
+        for step, value, steps, value_float, rendered in cases:
+            q = Quantizer(step)
+            # 2. Act
+            actual_steps = q.to_steps(value)
+            # 3. Assert
+            self.assertEqual(steps, actual_steps, step)
+            self.assertEqual(value_float, q.to_float(actual_steps), step)
+            self.assertEqual(rendered, q.render(actual_steps), step)
+
+    def test__rendered_matches_float(self):
+        # 1. Arrange
+        q = Quantizer("0.00001")
+        # 2. Act & 3. Assert
+        for steps in range(0, 200_000, 7):
+            self.assertEqual(q.to_float(steps), float(q.render(steps)))
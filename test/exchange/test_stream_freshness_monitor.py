@@ -0,0 +1,86 @@
+from typing import List
+from unittest import TestCase
+
+from patron_arby.arbitrage.market_data import MarketData
+from patron_arby.common.metrics import MetricsRegistry
+from patron_arby.exchange.stream_freshness_monitor import StreamFreshnessMonitor
+
+SYMBOL_TO_BASE_QUOTE = {"BTCUSDT": "BTC/USDT", "ETHUSDT": "ETH/USDT", "ETHBTC": "ETH/BTC"}
+
+
+class TestStreamFreshnessMonitor(TestCase):
+    def setUp(self) -> None:
+        self.now_ms = 0
+        self.resubscribed: List[str] = list()
+        self.market_data = MarketData(SYMBOL_TO_BASE_QUOTE, {"BTC", "ETH", "USDT"})
+        self.monitor = StreamFreshnessMonitor(self.market_data, stall_expected_intervals=10,
+            stall_min_silence_ms=1_000, resubscribe_cooldown_ms=5_000, clock=lambda: self.now_ms,
+            registry=MetricsRegistry())
+        self.monitor.add_connection("bookTicker_1", ["BTCUSDT", "ETHUSDT"], self.resubscribed.append)
+        self.monitor.add_connection("bookTicker_2", ["ETHBTC"], self.resubscribed.append)
+
+    def test__silent_connection_is_stalled(self):
+        # 1. Arrange
+        for t in range(0, 2_000, 100):
+            self._event("BTCUSDT", t)
+            self._event("ETHBTC", t)
+
+        # 2. Act
+        self.now_ms = 2_500
+        self.monitor.check()
+        for t in range(2_000, 5_000, 100):
+            self._event("ETHBTC", t)
+        self.monitor.check()
+
+        # 3. Assert
+        self.assertEqual(["bookTicker_1"], self.resubscribed)
+        self.assertEqual({"BTC/USDT", "ETH/USDT"}, self.market_data.stale_markets)
+        self.assertTrue(self.monitor.connections["bookTicker_1"].stalled)
+        self.assertFalse(self.monitor.connections["bookTicker_2"].stalled)
+
+    def test__market_is_fresh_again_with_its_next_event(self):
+        # 1. Arrange
+        self._event("BTCUSDT", 0)
+        self.now_ms = 1_500
+        self.monitor.check()
+
+        # 2. Act
+        self._event("BTCUSDT", 1_600)
+
+        # 3. Assert
+        self.assertEqual({"ETH/USDT", "ETH/BTC"}, self.market_data.stale_markets)
+        self.assertFalse(self.monitor.connections["bookTicker_1"].stalled)
+        self.assertEqual(1, self.monitor.snapshot()["connections"]["bookTicker_1"]["stalls"])
+
+    def test__resubscribe_cooldown(self):
+        # 1. Arrange
+        self._event("BTCUSDT", 0)
+
+        # 2. Act
+        for self.now_ms in range(1_500, 12_000, 500):
+            self.monitor.check()
+
+        # 3. Assert
+        # Both connections are stalled, each resubscribed at 1500, 6500 and 11500
+        self.assertEqual(6, len(self.resubscribed))
+
+    def test__frozen_market_on_live_connection_is_stale(self):
+        # 1. Arrange
+        for t in range(0, 2_000, 100):
+            self._event("BTCUSDT", t)
+            self._event("ETHUSDT", t)
+
+        # 2. Act
+        for t in range(2_000, 4_000, 100):
+            self._event("ETHUSDT", t)
+        self.monitor.check()
+
+        # 3. Assert
+        self.assertEqual({"BTC/USDT", "ETH/BTC"}, self.market_data.stale_markets)
+        self.assertFalse(self.monitor.connections["bookTicker_1"].stalled)
+        self.assertEqual(["bookTicker_2"], self.resubscribed)
+        self.assertEqual(1, self.monitor.snapshot()["market_stalls"])
+
+    def _event(self, market: str, t: int):
+        self.now_ms = t
+        self.monitor.on_market_event(market, t)
@@ -0,0 +1,36 @@
+from unittest import TestCase
+
+from patron_arby.exchange.binance.constants import Binance
+from patron_arby.exchange.binance.ticker_converter import BinanceTickerConverter
+
+
+class TestBinanceTickerConverter(TestCase):
+    def test__from_ws_event__spot_book_ticker(self):
+        # 1. Arrange
+        event = {"stream": "btcusdt@bookTicker", Binance.EVENT_KEY_RECEIVE_TIME: 1_000,
+                 "data": {"u": 400900217, "s": "BTCUSDT", "b": "25.35", "B": "31.21", "a": "25.36", "A": "40.66"}}
+
+        # 2. Act
+        ticker = BinanceTickerConverter().from_ws_event(event)
+
+        # 3. Assert
+        self.assertEqual("BTCUSDT", ticker.market)
+        self.assertEqual(25.35, ticker.best_bid)
+        self.assertEqual(40.66, ticker.best_ask_quantity)
+        self.assertEqual(1_000, ticker.time_ms)
+        self.assertEqual(-1, ticker.exchange_time_ms)
+        self.assertEqual(500, ticker.age_ms(1_500))
+
+    def test__from_ws_event__exchange_time(self):
+        # 1. Arrange
+        event = {"stream": "btcusdt@bookTicker", Binance.EVENT_KEY_RECEIVE_TIME: 1_000,
+                 "data": {"e": "bookTicker", "u": 400900217, "E": 900, "T": 890, "s": "BTCUSDT",
+                          "b": "25.35", "B": "31.21", "a": "25.36", "A": "40.66"}}
+
+        # 2. Act
+        ticker = BinanceTickerConverter().from_ws_event(event)
+
+        # 3. Assert
+        self.assertEqual(1_000, ticker.time_ms)
+        self.assertEqual(900, ticker.exchange_time_ms)
+        self.assertEqual(600, ticker.age_ms(1_500))
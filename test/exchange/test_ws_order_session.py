@@ -0,0 +1,110 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import TestCase
+
+from patron_arby.common.metrics import MetricsRegistry
+from patron_arby.common.order import Order, OrderSide
+from patron_arby.exchange.binance.async_rest_client import BinanceApiError
+from patron_arby.exchange.binance.ws_order_session import (
+    BinanceWsOrderSession,
+    WsSessionLostError,
+)
+from patron_arby.replay.mock_binance_rest import MOCK_API_KEY, MOCK_API_SECRET
+from patron_arby.replay.mock_binance_ws_api import MockBinanceWsApiServer
+from patron_arby.replay.stubs import StubExchangeApi
+
+
+def an_order(i: int) -> Order:
+    return Order(f"12345678_order_{i}", OrderSide.BUY, "BTCUSDT", 0.001, 50000.5)
+
+
+class TestBinanceWsOrderSession(TestCase):
+    def setUp(self) -> None:
+        self.server_loop = asyncio.new_event_loop()
+        threading.Thread(target=self.server_loop.run_forever, daemon=True).start()
+        self.server = MockBinanceWsApiServer(latency_seconds=0.05)
+        self.ws_api_url = self._on_server_loop(self.server.start())
+        self.fallback = StubExchangeApi()
+        self.session = None
+
+    def tearDown(self) -> None:
+        if self.session:
+            self.session.stop()
+        self._on_server_loop(self.server.close())
+        self.server_loop.call_soon_threadsafe(self.server_loop.stop)
+
+    def test__orders_placed_concurrently_over_single_session(self):
+        # 1. Arrange
+        self._start_session(MOCK_API_SECRET)
+
+        # 2. Act
+        start = time.perf_counter()
+        with ThreadPoolExecutor(3) as pool:
+            orders = list(pool.map(self.session.put_order, [an_order(i) for i in range(1, 4)]))
+        duration = time.perf_counter() - start
+        cancel_reply = self.session.cancel_order("BTCUSDT", orders[0].order_id)
+
+        # 3. Assert
+        self.assertEqual(["12345678_order_1", "12345678_order_2", "12345678_order_3"],
+            [o.client_order_id for o in orders])
+        self.assertEqual(["FILLED"] * 3, [o.status for o in orders])
+        self.assertEqual(12345678, orders[0].arbitrage_hash8)
+        self.assertEqual("50000.50000000", orders[0].price)
+        self.assertEqual("CANCELED", cancel_reply["status"])
+        # Requests don't wait for each other
+        self.assertLess(duration, 0.15)
+        self.assertEqual(1, self.server.connections_count)
+        self.assertEqual([], self.fallback.placed_orders)
+
+    def test__error_reply(self):
+        # 1. Arrange
+        self._start_session("wrong-secret")
+        # 2. Act
+        with self.assertRaises(BinanceApiError) as context:
+            self.session.put_order(an_order(1))
+        # 3. Assert
+        self.assertEqual(-1022, context.exception.code)
+
+    def test__falls_back_to_rest_without_session(self):
+        # 1. Arrange
+        self.session = BinanceWsOrderSession(MOCK_API_KEY, MOCK_API_SECRET, self.fallback, "ws://127.0.0.1:1",
+            registry=MetricsRegistry())
+        # 2. Act
+        order = self.session.put_order(an_order(1))
+        # 3. Assert
+        self.assertEqual("FILLED", order.status)
+        self.assertEqual(1, len(self.fallback.placed_orders))
+        self.assertEqual(1, self.session.fallback_requests_count)
+
+    def test__session_lost_with_request_in_flight(self):
+        # 1. Arrange
+        self._start_session(MOCK_API_SECRET)
+        self.server.swallow_requests = True
+        with ThreadPoolExecutor(1) as pool:
+            in_flight = pool.submit(self.session.put_order, an_order(1))
+            time.sleep(0.1)
+
+            # 2. Act
+            self._on_server_loop(self.server.drop_connections())
+
+            # 3. Assert
+            with self.assertRaises(WsSessionLostError):
+                in_flight.result(1)
+        # Not retried via REST, as might have been placed
+        self.assertEqual([], self.fallback.placed_orders)
+        # Session is back after reconnect
+        self.server.swallow_requests = False
+        self.assertTrue(self.session.wait_connected(5))
+        self.assertEqual("FILLED", self.session.put_order(an_order(2)).status)
+        self.assertEqual(2, self.server.connections_count)
+
+    def _start_session(self, api_secret: str):
+        self.session = BinanceWsOrderSession(MOCK_API_KEY, api_secret, self.fallback, self.ws_api_url,
+            registry=MetricsRegistry())
+        self.session.start()
+        self.assertTrue(self.session.wait_connected(5))
+
+    def _on_server_loop(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.server_loop).result()
@@ -0,0 +1,50 @@
+import json
+import time
+from unittest import TestCase
+
+from patron_arby.replay.harness import STAGE_ARBITRAGE_FIND, ReplayHarness
+
+SYMBOL_TO_BASE_QUOTE = {"BTCUSDT": "BTC/USDT", "ETHUSDT": "ETH/USDT", "ETHBTC": "ETH/BTC"}
+
+
+def book_ticker_frame(symbol: str, bid: float, ask: float, quantity: float = 1) -> str:
+    return json.dumps({"stream": f"{symbol.lower()}@bookTicker",
+                       "data": {"u": 1, "s": symbol, "b": str(bid), "B": str(quantity), "a": str(ask),
+                                "A": str(quantity)}})
+
+
+# USDT -> BTC -> ETH -> USDT makes ~4% profit: 1 BTC = 50_000 USDT = 20 ETH = 52_000 USDT
+PROFITABLE_FRAMES = [
+    (1_000_000, book_ticker_frame("BTCUSDT", 49_990, 50_000)),
+    (2_000_000, book_ticker_frame("ETHBTC", 0.0499, 0.05, 10)),
+    (3_000_000, book_ticker_frame("ETHUSDT", 2_600, 2_610, 10)),
+]
+
+
+class TestReplayHarness(TestCase):
+    def test__profitable_frames_lead_to_placed_orders(self):
+        # 1. Arrange
+        harness = ReplayHarness(SYMBOL_TO_BASE_QUOTE, default_trade_fee=0)
+        # 2. Act
+        report = harness.run(PROFITABLE_FRAMES)
+        # 3. Assert
+        self.assertEqual(3, report["frames"])
+        self.assertEqual(1, report["positive_chain_sets"])
+        self.assertEqual(3, report["orders_placed"])
+        self.assertEqual(3, len(harness.order_dao.orders))
+        self.assertEqual({"FILLED"}, {o.status for o in harness.order_dao.orders.values()})
+        self.assertEqual(3, report["stages_latency_us"][STAGE_ARBITRAGE_FIND]["count"])
+        self.assertGreater(len(harness.arbitrage_dao.profitable_arbitrages), 0)
+        # Report should be JSON-serializable, to compare across versions
+        json.dumps(report)
+
+    def test__realtime_mode_keeps_recorded_pace(self):
+        # 1. Arrange
+        frames = [(i * 50_000_000, book_ticker_frame("BTCUSDT", 49_990, 50_000)) for i in range(3)]
+        harness = ReplayHarness(SYMBOL_TO_BASE_QUOTE, realtime=True)
+        # 2. Act
+        start = time.monotonic()
+        report = harness.run(frames)
+        # 3. Assert
+        self.assertGreaterEqual(time.monotonic() - start, 0.1)
+        self.assertEqual("realtime", report["mode"])
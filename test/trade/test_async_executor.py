@@ -0,0 +1,123 @@
+import asyncio
+import threading
+from unittest import TestCase
+from unittest.mock import Mock
+
+from patron_arby.common.bus import Bus
+from patron_arby.common.bus_transport import InProcessBusTransport
+from patron_arby.common.metrics import MetricsRegistry
+from patron_arby.common.order import Order, OrderSide
+from patron_arby.exchange.binance.async_rest_client import (
+    AsyncBinanceRestClient,
+    BinanceApiError,
+)
+from patron_arby.replay.mock_binance_rest import (
+    MOCK_API_KEY,
+    MOCK_API_SECRET,
+    MockBinanceRestServer,
+)
+from patron_arby.replay.stubs import InMemoryOrderDao
+from patron_arby.trade.async_executor import AsyncOrderExecutor
+from patron_arby.trade.chain_dispatcher import LegSkewRecorder
+from patron_arby.trade.executor import SENTINEL_MESSAGE
+
+
+class TestAsyncOrderExecutor(TestCase):
+    def setUp(self) -> None:
+        # Mock server runs on its own loop, as executor runs its loop in the test thread
+        self.server_loop = asyncio.new_event_loop()
+        threading.Thread(target=self.server_loop.run_forever, daemon=True).start()
+        self.server = MockBinanceRestServer(latency_seconds=0.005)
+        self.api_url = asyncio.run_coroutine_threadsafe(self.server.start(), self.server_loop).result()
+
+    def tearDown(self) -> None:
+        asyncio.run_coroutine_threadsafe(self.server.close(), self.server_loop).result()
+        self.server_loop.call_soon_threadsafe(self.server_loop.stop)
+
+    def test__places_and_saves_orders_then_stops_on_sentinel(self):
+        # 1. Arrange
+        bus = Bus(InProcessBusTransport(MetricsRegistry()))
+        order_dao = InMemoryOrderDao()
+        rest_client = AsyncBinanceRestClient(MOCK_API_KEY, MOCK_API_SECRET, self.api_url, max_connections=2)
+        executor = AsyncOrderExecutor(bus, rest_client, order_dao, max_in_flight=4)
+        for i in range(10):
+            bus.fire_orders_queue.put(Order(f"{i}_order_1", OrderSide.BUY, "BTCUSDT", 1, 100))
+        bus.fire_orders_queue.put(SENTINEL_MESSAGE)
+
+        # 2. Act
+        executor.run()
+
+        # 3. Assert
+        self.assertEqual(10, len(order_dao.orders))
+        self.assertTrue(all(o.status == "FILLED" for o in order_dao.orders.values()))
+        self.assertLessEqual(self.server.connections_count, 2)
+        # Sentinel is re-sent for other executors
+        self.assertEqual(SENTINEL_MESSAGE, bus.fire_orders_queue.get_nowait())
+
+    def test__chain_legs_fired_concurrently(self):
+        # 1. Arrange
+        bus = Bus(InProcessBusTransport(MetricsRegistry()))
+        order_dao = InMemoryOrderDao()
+        rest_client = AsyncBinanceRestClient(MOCK_API_KEY, MOCK_API_SECRET, self.api_url)
+        executor = AsyncOrderExecutor(bus, rest_client, order_dao)
+        registry = MetricsRegistry()
+        executor.leg_skew = LegSkewRecorder(registry)
+        bus.fire_orders_queue.put([Order(f"1_order_{i}", OrderSide.BUY, "BTCUSDT", 1, 100) for i in range(1, 4)])
+        bus.fire_orders_queue.put(SENTINEL_MESSAGE)
+
+        # 2. Act
+        executor.run()
+
+        # 3. Assert
+        self.assertEqual(3, len(order_dao.orders))
+        # One connection per leg, as all the legs are in flight at once
+        self.assertEqual(3, self.server.connections_count)
+        self.assertEqual(1, registry.snapshot()["histograms"]["chain_leg_send_skew_us"]["count"])
+
+    def test__failed_order_saved_with_error(self):
+        # 1. Arrange
+        bus = Bus(InProcessBusTransport(MetricsRegistry()))
+        order_dao = InMemoryOrderDao()
+        rest_client = AsyncBinanceRestClient(MOCK_API_KEY, "wrong-secret", self.api_url)
+        executor = AsyncOrderExecutor(bus, rest_client, order_dao)
+        bus.fire_orders_queue.put(Order("1_order_1", OrderSide.SELL, "BTCUSDT", 1, 100))
+        bus.fire_orders_queue.put(SENTINEL_MESSAGE)
+
+        # 2. Act
+        executor.run()
+
+        # 3. Assert
+        self.assertEqual("ERROR", order_dao.get_order("1_order_1").status)
+        self.assertIn("-1022", order_dao.get_order("1_order_1").comment)
+
+    def test__orders_not_placed_when_trading_stopped(self):
+        # 1. Arrange
+        bus = Bus(InProcessBusTransport(MetricsRegistry()))
+        order_dao = InMemoryOrderDao()
+        rest_client = AsyncBinanceRestClient(MOCK_API_KEY, MOCK_API_SECRET, self.api_url)
+        executor = AsyncOrderExecutor(bus, rest_client, order_dao)
+        # Stopped after the orders were queued
+        bus.fire_orders_queue.put([Order(f"1_order_{i}", OrderSide.BUY, "BTCUSDT", 1, 100) for i in range(1, 3)])
+        bus.fire_orders_queue.put(SENTINEL_MESSAGE)
+        bus.set_stop_trading(True)
+
+        # 2. Act
+        executor.run()
+
+        # 3. Assert
+        self.assertEqual(0, self.server.requests_count)
+        self.assertEqual({"ERROR"}, {o.status for o in order_dao.orders.values()})
+        self.assertEqual(2, len(order_dao.orders))
+
+    def test__reservation_released_only_when_order_rejected(self):
+        # 1. Arrange
+        balances_checker = Mock()
+        executor = AsyncOrderExecutor(Bus(InProcessBusTransport(MetricsRegistry())), Mock(), InMemoryOrderDao(),
+            balances_checker=balances_checker)
+        order = Order("1_order_1", OrderSide.BUY, "BTCUSDT", 1, 100)
+        # 2. Act
+        executor._release_balance(order, BinanceApiError(503, -1001, "Internal error; unable to process your request"))
+        executor._release_balance(order, TimeoutError())
+        executor._release_balance(order, BinanceApiError(400, -2010, "Account has insufficient balance"))
+        # 3. Assert
+        balances_checker.registry.release_balance.assert_called_once_with("1_order_1")
@@ -0,0 +1,81 @@
+import random
+from unittest import TestCase
+
+from patron_arby.common.chain import AChain, AChainStep
+from patron_arby.common.metrics import MetricsRegistry
+from patron_arby.common.order import OrderSide
+from patron_arby.trade.chain_allocator import ChainAllocator
+
+
+def a_chain(usdt_volume: float, profit_usd: float, btc_volume: float = 0.01) -> AChain:
+    """
+    USDT -> BTC -> ETH -> USDT, spending the given USDT, BTC and 0.1 ETH
+    """
+    return AChain("USDT", [
+        AChainStep("BTC/USDT", OrderSide.BUY, 50_000, usdt_volume / 50_000),
+        AChainStep("ETH/BTC", OrderSide.BUY, 0.05, btc_volume / 0.05),
+        AChainStep("ETH/USDT", OrderSide.SELL, 3_000, 0.1)
+    ], roi=profit_usd / usdt_volume, profit=profit_usd, profit_usd=profit_usd)
+
+
+class TestChainAllocator(TestCase):
+    def setUp(self) -> None:
+        self.registry = MetricsRegistry()
+        self.allocator = ChainAllocator(max_balance_ratio=1, min_profit_usd=0.01, registry=self.registry)
+
+    def test__all_chains_fit(self):
+        # 1. Arrange
+        chains = [a_chain(100, 1), a_chain(200, 3)]
+        # 2. Act
+        allocations = self.allocator.allocate(chains, {"USDT": 1_000, "BTC": 1, "ETH": 1})
+        # 3. Assert
+        self.assertEqual([(chains[1], 1), (chains[0], 1)], [(a.chain, a.scale) for a in allocations])
+
+    def test__more_profitable_per_balance_first_then_scaled_to_the_rest(self):
+        # 1. Arrange
+        chains = [a_chain(600, 6), a_chain(500, 10)]
+        # 2. Act
+        allocations = self.allocator.allocate(chains, {"USDT": 800, "BTC": 1, "ETH": 1})
+        # 3. Assert
+        self.assertEqual([chains[1], chains[0]], [a.chain for a in allocations])
+        self.assertEqual(1, allocations[0].scale)
+        self.assertAlmostEqual(0.5, allocations[1].scale)
+
+    def test__scarce_coin_weighs_more(self):
+        # 1. Arrange
+        # Brings more, but takes all the BTC
+        btc_hungry = a_chain(100, 5, btc_volume=0.1)
+        modest = [a_chain(100, 3, btc_volume=0.01) for _ in range(5)]
+        # 2. Act
+        allocations = self.allocator.allocate([btc_hungry] + modest, {"USDT": 10_000, "BTC": 0.1, "ETH": 10})
+        # 3. Assert
+        self.assertEqual(modest, [a.chain for a in allocations[:5]])
+        self.assertAlmostEqual(0.5, allocations[5].scale)
+        total_btc = sum(a.scale * a.chain.steps[1].get_what_we_propose_volume() for a in allocations)
+        self.assertAlmostEqual(0.1, total_btc)
+
+    def test__skipped_when_no_balance_or_too_low_profit(self):
+        # 1. Arrange
+        chains = [a_chain(100, 1), a_chain(100, 0.001)]
+        # 2. Act
+        no_eth = self.allocator.allocate(chains, {"USDT": 1_000, "BTC": 1, "ETH": 0})
+        low_profit = self.allocator.allocate(chains, {"USDT": 1_000, "BTC": 1, "ETH": 1})
+        unknown_balances = self.allocator.allocate(chains, {})
+        # 3. Assert
+        self.assertEqual([], no_eth)
+        self.assertEqual([chains[0]], [a.chain for a in low_profit])
+        self.assertEqual([chains[0]], [a.chain for a in unknown_balances])
+
+    def test__never_overdraws_and_decision_time_recorded(self):
+        # 1. Arrange
+        rnd = random.Random(42)
+        chains = [a_chain(rnd.uniform(10, 500), rnd.uniform(0.1, 5), rnd.uniform(0.001, 0.01)) for _ in range(50)]
+        balances = {"USDT": 2_000, "BTC": 0.05, "ETH": 2}
+        # 2. Act
+        allocations = self.allocator.allocate(chains, balances)
+        # 3. Assert
+        for coin, balance in balances.items():
+            spent = sum(a.scale * s.get_what_we_propose_volume() for a in allocations for s in a.chain.steps
+                        if s.spending_coin() == coin)
+            self.assertLessEqual(spent, balance + 1e-9)
+        self.assertEqual(1, self.registry.snapshot()["histograms"]["chain_allocation_us"]["count"])
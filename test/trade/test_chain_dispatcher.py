@@ -0,0 +1,77 @@
+import threading
+import time
+from unittest import TestCase
+from unittest.mock import Mock
+
+from patron_arby.common.bus import Bus
+from patron_arby.common.metrics import MetricsRegistry
+from patron_arby.common.order import Order, OrderSide
+from patron_arby.replay.stubs import InMemoryOrderDao, StubExchangeApi
+from patron_arby.trade.chain_dispatcher import ChainDispatcher, LegSkewRecorder
+from patron_arby.trade.executor import OrderExecutor
+
+
+class SlowExchangeApi(StubExchangeApi):
+    def __init__(self, latency_seconds: float) -> None:
+        super().__init__()
+        self.latency_seconds = latency_seconds
+        self.threads = set()
+
+    def put_order(self, o: Order) -> Order:
+        self.threads.add(threading.get_ident())
+        time.sleep(self.latency_seconds)
+        return super().put_order(o)
+
+
+def chain_orders():
+    return [Order(f"12345678_order_{i}", OrderSide.BUY, "BTCUSDT", 1, 100) for i in range(1, 4)]
+
+
+class TestChainDispatcher(TestCase):
+    def test__legs_fired_at_once_from_own_slots(self):
+        # 1. Arrange
+        apis = [SlowExchangeApi(0.1) for _ in range(3)]
+        registry = MetricsRegistry()
+        executor = OrderExecutor(Bus(), None, InMemoryOrderDao(), chain_dispatcher=ChainDispatcher(apis))
+        executor.leg_skew = LegSkewRecorder(registry)
+
+        # 2. Act
+        start = time.perf_counter()
+        executor._process(chain_orders())
+        duration = time.perf_counter() - start
+
+        # 3. Assert
+        # Sequential firing would take 0.3s
+        self.assertLess(duration, 0.2)
+        self.assertEqual(3, len(executor.order_dao.orders))
+        # Each API has been used once, from its own thread
+        self.assertEqual([1, 1, 1], [len(api.placed_orders) for api in apis])
+        self.assertEqual(3, len(set.union(*[api.threads for api in apis])))
+        send_skew = registry.snapshot()["histograms"]["chain_leg_send_skew_us"]
+        self.assertEqual(1, send_skew["count"])
+        self.assertLess(send_skew["max"], 50_000)
+        self.assertEqual(1, registry.snapshot()["histograms"]["chain_leg_exchange_skew_ms"]["count"])
+        executor.chain_dispatcher.shutdown()
+
+    def test__legs_fired_one_by_one_without_dispatcher(self):
+        # 1. Arrange
+        api = SlowExchangeApi(0)
+        registry = MetricsRegistry()
+        executor = OrderExecutor(Bus(), api, InMemoryOrderDao())
+        executor.leg_skew = LegSkewRecorder(registry)
+
+        # 2. Act
+        executor._process(chain_orders())
+
+        # 3. Assert
+        self.assertEqual(["12345678_order_1", "12345678_order_2", "12345678_order_3"],
+            [o.client_order_id for o in api.placed_orders])
+        self.assertEqual(1, registry.snapshot()["histograms"]["chain_leg_send_skew_us"]["count"])
+
+    def test__chain_longer_than_slots(self):
+        # 1. Arrange
+        dispatcher = ChainDispatcher([StubExchangeApi()])
+        # 2. Act & 3. Assert
+        with self.assertRaises(ValueError):
+            dispatcher.dispatch(chain_orders(), Mock())
+        dispatcher.shutdown()
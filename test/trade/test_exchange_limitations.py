@@ -1,4 +1,3 @@
-from decimal import Decimal
 from unittest import TestCase
 
 from patron_arby.common.order import Order, OrderSide
@@ -22,5 +21,30 @@ class TestBinanceExchangeLimitations(TestCase):
         # 2. Act
         order = limits.adjust_price_and_volume_to_market_requirements(order)
         # 3. Assert
-        self.assertEqual(Decimal("12.34"), order.price)
-        self.assertEqual(Decimal("44.346"), order.quantity)
+        self.assertEqual(12.34, order.price)
+        self.assertEqual(44.346, order.quantity)
+        self.assertEqual("12.34", order.wire_price)
+        self.assertEqual("44.346", order.wire_quantity)
+
+    def test__min_notional_and_exchange_info_strings(self):
+        # 1. Arrange
+        exchange_info = {
+            "symbols": [{
+                "symbol": "DOGEBTC",
+                "filters": [
+                    {"filterType": "PRICE_FILTER", "tickSize": "0.00000001"},
+                    {"filterType": "LOT_SIZE", "stepSize": "1.00000000"},
+                    {"filterType": "MIN_NOTIONAL", "minNotional": "0.00010000"}
+                ]
+            }]
+        }
+        limits = BinanceExchangeLimitations(exchange_info)
+        # 2. Act
+        order = limits.adjust_price_and_volume_to_market_requirements(
+            Order("", OrderSide.BUY, "DOGEBTC", price=0.000005678, quantity=20.7))
+        small_order = limits.adjust_price_and_volume_to_market_requirements(
+            Order("", OrderSide.BUY, "DOGEBTC", price=0.000005678, quantity=17.2))
+        # 3. Assert
+        self.assertEqual(("0.00000568", "21"), (order.wire_price, order.wire_quantity))
+        self.assertTrue(limits.check_meets_exchange_filters(order)[0])
+        self.assertFalse(limits.check_meets_exchange_filters(small_order)[0])
@@ -2,6 +2,7 @@ import time
 from unittest import TestCase
 
 from patron_arby.common.chain import AChain, AChainStep
+from patron_arby.common.metrics import MetricsRegistry
 from patron_arby.common.order import OrderSide
 from patron_arby.trade.recent_arbitragers_filter import RecentArbitragersFilter
 
@@ -39,3 +40,34 @@ class TestRecentArbitragersFilter(TestCase):
         # 3. Assert
         # And now, it should be expired
         self.assertFalse(filter.register_and_return_contained(chain))
+
+    def test__roi_band(self):
+        # 1. Arrange
+        filter = RecentArbitragersFilter(10_000, roi_band=0.001, registry=MetricsRegistry())
+        steps = [AChainStep("BTCUDF", OrderSide.SELL, 123, 123)]
+        # 2. Act
+        filter.register_and_return_contained(AChain("BTC", steps, roi=0.0101))
+        # 3. Assert
+        self.assertTrue(filter.register_and_return_contained(AChain("BTC", steps, roi=0.0104)))
+        self.assertFalse(filter.register_and_return_contained(AChain("BTC", steps, roi=0.0111)))
+
+    def test__expired_chains_evicted(self):
+        # 1. Arrange
+        now_ms = 1_000_000
+        registry = MetricsRegistry()
+        filter = RecentArbitragersFilter(1_000, roi_band=0.0001, buckets=10, clock=lambda: now_ms, registry=registry)
+        steps = [AChainStep("BTCUDF", OrderSide.SELL, 123, 123)]
+        # 2. Act
+        for i in range(10_000):
+            now_ms += 1
+            filter.register_and_return_contained(AChain("BTC", steps, roi=i * 0.0001))
+        duplicate = filter.register_and_return_contained(AChain("BTC", steps, roi=9_999 * 0.0001))
+        expired = filter.register_and_return_contained(AChain("BTC", steps, roi=8_999 * 0.0001))
+        # 3. Assert
+        self.assertTrue(duplicate)
+        self.assertFalse(expired)
+        # Chains of the time frame, plus one bucket at most
+        self.assertLessEqual(len(filter.recent_chains), 1_100)
+        self.assertEqual({"size": len(filter.recent_chains), "hits": 1, "misses": 10_001,
+                          "evictions": 10_000 - len(filter.recent_chains)},
+            registry.snapshot()["gauges"]["recent_arbitrages_filter"])
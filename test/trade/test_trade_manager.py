@@ -4,7 +4,10 @@ from unittest.mock import Mock, call, patch
 
 from patron_arby.common.chain import AChain, AChainStep
 from patron_arby.common.order import Order, OrderSide
-from patron_arby.config.base import ORDER_PROFIT_THRESHOLD_USD
+from patron_arby.config.base import (
+    MAX_BALANCE_RATIO_PER_SINGLE_ORDER,
+    ORDER_PROFIT_THRESHOLD_USD,
+)
 from patron_arby.exchange.registry import BalancesRegistry
 from patron_arby.trade.manager import TradeManager
 
@@ -153,7 +156,7 @@ class TestTradeManager(TestCase):
         # 1. Arrange
         bus = Mock()
         bus.store_positive_arbitrages_queue.put = Mock()
-        tm = TradeManager(bus, {}, Mock(), fire_only_top_arbitrage=False)
+        tm = TradeManager(bus, {}, Mock(), fire_only_top_arbitrage=False, allocate_chains=False)
         tm._process_chain = Mock(return_value="Mock_Processed")
         chain1 = AChain(roi=0.1, profit=1)
         chain2 = AChain(roi=0.2, profit=2)
@@ -165,10 +168,38 @@ class TestTradeManager(TestCase):
         # All chains put to "store" queue regardless of whether have been processed or not
         self.assertEqual([call(chain2), call(chain1)], bus.store_positive_arbitrages_queue.put.mock_calls)
 
+    def test__process_chain_set__allocate_chains(self):
+        # 1. Arrange
+        bus = Mock()
+        balances = BalancesRegistry({"USDT": 800, "BTC": 1, "ETH": 10})
+        tm = TradeManager(bus, {}, balances, fire_only_top_arbitrage=False, allocate_chains=True)
+        tm._process_chain = Mock(return_value="Mock_Processed")
+        fired = list()
+        tm._process_chain.side_effect = lambda c: fired.append((c, c.steps[0].volume, c.profit_usd))
+        # Both need more than all the USDT, the second one brings more
+        chain1 = AChain("USDT", [AChainStep("BTC/USDT", OrderSide.BUY, 50_000, 0.018)], roi=0.02, profit=10,
+            profit_usd=10)
+        chain2 = AChain("USDT", [AChainStep("ETH/USDT", OrderSide.BUY, 3_000, 0.3)], roi=0.01, profit=15,
+            profit_usd=15)
+        # 2. Act
+        tm._process_chain_set({chain1, chain2})
+        # 3. Assert
+        self.assertEqual(1, len(fired))
+        scaled, volume, profit_usd = fired[0]
+        self.assertIsNot(chain2, scaled)
+        self.assertAlmostEqual(0.3 * MAX_BALANCE_RATIO_PER_SINGLE_ORDER * 800 / 900, volume)
+        self.assertLess(profit_usd, 15)
+        self.assertTrue(chain1.comment.startswith("Not allocated"))
+        # Chain is stored as found
+        self.assertEqual([call(chain1), call(chain2)], bus.store_positive_arbitrages_queue.put.mock_calls)
+        self.assertEqual(0.3, chain2.steps[0].volume)
+        self.assertEqual(15, chain2.profit_usd)
+        self.assertIn("Allocated", chain2.comment)
+
     def test___reduce_cached_balances_reduces_balances(self):
         # 1. Arrange
         balances_registry = Mock()
-        balances_registry.reduce_balance = Mock()
+        balances_registry.reserve_balance = Mock()
         tm = TradeManager(Mock(), {}, balances_registry)
         orders = [
             Order("12345678_order_1", OrderSide.SELL, "BTCUSDT", Decimal(2), price=35_000),  # check that Decimal works
@@ -186,5 +217,26 @@ class TestTradeManager(TestCase):
         # 2. Act
         tm._reduce_cached_balances(orders, chain)
         # 3. Assert
-        self.assertEqual([call("BTC", 2), call("USDT", 70_000), call("BUSD", 68_000)],
-            balances_registry.reduce_balance.mock_calls)
+        self.assertEqual([call("BTC", 2, "12345678_order_1"), call("USDT", 70_000, "12345678_order_2"),
+            call("BUSD", 68_000, "12345678_order_3")], balances_registry.reserve_balance.mock_calls)
+
+    def test__put_orders_to_execution_queue__atomically(self):
+        # 1. Arrange
+        bus = Mock()
+        tm = TradeManager(bus, {}, Mock(), dispatch_chain_atomically=True)
+        orders = [Order(f"12345678_order_{i}", OrderSide.BUY, "BTCUSDT", 1, 100) for i in range(1, 4)]
+        # 2. Act
+        tm._put_orders_to_execution_queue(orders)
+        # 3. Assert
+        self.assertEqual([call(orders)], bus.fire_orders_queue.put.mock_calls)
+
+    def test__put_orders_to_execution_queue__one_by_one(self):
+        # 1. Arrange
+        bus = Mock()
+        tm = TradeManager(bus, {}, Mock(), dispatch_chain_atomically=False)
+        orders = [Order(f"12345678_order_{i}", OrderSide.BUY, "BTCUSDT", 1, 100) for i in range(1, 4)]
+        # 2. Act
+        tm._put_orders_to_execution_queue(orders)
+        # 3. Assert
+        self.assertEqual(3, len(bus.fire_orders_queue.put.mock_calls))
+        self.assertCountEqual(orders, [args[0] for _, args, _ in bus.fire_orders_queue.put.mock_calls])